@@ -1,50 +1,38 @@
+"""
+FraudShield India — Detection Agent
+Classifies UPI messages into fraud categories with the shared detection
+classifier (fraudshield/classifier.py): the same router, guard, prompt and
+verdict cache as function_app. Nothing connects at import; the client is
+built on the first classification.
+"""
 import os
-import json
-from openai import AzureOpenAI
+import sys
 from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from fraudshield.classifier import DetectionClassifier  # noqa: E402
+
 load_dotenv()
 
-client = AzureOpenAI(
-    api_key=os.environ["AZURE_OPENAI_KEY"],
-    api_version="2024-12-01-preview",
-    azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
-)
+_classifier = None
+
+
+def get_classifier() -> DetectionClassifier:
+    """The agent's DetectionClassifier, built from the environment on first use."""
+    global _classifier
+    if _classifier is None:
+        _classifier = DetectionClassifier.from_env()
+    return _classifier
+
 
-SYSTEM_PROMPT = '''You are FraudShield, a UPI fraud detection system for India.
-Analyze the given message and classify it.
+def classify_message(message, source="unknown", sender="unknown"):
+    return get_classifier().classify(message, source, sender)
 
-CATEGORIES:
-- fake_cashback: Fake cashback/refund, asks to approve collect requests
-- digital_arrest: Impersonates police/CBI/customs, threatens arrest
-- kyc_freeze: Claims KYC expired, asks for OTP or UPI PIN
-- job_scam: Fake job requiring deposit/fee via UPI
-- lottery_scam: Fake prize/lottery, asks for processing fee
-- govt_impersonation: Fake e-challan, tax notice with phishing link
-- phishing_link: Suspicious link to steal credentials
-- legitimate: Safe, genuine message
 
-Respond ONLY with valid JSON (no markdown, no backticks):
-{
-  "is_scam": true/false,
-  "category": "category_name",
-  "confidence": 0.0 to 1.0,
-  "risk_level": "high/medium/low",
-  "explanation_en": "1-2 sentence English explanation",
-  "explanation_hi": "1-2 sentence Hindi explanation",
-  "red_flags": ["flag1", "flag2"]
-}'''
+def classify_many(messages, workers=8):
+    """Classify a list of messages concurrently; verdicts come back in input order."""
+    return get_classifier().classify_many(messages, workers=workers)
 
-def classify_message(message, language="auto"):
-    response = client.chat.completions.create(
-        model=os.environ.get("AZURE_OPENAI_DEPLOYMENT", "o4-mini"),
-        messages=[
-            {"role": "user", "content": f"{SYSTEM_PROMPT}\n\nAnalyze (language: {language}): {message}"}
-        ],
-        max_completion_tokens=500
-    )
-    text = response.choices[0].message.content
-    text = text.replace("```json", "").replace("```", "").strip()
-    return json.loads(text)
 
 if __name__ == "__main__":
     tests = [
@@ -54,10 +42,11 @@ if __name__ == "__main__":
         ("Earn Rs.15,000 daily! Like YouTube videos. Pay Rs.999 deposit: taskpay.earn@ybl", True),
         ("Hey, dinner at 8pm tonight? Send me Rs.300 for my share on GPay.", False),
     ]
-    import time
     correct = 0
-    for msg, expected in tests:
-        result = classify_message(msg)
+    for (msg, expected), result in zip(tests, classify_many([msg for msg, _ in tests])):
+        if "error" in result:
+            print(f"[ERROR] {result['error']} - {msg[:50]}...")
+            continue
         got = result.get("is_scam", False)
         match = got == expected
         correct += int(match)
@@ -65,5 +54,4 @@ if __name__ == "__main__":
         print(f"[{status}] {result['category']} ({result['confidence']}) - {msg[:50]}...")
         print(f"  Hindi: {result['explanation_hi']}")
         print()
-        time.sleep(2)
     print(f"Accuracy: {correct}/{len(tests)}")
@@ -0,0 +1,50 @@
+"""
+FraudShield India — Distilled Classifier Trainer
+Trains the local classifier (fraudshield/distill.py) on the verdicts logged
+by function_app (FRAUDSHIELD_DISTILL_LOG) and writes the artifact that
+function_app loads at cold start. Held-out agreement with the LLM, the share
+of messages the cascade would answer locally, and the calibrated threshold
+are printed.
+
+Usage:
+  python agents/detection/train_distilled.py --log /home/data/verdicts.ndjson
+  python agents/detection/train_distilled.py --log a.ndjson --log b.ndjson --target-agreement 0.99 --dim 32768
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from fraudshield.distill import (  # noqa: E402
+    ASSET_PATH, DEFAULT_DIM, DEFAULT_TARGET_AGREEMENT, DistilledModel, read_log, train,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the distilled local classifier from logged verdicts")
+    parser.add_argument("--log", action="append", required=True, help="verdict log (repeatable)")
+    parser.add_argument("--out", default=ASSET_PATH)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="hashed feature buckets (power of two)")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--min-confidence", type=float, default=0.6, help="skip verdicts the LLM was unsure of")
+    parser.add_argument("--target-agreement", type=float, default=DEFAULT_TARGET_AGREEMENT)
+    args = parser.parse_args()
+
+    texts, labels, weights = read_log(args.log, args.min_confidence)
+    if len(texts) < 100:
+        sys.exit(f"Only {len(texts)} usable verdicts; log more traffic before training.")
+    model = train(texts, labels, weights, dim=args.dim, epochs=args.epochs, target_agreement=args.target_agreement)
+    model.save(args.out)
+
+    t0 = time.perf_counter()
+    DistilledModel.load(args.out)
+    load_ms = (time.perf_counter() - t0) * 1000
+    print(f"Wrote {args.out} ({os.path.getsize(args.out) / 1024:.0f} KB, loads in {load_ms:.1f} ms)")
+    print(json.dumps(model.meta, indent=2))
+
+
+if __name__ == "__main__":
+    main()
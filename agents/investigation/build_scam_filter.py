@@ -0,0 +1,86 @@
+"""
+FraudShield India — Scam Filter Builder
+Builds the known-identifier Bloom filter from the graph's UpiId and Phone
+vertices plus the known-bad domain list. Writes it to
+fraudshield/assets/scam_filter.bin, which function_app loads at cold start.
+The false-positive rate is measured on random probes and printed.
+
+Usage:
+  python agents/investigation/build_scam_filter.py --seed            # bundled seed data only
+  python agents/investigation/build_scam_filter.py --capacity 5000000 --fp-rate 0.0005
+
+Env vars needed (without --seed):
+  COSMOS_DB_ENDPOINT=https://fraudshield-cosmosdb.documents.azure.com:443/
+  COSMOS_DB_KEY=your_primary_key
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from fraudshield.bloom import (  # noqa: E402
+    ASSET_PATH, DEFAULT_CAPACITY, DEFAULT_FP_RATE, BloomFilter, build_scam_filter, identifier_key, measure_fp_rate,
+)
+from fraudshield.scam_graph import KNOWN_BAD_DOMAINS, SCAM_PHONES, SCAM_UPIS  # noqa: E402
+
+
+def graph_identifiers() -> tuple:
+    """(vpas, phones) from every UpiId and Phone vertex in Cosmos DB."""
+    from investigation_agent import _get_gremlin_client
+    gremlin = _get_gremlin_client()
+    try:
+        vpas = gremlin.submitAsync("g.V().hasLabel('UpiId').values('vpa')").result().all().result()
+        phones = gremlin.submitAsync("g.V().hasLabel('Phone').values('number')").result().all().result()
+        return list(vpas), list(phones)
+    finally:
+        gremlin.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the known scam identifier Bloom filter")
+    parser.add_argument("--seed", action="store_true", help="use the bundled seed data instead of Cosmos DB")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY,
+                        help="identifiers the filter is sized for, including later incremental adds")
+    parser.add_argument("--fp-rate", type=float, default=DEFAULT_FP_RATE, help="target false-positive rate")
+    parser.add_argument("--probes", type=int, default=200_000)
+    parser.add_argument("--out", default=ASSET_PATH)
+    args = parser.parse_args()
+
+    if args.seed:
+        vpas, phones = [u[1] for u in SCAM_UPIS], [p[1] for p in SCAM_PHONES]
+    else:
+        vpas, phones = graph_identifiers()
+
+    t0 = time.perf_counter()
+    bloom = build_scam_filter(vpas, phones, KNOWN_BAD_DOMAINS, args.capacity, args.fp_rate)
+    build_ms = (time.perf_counter() - t0) * 1000
+    bloom.save(args.out)
+
+    measured = measure_fp_rate(bloom, args.probes)
+    # The same filter filled to capacity with synthetic identifiers, as it will be after incremental adds.
+    full = BloomFilter(args.capacity, args.fp_rate)
+    for i in range(args.capacity):
+        full.add(f"fill:{i}")
+    measured_full = measure_fp_rate(full, args.probes, seed=1)
+
+    keys = [identifier_key("vpa", v) for v in vpas] or ["vpa:none@ybl"]
+    t0 = time.perf_counter()
+    for i in range(args.probes):
+        keys[i % len(keys)] in bloom
+    lookup_us = (time.perf_counter() - t0) / args.probes * 1e6
+
+    print(f"Identifiers:      {len(vpas)} VPAs, {len(phones)} phones, {len(KNOWN_BAD_DOMAINS)} domains")
+    print(f"Filter:           {bloom.bits} bits, {bloom.hashes} hashes, "
+          f"{bloom.size_bytes / 1024:.1f} KiB in memory, {os.path.getsize(args.out) / 1024:.1f} KiB on disk")
+    print(f"Build time:       {build_ms:.1f} ms")
+    print(f"Lookup:           {lookup_us:.2f} µs")
+    print(f"FP rate now:      {bloom.estimated_fp_rate():.4%} expected, {measured:.4%} measured")
+    print(f"FP rate at cap.:  {args.fp_rate:.4%} target, {full.estimated_fp_rate():.4%} expected, "
+          f"{measured_full:.4%} measured over {args.probes} probes")
+    print(f"Written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
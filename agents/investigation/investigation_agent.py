@@ -4,10 +4,15 @@ Queries the Cosmos DB Gremlin graph to find scam rings and related
 entities for a given UPI ID or phone number.
 """
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
 
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from fraudshield.bloom import ASSET_PATH, load_scam_filter, screen  # noqa: E402
+from fraudshield.entities import extract_entities  # noqa: E402
+
 try:
     from gremlin_python.driver import client, serializer
 except ImportError:
@@ -103,6 +108,34 @@ def investigate_phone(number: str) -> dict:
         gremlin.close()
 
 
+_scam_filter = None
+
+
+def investigate_message(message: str) -> dict:
+    """Look up the UPI IDs and phone numbers in a message, querying the graph only for filter positives.
+
+    Args:
+        message: Raw message text
+
+    Returns:
+        dict with keys: upis (list of investigate_upi results), phones (list of
+        investigate_phone results), screened (int), graph_lookups (int)
+    """
+    global _scam_filter
+    if _scam_filter is None:
+        _scam_filter = load_scam_filter(os.environ.get("FRAUDSHIELD_SCAM_FILTER_PATH", ASSET_PATH))
+    entities = extract_entities(message)
+    suspects = screen(_scam_filter, entities)
+    upis = [investigate_upi(value) for kind, value in suspects if kind == "vpa"]
+    phones = [investigate_phone(value) for kind, value in suspects if kind == "phone"]
+    return {
+        "upis": [r for r in upis if r["found"]],
+        "phones": [r for r in phones if r["found"]],
+        "screened": len(entities["vpas"]) + len(entities["phones"]),
+        "graph_lookups": len(upis) + len(phones),
+    }
+
+
 def find_scam_rings() -> list:
     """Return phone numbers that control 2 or more UPI IDs (scam rings).
 
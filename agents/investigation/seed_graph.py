@@ -35,6 +35,9 @@ except ImportError:
     log.error("Run: pip install gremlinpython")
     sys.exit(1)
 
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from fraudshield.scam_graph import LINKS, SCAM_PHONES, SCAM_UPIS  # noqa: E402
+
 
 QUERY_TIMEOUT = 30  # seconds — per-query timeout to prevent hanging
 BATCH_SIZE = 5      # concurrent queries to submit at once
@@ -134,71 +137,6 @@ def drop_all(gremlin_client):
     log.info("   Cleared in %.1fs", time.time() - t0)
 
 
-# ── Scam UPI IDs ──────────────────────────────────────────────────────────────
-# Format: (id, vpa, category, report_count, status, state, victims_est)
-SCAM_UPIS = [
-    ("upi1",  "taskpay.earn@ybl",         "job_scam",          27, "active",   "Maharashtra",    450),
-    ("upi2",  "kbcprize2024@paytm",      "lottery_scam",      23, "active",   "Uttar Pradesh",  380),
-    ("upi3",  "sbikyc.update@ybl",       "kyc_freeze",         8, "blocked",  "Rajasthan",      120),
-    ("upi4",  "cashback.official@okaxis","fake_cashback",     31, "active",   "Delhi",          520),
-    ("upi5",  "cbi.penalty@upi",         "digital_arrest",    12, "active",   "Tamil Nadu",     200),
-    ("upi6",  "echallane.pay@ybl",       "govt_impersonation", 6, "active",   "Karnataka",       90),
-    ("upi7",  "refund.process@paytm",    "fake_cashback",     19, "active",   "Gujarat",        310),
-    ("upi8",  "youtube.task@ybl",        "job_scam",          27, "active",   "West Bengal",    440),
-    ("upi9",  "jiodraw@paytm",           "lottery_scam",      15, "active",   "Bihar",          250),
-    ("upi10", "loanfast@ybl",            "job_scam",           9, "active",   "Telangana",      150),
-    ("upi11", "goldscheme@ybl",          "fake_cashback",     11, "active",   "Madhya Pradesh", 180),
-    ("upi12", "customsduty@ybl",         "govt_impersonation",14, "active",   "Punjab",         230),
-    ("upi13", "doubleincome@ybl",        "fake_cashback",     21, "active",   "Haryana",        350),
-    ("upi14", "dream11winner@ybl",       "lottery_scam",      17, "active",   "Andhra Pradesh", 280),
-    ("upi15", "meta-jobs@ybl",           "job_scam",           7, "active",   "Kerala",         110),
-    ("upi16", "cybercell@ybl",           "digital_arrest",    18, "active",   "Delhi",          300),
-    ("upi17", "flipkart-prize@okaxis",   "lottery_scam",      13, "active",   "Maharashtra",    210),
-    ("upi18", "taxsettlement@ybl",       "govt_impersonation",10, "active",   "Uttar Pradesh",  165),
-    ("upi19", "bgv-check@ybl",           "job_scam",           5, "active",   "Karnataka",       80),
-    ("upi20", "bescom-urgent@ybl",       "govt_impersonation", 8, "active",   "Karnataka",      130),
-]
-
-
-# ── Phone numbers ─────────────────────────────────────────────────────────────
-# Format: (id, number, state, operator)
-SCAM_PHONES = [
-    ("ph1",  "+91-9876500001", "Rajasthan",      "Jio"),
-    ("ph2",  "+91-9876500002", "Uttar Pradesh",  "Airtel"),
-    ("ph3",  "+91-9876500003", "Maharashtra",    "Jio"),
-    ("ph4",  "+91-9876500004", "Delhi",          "BSNL"),
-    ("ph5",  "+91-9876500005", "Tamil Nadu",     "Vi"),
-    ("ph6",  "+91-9330284713", "West Bengal",    "Airtel"),
-    ("ph7",  "+91-9223011112", "West Bengal",    "Jio"),
-    ("ph8",  "+91-9876500008", "Gujarat",        "Airtel"),
-    ("ph9",  "+91-9876500009", "Bihar",          "Jio"),
-    ("ph10", "+91-9876500010", "Haryana",        "Vi"),
-]
-
-
-# ── UPI → Phone links (same scammer controls multiple accounts) ───────────────
-# Format: (phone_id, upi_id, relationship)
-LINKS = [
-    ("ph1",  "upi1",  "OPERATED_BY"),
-    ("ph1",  "upi8",  "OPERATED_BY"),
-    ("ph2",  "upi2",  "OPERATED_BY"),
-    ("ph2",  "upi9",  "OPERATED_BY"),
-    ("ph3",  "upi4",  "OPERATED_BY"),
-    ("ph3",  "upi7",  "OPERATED_BY"),
-    ("ph3",  "upi13", "OPERATED_BY"),
-    ("ph4",  "upi5",  "OPERATED_BY"),
-    ("ph4",  "upi16", "OPERATED_BY"),
-    ("ph5",  "upi3",  "OPERATED_BY"),
-    ("ph6",  "upi6",  "OPERATED_BY"),
-    ("ph7",  "upi12", "OPERATED_BY"),
-    ("ph8",  "upi11", "OPERATED_BY"),
-    ("ph9",  "upi17", "OPERATED_BY"),
-    ("ph10", "upi10", "OPERATED_BY"),
-    ("ph10", "upi15", "OPERATED_BY"),
-    ("ph10", "upi19", "OPERATED_BY"),
-]
-
-
 def seed_upis(gremlin_client):
     log.info("📌 Seeding %d scam UPI vertices...", len(SCAM_UPIS))
     t0 = time.time()
@@ -1,16 +1,68 @@
-# For now this runs locally, we'll deploy to Azure Functions later
+# Standalone FraudShield API server for local runs and on-prem pilots.
+# Same /api/classify, /api/bulk and /api/health contract as the Azure Function;
+# /api/bulk streams its NDJSON verdicts back with chunked encoding as they complete.
+# /api/reports counts the scams it classifies (by the request's optional "city"/"state"),
+# and /api/reports/stream holds an SSE connection open and pushes each delta as it happens,
+# for up to API_MAX_STREAMS clients; beyond that a client gets one poll, as on Azure Functions.
+#
+#   python api/function_app.py [--host 0.0.0.0] [--port 7071] [--workers 64]
+#
+# Connections are served by a bounded worker pool with HTTP/1.1 keep-alive;
+# SIGTERM/SIGINT stop accepting, let in-flight requests finish, then exit.
 from openai import OpenAI
 from dotenv import load_dotenv
-import os, json
+import argparse
+import io
+import os, json, sys
+import signal
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fraudshield.bulk import FORMATS, encode, read_records, scan
+from fraudshield.cache import VerdictCache
+from fraudshield.feed import DeltaLog
+from fraudshield.reports import ReportAggregator, etag_matches
 
 load_dotenv()
 
-client = OpenAI(
-    base_url=os.getenv("OPENAI_BASE_URL", "https://models.inference.ai.azure.com"),
-    api_key=os.getenv("GITHUB_TOKEN")
+MAX_BODY_BYTES = int(os.getenv("API_MAX_BODY_BYTES", str(64 * 1024)))
+MAX_WORKERS = int(os.getenv("API_MAX_WORKERS", "64"))
+MAX_PENDING = int(os.getenv("API_MAX_PENDING", "256"))       # accepted connections waiting for a worker
+KEEPALIVE_TIMEOUT = float(os.getenv("API_KEEPALIVE_TIMEOUT", "5"))
+MAX_KEEPALIVE_REQUESTS = int(os.getenv("API_MAX_KEEPALIVE_REQUESTS", "100"))
+MAX_BULK_BYTES = int(os.getenv("API_MAX_BULK_BYTES", str(256 * 1024 * 1024)))
+BULK_WORKERS = int(os.getenv("FRAUDSHIELD_BULK_WORKERS", "8"))
+SPOOL_BYTES = 1024 * 1024                                       # uploads above this are spooled to disk
+MAX_STREAMS = int(os.getenv("API_MAX_STREAMS", "16"))          # held SSE connections (each holds a worker)
+STREAM_HEARTBEAT = float(os.getenv("API_STREAM_HEARTBEAT", "15"))
+
+_verdict_cache = VerdictCache(
+    capacity=int(os.getenv("FRAUDSHIELD_VERDICT_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("FRAUDSHIELD_VERDICT_CACHE_TTL", "3600")),
 )
 
+_reports = ReportAggregator()
+_feed = DeltaLog(retry_ms=int(os.getenv("FRAUDSHIELD_FEED_RETRY_MS", "5000")), epoch=_reports.epoch)
+_reports.listeners.append(_feed.append)
+_stream_slots = threading.BoundedSemaphore(MAX_STREAMS)
+
+_client = None
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        _client = OpenAI(
+            base_url=os.getenv("OPENAI_BASE_URL", "https://models.inference.ai.azure.com"),
+            api_key=os.getenv("GITHUB_TOKEN")
+        )
+    return _client
+
 SYSTEM_PROMPT = '''You are FraudShield, a UPI fraud detection system for India.
 Analyze the given message and classify it.
 
@@ -36,34 +88,189 @@ Respond ONLY with valid JSON (no markdown, no backticks):
 }'''
 
 
+def classify_message(message):
+    response = _get_client().chat.completions.create(
+        model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Analyze: {message}"}
+        ],
+        max_completion_tokens=500
+    )
+    text = response.choices[0].message.content
+    text = text.replace("```json", "").replace("```", "").strip()
+    return json.loads(text)
+
+
 class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"     # keep-alive by default
+    timeout = KEEPALIVE_TIMEOUT       # idle keep-alive connections are closed after this
+
+    def setup(self):
+        super().setup()
+        self._requests_on_connection = 0
+
+    def log_message(self, format, *args):
+        if os.getenv("API_ACCESS_LOG"):
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, close=False):
+        data = json.dumps(payload, ensure_ascii=False).encode()
+        self._requests_on_connection += 1
+        if self._requests_on_connection >= MAX_KEEPALIVE_REQUESTS or getattr(self.server, "draining", False):
+            close = True
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if close:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        """Return the parsed body, or None after sending a 4xx response."""
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self._send_json(400, {"error": "Invalid Content-Length"}, close=True)
+            return None
+        if length > MAX_BODY_BYTES:
+            # The body is not read, so the connection cannot be reused.
+            self._send_json(413, {"error": f"Body exceeds {MAX_BODY_BYTES} bytes"}, close=True)
+            return None
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "Invalid JSON"})
+            return None
+        if not isinstance(body, dict):
+            self._send_json(400, {"error": "Invalid JSON"})
+            return None
+        return body
+
+    def _bulk(self):
+        """Spool the upload (memory, then disk), then stream one NDJSON line per verdict."""
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._send_json(411, {"error": "Content-Length required"}, close=True)
+            return
+        if length > MAX_BULK_BYTES:
+            self._send_json(413, {"error": f"Body exceeds {MAX_BULK_BYTES} bytes"}, close=True)
+            return
+        query = parse_qs(urlsplit(self.path).query)
+        fmt = query.get("format", [None])[0]
+        if fmt is None and "csv" in (self.headers.get("Content-Type") or ""):
+            fmt = "csv"
+        if fmt is not None and fmt not in FORMATS:
+            self.rfile.read(length)
+            self._send_json(400, {"error": f"'format' must be one of {list(FORMATS)}"})
+            return
+
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        remaining = length
+        while remaining:
+            chunk = self.rfile.read(min(64 * 1024, remaining))
+            if not chunk:
+                break
+            spool.write(chunk)
+            remaining -= len(chunk)
+        spool.seek(0)
+
+        self._requests_on_connection += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        if self._requests_on_connection >= MAX_KEEPALIVE_REQUESTS or getattr(self.server, "draining", False):
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        with io.TextIOWrapper(spool, encoding="utf-8", errors="replace", newline="") as lines:
+            outputs = scan(read_records(lines, fmt), lambda message, source, sender: classify_message(message),
+                           _verdict_cache, BULK_WORKERS)
+            try:
+                for out in outputs:
+                    data = encode(out)
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            except OSError:
+                self.close_connection = True    # the client went away mid-scan
+                return
+            except Exception as exc:            # still end the body, so the client sees where it stopped
+                data = encode({"type": "error", "error": f"scan stopped: {exc}"})
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.close_connection = True
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _reports_snapshot(self):
+        body, etag = _reports.render()
+        self._requests_on_connection += 1
+        not_modified = etag_matches(self.headers.get("If-None-Match"), etag)
+        self.send_response(304 if not_modified else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+        if self._requests_on_connection >= MAX_KEEPALIVE_REQUESTS or getattr(self.server, "draining", False):
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reports_stream(self):
+        """Hold the SSE connection open and write each delta as it is counted."""
+        query = parse_qs(urlsplit(self.path).query)
+        last_event_id = self.headers.get("Last-Event-ID") or query.get("since", [None])[0]
+        held = _stream_slots.acquire(blocking=False)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if not held:
+            # Every held stream ties up a worker; past the cap the client polls (retry: ms) instead.
+            body = _feed.stream(last_event_id)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Connection", "close")
+            self.close_connection = True
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        try:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Connection", "close")
+            self.close_connection = True
+            self.end_headers()
+            for chunk in _feed.follow(last_event_id, heartbeat=STREAM_HEARTBEAT):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        except OSError:
+            pass        # the dashboard went away; the next heartbeat write noticed
+        finally:
+            _stream_slots.release()
+
     def do_POST(self):
+        if urlsplit(self.path).path == "/api/bulk":
+            self._bulk()
+            return
+
         if self.path == "/api/classify":
-            length = int(self.headers.get("Content-Length", 0))
-            body = json.loads(self.rfile.read(length))
+            body = self._read_json()
+            if body is None:
+                return
             message = body.get("message", "")
             source = body.get("source", "unknown")
             sender = body.get("sender", "")
 
             if not message:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": "No message"}).encode())
+                self._send_json(400, {"error": "No message"})
                 return
 
             try:
-                response = client.chat.completions.create(
-                    model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-                    messages=[
-                        {"role": "system", "content": SYSTEM_PROMPT},
-                        {"role": "user", "content": f"Analyze: {message}"}
-                    ],
-                    max_completion_tokens=500
-                )
-                text = response.choices[0].message.content
-                text = text.replace("```json", "").replace("```", "").strip()
-                result = json.loads(text)
+                result = classify_message(message)
                 result["source"] = source
                 result["sender"] = sender
                 result["original_message"] = message
@@ -82,41 +289,103 @@ class Handler(BaseHTTPRequestHandler):
                 else:
                     result["action_required"] = False
 
-                self.send_response(200)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps(result, ensure_ascii=False).encode())
+                _reports.ingest(dict(result, city=body.get("city"), state=body.get("state")))
+                self._send_json(200, result)
 
             except Exception as e:
-                self.send_response(500)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": str(e)}).encode())
+                self._send_json(500, {"error": str(e)})
             return
 
         if self.path == "/api/health":
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "healthy"}).encode())
+            self._read_json()
+            self._send_json(200, {"status": "healthy"})
             return
 
-        self.send_response(404)
-        self.end_headers()
+        self._send_json(404, {"error": "Not found"})
 
     def do_GET(self):
-        if self.path == "/api/health":
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "healthy", "service": "FraudShield API"}).encode())
+        path = urlsplit(self.path).path
+        if path == "/api/health":
+            self._send_json(200, {"status": "healthy", "service": "FraudShield API"})
             return
-        self.send_response(404)
-        self.end_headers()
+        if path == "/api/reports":
+            self._reports_snapshot()
+            return
+        if path == "/api/reports/stream":
+            self._reports_stream()
+            return
+        self._send_json(404, {"error": "Not found"})
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands each connection to a bounded worker pool.
+
+    Connections beyond `max_workers + max_pending` get an immediate 503
+    instead of piling up; `shutdown()` followed by `server_close()` drains
+    in-flight requests before returning.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, max_workers=MAX_WORKERS, max_pending=MAX_PENDING):
+        super().__init__(server_address, handler_class)
+        self.draining = False
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fraudshield-http")
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def process_request(self, request, client_address):
+        if self.draining or not self._slots.acquire(blocking=False):
+            self._reject(request)
+            return
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def _reject(self, request):
+        try:
+            request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def begin_shutdown(self):
+        """Stop accepting and ask keep-alive clients to disconnect (safe from signal handlers)."""
+        self.draining = True
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def server_close(self):
+        super().server_close()
+        _feed.close()      # ends held report streams, so draining does not wait on them
+        self._pool.shutdown(wait=True)
+
+
+def serve(host="0.0.0.0", port=7071, max_workers=MAX_WORKERS):
+    server = PooledHTTPServer((host, port), Handler, max_workers=max_workers)
+    server.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: server.begin_shutdown())
+    print(f"FraudShield API running on http://localhost:{port} ({max_workers} workers, keep-alive)")
+    print(f"Test: curl -X POST http://localhost:{port}/api/classify -H 'Content-Type: application/json' -d '{{\"message\": \"test\"}}'")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        print("FraudShield API stopped.")
 
 
 if __name__ == "__main__":
-    server = HTTPServer(("0.0.0.0", 7071), Handler)
-    print("FraudShield API running on http://localhost:7071")
-    print("Test: curl -X POST http://localhost:7071/api/classify -H 'Content-Type: application/json' -d '{\"message\": \"test\"}'")
-    server.serve_forever()
+    parser = argparse.ArgumentParser(description="FraudShield standalone API server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=7071)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
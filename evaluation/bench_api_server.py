@@ -0,0 +1,132 @@
+"""
+FraudShield India — Standalone API Server Load Test
+Starts api/function_app.py in-process with the model call replaced by a fixed
+delay, then drives it with N concurrent keep-alive clients and reports
+throughput and latency. `--baseline` also runs the old single-threaded
+HTTPServer for comparison.
+
+Usage:
+  python evaluation/bench_api_server.py --clients 100 --requests 20 --delay 0.2
+  python evaluation/bench_api_server.py --clients 100 --baseline
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer
+
+SERVER_PATH = os.path.join(os.path.dirname(__file__), "..", "api", "function_app.py")
+
+SCAM = {"is_scam": True, "category": "kyc_freeze", "confidence": 0.95, "risk_level": "high",
+        "explanation_en": "Fake KYC update.", "explanation_hi": "नकली KYC अपडेट।", "red_flags": ["asks for OTP"]}
+
+
+def load_server_module():
+    """Import api/function_app.py under its own name (it clashes with the Azure function_app)."""
+    spec = importlib.util.spec_from_file_location("fraudshield_api_server", SERVER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _client(port: int, n_requests: int, timeout: float) -> tuple:
+    """One keep-alive client. Returns (latencies_ms, errors, connections_opened)."""
+    latencies, errors, connections = [], 0, 0
+    conn = None
+    body = json.dumps({"message": "Your SBI KYC expired. Update: bit.ly/sbi-kyc", "source": "bench"})
+    for _ in range(n_requests):
+        if conn is None:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+            connections += 1
+        t0 = time.perf_counter()
+        try:
+            conn.request("POST", "/api/classify", body=body, headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errors += 1
+            if resp.getheader("Connection", "").lower() == "close":
+                conn.close()
+                conn = None
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = None
+            continue
+        latencies.append((time.perf_counter() - t0) * 1000)
+    if conn is not None:
+        conn.close()
+    return latencies, errors, connections
+
+
+def run(server, clients: int, n_requests: int, timeout: float = 60.0) -> dict:
+    """Serve on `server` while `clients` threads each send `n_requests`; return a summary."""
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    port = server.server_address[1]
+    t0 = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            results = list(pool.map(lambda _: _client(port, n_requests, timeout), range(clients)))
+    finally:
+        elapsed = time.perf_counter() - t0
+        server.shutdown()
+        server.server_close()
+    latencies = [ms for lat, _, _ in results for ms in lat]
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": sum(err for _, err, _ in results),
+        "connections": sum(conns for _, _, conns in results),
+        "seconds": round(elapsed, 2),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the standalone FraudShield API server")
+    parser.add_argument("--clients", type=int, default=100, help="concurrent keep-alive clients")
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--delay", type=float, default=0.2, help="simulated model latency (seconds)")
+    parser.add_argument("--workers", type=int, default=None, help="server worker pool size")
+    parser.add_argument("--baseline", action="store_true", help="also run the single-threaded HTTPServer")
+    args = parser.parse_args()
+
+    api = load_server_module()
+
+    def fake_classify(message):
+        time.sleep(args.delay)
+        return dict(SCAM)
+
+    api.classify_message = fake_classify
+    workers = args.workers or max(api.MAX_WORKERS, args.clients)
+
+    runs = [("pooled", api.PooledHTTPServer(("127.0.0.1", 0), api.Handler, max_workers=workers))]
+    if args.baseline:
+        runs.append(("single-threaded", HTTPServer(("127.0.0.1", 0), api.Handler)))
+
+    print(f"{args.clients} clients x {args.requests} requests, model delay {args.delay * 1000:.0f} ms")
+    print(f"{'server':<16} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'conns':>6}")
+    for name, server in runs:
+        s = run(server, args.clients, args.requests)
+        print(f"{name:<16} {s['rps']:>8} {s['p50_ms']:>8} {s['p95_ms']:>8} {s['p99_ms']:>8} "
+              f"{s['errors']:>7} {s['connections']:>6}")
+
+
+if __name__ == "__main__":
+    main()
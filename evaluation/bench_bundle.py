@@ -0,0 +1,108 @@
+"""
+FraudShield India — Detection Bundle Benchmark
+Size of the on-device bundle (fraudshield/bundle.py) and of the delta the
+app downloads for a daily batch of new identifiers, as the blocklist grows.
+
+For each blocklist size a filter of that many random VPAs, phones and
+domains is built at the production capacity and false-positive rate, a
+batch of new identifiers is added, and the full bundle and the delta are
+measured raw and gzip-compressed (the app asks for Accept-Encoding: gzip).
+With --model a distilled classifier of the production shape is included,
+and the delta for a retrained model is reported too.
+
+Usage:
+  python evaluation/bench_bundle.py
+  python evaluation/bench_bundle.py --sizes 1000,100000,300000 --batch 2000 --model
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from fraudshield import bundle  # noqa: E402
+from fraudshield.bloom import DEFAULT_CAPACITY, DEFAULT_FP_RATE, BloomFilter, identifier_key  # noqa: E402
+from fraudshield.prompting import CATEGORIES  # noqa: E402
+
+KEY = b"bench"
+
+
+def _identifiers(rng, n: int):
+    alphabet = string.ascii_lowercase + string.digits
+    for i in range(n):
+        kind = ("vpa", "phone", "domain")[i % 3]
+        if kind == "vpa":
+            yield identifier_key(kind, "".join(rng.choices(alphabet, k=10)) + "@ybl")
+        elif kind == "phone":
+            yield identifier_key(kind, str(rng.randint(6_000_000_000, 9_999_999_999)))
+        else:
+            yield identifier_key(kind, "".join(rng.choices(alphabet, k=12)) + ".xyz")
+
+
+def _model(version: str, seed: int):
+    import numpy as np
+    from fraudshield.distill import DEFAULT_DIM, DistilledModel
+    rng = np.random.default_rng(seed)
+    meta = {"format": 1, "version": version, "categories": list(CATEGORIES), "dim": DEFAULT_DIM, "threshold": 0.9}
+    return DistilledModel(rng.normal(0, 0.1, size=(DEFAULT_DIM, len(CATEGORIES))),
+                          rng.normal(size=len(CATEGORIES)), meta)
+
+
+def _sizes(data: bytes) -> dict:
+    return {"bytes": len(data), "gzip_bytes": len(gzip.compress(data, mtime=0))}
+
+
+def run(size: int, batch: int, capacity: int, fp_rate: float, model, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    bloom = BloomFilter(capacity, fp_rate)
+    for item in _identifiers(rng, size):
+        bloom.add(item)
+    _, base = bundle.build(bloom, model, KEY)
+    for item in _identifiers(rng, batch):
+        bloom.add(item)
+    t0 = time.perf_counter()
+    _, target = bundle.build(bloom, model, KEY)
+    build_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    delta = bundle.diff(base, target)
+    diff_ms = (time.perf_counter() - t0) * 1000
+    assert bundle.apply_delta(base, delta) == target
+    return {"blocklist": size, "fp_rate": round(bloom.estimated_fp_rate(), 5), "full": _sizes(target),
+            "delta": _sizes(delta), "build_ms": round(build_ms, 1), "diff_ms": round(diff_ms, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundle and delta size as the blocklist grows")
+    parser.add_argument("--sizes", default="1000,10000,50000,100000,200000")
+    parser.add_argument("--batch", type=int, default=500, help="new identifiers between two versions")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY)
+    parser.add_argument("--fp-rate", type=float, default=DEFAULT_FP_RATE)
+    parser.add_argument("--model", action="store_true", help="include a distilled model of the production shape")
+    args = parser.parse_args()
+
+    model = _model("bench-1", 1) if args.model else None
+    rows = [run(int(s), args.batch, args.capacity, args.fp_rate, model) for s in args.sizes.split(",")]
+
+    print(f"{'blocklist':>10}{'fp rate':>9}{'full':>10}{'full gz':>10}{'delta':>9}{'delta gz':>10}{'build ms':>10}")
+    for r in rows:
+        print(f"{r['blocklist']:>10}{r['fp_rate']:>9.4f}{r['full']['bytes']:>10}{r['full']['gzip_bytes']:>10}"
+              f"{r['delta']['bytes']:>9}{r['delta']['gzip_bytes']:>10}{r['build_ms']:>10.1f}")
+    result = {"batch": args.batch, "rows": rows}
+    if model is not None:
+        bloom = BloomFilter(args.capacity, args.fp_rate)
+        _, before = bundle.build(bloom, model, KEY)
+        _, after = bundle.build(bloom, _model("bench-2", 2), KEY)
+        result["retrained_model_delta"] = _sizes(bundle.diff(before, after))
+        print(f"\nretrained model delta: {result['retrained_model_delta']}")
+    print()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
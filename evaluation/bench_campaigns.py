@@ -0,0 +1,83 @@
+"""
+FraudShield India — Campaign Assignment Benchmark
+Time to assign one message to a campaign with fraudshield.campaigns
+(MinHash + LSH banding), as the number of indexed campaigns grows, and how
+well variants of one template land in the same campaign.
+
+Variants change the amount, name, phone number and link of a handful of
+scam templates; filler campaigns are random word sequences. No embedding
+endpoint is called.
+
+Usage:
+  python evaluation/bench_campaigns.py
+  python evaluation/bench_campaigns.py --campaigns 1000,100000 --variants 200
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from fraudshield.campaigns import CampaignIndex  # noqa: E402
+
+TEMPLATES = [
+    "Dear {name}, your SBI account will be blocked today. Update KYC at {link} or call {phone}. Rs.{amount} penalty.",
+    "Badhai ho {name}! Aapne KBC me Rs.{amount} jeete hain. Registration fee bhejein {link}",
+    "Overspeeding Notice: Pay Rs.{amount} challan immediately at {link} to avoid court. Helpline {phone}",
+    "CBI officer here. {name}, your Aadhaar is linked to money laundering. Transfer Rs.{amount} or face arrest.",
+]
+NAMES = ["customer", "Ramesh", "Priya", "Sir", "Anita", "user", "Mohd Irfan"]
+
+
+def _variant(template: str, rng: random.Random) -> str:
+    word = "".join(rng.choices(string.ascii_lowercase, k=6))
+    return template.format(name=rng.choice(NAMES), amount=f"{rng.randint(1, 99) * 500:,}",
+                           phone=f"9{rng.randint(0, 10**9 - 1):09d}",
+                           link=rng.choice([f"https://{word}.xyz/{rng.randint(1, 999)}", f"bit.ly/{word}",
+                                            f"{word}-update.in"]))
+
+
+def _filler(rng: random.Random) -> str:
+    return " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8)))
+                    for _ in range(rng.randint(8, 20)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MinHash/LSH campaign assignment")
+    parser.add_argument("--campaigns", default="0,1000,10000,50000")
+    parser.add_argument("--variants", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    rows = []
+    for size in (int(s) for s in args.campaigns.split(",")):
+        index = CampaignIndex(capacity=size + 1000)
+        for _ in range(size):
+            index.assign(_filler(rng))
+        variants = [(t, _variant(template, rng)) for t, template in enumerate(TEMPLATES)
+                    for _ in range(args.variants)]
+        rng.shuffle(variants)
+        t0 = time.perf_counter()
+        assigned = [(t, index.assign(message)["campaign_id"]) for t, message in variants]
+        elapsed = time.perf_counter() - t0
+        ids = [{cid for tt, cid in assigned if tt == t} for t in range(len(TEMPLATES))]
+        rows.append({"indexed": size, "assign_us": round(elapsed / len(variants) * 1e6, 1),
+                     "campaigns_per_template": [len(s) for s in ids],
+                     "largest_share": round(sum(max((sum(1 for tt, c in assigned if tt == t and c == cid)
+                                                     for cid in ids[t]), default=0)
+                                                 for t in range(len(TEMPLATES))) / len(variants), 3)})
+
+    print(f"{'indexed':>9}{'µs/msg':>9}{'in largest campaign':>21}")
+    for r in rows:
+        print(f"{r['indexed']:>9}{r['assign_us']:>9.1f}{r['largest_share']:>21.1%}")
+    print()
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
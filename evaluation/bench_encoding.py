@@ -0,0 +1,102 @@
+"""
+FraudShield India — Response Encoding Benchmark
+Payload size and serialisation time of a typical /api/classify response for
+each encoding fraudshield.encoding can negotiate, against the old
+json.dumps(result, ensure_ascii=False) body.
+
+The response is built from a real message: a templated kyc_freeze verdict
+with English, Hindi and Hinglish explanations, the request echoes, a
+verdict_id and the action fields. Encodings whose library is not installed
+are listed as skipped.
+
+Usage:
+  python evaluation/bench_encoding.py
+  python evaluation/bench_encoding.py --iterations 20000 --fields is_scam,category,risk_level,explanation_hi
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from fraudshield import encoding, templates  # noqa: E402
+
+MESSAGE = ("URGENT: Aapka SBI KYC expire ho gaya hai. Account block hone se bachne ke liye turant update karein: "
+           "http://sbi-kyc-update.xyz/verify ya call karein 9876543210")
+
+
+def sample_response() -> dict:
+    verdict = {"is_scam": True, "category": "kyc_freeze", "confidence": 0.94, "risk_level": "high",
+               "tier": "distilled", "model_version": "distilled-20261001", "red_flags": []}
+    templates.apply(verdict, MESSAGE)
+    verdict.update({"message": MESSAGE, "source": "sms", "sender": "VM-SBIUPD", "verdict_id": "Jq3b0x6pQe1Zc8Lm",
+                    "action_required": True, "report_url": "https://cybercrime.gov.in", "helpline": "1930"})
+    return verdict
+
+
+def _encoders():
+    yield "json (before)", lambda obj: json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    yield "json compact", lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+    yield "orjson", (lambda obj: encoding.orjson.dumps(obj)) if encoding.orjson else None
+    yield "msgpack", (lambda obj: encoding.msgpack.packb(obj, use_bin_type=True)) if encoding.msgpack else None
+
+
+def _compressors():
+    yield "", lambda data: data
+    yield " + gzip", lambda data: gzip.compress(data, compresslevel=encoding.GZIP_LEVEL, mtime=0)
+    if encoding.brotli is not None:
+        yield " + br", lambda data: encoding.brotli.compress(data, quality=encoding.BROTLI_QUALITY)
+
+
+def _time_us(fn, obj, iterations: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn(obj)
+    return (time.perf_counter() - t0) / iterations * 1e6
+
+
+def run(response: dict, iterations: int) -> list:
+    rows = []
+    for name, encode in _encoders():
+        if encode is None:
+            rows.append({"encoding": name, "skipped": "not installed"})
+            continue
+        for suffix, compress in _compressors():
+            fn = (lambda obj, e=encode, c=compress: c(e(obj)))
+            rows.append({"encoding": name + suffix, "bytes": len(fn(response)),
+                         "us_per_response": round(_time_us(fn, response, iterations), 2)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Payload size and serialisation time per response encoding")
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--fields", default=None, help="comma-separated fields, as the 'fields' request parameter")
+    args = parser.parse_args()
+
+    full = sample_response()
+    results = {"full": run(full, args.iterations),
+               "no echo": run(encoding.select(full, echo=False), args.iterations)}
+    if args.fields:
+        results[f"fields={args.fields}"] = run(encoding.select(full, args.fields), args.iterations)
+
+    baseline = results["full"][0]["bytes"]
+    for label, rows in results.items():
+        print(f"\n{label}")
+        print(f"{'encoding':<22}{'bytes':>8}{'vs before':>11}{'µs':>9}")
+        for row in rows:
+            if "skipped" in row:
+                print(f"{row['encoding']:<22}{'(' + row['skipped'] + ')':>28}")
+            else:
+                print(f"{row['encoding']:<22}{row['bytes']:>8}{row['bytes'] / baseline:>10.0%}"
+                      f"{row['us_per_response']:>9.1f}")
+    print()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
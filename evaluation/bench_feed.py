@@ -0,0 +1,128 @@
+"""
+FraudShield India — Live Feed Fan-out Benchmark
+Simulates N dashboard subscribers on the /api/reports/stream SSE feed
+against a local event source, and compares the cost with polling the full
+/api/reports snapshot.
+
+Each subscriber reconnects every `--retry-ms` (with jitter) and sends its
+Last-Event-ID, as EventSource does. The benchmark reports server time per
+poll, bytes per poll and the delivery lag from ingest to subscriber.
+
+Usage:
+  python evaluation/bench_feed.py --subscribers 1000 --rate 50 --seconds 10
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from fraudshield.feed import DeltaLog  # noqa: E402
+from fraudshield.reports import CITIES, ReportAggregator  # noqa: E402
+
+CATEGORIES = ["fake_cashback", "digital_arrest", "kyc_freeze", "job_scam",
+              "lottery_scam", "govt_impersonation", "phishing_link"]
+_ID_RE = re.compile(rb"^id: ([0-9a-f]+-(\d+))$", re.MULTILINE)
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def event_source(agg: ReportAggregator, rate: float, stop: threading.Event, ingested_at: dict):
+    cities = list(CITIES)
+    interval = 1.0 / rate
+    next_at = time.perf_counter()
+    while not stop.is_set():
+        agg.ingest({"is_scam": True, "category": random.choice(CATEGORIES), "city": random.choice(cities)})
+        ingested_at[agg.version] = time.perf_counter()
+        next_at += interval
+        time.sleep(max(0.0, next_at - time.perf_counter()))
+
+
+def subscriber(log: DeltaLog, agg: ReportAggregator, retry_s: float, stop: threading.Event,
+               ingested_at: dict, results: dict, snapshot: bool):
+    last_id = "0"
+    time.sleep(random.uniform(0, retry_s))
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        body = agg.render()[0] if snapshot else log.stream(last_id)
+        served = time.perf_counter()
+        results["service_us"].append((served - t0) * 1e6)
+        results["bytes"].append(len(body))
+        if not snapshot:
+            ids = _ID_RE.findall(body)
+            if b"event: resync" in body:
+                results["resyncs"] += 1
+            else:
+                for _, seq in ids:
+                    results["lag_ms"].append((served - ingested_at.get(int(seq), served)) * 1000)
+            if ids:
+                last_id = ids[-1][0].decode()
+        time.sleep(retry_s * random.uniform(0.9, 1.1))
+
+
+def run(subscribers: int, rate: float, seconds: float, retry_ms: int, snapshot: bool) -> dict:
+    agg = ReportAggregator()
+    log = DeltaLog(retry_ms=retry_ms, epoch=agg.epoch)
+    agg.listeners.append(log.append)
+    stop = threading.Event()
+    ingested_at = {}
+    results = {"service_us": [], "bytes": [], "lag_ms": [], "resyncs": 0}
+
+    threads = [threading.Thread(target=event_source, args=(agg, rate, stop, ingested_at), daemon=True)]
+    threads += [
+        threading.Thread(target=subscriber, daemon=True,
+                         args=(log, agg, retry_ms / 1000, stop, ingested_at, results, snapshot))
+        for _ in range(subscribers)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join(timeout=retry_ms / 1000 * 2)
+
+    polls = len(results["service_us"])
+    return {
+        "mode": "snapshot" if snapshot else "sse-delta",
+        "events": agg.version,
+        "polls": polls,
+        "service_us_p50": round(percentile(results["service_us"], 50), 1),
+        "service_us_p99": round(percentile(results["service_us"], 99), 1),
+        "bytes_per_poll": round(sum(results["bytes"]) / polls) if polls else 0,
+        "lag_ms_p50": round(percentile(results["lag_ms"], 50)),
+        "lag_ms_p95": round(percentile(results["lag_ms"], 95)),
+        "resyncs": results["resyncs"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fan-out benchmark for the live report feed")
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=50, help="fraud events per second")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--retry-ms", type=int, default=1000, help="subscriber reconnect interval")
+    args = parser.parse_args()
+
+    print(f"{args.subscribers} subscribers, {args.rate:g} events/s for {args.seconds:g}s, "
+          f"reconnect every {args.retry_ms} ms")
+    print(f"{'mode':<10} {'events':>7} {'polls':>7} {'p50 us':>8} {'p99 us':>8} {'bytes/poll':>11} "
+          f"{'lag p50':>8} {'lag p95':>8} {'resyncs':>8}")
+    for snapshot in (False, True):
+        r = run(args.subscribers, args.rate, args.seconds, args.retry_ms, snapshot)
+        lag = ("-", "-") if snapshot else (r["lag_ms_p50"], r["lag_ms_p95"])
+        print(f"{r['mode']:<10} {r['events']:>7} {r['polls']:>7} {r['service_us_p50']:>8} "
+              f"{r['service_us_p99']:>8} {r['bytes_per_poll']:>11} {lag[0]:>8} {lag[1]:>8} {r['resyncs']:>8}")
+
+
+if __name__ == "__main__":
+    main()
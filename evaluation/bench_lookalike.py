@@ -0,0 +1,86 @@
+"""
+FraudShield India — Look-alike Matching Benchmark
+Time to check one message's domains and VPAs against the brand list with
+fraudshield.lookalike.LookalikeIndex, against pairwise edit distance from
+every token to every brand name, as the brand list grows.
+
+Synthetic brand names are added to the curated list to reach each size;
+the probe identifiers are a mix of look-alikes, official domains and
+unrelated ones.
+
+Usage:
+  python evaluation/bench_lookalike.py
+  python evaluation/bench_lookalike.py --brands 32,500,5000 --repeat 200
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from fraudshield.entities import extract_entities  # noqa: E402
+from fraudshield.lookalike import BRANDS, LookalikeIndex, fold, levenshtein  # noqa: E402
+
+MESSAGES = [
+    "Your challan is pending. Pay at https://echallane.vip/pay before 6pm",
+    "SBI KYC expired, update at sbi-kyc-update.in or pay sbikyc.update@ybl",
+    "Order shipped! Track at https://www.flipkart.com/orders",
+    "Cashback credited, claim at phonpe-reward.in",
+    "Meet at 5? Pay my share to rahul.sharma@okhdfcbank",
+]
+
+
+def _brands(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    brands = list(BRANDS)
+    while sum(len(names) for names, *_ in brands) < n:
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12)))
+        brands.append(((name,), name.title(), "brand", (f"{name}.com",)))
+    return brands
+
+
+def _pairwise(names: list, entities: dict) -> list:
+    tokens = [fold(label) for d in entities["domains"] for label in d.split(".")[:-1]]
+    tokens += [fold(v.split("@")[0]) for v in entities["vpas"]]
+    return [(t, n) for t in tokens for n in names if n in t or levenshtein(t, n) <= 2]
+
+
+def _per_message_us(fn, entities: list, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for e in entities:
+            fn(e)
+    return (time.perf_counter() - t0) / (repeat * len(entities)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look-alike index vs pairwise edit distance")
+    parser.add_argument("--brands", default="32,200,1000,5000")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    entities = [extract_entities(m) for m in MESSAGES]
+    rows = []
+    for size in (int(s) for s in args.brands.split(",")):
+        brands = _brands(size)
+        index = LookalikeIndex(brands)
+        names = [name for group, *_ in brands for name in group]
+        rows.append({"brand_names": len(names),
+                     "index_us": round(_per_message_us(index.scan, entities, args.repeat), 1),
+                     "pairwise_us": round(_per_message_us(lambda e: _pairwise(names, e), entities,
+                                                          max(1, args.repeat // 10)), 1)})
+
+    print(f"{'brand names':>12}{'index µs/msg':>14}{'pairwise µs/msg':>17}")
+    for r in rows:
+        print(f"{r['brand_names']:>12}{r['index_us']:>14.1f}{r['pairwise_us']:>17.1f}")
+    print()
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
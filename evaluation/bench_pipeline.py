@@ -0,0 +1,97 @@
+"""
+FraudShield India — Staged Pipeline Benchmark
+Runs pipeline/orchestrator.Pipeline over N messages with local stub stages
+that sleep for a typical model, graph and response latency. Compares it with
+the old one-message-at-a-time loop (without its 3 s demo sleep) and prints
+per-stage throughput and queue depth.
+
+Usage:
+  python evaluation/bench_pipeline.py --messages 500
+  python evaluation/bench_pipeline.py --messages 500 --detect-ms 800 --detect-workers 16
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from pipeline.orchestrator import Pipeline, respond  # noqa: E402
+
+SAMPLES = [
+    ("Google Pay se aapko Rs.1500 cashback mila hai. Approve karein: cashback@ybl", True),
+    ("CBI officer here. Transfer Rs.50,000 or face arrest.", True),
+    ("Your SBI KYC expired. Update: bit.ly/sbi-kyc", True),
+    ("Earn Rs.15,000 daily! Pay Rs.999 deposit: taskpay.earn@ybl", True),
+    ("Hey, dinner at 8pm tonight? Send me Rs.300.", False),
+]
+
+
+def stub(ms: float, fn=None):
+    """A stage that sleeps ~`ms` (±20%) and then applies `fn`."""
+    def stage(item):
+        time.sleep(ms / 1000 * random.uniform(0.8, 1.2))
+        return fn(item) if fn else item
+    return stage
+
+
+def _detected(item):
+    is_scam = dict(SAMPLES)[item["message"]]
+    item["result"] = {"is_scam": is_scam, "category": "job_scam" if is_scam else "legitimate",
+                      "confidence": 0.9, "risk_level": "high" if is_scam else "low", "red_flags": []}
+    return item
+
+
+def _investigated(item):
+    item["investigation"] = {"upis": [], "phones": [], "screened": 1, "graph_lookups": 1}
+    return item
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Staged pipeline benchmark with stub agents")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--detect-ms", type=float, default=400)
+    parser.add_argument("--investigate-ms", type=float, default=60)
+    parser.add_argument("--respond-ms", type=float, default=5)
+    parser.add_argument("--detect-workers", type=int, default=8)
+    parser.add_argument("--investigate-workers", type=int, default=4)
+    parser.add_argument("--respond-workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=32)
+    parser.add_argument("--sequential", type=int, default=20, help="messages for the sequential baseline")
+    args = parser.parse_args()
+
+    stages = [
+        ("detection", stub(args.detect_ms, _detected), args.detect_workers),
+        ("investigation", stub(args.investigate_ms, _investigated), args.investigate_workers),
+        ("response", stub(args.respond_ms, respond), args.respond_workers),
+    ]
+    messages = [random.choice(SAMPLES)[0] for _ in range(args.messages)]
+
+    t0 = time.perf_counter()
+    for message in messages[:args.sequential]:
+        item = {"index": 0, "message": message}
+        for _, fn, _ in stages:
+            item = fn(item)
+    sequential = args.sequential / (time.perf_counter() - t0)
+
+    pipeline = Pipeline(stages, queue_size=args.queue_size)
+    completed = sum(1 for _ in pipeline.run(iter(messages)))
+    stats = pipeline.stats()
+
+    print(f"Sequential: {sequential:.1f} msg/s ({args.sequential} messages)")
+    print(f"Pipeline:   {stats['throughput_per_s']:.1f} msg/s ({completed} messages, {stats['elapsed_s']:.1f} s)")
+    print(f"Speed-up:   {stats['throughput_per_s'] / sequential:.1f}x")
+    print()
+    print(f"{'stage':<14}{'workers':>8}{'msg/s':>9}{'util':>7}{'q avg':>7}{'q max':>7}")
+    for name, s in stats["stages"].items():
+        print(f"{name:<14}{s['workers']:>8}{s['throughput_per_s']:>9.1f}{s['utilization']:>7.0%}"
+              f"{s['queue_depth_avg']:>7.1f}{s['queue_depth_max']:>7}")
+    print()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+FraudShield India — Prompt Prefix Cache Benchmark
+Sends N distinct messages with two prompt layouts and reports latency and
+how many prompt tokens the provider served from its prefix cache
+(usage.prompt_tokens_details.cached_tokens):
+
+  legacy – the old detection agent: instructions and message in one user turn
+  system – fraudshield/prompting.build_messages: fixed system message + short user turn
+
+Azure OpenAI only caches prompts of 1024+ tokens, in 128-token steps after
+the first 1024. The default system prompt is shorter than that, so
+--pad-tokens adds that many tokens of labelled examples to the instructions
+(both layouts) to show where hits begin. --stub runs against a local model
+of the provider cache instead of the endpoint.
+
+Usage:
+  python evaluation/bench_prefix_cache.py --messages 40
+  python evaluation/bench_prefix_cache.py --messages 40 --pad-tokens 1200
+  python evaluation/bench_prefix_cache.py --stub --pad-tokens 1200
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from fraudshield.prompting import SYSTEM_PROMPT, build_messages, count_tokens  # noqa: E402
+
+MIN_CACHED_TOKENS = 1024
+CACHE_INCREMENT = 128
+
+TEMPLATES = [
+    "Google Pay se aapko Rs.{n} cashback mila hai. Approve karein: cashback{n}@ybl",
+    "CBI officer here. Case no {n}. Transfer Rs.{n},000 or face arrest.",
+    "Your SBI KYC expired. Update within 24 hours: bit.ly/kyc{n}",
+    "Earn Rs.{n} daily! Pay Rs.999 deposit: taskpay{n}@ybl",
+    "Hey, dinner at {h}pm tonight? Send me Rs.{n} for my share.",
+    "Your OTP for login is {n}. Do not share it with anyone.",
+]
+EXAMPLES = [
+    ("Congratulations! You won Rs.25 lakh in KBC lottery. Pay Rs.5,000 processing fee to claim.", "lottery_scam"),
+    ("Your electricity e-challan is pending. Pay now at echallan-gov.in to avoid disconnection.", "govt_impersonation"),
+    ("Mom, reached office safely. Will call at lunch.", "legitimate"),
+    ("Refund of Rs.2,499 initiated. Approve the collect request on PhonePe to receive it.", "fake_cashback"),
+]
+
+
+def examples(pad_tokens: int) -> str:
+    """About `pad_tokens` tokens of labelled examples, always the same text for a given size."""
+    if pad_tokens <= 0:
+        return ""
+    lines, i = ["", "Examples:"], 0
+    while count_tokens("\n".join(lines)) < pad_tokens:
+        text, category = EXAMPLES[i % len(EXAMPLES)]
+        lines.append(f"{i + 1}. {text} -> {category}")
+        i += 1
+    return "\n".join(lines)
+
+
+def legacy_messages(message: str, pad: str) -> list:
+    return [{"role": "user", "content": f"{SYSTEM_PROMPT}{pad}\n\nAnalyze (language: auto): {message}"}]
+
+
+def system_messages(message: str, pad: str) -> list:
+    messages, _ = build_messages(message, "sms", "unknown", variant="full")
+    messages[0] = {"role": "system", "content": messages[0]["content"] + pad}
+    return messages
+
+
+LAYOUTS = {"legacy": legacy_messages, "system": system_messages}
+
+
+class StubCache:
+    """A model of the provider cache: the longest cached prefix, from 1024 tokens in 128-token steps."""
+
+    def __init__(self, base_ms: float = 250, per_token_ms: float = 0.15):
+        self.base_ms = base_ms
+        self.per_token_ms = per_token_ms
+        self._prefixes = set()
+
+    def create(self, messages, **kwargs):
+        text = "".join(f"<|{m['role']}|>{m['content']}" for m in messages)
+        total = count_tokens(text)
+        cached = 0
+        for size in range(MIN_CACHED_TOKENS, total + 1, CACHE_INCREMENT):
+            prefix = text[:len(text) * size // total]
+            if prefix in self._prefixes:
+                cached = size
+            self._prefixes.add(prefix)
+        time.sleep((self.base_ms + self.per_token_ms * (total - cached)) / 1000)
+        usage = SimpleNamespace(prompt_tokens=total, prompt_tokens_details=SimpleNamespace(cached_tokens=cached))
+        return SimpleNamespace(usage=usage)
+
+
+def run(create, layout, messages, pad: str) -> dict:
+    latencies, prompt, cached = [], 0, 0
+    for message in messages:
+        t0 = time.perf_counter()
+        response = create(messages=LAYOUTS[layout](message, pad), max_completion_tokens=500)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        details = getattr(response.usage, "prompt_tokens_details", None)
+        prompt += response.usage.prompt_tokens
+        cached += getattr(details, "cached_tokens", 0) or 0
+    latencies.sort()
+    return {
+        "calls": len(messages),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p90_ms": round(latencies[int(len(latencies) * 0.9) - 1], 1),
+        "prompt_tokens": prompt,
+        "cached_tokens": cached,
+        "cached_ratio": round(cached / prompt, 3) if prompt else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt prefix cache benchmark")
+    parser.add_argument("--messages", type=int, default=30)
+    parser.add_argument("--pad-tokens", type=int, default=0, help="tokens of examples added to the instructions")
+    parser.add_argument("--stub", action="store_true", help="use a local model of the provider cache")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    messages = [rng.choice(TEMPLATES).format(n=rng.randint(100, 99999), h=rng.randint(6, 10))
+                for _ in range(args.messages)]
+    pad = examples(args.pad_tokens)
+    if args.stub:
+        create = StubCache().create
+    else:
+        from fraudshield.router import shared_router
+        create = shared_router().create
+
+    results = {}
+    for layout in LAYOUTS:
+        create(messages=LAYOUTS[layout]("warm-up", pad), max_completion_tokens=500)
+        results[layout] = run(create, layout, messages, pad)
+
+    instructions = count_tokens(system_messages("", pad)[0]["content"])
+    print(f"Instruction prefix: ~{instructions} tokens (provider caches from {MIN_CACHED_TOKENS})")
+    print(f"{'layout':<8}{'p50 ms':>9}{'p90 ms':>9}{'prompt tok':>12}{'cached tok':>12}{'cached':>8}")
+    for layout, r in results.items():
+        print(f"{layout:<8}{r['p50_ms']:>9.1f}{r['p90_ms']:>9.1f}{r['prompt_tokens']:>12}"
+              f"{r['cached_tokens']:>12}{r['cached_ratio']:>8.0%}")
+    print()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
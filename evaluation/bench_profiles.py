@@ -0,0 +1,114 @@
+"""
+FraudShield India — Response Profile Benchmark
+Classifies the same messages with each response profile (verdict,
+explain_hi, full) and reports latency and completion tokens per profile,
+plus the cost of explaining one verdict later through /api/explain.
+
+Against the configured endpoint the numbers are real. With --stub, a local
+model of o4-mini is used instead: a fixed time to first token plus a
+per-token generation time over the reasoning tokens and the profile's JSON
+output, which shows how the output size alone moves latency.
+
+Usage:
+  python evaluation/bench_profiles.py --messages 20
+  python evaluation/bench_profiles.py --stub --reasoning-tokens 192 --ms-per-token 12
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from fraudshield.parsing import SCHEMAS, complete_verdict  # noqa: E402
+from fraudshield.prompting import PROFILES, build_explain_messages, build_messages, count_tokens  # noqa: E402
+
+SAMPLES = [
+    "Google Pay se aapko Rs.1500 cashback mila hai. Approve karein: cashback@ybl",
+    "CBI officer here. Your Aadhaar linked to money laundering. Transfer Rs.50,000.",
+    "Your SBI KYC expired. Update immediately: bit.ly/sbi-kyc",
+    "Earn Rs.15,000 daily! Like YouTube videos. Pay Rs.999 deposit: taskpay.earn@ybl",
+    "Hey, dinner at 8pm tonight? Send me Rs.300 for my share on GPay.",
+]
+
+# A typical full verdict, used by --stub to size each profile's output.
+TYPICAL = {
+    "is_scam": True, "category": "kyc_freeze", "confidence": 0.95, "risk_level": "high",
+    "explanation_en": "This message falsely claims your KYC has expired and pushes you to a short link "
+                      "to steal your banking details. Banks never ask you to update KYC through SMS links.",
+    "explanation_hi": "यह संदेश झूठा दावा करता है कि आपका KYC समाप्त हो गया है और आपकी बैंकिंग जानकारी "
+                      "चुराने के लिए लिंक भेजता है। बैंक कभी SMS लिंक से KYC अपडेट नहीं करवाते।",
+    "red_flags": ["claims KYC expired", "shortened link bit.ly", "urgency: update immediately"],
+    "complaint_form": {"portal": "cybercrime.gov.in", "helpline": "1930",
+                       "evidence_to_collect": ["screenshot", "sender_id", "transaction_id"]},
+}
+
+
+class StubModel:
+    def __init__(self, ttft_ms: float, ms_per_token: float, reasoning_tokens: int):
+        self.ttft_ms = ttft_ms
+        self.ms_per_token = ms_per_token
+        self.reasoning_tokens = reasoning_tokens
+
+    def create(self, messages, response_format=None, **kwargs):
+        schema = response_format["json_schema"]["schema"] if response_format else SCHEMAS["full"]
+        content = json.dumps({k: v for k, v in TYPICAL.items() if k in schema["properties"]}, ensure_ascii=False)
+        completion = self.reasoning_tokens + count_tokens(content)
+        time.sleep((self.ttft_ms + self.ms_per_token * completion) / 1000)
+        prompt = sum(count_tokens(m["content"]) for m in messages)
+        usage = SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion, total_tokens=prompt + completion)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+
+def run(create, messages, build) -> dict:
+    latencies, completion = [], []
+    for message in messages:
+        chat, info = build(message)
+        t0 = time.perf_counter()
+        response, _ = complete_verdict(create, chat, max_completion_tokens=1000, variant=info["variant"])
+        latencies.append((time.perf_counter() - t0) * 1000)
+        completion.append(response.usage.completion_tokens)
+    latencies.sort()
+    return {
+        "calls": len(messages),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+        "completion_tokens_avg": round(statistics.mean(completion), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and completion tokens per response profile")
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--stub", action="store_true", help="use a local latency model instead of the endpoint")
+    parser.add_argument("--ttft-ms", type=float, default=300)
+    parser.add_argument("--ms-per-token", type=float, default=10)
+    parser.add_argument("--reasoning-tokens", type=int, default=192)
+    args = parser.parse_args()
+
+    messages = [SAMPLES[i % len(SAMPLES)] for i in range(args.messages)]
+    if args.stub:
+        create = StubModel(args.ttft_ms, args.ms_per_token, args.reasoning_tokens).create
+    else:
+        from fraudshield.router import shared_router
+        create = shared_router().create
+
+    results = {}
+    for profile in PROFILES:
+        results[profile] = run(create, messages, lambda m, p=profile: build_messages(m, "sms", variant=p))
+    verdict = {k: TYPICAL[k] for k in ("is_scam", "category", "confidence", "risk_level")}
+    results["explain (on tap)"] = run(create, messages, lambda m: build_explain_messages(m, verdict))
+
+    print(f"{'profile':<18}{'p50 ms':>9}{'p95 ms':>9}{'completion tok':>16}")
+    for profile, r in results.items():
+        print(f"{profile:<18}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['completion_tokens_avg']:>16.1f}")
+    print()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
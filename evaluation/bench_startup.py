@@ -0,0 +1,152 @@
+"""
+FraudShield India — Cold-start Profile
+Measures what a fresh Functions worker pays before it can answer. First, the
+`python -X importtime` breakdown of `import function_app`. Second, the
+warm-up steps that are now done off the request path (fraudshield/warmup.py).
+Writes evaluation/startup_profile.md.
+
+Usage:
+  python evaluation/bench_startup.py --runs 5
+  python evaluation/bench_startup.py --runs 5 --tls   # also time TLS to the configured endpoints
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PROFILE_PATH = os.path.join(os.path.dirname(__file__), "startup_profile.md")
+TOP_N = 15
+
+_ENV = {
+    "AZURE_OPENAI_ENDPOINT": "https://example.openai.azure.com/",
+    "AZURE_OPENAI_KEY": "bench",
+    "FRAUDSHIELD_WARMUP": "0",
+    "FRAUDSHIELD_TRENDS_PATH": os.devnull,
+    "FRAUDSHIELD_CAMPAIGNS_PATH": os.devnull,
+}
+
+_WARMUP_SNIPPET = """
+import json, time
+t0 = time.perf_counter()
+import function_app
+load_ms = (time.perf_counter() - t0) * 1000
+function_app._warmup.tls = {tls}
+timings = function_app._warmup.run()
+print(json.dumps(dict(timings, module_load=round(load_ms, 1))))
+"""
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    for key, value in _ENV.items():
+        env.setdefault(key, value)
+    return env
+
+
+def import_profile() -> tuple:
+    """One fresh interpreter: ({module: (self_us, cumulative_us)}, direct imports of function_app)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import function_app"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True,
+    )
+    modules, children = {}, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        modules[name] = (int(self_us), int(cumulative_us))
+        if depth == 0 and name != "function_app":
+            children = []           # a top-level import that is not function_app's
+        elif depth == 1:
+            children.append(name)
+    return modules, children
+
+
+def warmup_profile(tls: bool) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _WARMUP_SNIPPET.format(tls=tls)],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _median(values: list) -> float:
+    return statistics.median(values) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start profile for function_app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tls", action="store_true", help="include TLS warm-up to the configured endpoints")
+    parser.add_argument("--out", default=PROFILE_PATH)
+    args = parser.parse_args()
+
+    runs = [import_profile() for _ in range(args.runs)]
+    warmups = [warmup_profile(args.tls) for _ in range(args.runs)]
+    profiles = [modules for modules, _ in runs]
+
+    names = set().union(*profiles)
+    cumulative = {n: _median([p[n][1] for p in profiles if n in p]) / 1000 for n in names}
+    self_ms = {n: _median([p[n][0] for p in profiles if n in p]) / 1000 for n in names}
+    total = cumulative.get("function_app", 0.0)
+    top = sorted(set(runs[0][1]), key=lambda n: cumulative[n], reverse=True)[:TOP_N]
+    fraudshield = sorted((n for n in names if n.startswith("fraudshield")), key=lambda n: cumulative[n], reverse=True)
+    steps = [k for k in warmups[0] if k != "module_load"]
+
+    lines = [
+        "# FraudShield India — Cold-start Profile",
+        "",
+        f"> Generated by `evaluation/bench_startup.py` on {datetime.now().strftime('%Y-%m-%d %H:%M')} — "
+        f"median of {args.runs} fresh interpreters, Python {sys.version.split()[0]}.",
+        "",
+        "## `import function_app` (-X importtime)",
+        "",
+        f"Total: **{total:.1f} ms** cumulative for `function_app`; its direct imports:",
+        "",
+        "| Module | Cumulative ms | Self ms |",
+        "|--------|--------------:|--------:|",
+    ]
+    lines += [f"| `{n}` | {cumulative[n]:.1f} | {self_ms[n]:.1f} |" for n in top]
+    lines += [
+        "",
+        "### fraudshield package",
+        "",
+        "| Module | Cumulative ms |",
+        "|--------|--------------:|",
+    ]
+    lines += [f"| `{n}` | {cumulative[n]:.1f} |" for n in fraudshield]
+    lines += [
+        "",
+        "## Deferred to warm-up (off the request path)",
+        "",
+        "These used to be paid by the first classification. They now run in a background thread at load",
+        "and in the `warmup` trigger.",
+        "",
+        "| Step | Median ms |",
+        "|------|----------:|",
+    ]
+    lines += [f"| {s} | {_median([w.get(s, 0.0) for w in warmups]):.1f} |" for s in steps]
+    lines += [
+        "",
+        f"Module load measured in-process: {_median([w['module_load'] for w in warmups]):.1f} ms.",
+    ]
+    if importlib.util.find_spec("tiktoken") is None:
+        lines.append("tiktoken is not installed here, so the tokenizer step measures the byte-length fallback only.")
+    if not args.tls:
+        lines.append("TLS warm-up was not measured (run with `--tls` against real endpoints).")
+    lines.append("")
+    with open(args.out, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    print("\n".join(lines))
+
+
+if __name__ == "__main__":
+    main()
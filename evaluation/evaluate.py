@@ -4,6 +4,7 @@ Calls the live Azure Function API and generates evaluation/metrics.md
 
 Usage:
   python evaluation/evaluate.py --max 20
+  python evaluation/evaluate.py --max 20 --variants full,compact
 
 Requirements:
   pip install requests pandas
@@ -22,17 +23,22 @@ import requests
 API_URL = "https://fraudshield-api.azurewebsites.net/api/classify"
 DATASET_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "scam_messages.csv")
 METRICS_PATH = os.path.join(os.path.dirname(__file__), "metrics.md")
+VARIANTS_PATH = os.path.join(os.path.dirname(__file__), "prompt_variants.md")
 REQUEST_DELAY = 8  # seconds between calls to avoid rate limits
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
-def classify(message: str, source: str = "evaluation", sender: str = "evaluator") -> dict:
+def classify(message: str, source: str = "evaluation", sender: str = "evaluator",
+             prompt_variant: str = None) -> dict:
     """Call the FraudShield API with retry logic."""
+    payload = {"message": message, "source": source, "sender": sender}
+    if prompt_variant:
+        payload["prompt_variant"] = prompt_variant
     for attempt in range(3):  # retry up to 3 times
         try:
             response = requests.post(
                 API_URL,
-                json={"message": message, "source": source, "sender": sender},
+                json=payload,
                 timeout=90,
             )
             response.raise_for_status()
@@ -53,6 +59,15 @@ def normalize_bool(val) -> bool:
     return str(val).strip().upper() in ("TRUE", "1", "YES")
 
 
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0.0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
 def load_dataset(path: str, max_rows: int) -> list[dict]:
     """Load CSV dataset, return list of dicts."""
     rows = []
@@ -66,11 +81,12 @@ def load_dataset(path: str, max_rows: int) -> list[dict]:
 
 
 # ── Main evaluation ───────────────────────────────────────────────────────────
-def run_evaluation(max_rows: int):
+def run_evaluation(max_rows: int, prompt_variant: str = None, write_report: bool = True) -> dict:
     print(f"\n🛡️  FraudShield India — Evaluation")
     print(f"📂  Dataset: {DATASET_PATH}")
     print(f"🌐  API:     {API_URL}")
     print(f"📊  Max rows: {max_rows}")
+    print(f"🧾  Prompt variant: {prompt_variant or 'server default'}")
     print("-" * 55)
 
     rows = load_dataset(DATASET_PATH, max_rows)
@@ -81,6 +97,7 @@ def run_evaluation(max_rows: int):
     category_correct = 0
     total = 0
     errors = 0
+    latencies_ms = []
 
     # Per-category tracking
     cat_stats = {}  # { category: {tp, fp, fn, tn} }
@@ -96,7 +113,9 @@ def run_evaluation(max_rows: int):
         print(f"[{i+1:02d}/{len(rows)}] Testing: {msg[:60]}...")
 
         try:
-            result = classify(msg)
+            t0 = time.perf_counter()
+            result = classify(msg, prompt_variant=prompt_variant)
+            latencies_ms.append((time.perf_counter() - t0) * 1000)
             pred_label = result.get("is_scam", False)
             pred_cat = result.get("category", "unknown")
             confidence = result.get("confidence", 0.0)
@@ -179,12 +198,50 @@ def run_evaluation(max_rows: int):
     print(f"   Recall          : {recall:.1%}")
     print(f"   F1 Score        : {f1:.1%}")
     print(f"   Errors          : {errors}")
+    print(f"   Latency p50/p95 : {percentile(latencies_ms, 50):.0f} / {percentile(latencies_ms, 95):.0f} ms")
     print("=" * 55)
 
     # ── Write metrics.md ─────────────────────────────────────────────────────
-    write_metrics_md(results, total, accuracy, cat_accuracy,
-                     precision, recall, f1, errors, cat_stats, max_rows)
-    print(f"\n✅  Metrics saved to: {METRICS_PATH}")
+    if write_report:
+        write_metrics_md(results, total, accuracy, cat_accuracy,
+                         precision, recall, f1, errors, cat_stats, max_rows)
+        print(f"\n✅  Metrics saved to: {METRICS_PATH}")
+
+    return {
+        "variant": prompt_variant or "default",
+        "total": total,
+        "accuracy": accuracy,
+        "cat_accuracy": cat_accuracy,
+        "f1": f1,
+        "errors": errors,
+        "latency_p50_ms": percentile(latencies_ms, 50),
+        "latency_p95_ms": percentile(latencies_ms, 95),
+    }
+
+
+def write_variants_md(summaries: list, max_rows: int):
+    """Write the accuracy / latency trade-off of each prompt variant."""
+    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+    lines = [
+        "# FraudShield India — Prompt Variant Trade-off",
+        "",
+        f"> Generated: {now} | Dataset: `data/scam_messages.csv` | Max rows: {max_rows}",
+        "",
+        "| Variant | Evaluated | Accuracy | Category Acc. | F1 | p50 Latency | p95 Latency | Errors |",
+        "|---------|-----------|----------|---------------|----|-------------|-------------|--------|",
+    ]
+    for s in summaries:
+        lines.append(
+            f"| {s['variant']} | {s['total']} | {s['accuracy']:.1%} | {s['cat_accuracy']:.1%} | "
+            f"{s['f1']:.1%} | {s['latency_p50_ms']:.0f} ms | {s['latency_p95_ms']:.0f} ms | {s['errors']} |"
+        )
+    lines += [
+        "",
+        "Token counts per variant are in `/api/metrics` under `tokens.<variant>.prompt` "
+        "and `tokens.<variant>.completion`.",
+    ]
+    with open(VARIANTS_PATH, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
 
 
 def write_metrics_md(results, total, accuracy, cat_accuracy,
@@ -259,5 +316,13 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="FraudShield India Evaluator")
     parser.add_argument("--max", type=int, default=10,
                         help="Max messages to evaluate (default: 10)")
+    parser.add_argument("--variants", default="",
+                        help="Comma-separated prompt variants to compare, e.g. full,compact")
     args = parser.parse_args()
-    run_evaluation(args.max)
+    if args.variants:
+        summaries = [run_evaluation(args.max, prompt_variant=v.strip(), write_report=False)
+                     for v in args.variants.split(",") if v.strip()]
+        write_variants_md(summaries, args.max)
+        print(f"\n✅  Variant comparison saved to: {VARIANTS_PATH}")
+    else:
+        run_evaluation(args.max)
@@ -0,0 +1,5 @@
+"""
+FraudShield India — shared serving layer.
+Model routing, metrics and the other building blocks used by function_app.py
+and the standalone API server.
+"""
@@ -0,0 +1,196 @@
+"""
+FraudShield India — Known-Identifier Filter
+A Bloom filter over every reported UPI VPA, phone number and known-bad
+domain. Classification screens the identifiers in a message against it in
+microseconds. Only the positives go on to an exact lookup (the reputation
+table here, or Cosmos DB in the investigation agent).
+
+A Bloom filter never misses an identifier that was added to it. It may
+wrongly match one that was not. The false-positive rate is chosen at build
+time from `capacity` and `fp_rate`. It rises once more than `capacity`
+identifiers have been added, so `estimated_fp_rate()` reports the current
+rate and `measure_fp_rate()` checks it empirically.
+
+The filter is built by agents/investigation/build_scam_filter.py into
+fraudshield/assets/scam_filter.bin, loaded at cold start, and extended
+from the FraudEvent stream. The shipped asset is never written at runtime:
+pipeline/event_consumer.py saves its updates to a data path, and
+load_scam_filter() falls back to the asset while that path has no file.
+"""
+import hashlib
+import logging
+import math
+import os
+import random
+import string
+import struct
+import threading
+import zlib
+
+from fraudshield.entities import extract_entities
+from fraudshield.reputation import is_shared_domain, normalize
+
+logger = logging.getLogger(__name__)
+
+ASSET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "scam_filter.bin")
+DEFAULT_CAPACITY = 100_000
+DEFAULT_FP_RATE = 0.001
+
+_MAGIC = b"FSBF"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBQBQ")     # magic, version, bits, hashes, count
+
+
+def identifier_key(kind: str, value: str) -> str:
+    return f"{kind}:{normalize(kind, value)}"
+
+
+class BloomFilter:
+    """Fixed-size bit array with `hashes` positions per item (Kirsch-Mitzenmacher double hashing)."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, fp_rate: float = DEFAULT_FP_RATE,
+                 bits: int = None, hashes: int = None):
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate must be between 0 and 1")
+        self.bits = bits or max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = hashes or max(1, round(self.bits / max(1, capacity) * math.log(2)))
+        self.count = 0
+        self._array = bytearray((self.bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, item: str) -> bool:
+        """Add an item. Returns False if it (probably) was already present."""
+        positions = self._positions(item)
+        with self._lock:
+            new = False
+            for p in positions:
+                byte, bit = p >> 3, 1 << (p & 7)
+                if not self._array[byte] & bit:
+                    self._array[byte] |= bit
+                    new = True
+            if new:
+                self.count += 1
+        return new
+
+    def __contains__(self, item: str) -> bool:
+        array = self._array
+        return all(array[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._array)
+
+    def estimated_fp_rate(self) -> float:
+        """Expected false-positive rate for the number of items added so far."""
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    def snapshot(self) -> tuple:
+        """(bits, hashes, count, bit array) as one consistent, uncompressed copy."""
+        with self._lock:
+            return self.bits, self.hashes, self.count, bytes(self._array)
+
+    def to_bytes(self) -> bytes:
+        with self._lock:
+            body = zlib.compress(bytes(self._array))
+            return _HEADER.pack(_MAGIC, _VERSION, self.bits, self.hashes, self.count) + body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        magic, version, bits, hashes, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("not a scam filter file")
+        array = zlib.decompress(data[_HEADER.size:])
+        if len(array) != (bits + 7) // 8:
+            raise ValueError("truncated scam filter file")
+        bloom = cls(bits=bits, hashes=hashes)
+        bloom._array = bytearray(array)
+        bloom.count = count
+        return bloom
+
+    def save(self, path: str) -> None:
+        """Write the filter to `path` atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Read a filter written by `save`. Returns None if there is none or it is unusable."""
+        try:
+            with open(path, "rb") as f:
+                return cls.from_bytes(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error, zlib.error) as exc:
+            logger.warning("Ignoring scam filter %s: %s", path, exc)
+            return None
+
+
+def build_scam_filter(vpas=(), phones=(), domains=(), capacity: int = DEFAULT_CAPACITY,
+                      fp_rate: float = DEFAULT_FP_RATE) -> BloomFilter:
+    bloom = BloomFilter(capacity, fp_rate)
+    for kind, values in (("vpa", vpas), ("phone", phones), ("domain", domains)):
+        for value in values:
+            bloom.add(identifier_key(kind, value))
+    return bloom
+
+
+def seed_filter(capacity: int = DEFAULT_CAPACITY, fp_rate: float = DEFAULT_FP_RATE) -> BloomFilter:
+    """A filter over the bundled scam graph seed data."""
+    from fraudshield.scam_graph import KNOWN_BAD_DOMAINS, SCAM_PHONES, SCAM_UPIS
+    return build_scam_filter([u[1] for u in SCAM_UPIS], [p[1] for p in SCAM_PHONES], KNOWN_BAD_DOMAINS,
+                             capacity, fp_rate)
+
+
+def load_scam_filter(path: str = ASSET_PATH) -> BloomFilter:
+    """The filter at `path`, else the shipped asset, else one built from the seed data."""
+    bloom = BloomFilter.load(path)
+    if bloom is None and os.path.abspath(path) != ASSET_PATH:
+        logger.info("No scam filter at %s; using the shipped asset.", path)
+        bloom = BloomFilter.load(ASSET_PATH)
+    if bloom is None:
+        logger.info("No scam filter at %s; building one from the seed data.", path)
+        bloom = seed_filter()
+    return bloom
+
+
+def entity_pairs(entities: dict) -> list:
+    """(kind, value) pairs the filter covers, from `extract_entities` output."""
+    return ([("vpa", v) for v in entities["vpas"]] + [("phone", p) for p in entities["phones"]]
+            + [("domain", d) for d in entities["domains"]])
+
+
+def screen(bloom: BloomFilter, entities: dict) -> list:
+    """The (kind, value) pairs in `entities` that may be known scam identifiers."""
+    return [(kind, value) for kind, value in entity_pairs(entities) if identifier_key(kind, value) in bloom]
+
+
+def add_event(bloom: BloomFilter, event: dict) -> int:
+    """Add every identifier in a scam FraudEvent, except brand and shortener domains it quotes. Returns how many were new."""
+    if not event.get("is_scam"):
+        return 0
+    pairs = entity_pairs(extract_entities(event.get("message", "")))
+    return sum(bloom.add(identifier_key(kind, value)) for kind, value in pairs
+               if not (kind == "domain" and is_shared_domain(value)))
+
+
+def measure_fp_rate(bloom: BloomFilter, probes: int = 100_000, seed: int = 0) -> float:
+    """Fraction of random identifiers that were never added but still match."""
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + string.digits
+    hits = 0
+    for _ in range(probes):
+        # A probe prefix that real identifiers never use, so every match is a false positive.
+        hits += f"probe:{''.join(rng.choices(alphabet, k=16))}" in bloom
+    return hits / probes
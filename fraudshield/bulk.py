@@ -0,0 +1,321 @@
+"""
+FraudShield India — Bulk Inbox Scan
+Scans an SMS inbox export (NDJSON or CSV, any size) and streams NDJSON
+verdicts back as they complete. Records flow through a chain of generators,
+so memory stays bounded by the model window, not the upload:
+
+  read_records → dedupe → rule pre-filter → verdict cache → model
+
+- dedupe: repeats of a message already seen in this scan are answered with
+  a `duplicate_of` pointer instead of a second verdict.
+- rule pre-filter: messages with no rule match and no link, UPI ID, phone
+  or amount are legitimate without asking the model.
+- cache: verdicts from earlier scans, by message fingerprint. Entries are
+  kept under a "bulk:" prefix and hold only the verdict fields, since the
+  process-wide cache is shared with DetectionClassifier, which keys plain
+  model verdicts by bare fingerprint.
+- model: at most `workers` concurrent calls; results stream out in
+  completion order.
+
+Output lines have a "type": "verdict" (one per input record, with its 1-based
+"line"), "error", "progress" (every `progress_every` records) and a final
+"summary".
+
+CLI:
+  python -m fraudshield.bulk inbox.csv > verdicts.ndjson
+  python -m fraudshield.bulk inbox.ndjson --url https://<app>.azurewebsites.net/api/bulk --key <function key>
+"""
+import argparse
+import csv
+import itertools
+import json
+import logging
+import sys
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from fraudshield import metrics
+from fraudshield.coalesce import fingerprint
+from fraudshield.entities import extract_entities
+from fraudshield.rules import rule_verdict, score_message
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "csv")
+DEFAULT_WORKERS = 8
+DEFAULT_PROGRESS_EVERY = 500
+SEEN_LIMIT = 100_000
+
+# Column names used by common SMS backup apps and bank exports.
+MESSAGE_FIELDS = ("message", "body", "text", "sms", "content")
+SENDER_FIELDS = ("sender", "address", "from", "number", "sender_id")
+ID_FIELDS = ("id", "_id", "message_id")
+VERDICT_FIELDS = ("is_scam", "category", "confidence", "risk_level", "explanation_en", "explanation_hi",
+                  "red_flags", "tier")
+CACHE_PREFIX = "bulk:"
+
+
+def _pick(row: dict, fields) -> str:
+    for field in fields:
+        value = row.get(field)
+        if value not in (None, ""):
+            return str(value)
+    return ""
+
+
+def _record(line: int, row: dict, source: str) -> dict:
+    row = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+    record = {"line": line, "message": _pick(row, MESSAGE_FIELDS).strip(),
+              "sender": _pick(row, SENDER_FIELDS) or "unknown", "source": _pick(row, ("source",)) or source}
+    record_id = _pick(row, ID_FIELDS)
+    if record_id:
+        record["id"] = record_id
+    if not record["message"]:
+        record["error"] = "no message field"
+    return record
+
+
+def detect_format(first_line: str) -> str:
+    return "ndjson" if first_line.lstrip("\ufeff \t").startswith("{") else "csv"
+
+
+def read_records(lines, fmt: str = None, source: str = "sms"):
+    """Yield one record dict per non-blank NDJSON line or CSV row from an iterable of text lines."""
+    lines = iter(lines)
+    first = next((line for line in lines if line.strip()), None)
+    if first is None:
+        return
+    fmt = fmt or detect_format(first)
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    lines = itertools.chain([first.lstrip("\ufeff")], lines)
+    if fmt == "csv":
+        reader, n = csv.DictReader(lines), 0
+        while True:
+            n += 1
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as exc:    # an oversized field: skip the row, not the rest of the upload
+                yield {"line": n, "error": f"invalid CSV: {exc}"}
+                continue
+            yield _record(n, row, source)
+    n = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        n += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield {"line": n, "error": "invalid JSON"}
+            continue
+        yield _record(n, row, source) if isinstance(row, dict) else {"line": n, "error": "not a JSON object"}
+
+
+def _verdict(record: dict, verdict: dict, stage: str) -> dict:
+    out = {"type": "verdict", "line": record["line"]}
+    if "id" in record:
+        out["id"] = record["id"]
+    out["sender"] = record["sender"]
+    out.update((k, verdict[k]) for k in VERDICT_FIELDS if k in verdict)
+    out["stage"] = stage
+    return out
+
+
+def _error(record: dict, error: str) -> dict:
+    out = {"type": "error", "line": record["line"], "error": error}
+    if "id" in record:
+        out["id"] = record["id"]
+    return out
+
+
+# ── Stages: each passes finished output dicts (with a "type") straight through ──
+
+def dedupe(items, seen_limit: int = SEEN_LIMIT):
+    seen = OrderedDict()       # fingerprint -> first line, bounded
+    for item in items:
+        if "type" in item:
+            yield item
+            continue
+        if "error" in item:
+            yield _error(item, item["error"])
+            continue
+        item["fingerprint"] = key = fingerprint(item["message"])
+        first = seen.get(key)
+        if first is not None:
+            seen.move_to_end(key)
+            out = {"type": "verdict", "line": item["line"], "duplicate_of": first, "stage": "duplicate"}
+            if "id" in item:
+                out["id"] = item["id"]
+            yield out
+            continue
+        seen[key] = item["line"]
+        if len(seen) > seen_limit:
+            seen.popitem(last=False)
+        yield item
+
+
+def prefilter(items):
+    for item in items:
+        if "type" in item:
+            yield item
+            continue
+        try:
+            entities = extract_entities(item["message"])
+            quiet = not score_message(item["message"]) and not any(entities.values())
+            out = _verdict(item, rule_verdict(item["message"]), "prefilter") if quiet else item
+        except Exception as exc:    # one bad record must not end the scan
+            logger.warning("Bulk scan line %s failed in the pre-filter: %s", item["line"], exc)
+            out = _error(item, str(exc))
+        yield out
+
+
+def cached(items, cache):
+    for item in items:
+        if "type" in item or cache is None:
+            yield item
+            continue
+        try:
+            verdict = cache.get(CACHE_PREFIX + item["fingerprint"])
+        except Exception as exc:
+            logger.warning("Bulk scan line %s: verdict cache lookup failed: %s", item["line"], exc)
+            verdict = None
+        yield _verdict(item, verdict, "cache") if verdict is not None else item
+
+
+def classify_all(items, classify, cache=None, workers: int = DEFAULT_WORKERS):
+    """Run `classify(message, source, sender)` for the remaining records, `workers` at a time."""
+    pending = {}
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fraudshield-bulk")
+
+    def finished():
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            item = pending.pop(future)
+            try:
+                verdict = future.result()
+            except Exception as exc:
+                logger.warning("Bulk scan line %s failed: %s", item["line"], exc)
+                yield _error(item, str(exc))
+                continue
+            # Only model verdicts are cached; rule fallbacks and reputation verdicts are re-derived.
+            if cache is not None and "tier" not in verdict:
+                cache.put(CACHE_PREFIX + item["fingerprint"], {k: verdict[k] for k in VERDICT_FIELDS if k in verdict})
+            yield _verdict(item, verdict, "model")
+
+    try:
+        for item in items:
+            if "type" in item:
+                yield item
+                continue
+            pending[pool.submit(classify, item["message"], item["source"], item["sender"])] = item
+            # Block only when the window is full; otherwise hand back whatever is already done.
+            if len(pending) >= workers or any(future.done() for future in pending):
+                yield from finished()
+        while pending:
+            yield from finished()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def scan(records, classify, cache=None, workers: int = DEFAULT_WORKERS,
+         progress_every: int = DEFAULT_PROGRESS_EVERY, clock=time.perf_counter):
+    """Yield an output dict per record, periodic progress, and a final summary."""
+    t0 = clock()
+    counts, stages, categories = Counter(), Counter(), Counter()
+    outputs = classify_all(cached(prefilter(dedupe(records)), cache), classify, cache, workers)
+    try:
+        for out in outputs:
+            counts["records"] += 1
+            if out["type"] == "error":
+                counts["errors"] += 1
+            else:
+                stages[out["stage"]] += 1
+                if out.get("is_scam"):
+                    counts["scams"] += 1
+                    categories[out["category"]] += 1
+            yield out
+            if progress_every and counts["records"] % progress_every == 0:
+                elapsed = clock() - t0
+                yield {"type": "progress", "processed": counts["records"], "scams": counts["scams"],
+                       "errors": counts["errors"], "elapsed_s": round(elapsed, 2),
+                       "rate_per_s": round(counts["records"] / elapsed, 1) if elapsed else 0.0}
+    except Exception as exc:        # the client still gets the summary of what was scanned
+        logger.exception("Bulk scan stopped after %d records", counts["records"])
+        counts["errors"] += 1
+        yield {"type": "error", "error": f"scan stopped: {exc}"}
+    elapsed = clock() - t0
+    metrics.incr("bulk.records", counts["records"])
+    metrics.incr("bulk.model_calls", stages["model"])
+    yield {
+        "type": "summary",
+        "total": counts["records"],
+        "scams": counts["scams"],
+        "errors": counts["errors"],
+        "by_stage": dict(stages),
+        "by_category": dict(categories.most_common()),
+        "elapsed_s": round(elapsed, 2),
+        "rate_per_s": round(counts["records"] / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def encode(out: dict) -> bytes:
+    return (json.dumps(out, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def _remote(args, out):
+    import requests
+    headers = {"Content-Type": "text/csv" if args.format == "csv" else "application/x-ndjson"}
+    if args.key:
+        headers["x-functions-key"] = args.key
+    params = {"format": args.format} if args.format else {}
+    with open(args.path, "rb") as f, requests.post(args.url, data=f, headers=headers, params=params,
+                                                   stream=True, timeout=(10, None)) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            if line:
+                _emit(json.loads(line), out)
+
+
+def _emit(obj: dict, out) -> None:
+    if obj["type"] in ("progress", "summary"):
+        print(json.dumps(obj, ensure_ascii=False), file=sys.stderr)
+    if obj["type"] != "progress":
+        out.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        out.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan an SMS inbox export (NDJSON or CSV) for scams")
+    parser.add_argument("path", help="NDJSON or CSV file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="default: detected from the first line")
+    parser.add_argument("--url", help="scan through a deployed /api/bulk endpoint instead of locally")
+    parser.add_argument("--key", help="function key for --url")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--progress-every", type=int, default=DEFAULT_PROGRESS_EVERY)
+    parser.add_argument("--out", help="write verdicts here instead of stdout")
+    args = parser.parse_args()
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        if args.url:
+            _remote(args, out)
+            return
+        import function_app
+        source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8", errors="replace", newline="")
+        with source:
+            for obj in scan(read_records(source, args.format), function_app.classify_message,
+                            function_app._verdict_cache, args.workers, args.progress_every):
+                _emit(obj, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+FraudShield India — On-device Detection Bundle
+Packages what the Android app needs to classify SMS offline into one
+versioned binary, and computes small deltas between versions.
+
+Layout (little-endian):
+  header   "FSDB", format (u8), version (8 bytes), section count (u8)
+  sections tag (4 bytes), length (u32), payload — in this order:
+    FLTR  the known-bad VPA/phone/domain Bloom filter: bits (u64), hashes (u8),
+          count (u64), raw bit array (see fraudshield.bloom for hashing)
+    MODL  the distilled classifier, if one is loaded: meta JSON length (u32),
+          meta JSON, float16 weights (dim × categories), float32 bias
+    RULE  JSON with the rule patterns, weights, urgency pattern, scam
+          threshold and the canned English/Hindi explanations
+  trailer  SHA-256 of everything before it (32 bytes)
+
+The trailer is a checksum, not a signature: it catches a truncated download
+or a delta applied to the wrong bytes, and authenticity rests on HTTPS and
+the function key. The app must not ship a secret that a trailer could be
+keyed with.
+
+The version is a digest of the sections. The filter section comes from the
+shared filter asset, not an instance's copy that Event Hub reports keep
+adding to, so every instance serves the same version. Large, fixed-size sections
+come first so that a growing blocklist or a retrained model leaves the byte
+offsets of everything else in place.
+
+A delta is "FSDD", format (u8), base version, target version, target length
+(u32), then the zlib-compressed XOR of the base and target bundles (the base
+zero-padded to the target's length). Adding identifiers only sets bits in
+the filter, so the XOR is almost all zeros and compresses to a few bytes per
+new identifier. The client applies the delta and checks the trailer as it
+would for a full bundle.
+
+The app classifies with the rules, filter and model, and escalates to
+/api/classify only when the local verdict is below the model's threshold.
+
+Env vars:
+  FRAUDSHIELD_BUNDLE              – "0" to disable /api/bundle (default "1")
+  FRAUDSHIELD_BUNDLE_HISTORY      – versions kept for deltas (default 8)
+  FRAUDSHIELD_BUNDLE_MIN_INTERVAL – seconds between rebuilds (default 300)
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from fraudshield import metrics
+from fraudshield.prompting import CATEGORIES
+from fraudshield.rules import EXPLANATIONS, RULES, SCAM_THRESHOLD, URGENCY_RE
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FSDB"
+DELTA_MAGIC = b"FSDD"
+FORMAT_VERSION = 2     # 1 had an HMAC trailer
+MEDIA_TYPE = "application/vnd.fraudshield.bundle"
+DELTA_MEDIA_TYPE = "application/vnd.fraudshield.bundle-delta"
+
+_HEADER = struct.Struct("<4sB8sB")          # magic, format, version, section count
+_SECTION = struct.Struct("<4sI")            # tag, length
+_FILTER = struct.Struct("<QBQ")             # bits, hashes, count
+_DELTA = struct.Struct("<4sB8s8sI")         # magic, format, base, target, target length
+CHECKSUM_SIZE = 32
+
+
+class BundleError(ValueError):
+    """A bundle or delta is malformed, fails its checksum, or does not apply."""
+
+
+# ── Sections ──────────────────────────────────────────────────────────────────
+
+def _filter_section(bloom) -> bytes:
+    bits, hashes, count, array = bloom.snapshot()
+    return _FILTER.pack(bits, hashes, count) + array
+
+
+def _model_section(model) -> bytes:
+    import numpy as np
+    meta = json.dumps(model.meta, separators=(",", ":")).encode()
+    weights = np.ascontiguousarray(model.weights, dtype="<f2").tobytes()
+    bias = np.ascontiguousarray(model.bias, dtype="<f4").tobytes()
+    return struct.pack("<I", len(meta)) + meta + weights + bias
+
+
+def _rules_section() -> bytes:
+    rules = {
+        "categories": list(CATEGORIES),
+        "rules": [[category, weight, pattern] for category, weight, pattern in RULES],
+        "flags": "i",
+        "urgency": URGENCY_RE.pattern,
+        "threshold": SCAM_THRESHOLD,
+        "explanations": {category: list(texts) for category, texts in EXPLANATIONS.items()},
+    }
+    return json.dumps(rules, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _checksum(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+def build(bloom, model=None) -> tuple:
+    """(version, bundle bytes) for a scam filter and an optional DistilledModel."""
+    sections = [(b"FLTR", _filter_section(bloom))]
+    if model is not None:
+        sections.append((b"MODL", _model_section(model)))
+    sections.append((b"RULE", _rules_section()))
+    body = b"".join(_SECTION.pack(tag, len(payload)) + payload for tag, payload in sections)
+    version = hashlib.blake2b(body, digest_size=8).digest()
+    data = _HEADER.pack(MAGIC, FORMAT_VERSION, version, len(sections)) + body
+    return version.hex(), data + _checksum(data)
+
+
+def parse(data: bytes) -> tuple:
+    """(version, {tag: payload}) of a bundle whose checksum matches."""
+    if len(data) < _HEADER.size + CHECKSUM_SIZE:
+        raise BundleError("truncated bundle")
+    data, checksum = data[:-CHECKSUM_SIZE], data[-CHECKSUM_SIZE:]
+    if not hmac.compare_digest(checksum, _checksum(data)):
+        raise BundleError("bundle checksum does not match")
+    magic, fmt, version, count = _HEADER.unpack_from(data)
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise BundleError("not a detection bundle")
+    sections, offset = {}, _HEADER.size
+    for _ in range(count):
+        tag, length = _SECTION.unpack_from(data, offset)
+        offset += _SECTION.size
+        sections[tag.decode()] = data[offset:offset + length]
+        offset += length
+    if offset != len(data):
+        raise BundleError("bundle length does not match its sections")
+    return version.hex(), sections
+
+
+# ── Deltas ────────────────────────────────────────────────────────────────────
+
+def _xor(a: bytes, b: bytes) -> bytes:
+    n = len(b)
+    a = a[:n].ljust(n, b"\0")
+    return (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(n, "little")
+
+
+def _version_of(data: bytes) -> bytes:
+    return _HEADER.unpack_from(data)[2]
+
+
+def diff(base: bytes, target: bytes) -> bytes:
+    """A delta that turns bundle `base` into bundle `target`."""
+    return (_DELTA.pack(DELTA_MAGIC, FORMAT_VERSION, _version_of(base), _version_of(target), len(target))
+            + zlib.compress(_xor(base, target), 9))
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """The target bundle of `delta`, rebuilt from `base`. Check it with parse() before use."""
+    try:
+        magic, fmt, base_version, _, length = _DELTA.unpack_from(delta)
+        mask = zlib.decompress(delta[_DELTA.size:])
+    except (struct.error, zlib.error) as exc:
+        raise BundleError(f"malformed delta: {exc}") from exc
+    if magic != DELTA_MAGIC or fmt != FORMAT_VERSION or len(mask) != length:
+        raise BundleError("malformed delta")
+    if _version_of(base) != base_version:
+        raise BundleError("delta does not apply to this bundle version")
+    return _xor(base, mask)
+
+
+# ── Serving ───────────────────────────────────────────────────────────────────
+
+class BundleStore:
+    """The current bundle, rebuilt when its sources change, plus recent versions for deltas.
+
+    `sources` returns (scam filter, distilled model or None). They are
+    rechecked at most every `min_interval` seconds; the filter is compared by
+    identity and count, and the model by its version.
+    """
+
+    def __init__(self, sources, history: int = 8, min_interval: float = 300.0, clock=time.monotonic):
+        self.sources = sources
+        self.history = history
+        self.min_interval = min_interval
+        self.clock = clock
+        self._bundles = OrderedDict()       # version -> bytes, oldest first
+        self._deltas = {}
+        self._source_key = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, sources):
+        """A store configured from FRAUDSHIELD_BUNDLE_*, or None if switched off."""
+        if os.environ.get("FRAUDSHIELD_BUNDLE", "1") == "0":
+            return None
+        return cls(sources,
+                   history=int(os.environ.get("FRAUDSHIELD_BUNDLE_HISTORY", "8")),
+                   min_interval=float(os.environ.get("FRAUDSHIELD_BUNDLE_MIN_INTERVAL", "300")))
+
+    def current(self) -> tuple:
+        """(version, bytes) of the newest bundle."""
+        with self._lock:
+            now = self.clock()
+            if self._checked_at is None or now - self._checked_at >= self.min_interval:
+                self._checked_at = now
+                self._refresh()
+            version = next(reversed(self._bundles))
+            return version, self._bundles[version]
+
+    def _refresh(self) -> None:
+        bloom, model = self.sources()
+        source_key = (id(bloom), len(bloom), getattr(model, "version", None))
+        if source_key == self._source_key:
+            return
+        t0 = time.perf_counter()
+        version, data = build(bloom, model)
+        self._source_key = source_key
+        if version in self._bundles:
+            self._bundles.move_to_end(version)
+            return
+        self._bundles[version] = data
+        while len(self._bundles) > self.history:
+            self._bundles.popitem(last=False)
+        self._deltas.clear()
+        metrics.incr("bundle.builds")
+        metrics.set_gauge("bundle.bytes", len(data))
+        metrics.observe("bundle.build_ms", (time.perf_counter() - t0) * 1000)
+        logger.info("Built detection bundle %s (%d bytes)", version, len(data))
+
+    def delta(self, base_version: str):
+        """A delta from `base_version` to the current bundle, or None if that version is no longer kept."""
+        version, data = self.current()
+        with self._lock:
+            base = self._bundles.get(base_version)
+            if base is None or base_version == version:
+                return None
+            delta = self._deltas.get((base_version, version))
+            if delta is None:
+                delta = self._deltas[base_version, version] = diff(base, data)
+            return delta
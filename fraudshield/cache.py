@@ -0,0 +1,76 @@
+"""
+FraudShield India — Verdict Cache
+LRU cache of model verdicts keyed by message fingerprint, with a TTL so a
+verdict is re-checked once the model or prompt may have changed. The same
+scam text shows up thousands of times across inbox exports, so most bulk
+lookups never reach the model. shared_cache() is the process-wide one.
+"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fraudshield import metrics
+
+DEFAULT_CAPACITY = 10_000
+DEFAULT_TTL = 3600.0
+
+
+class VerdictCache:
+    """Bounded fingerprint -> verdict map with least-recently-used eviction and expiry."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, ttl: float = DEFAULT_TTL, clock=time.monotonic,
+                 name: str = "verdict_cache"):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self.name = name
+        self._entries = OrderedDict()     # key -> (expires_at, verdict)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, env=None) -> "VerdictCache":
+        env = os.environ if env is None else env
+        return cls(capacity=int(env.get("FRAUDSHIELD_VERDICT_CACHE_SIZE", str(DEFAULT_CAPACITY))),
+                   ttl=float(env.get("FRAUDSHIELD_VERDICT_CACHE_TTL", str(DEFAULT_TTL))))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str):
+        """A copy of the cached verdict, or None if missing or expired."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                metrics.incr(f"{self.name}.misses")
+                return None
+            self._entries.move_to_end(key)
+        metrics.incr(f"{self.name}.hits")
+        return copy.deepcopy(entry[1])
+
+    def put(self, key: str, verdict: dict) -> None:
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, copy.deepcopy(verdict))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                metrics.incr(f"{self.name}.evictions")
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache() -> VerdictCache:
+    """The process-wide VerdictCache from the environment, shared by every model caller."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = VerdictCache.from_env()
+    return _shared
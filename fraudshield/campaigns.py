@@ -0,0 +1,346 @@
+"""
+FraudShield India — Near-duplicate Campaign Detection
+Groups the slight variants of one scam blast (another amount, name or link)
+into a campaign, without an embedding call per message.
+
+- Messages are normalized (case, width, whitespace), then URLs, numbers and
+  amounts are masked, so the variants of one template share most of their
+  text. The text is cut into overlapping character shingles.
+- A MinHash signature of `num_perm` values estimates the Jaccard similarity
+  of two messages' shingle sets. The shingles are hashed once with CRC32,
+  and each permutation is a multiply-shift hash, all in one NumPy pass.
+- The signature is split into `bands` bands. Each band is a key in a hash
+  table, and two messages that agree on any whole band are candidates. The
+  best candidate at or above `threshold` estimated similarity is the
+  campaign; otherwise the message starts a new one. The work per message
+  does not depend on how many campaigns are indexed.
+
+A campaign remembers the first scam verdict the model gave for one of its
+messages, and campaign_verdict() answers later variants with it
+(tier="campaign"). Masking hides the link, so the campaign also keeps the
+link domains and UPI IDs the model has seen in its scam messages; assign()
+lists a message's others as "unseen", and such a message goes to the model.
+A legitimate verdict is never reused: the same alert text with a phishing
+link in it would inherit it. Campaigns not seen for `max_age` seconds are dropped, and
+the least recently seen are evicted beyond `capacity`. The index can be
+snapshotted to disk and restored on start, like the trend counters.
+
+Env vars:
+  FRAUDSHIELD_CAMPAIGNS               – "0" to switch campaign detection off (default "1")
+  FRAUDSHIELD_CAMPAIGN_THRESHOLD      – estimated Jaccard similarity to join a campaign (default 0.6)
+  FRAUDSHIELD_CAMPAIGN_CAPACITY       – campaigns kept (default 50000)
+  FRAUDSHIELD_CAMPAIGN_MAX_AGE_DAYS   – days a campaign is kept after its last message (default 7)
+  FRAUDSHIELD_CAMPAIGN_MIN_CONFIDENCE – model confidence for a verdict to be reused (default 0.8)
+"""
+import base64
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from fraudshield import metrics
+from fraudshield.coalesce import normalize_message
+from fraudshield.rules import EXPLANATIONS
+
+np = None     # imported by _numpy() on first use, so it stays off the cold-start path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_SHINGLE = 5
+DEFAULT_THRESHOLD = 0.6
+DEFAULT_CAPACITY = 50_000
+DEFAULT_MAX_AGE = 7 * 86400.0
+SNAPSHOT_VERSION = 1
+# The verdict fields a campaign keeps; explanations are filled per message by fraudshield.templates.
+VERDICT_FIELDS = ("is_scam", "category", "confidence", "risk_level")
+MAX_IDENTIFIERS = 256     # link domains / UPI IDs kept per campaign; later ones keep going to the model
+
+_URL = re.compile(r"(?:https?://|www\.)\S+|\b[\w-]+(?:\.[\w-]+)*\.(?:com|in|net|org|co|info|xyz|vip|top|online|site|"
+                  r"live|link|click|ly|gd|me|io|app)\b(?:/\S*)?", re.I)
+_AMOUNT = re.compile(r"(?:rs\.?|inr|₹)\s*[\d,]+(?:\.\d+)?", re.I)
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def _numpy():
+    """numpy, imported when the first message is hashed or a snapshot is restored; None if missing."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:     # pragma: no cover - numpy is in requirements.txt
+            return None
+        np = numpy
+    return np
+
+
+def mask(message: str) -> str:
+    """Normalized text with URLs, amounts and numbers replaced by placeholders."""
+    text = _URL.sub("<url>", normalize_message(message))
+    return _NUMBER.sub("0", _AMOUNT.sub("<amt>", text))
+
+
+def shingles(message: str, k: int = DEFAULT_SHINGLE) -> set:
+    """Overlapping `k`-character shingles of the masked message."""
+    text = mask(message)
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+class Campaign:
+    """One group of near-duplicate messages. Not thread-safe; CampaignIndex holds the lock."""
+
+    __slots__ = ("id", "signature", "size", "first_seen", "last_seen", "verdict", "example", "identifiers")
+
+    def __init__(self, id: str, signature, now: float, example: str = ""):
+        self.id = id
+        self.signature = signature
+        self.size = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.verdict = None
+        self.example = example
+        self.identifiers = set()
+
+    def summary(self, similarity: float = 1.0) -> dict:
+        return {"campaign_id": self.id, "size": self.size, "similarity": round(similarity, 2),
+                "first_seen": self.first_seen, "last_seen": self.last_seen,
+                "verdict": dict(self.verdict) if self.verdict else None}
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "signature": base64.b64encode(self.signature.tobytes()).decode("ascii"),
+                "size": self.size, "first_seen": self.first_seen, "last_seen": self.last_seen,
+                "verdict": self.verdict, "example": self.example, "identifiers": sorted(self.identifiers)}
+
+    @classmethod
+    def from_dict(cls, data: dict, num_perm: int) -> "Campaign":
+        _numpy()
+        signature = np.frombuffer(base64.b64decode(data["signature"]), dtype=np.uint32).copy()
+        if len(signature) != num_perm:
+            raise ValueError("signature length mismatch")
+        campaign = cls(data["id"], signature, data["first_seen"], data.get("example", ""))
+        campaign.size, campaign.last_seen = data["size"], data["last_seen"]
+        if (data["verdict"] or {}).get("is_scam"):
+            campaign.verdict = data["verdict"]
+            campaign.identifiers = set(data.get("identifiers", ()))
+        return campaign
+
+
+class CampaignIndex:
+    """MinHash signatures of recent messages with an LSH banding index over them."""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, bands: int = DEFAULT_BANDS, shingle: int = DEFAULT_SHINGLE,
+                 threshold: float = DEFAULT_THRESHOLD, capacity: int = DEFAULT_CAPACITY,
+                 max_age: float = DEFAULT_MAX_AGE, seed: int = 1, clock=time.time):
+        if importlib.util.find_spec("numpy") is None:
+            raise RuntimeError("numpy is required for campaign detection")
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        self.threshold = threshold
+        self.capacity = capacity
+        self.max_age = max_age
+        self.seed = seed
+        self.clock = clock
+        self._hash = None                               # (a, b) per permutation, drawn on first use
+        self._campaigns = OrderedDict()                 # id -> Campaign, least recently seen first
+        self._buckets = [{} for _ in range(bands)]      # band bytes -> campaign id, per band
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """An index configured from FRAUDSHIELD_CAMPAIGN_*, or None if switched off or numpy is missing."""
+        if os.environ.get("FRAUDSHIELD_CAMPAIGNS", "1") == "0":
+            return None
+        if importlib.util.find_spec("numpy") is None:
+            logger.warning("numpy is not installed; campaign detection is disabled")
+            return None
+        return cls(threshold=float(os.environ.get("FRAUDSHIELD_CAMPAIGN_THRESHOLD", str(DEFAULT_THRESHOLD))),
+                   capacity=int(os.environ.get("FRAUDSHIELD_CAMPAIGN_CAPACITY", str(DEFAULT_CAPACITY))),
+                   max_age=float(os.environ.get("FRAUDSHIELD_CAMPAIGN_MAX_AGE_DAYS", "7")) * 86400)
+
+    def __len__(self) -> int:
+        return len(self._campaigns)
+
+    def _permutations(self) -> tuple:
+        if self._hash is None:
+            np = _numpy()
+            rng = np.random.default_rng(self.seed)
+            a = rng.integers(1, 1 << 63, size=self.num_perm, dtype=np.uint64) | np.uint64(1)
+            self._hash = (a, rng.integers(0, 1 << 63, size=self.num_perm, dtype=np.uint64))
+        return self._hash
+
+    def signature(self, message: str):
+        """The MinHash signature of `message` (uint32 × num_perm), or None if it has no text."""
+        grams = shingles(message, self.shingle)
+        if not grams:
+            return None
+        a, b = self._permutations()
+        x = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        # Multiply-shift: the top 32 bits of a*x + b (mod 2**64), one row per permutation.
+        hashed = (a[:, None] * x[None, :] + b[:, None]) >> np.uint64(32)
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def _bands(self, signature) -> list:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _candidate(self, signature, keys: list):
+        best, best_similarity = None, 0.0
+        for band, key in enumerate(keys):
+            campaign = self._campaigns.get(self._buckets[band].get(key))
+            if campaign is None or campaign is best:
+                continue
+            similarity = float(np.count_nonzero(campaign.signature == signature)) / self.num_perm
+            if similarity > best_similarity:
+                best, best_similarity = campaign, similarity
+        return best, best_similarity
+
+    def assign(self, message: str, ts: float = None, identifiers=()):
+        """The campaign summary for `message`, starting a new campaign if no indexed one is close enough.
+
+        `identifiers` are the message's link domains and UPI IDs; the summary's "unseen" lists those the
+        campaign's verdict was not given for. Returns None for a message with no text.
+        """
+        signature = self.signature(message)
+        if signature is None:
+            return None
+        keys = self._bands(signature)
+        now = self.clock() if ts is None else ts
+        with self._lock:
+            self._age(now)
+            campaign, similarity = self._candidate(signature, keys)
+            if campaign is None or similarity < self.threshold:
+                campaign_id = hashlib.blake2b(signature.tobytes(), digest_size=6).hexdigest()
+                campaign = self._campaigns.get(campaign_id)
+                if campaign is None:
+                    campaign = self._campaigns[campaign_id] = Campaign(campaign_id, signature, now, message[:160])
+                    for band, key in enumerate(keys):
+                        self._buckets[band].setdefault(key, campaign_id)
+                    metrics.incr("campaigns.created")
+                    self._evict()
+                similarity = 1.0
+            else:
+                metrics.incr("campaigns.matched")
+            campaign.size += 1
+            campaign.last_seen = max(campaign.last_seen, now)
+            self._campaigns.move_to_end(campaign.id)
+            summary = campaign.summary(similarity)
+            summary["unseen"] = [i for i in dict.fromkeys(identifiers) if i not in campaign.identifiers]
+            return summary
+
+    def set_verdict(self, campaign_id: str, verdict: dict, identifiers=()) -> bool:
+        """Remember a scam `verdict` and the `identifiers` it was given for.
+
+        The first verdict stays; a later one only adds its identifiers. Returns True if `verdict` was
+        stored, False if the campaign is gone, already has one or the verdict is not a scam.
+        """
+        if not verdict.get("is_scam"):
+            return False
+        with self._lock:
+            campaign = self._campaigns.get(campaign_id)
+            if campaign is None:
+                return False
+            for identifier in identifiers:
+                if len(campaign.identifiers) >= MAX_IDENTIFIERS:
+                    break
+                campaign.identifiers.add(identifier)
+            if campaign.verdict is not None:
+                return False
+            campaign.verdict = {k: verdict[k] for k in VERDICT_FIELDS if k in verdict}
+            return True
+
+    def get(self, campaign_id: str):
+        with self._lock:
+            campaign = self._campaigns.get(campaign_id)
+            return campaign.summary() if campaign is not None else None
+
+    def top(self, n: int = 10) -> list:
+        """The `n` largest live campaigns, with an example message each."""
+        with self._lock:
+            self._age(self.clock())
+            largest = sorted(self._campaigns.values(), key=lambda c: -c.size)[:n]
+            return [{**c.summary(), "example": c.example} for c in largest]
+
+    def _drop(self, campaign: Campaign) -> None:
+        del self._campaigns[campaign.id]
+        for band, key in enumerate(self._bands(campaign.signature)):
+            if self._buckets[band].get(key) == campaign.id:
+                del self._buckets[band][key]
+
+    def _age(self, now: float) -> None:
+        while self._campaigns:
+            oldest = next(iter(self._campaigns.values()))
+            if oldest.last_seen > now - self.max_age:
+                break
+            self._drop(oldest)
+            metrics.incr("campaigns.expired")
+
+    def _evict(self) -> None:
+        while len(self._campaigns) > self.capacity:
+            self._drop(next(iter(self._campaigns.values())))
+            metrics.incr("campaigns.evictions")
+
+    def snapshot(self, path: str) -> None:
+        """Write every campaign to `path` atomically."""
+        with self._lock:
+            data = {"version": SNAPSHOT_VERSION, "saved_at": self.clock(),
+                    "params": [self.num_perm, self.bands, self.shingle, self.seed],
+                    "campaigns": [c.to_dict() for c in self._campaigns.values()]}
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def restore(self, path: str) -> bool:
+        """Load a snapshot written by `snapshot`. Returns False if there is none or it is unusable."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"snapshot version {data.get('version')}")
+            if data["params"] != [self.num_perm, self.bands, self.shingle, self.seed]:
+                raise ValueError("signature parameters differ")
+            campaigns = [Campaign.from_dict(c, self.num_perm) for c in data["campaigns"]]
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning("Ignoring campaign snapshot %s: %s", path, exc)
+            return False
+        with self._lock:
+            self._campaigns = OrderedDict((c.id, c) for c in sorted(campaigns, key=lambda c: c.last_seen))
+            self._buckets = [{} for _ in range(self.bands)]
+            for campaign in self._campaigns.values():
+                for band, key in enumerate(self._bands(campaign.signature)):
+                    self._buckets[band].setdefault(key, campaign.id)
+            self._age(self.clock())
+            self._evict()
+        return True
+
+
+def campaign_verdict(campaign: dict) -> dict:
+    """A full verdict dict (tier="campaign") from the verdict already known for a message's campaign."""
+    verdict = campaign["verdict"]
+    category = verdict["category"]
+    is_scam = verdict.get("is_scam", category != "legitimate")
+    explanation_en, explanation_hi = EXPLANATIONS[category]
+    return {
+        "is_scam": is_scam,
+        "category": category,
+        "confidence": verdict.get("confidence", 0.8),
+        "risk_level": verdict.get("risk_level", "high" if is_scam else "low"),
+        "explanation_en": explanation_en,
+        "explanation_hi": explanation_hi,
+        "red_flags": [f"part of a campaign of {campaign['size']} similar messages"] if is_scam else [],
+        "tier": "campaign",
+    }
@@ -0,0 +1,141 @@
+"""
+FraudShield India — Detection Classifier
+One model classification path for every caller: function_app, the detection
+agent, the batch pipeline and the bulk scanner.
+
+- The prompt is a fixed system message followed by a short user message
+  with the source, sender and text (fraudshield/prompting.py). Every call
+  therefore starts with the same tokens, which is what the provider's
+  prompt-prefix cache matches on.
+- Calls go through the shared ModelRouter (pooled clients, failover) and a
+  ModelGuard. When the guard sheds a call, every deployment is throttled,
+  failing or out of budget, the output is unusable after repair, or a
+  coalesced call times out, the rule verdict (tier="rules") is returned and
+  not cached.
+- Optional SingleFlight coalescing and a VerdictCache sit in front.
+  from_env() uses the process-wide guard, SingleFlight and cache that
+  function_app uses too, so one process has one concurrency limit, one
+  breaker and one set of in-flight calls.
+"""
+import copy
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from fraudshield import metrics
+from fraudshield.cache import VerdictCache, shared_cache
+from fraudshield.coalesce import CoalesceTimeout, SingleFlight, fingerprint, shared_inflight
+from fraudshield.limiter import CircuitOpen, ModelGuard, Overloaded, shared_guard
+from fraudshield.parsing import VerdictParseError, complete_verdict
+from fraudshield.prompting import build_explain_messages, build_messages, record_usage
+from fraudshield.router import NoDeploymentAvailable, is_retryable, shared_router
+from fraudshield.rules import EXPLANATIONS, rule_verdict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+# Errors that mean "no model verdict right now" rather than a bad request.
+UNAVAILABLE = (CircuitOpen, Overloaded, NoDeploymentAvailable, VerdictParseError, CoalesceTimeout)
+
+
+def _unavailable(exc: Exception) -> bool:
+    """True for UNAVAILABLE errors and the 429/5xx/transport error left after every deployment failed."""
+    return isinstance(exc, UNAVAILABLE) or is_retryable(exc)
+
+
+class DetectionClassifier:
+    """Classifies messages with the model; `create` is a chat-completions callable (messages=..., ...)."""
+
+    def __init__(self, create, inflight: SingleFlight = None, cache: VerdictCache = None,
+                 variant: str = None, max_completion_tokens: int = 500):
+        self.create = create
+        self.inflight = inflight
+        self.cache = cache
+        self.variant = variant
+        self.max_completion_tokens = max_completion_tokens
+
+    @classmethod
+    def from_env(cls, guard: ModelGuard = None, **kwargs) -> "DetectionClassifier":
+        """A classifier on the shared router, guard, SingleFlight and cache unless others are passed in."""
+        guard = guard or shared_guard()
+        kwargs.setdefault("inflight", shared_inflight())
+        kwargs.setdefault("cache", shared_cache())
+        return cls(lambda **kw: guard.call(shared_router().create, **kw), **kwargs)
+
+    def model_verdict(self, message: str, source: str = "unknown", sender: str = "unknown",
+                      variant: str = None) -> dict:
+        """One model call (no cache or coalescing); the rule verdict if the model is unavailable."""
+        messages, info = build_messages(message, source, sender, variant=variant or self.variant)
+        try:
+            response, verdict = complete_verdict(
+                self.create, messages, max_completion_tokens=self.max_completion_tokens, variant=info["variant"],
+            )
+        except Exception as exc:
+            if not _unavailable(exc):
+                raise
+            logger.warning("Model unavailable (%s); returning rule-based verdict.", exc)
+            metrics.incr("classify.rule_fallback")
+            return rule_verdict(message)
+        record_usage(response, info)
+        return verdict
+
+    def explain(self, message: str, verdict: dict) -> dict:
+        """English and Hindi explanations and red flags for an existing verdict.
+
+        The canned category explanation is returned (tier="rules") if the model is unavailable.
+        """
+        messages, info = build_explain_messages(message, verdict)
+        try:
+            response, explanation = complete_verdict(
+                self.create, messages, max_completion_tokens=self.max_completion_tokens, variant="explain",
+            )
+        except Exception as exc:
+            if not _unavailable(exc):
+                raise
+            logger.warning("Model unavailable (%s); returning the canned explanation.", exc)
+            metrics.incr("explain.rule_fallback")
+            explanation_en, explanation_hi = EXPLANATIONS.get(verdict.get("category"), EXPLANATIONS["legitimate"])
+            return {"explanation_en": explanation_en, "explanation_hi": explanation_hi,
+                    "red_flags": rule_verdict(message)["red_flags"], "tier": "rules"}
+        record_usage(response, info)
+        return explanation
+
+    def classify(self, message: str, source: str = "unknown", sender: str = "unknown",
+                 variant: str = None) -> dict:
+        variant = variant or self.variant
+        key = fingerprint(message) + (f":{variant}" if variant else "")
+        if self.cache is not None:
+            verdict = self.cache.get(key)
+            if verdict is not None:
+                return verdict
+        call = lambda: self.model_verdict(message, source, sender, variant)   # noqa: E731
+        try:
+            verdict = self.inflight.do(key, call) if self.inflight is not None else call()
+        except CoalesceTimeout as exc:
+            logger.warning("Shared model call timed out (%s); returning rule-based verdict.", exc)
+            metrics.incr("classify.rule_fallback")
+            verdict = rule_verdict(message)
+        # Rule fallbacks are not cached, so the model is asked again once it recovers.
+        if self.cache is not None and "tier" not in verdict:
+            self.cache.put(key, verdict)
+        return copy.deepcopy(verdict)
+
+    def classify_many(self, messages, source: str = "unknown", sender: str = "unknown",
+                      workers: int = DEFAULT_WORKERS) -> list:
+        """Classify several messages concurrently; verdicts come back in input order.
+
+        Each message is a string or a dict with "message" and optional "source"/"sender".
+        A message whose call fails gets {"error": ...} in its place.
+        """
+        items = [m if isinstance(m, dict) else {"message": m} for m in messages]
+
+        def one(item):
+            try:
+                return self.classify(item["message"], item.get("source", source), item.get("sender", sender))
+            except Exception as exc:
+                logger.warning("classify_many: %s", exc)
+                return {"error": str(exc)}
+
+        if len(items) <= 1:
+            return [one(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(workers, len(items)), thread_name_prefix="fraudshield-classify") as pool:
+            return list(pool.map(one, items))
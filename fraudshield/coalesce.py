@@ -0,0 +1,113 @@
+"""
+FraudShield India — Request Coalescing
+Single-flight deduplication: when a scam SMS blast arrives, concurrent
+requests with the same normalized fingerprint wait on one shared model call
+instead of each issuing their own. shared_inflight() is the process-wide
+SingleFlight for model classifications.
+
+Env vars:
+  FRAUDSHIELD_COALESCE_TIMEOUT – seconds a waiter waits for the shared call (default 60)
+"""
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+
+from fraudshield import metrics
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Fold case, Unicode width variants and whitespace so trivial copies match."""
+    text = unicodedata.normalize("NFKC", message or "").casefold()
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def fingerprint(message: str) -> str:
+    """Stable key for a message after normalization."""
+    return hashlib.sha1(normalize_message(message).encode("utf-8")).hexdigest()
+
+
+class CoalesceTimeout(TimeoutError):
+    """Raised to a waiter whose shared call did not finish within its timeout."""
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its outcome.
+
+    The first caller for a key (the leader) runs `fn`. Callers arriving while it
+    runs wait for the leader's result, or get the leader's exception re-raised.
+    Counters `<name>.calls`, `<name>.leaders`, `<name>.coalesced` and the gauge
+    `<name>.ratio` show how much work was saved.
+    """
+
+    def __init__(self, name: str = "coalesce", timeout: float = 60.0):
+        self.name = name
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._flights: dict = {}
+
+    def do(self, key: str, fn, timeout: float = None):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+            in_flight = len(self._flights)
+
+        metrics.incr(f"{self.name}.calls")
+        metrics.incr(f"{self.name}.leaders" if leader else f"{self.name}.coalesced")
+        metrics.set_gauge(f"{self.name}.in_flight", in_flight)
+        metrics.set_gauge(f"{self.name}.ratio", metrics.ratio(f"{self.name}.coalesced", f"{self.name}.calls"))
+
+        if leader:
+            try:
+                flight.result = fn()
+            except BaseException as exc:
+                flight.error = exc
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+            return flight.result
+
+        if not flight.done.wait(self.timeout if timeout is None else timeout):
+            metrics.incr(f"{self.name}.timeouts")
+            raise CoalesceTimeout(f"Timed out waiting for shared call {key[:12]}")
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_inflight() -> SingleFlight:
+    """The process-wide SingleFlight for model classifications, so callers coalesce across modules."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = SingleFlight("classify.coalesce",
+                                       timeout=float(os.environ.get("FRAUDSHIELD_COALESCE_TIMEOUT", "60")))
+    return _shared
@@ -0,0 +1,372 @@
+"""
+FraudShield India — Distilled Local Classifier
+A small model trained on the verdicts the LLM has already returned, so the
+common, easy messages can be answered locally.
+
+- VerdictLog appends (normalized message, category, confidence) for every
+  model verdict to an NDJSON file. Logging is opt-in: nothing is written
+  unless FRAUDSHIELD_DISTILL_LOG is set.
+- featurize() hashes character 2–4-grams and words into a fixed number of
+  buckets; DistilledModel is a softmax linear classifier over those features
+  for the eight CATEGORIES, trained with NumPy (train()).
+- Confidences are calibrated on a held-out split (temperature scaling), and
+  the artifact stores the lowest confidence at which held-out predictions
+  agreed with the LLM at least `target_agreement` of the time.
+- The artifact is one compressed .npz (float16 weights plus JSON metadata
+  with a version string); it loads in a few milliseconds.
+
+function_app runs it in one of three modes (FRAUDSHIELD_DISTILL_MODE):
+  off     – never consulted
+  shadow  – every model verdict is compared with the local prediction;
+            ShadowStats reports agreement and the share of calls it would save
+  cascade – a local prediction at or above the threshold is the answer; the
+            LLM is called otherwise
+
+Training: python agents/detection/train_distilled.py --log verdicts.ndjson
+
+Env vars:
+  FRAUDSHIELD_DISTILL_LOG        – NDJSON file to log model verdicts to (default: not logged)
+  FRAUDSHIELD_DISTILL_LOG_MAX_MB – size at which the log rolls over to <path>.1 (default 100)
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+
+from fraudshield import metrics
+from fraudshield.coalesce import normalize_message
+from fraudshield.prompting import CATEGORIES
+from fraudshield.rules import EXPLANATIONS
+
+np = None     # imported by _numpy() on first use, so it stays off the cold-start path
+
+logger = logging.getLogger(__name__)
+
+ASSET_PATH = os.path.join(os.path.dirname(__file__), "assets", "distilled_model.npz")
+FORMAT_VERSION = 1
+DEFAULT_DIM = 1 << 14
+NGRAMS = (2, 3, 4)
+MODES = ("off", "shadow", "cascade")
+DEFAULT_TARGET_AGREEMENT = 0.97
+MIN_CONFIDENT_HOLDOUT = 20
+
+_WORD = re.compile(r"\w+")
+
+
+def _numpy():
+    """numpy, imported on first use (it costs ~95 ms and most deployments ship no artifact); None if missing."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:     # pragma: no cover - numpy is in requirements.txt
+            return None
+        np = numpy
+    return np
+
+
+# ── Verdict log ───────────────────────────────────────────────────────────────
+
+class VerdictLog:
+    """Appends one NDJSON line per model verdict; rolls over to `<path>.1` at `max_bytes`."""
+
+    def __init__(self, path: str, max_bytes: int = 100 << 20, clock=time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """A log at FRAUDSHIELD_DISTILL_LOG, or None (nothing is logged) if it is not set."""
+        path = os.environ.get("FRAUDSHIELD_DISTILL_LOG")
+        if not path:
+            return None
+        return cls(path, max_bytes=int(os.environ.get("FRAUDSHIELD_DISTILL_LOG_MAX_MB", "100")) << 20)
+
+    def append(self, message: str, verdict: dict) -> None:
+        category = verdict.get("category")
+        if category not in CATEGORIES or "tier" in verdict:
+            return
+        line = json.dumps({"text": normalize_message(message), "category": category,
+                           "confidence": verdict.get("confidence"), "ts": round(self.clock(), 3)},
+                          ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            metrics.incr("distill.logged")
+        except OSError as exc:
+            logger.warning("Could not log verdict to %s: %s", self.path, exc)
+
+
+def read_log(paths, min_confidence: float = 0.0):
+    """(texts, labels, weights) from one or more verdict logs; the latest verdict per text wins."""
+    latest = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                confidence = row.get("confidence")
+                if row.get("category") not in CATEGORIES or not row.get("text"):
+                    continue
+                if not isinstance(confidence, (int, float)) or confidence < min_confidence:
+                    continue
+                latest[row["text"]] = (row["category"], float(confidence))
+    texts = list(latest)
+    return texts, [latest[t][0] for t in texts], [latest[t][1] for t in texts]
+
+
+# ── Features ──────────────────────────────────────────────────────────────────
+
+def _bucket(token: str, dim: int) -> int:
+    return zlib.crc32(token.encode("utf-8")) & (dim - 1)
+
+
+def featurize(message: str, dim: int = DEFAULT_DIM) -> tuple:
+    """(indices, values): hashed char n-grams and words, log-scaled and L2-normalized."""
+    _numpy()
+    text = normalize_message(message)
+    counts = {}
+    padded = f" {text} "
+    for n in NGRAMS:
+        for i in range(len(padded) - n + 1):
+            j = _bucket(padded[i:i + n], dim)
+            counts[j] = counts.get(j, 0) + 1
+    for word in _WORD.findall(text):
+        j = _bucket(f"w:{word}", dim)
+        counts[j] = counts.get(j, 0) + 1
+    indices = np.fromiter(counts, dtype=np.int64, count=len(counts))
+    values = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    norm = float(np.linalg.norm(values))
+    return indices, values / norm if norm else values
+
+
+def _dense(rows, dim: int):
+    """A dense matrix for a few sparse rows; only ever built one mini-batch at a time."""
+    X = np.zeros((len(rows), dim), dtype=np.float32)
+    for r, (indices, values) in enumerate(rows):
+        X[r, indices] = values
+    return X
+
+
+def _logits(rows, W, b):
+    """Logits for sparse rows, without densifying them."""
+    return np.stack([values @ W[indices] for indices, values in rows]) + b
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    e = np.exp(logits)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+# ── Model ─────────────────────────────────────────────────────────────────────
+
+class DistilledModel:
+    """Softmax linear classifier over hashed features; `threshold` gates local answers."""
+
+    def __init__(self, weights, bias, meta: dict):
+        self.weights = weights.astype("float32")
+        self.bias = bias.astype("float32")
+        self.meta = meta
+        self.categories = tuple(meta["categories"])
+        self.dim = int(meta["dim"])
+        self.temperature = float(meta.get("temperature", 1.0))
+        self.threshold = float(meta.get("threshold", 1.01))
+
+    @property
+    def version(self) -> str:
+        return self.meta.get("version", "unknown")
+
+    def probabilities(self, message: str):
+        indices, values = featurize(message, self.dim)
+        logits = values @ self.weights[indices] + self.bias
+        return _softmax((logits / self.temperature)[None, :])[0]
+
+    def predict(self, message: str) -> tuple:
+        """(category, calibrated confidence)."""
+        probs = self.probabilities(message)
+        k = int(probs.argmax())
+        return self.categories[k], float(probs[k])
+
+    def verdict(self, message: str, category: str = None, confidence: float = None) -> dict:
+        """A full verdict dict (tier="distilled") for a local answer."""
+        if category is None:
+            category, confidence = self.predict(message)
+        is_scam = category != "legitimate"
+        explanation_en, explanation_hi = EXPLANATIONS[category]
+        return {
+            "is_scam": is_scam,
+            "category": category,
+            "confidence": round(confidence, 2),
+            "risk_level": ("high" if confidence >= 0.9 else "medium") if is_scam else "low",
+            "explanation_en": explanation_en,
+            "explanation_hi": explanation_hi,
+            "red_flags": [f"matches {category.replace('_', ' ')} pattern"] if is_scam else [],
+            "tier": "distilled",
+            "model_version": self.version,
+        }
+
+    def save(self, path: str) -> None:
+        """Write the artifact to `path` atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, weights=self.weights.astype(np.float16), bias=self.bias,
+                            meta=np.array(json.dumps(self.meta)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Read an artifact written by `save`. Returns None if there is none or it is unusable."""
+        if not os.path.exists(path):
+            return None
+        if _numpy() is None:
+            logger.warning("numpy is not installed; the distilled classifier is disabled")
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("format") != FORMAT_VERSION:
+                    raise ValueError(f"unsupported format {meta.get('format')}")
+                model = cls(data["weights"], data["bias"], meta)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Ignoring distilled model %s: %s", path, exc)
+            return None
+        if model.weights.shape != (model.dim, len(model.categories)):
+            logger.warning("Ignoring distilled model %s: weight shape %s", path, model.weights.shape)
+            return None
+        return model
+
+
+# ── Training ──────────────────────────────────────────────────────────────────
+
+def _fit(rows, y, w, dim: int, classes: int, epochs: int, lr: float, l2: float, batch: int, rng):
+    """Mini-batch Adam on the weighted softmax cross-entropy; `rows` stay sparse between batches."""
+    W = np.zeros((dim, classes), dtype=np.float32)
+    b = np.zeros(classes, dtype=np.float32)
+    mW, vW, mb, vb = np.zeros_like(W), np.zeros_like(W), np.zeros_like(b), np.zeros_like(b)
+    beta1, beta2, eps, step = 0.9, 0.999, 1e-8, 0
+    Y = np.eye(classes, dtype=np.float32)[y]
+    for _ in range(epochs):
+        order = rng.permutation(len(y))
+        for start in range(0, len(y), batch):
+            idx = order[start:start + batch]
+            Xb, wb = _dense([rows[i] for i in idx], dim), w[idx, None]
+            grad = (_softmax(Xb @ W + b) - Y[idx]) * wb / wb.sum()
+            gW = Xb.T @ grad + l2 * W
+            gb = grad.sum(axis=0)
+            step += 1
+            for p, g, m, v in ((W, gW, mW, vW), (b, gb, mb, vb)):
+                m *= beta1
+                m += (1 - beta1) * g
+                v *= beta2
+                v += (1 - beta2) * g * g
+                p -= lr * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + eps)
+    return W, b
+
+
+def _calibrate(logits, y) -> float:
+    """Temperature that minimizes held-out negative log-likelihood."""
+    best_t, best_nll = 1.0, float("inf")
+    for t in np.geomspace(0.25, 8.0, 41):
+        probs = _softmax(logits / t)
+        nll = -float(np.mean(np.log(probs[np.arange(len(y)), y] + 1e-12)))
+        if nll < best_nll:
+            best_t, best_nll = float(t), nll
+    return best_t
+
+
+def _threshold(confidence, correct, target: float, min_count: int) -> float:
+    """Lowest confidence at which everything at or above it agrees at least `target` of the time."""
+    order = np.argsort(-confidence)
+    agree = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+    ok = np.nonzero(agree[min_count - 1:] >= target)[0]
+    return float(confidence[order[ok[-1] + min_count - 1]]) if len(ok) else 1.01
+
+
+def train(texts, labels, weights=None, dim: int = DEFAULT_DIM, epochs: int = 20, lr: float = 0.05,
+          l2: float = 1e-6, batch: int = 256, holdout: float = 0.2,
+          target_agreement: float = DEFAULT_TARGET_AGREEMENT, seed: int = 0) -> DistilledModel:
+    """Train, calibrate and pick the cascade threshold; held-out stats go in `model.meta`."""
+    if _numpy() is None:
+        raise RuntimeError("numpy is required to train the distilled classifier")
+    if dim & (dim - 1):
+        raise ValueError("dim must be a power of two")
+    index = {c: k for k, c in enumerate(CATEGORIES)}
+    y = np.array([index[label] for label in labels], dtype=np.int64)
+    w = np.ones(len(y), dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+    rows = [featurize(t, dim) for t in texts]
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(y))
+    n_hold = int(len(y) * holdout)
+    hold, fit = order[:n_hold], order[n_hold:]
+
+    t0 = time.perf_counter()
+    W, b = _fit([rows[i] for i in fit], y[fit], w[fit], dim, len(CATEGORIES), epochs, lr, l2, batch, rng)
+    meta = {"format": FORMAT_VERSION, "categories": list(CATEGORIES), "dim": dim, "ngrams": list(NGRAMS),
+            "samples": int(len(y)), "train_seconds": round(time.perf_counter() - t0, 2),
+            "target_agreement": target_agreement, "temperature": 1.0, "threshold": 1.01}
+    if n_hold:
+        logits = _logits([rows[i] for i in hold], W, b)
+        meta["temperature"] = temperature = _calibrate(logits, y[hold])
+        probs = _softmax(logits / temperature)
+        confidence, correct = probs.max(axis=1), (probs.argmax(axis=1) == y[hold]).astype(np.float32)
+        meta["threshold"] = threshold = _threshold(confidence, correct, target_agreement,
+                                                   min(MIN_CONFIDENT_HOLDOUT, n_hold))
+        local = confidence >= threshold
+        meta["holdout"] = {
+            "samples": int(n_hold),
+            "agreement": round(float(correct.mean()), 4),
+            "local_share": round(float(local.mean()), 4),
+            "local_agreement": round(float(correct[local].mean()), 4) if local.any() else None,
+        }
+    digest = hashlib.sha1(W.astype(np.float16).tobytes()).hexdigest()[:8]
+    meta["version"] = f"{time.strftime('%Y%m%d%H%M%S', time.gmtime())}-{digest}"
+    return DistilledModel(W, b, meta)
+
+
+# ── Shadow mode ───────────────────────────────────────────────────────────────
+
+class ShadowStats:
+    """Agreement between local predictions and model verdicts, and the share the cascade would answer."""
+
+    def __init__(self, name: str = "distill.shadow"):
+        self.name = name
+        self._lock = threading.Lock()
+        self.calls = self.agree = self.confident = self.confident_agree = 0
+
+    def record(self, category: str, confidence: float, threshold: float, model_category: str) -> None:
+        agree = category == model_category
+        confident = confidence >= threshold
+        with self._lock:
+            self.calls += 1
+            self.agree += agree
+            self.confident += confident
+            self.confident_agree += confident and agree
+            summary = self.summary()
+        metrics.incr(f"{self.name}.calls")
+        metrics.set_gauge(f"{self.name}.agreement", summary["agreement"])
+        metrics.set_gauge(f"{self.name}.calls_saved", summary["calls_saved"])
+        metrics.set_gauge(f"{self.name}.saved_agreement", summary["saved_agreement"])
+
+    def summary(self) -> dict:
+        calls = self.calls or 1
+        return {
+            "calls": self.calls,
+            "agreement": round(self.agree / calls, 4),
+            "calls_saved": round(self.confident / calls, 4),
+            "saved_agreement": round(self.confident_agree / self.confident, 4) if self.confident else None,
+        }
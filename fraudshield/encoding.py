@@ -0,0 +1,150 @@
+"""
+FraudShield India — Response Encoding
+Content negotiation for API responses, so that clients on slow mobile
+connections can ask for smaller payloads.
+
+- Accept: application/msgpack returns MessagePack instead of JSON.
+- Accept-Encoding: br or gzip compresses bodies of at least
+  FRAUDSHIELD_COMPRESS_MIN_BYTES; smaller ones gain little over a TCP packet.
+- select() keeps only the requested top-level fields, and can drop the
+  request echoes (message, source, sender).
+
+JSON is written with orjson when it is installed, otherwise with the json
+module; both are compact and keep non-ASCII text as UTF-8. msgpack and brotli
+are also optional; a client asking for them is served JSON or gzip instead.
+Every response carries Vary: Accept, Accept-Encoding.
+
+Env vars:
+  FRAUDSHIELD_COMPRESS_MIN_BYTES – smallest body that is compressed (default 512)
+  FRAUDSHIELD_BROTLI_QUALITY     – brotli quality 0-11 (default 5)
+  FRAUDSHIELD_GZIP_LEVEL         – gzip level 1-9 (default 6)
+"""
+import gzip
+import json
+import os
+
+from fraudshield import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+# Media types clients use for MessagePack.
+_MSGPACK_ALIASES = {MSGPACK, "application/x-msgpack", "application/vnd.msgpack"}
+
+ECHO_FIELDS = ("message", "source", "sender")
+# Always returned, whatever fields were selected.
+KEEP_FIELDS = ("verdict_id",)
+
+COMPRESS_MIN_BYTES = int(os.environ.get("FRAUDSHIELD_COMPRESS_MIN_BYTES", "512"))
+BROTLI_QUALITY = int(os.environ.get("FRAUDSHIELD_BROTLI_QUALITY", "5"))
+GZIP_LEVEL = int(os.environ.get("FRAUDSHIELD_GZIP_LEVEL", "6"))
+
+
+def dumps(obj) -> bytes:
+    """Compact UTF-8 JSON, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _preferences(header: str) -> list:
+    """Parse an Accept-style header into [(value, q)], highest q first, in header order on ties."""
+    prefs = []
+    for i, part in enumerate((header or "").split(",")):
+        value, _, params = part.partition(";")
+        value = value.strip().lower()
+        if not value:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, number = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        prefs.append((value, q, i))
+    prefs.sort(key=lambda p: (-p[1], p[2]))
+    return [(value, q) for value, q, _ in prefs]
+
+
+def media_type(accept: str) -> str:
+    """JSON or MessagePack, whichever the Accept header prefers and this process can write."""
+    for value, q in _preferences(accept):
+        if q <= 0:
+            continue
+        if value in _MSGPACK_ALIASES and msgpack is not None:
+            return MSGPACK
+        if value in (JSON, "application/*", "*/*"):
+            return JSON
+    return JSON
+
+
+def content_encoding(accept_encoding: str) -> str:
+    """br, gzip or identity, from an Accept-Encoding header."""
+    available = {"gzip"} | ({"br"} if brotli is not None else set())
+    prefs = _preferences(accept_encoding)
+    refused = {value for value, q in prefs if q <= 0}
+    for value, q in prefs:
+        if q <= 0:
+            continue
+        if value in available:
+            return value
+        elif value == "*":
+            for coding in ("br", "gzip"):
+                if coding in available and coding not in refused:
+                    return coding
+    return "identity"
+
+
+def select(result: dict, fields=None, echo: bool = True) -> dict:
+    """Keep only `fields` (a list or comma-separated string) and, unless `echo`, drop the request echoes."""
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(",") if f.strip()]
+    if fields:
+        keep = set(fields) | set(KEEP_FIELDS)
+        result = {k: v for k, v in result.items() if k in keep}
+    if not echo:
+        result = {k: v for k, v in result.items() if k not in ECHO_FIELDS}
+    return result
+
+
+def encode(obj, accept: str = None, accept_encoding: str = None) -> tuple:
+    """Serialise `obj` for a request's Accept and Accept-Encoding headers.
+
+    Returns (body_bytes, headers) with Content-Type, Vary and, when the body
+    was compressed, Content-Encoding.
+    """
+    kind = media_type(accept)
+    body = msgpack.packb(obj, use_bin_type=True) if kind == MSGPACK else dumps(obj)
+    headers = {"Content-Type": kind if kind == MSGPACK else f"{JSON}; charset=utf-8",
+               "Vary": "Accept, Accept-Encoding"}
+    body, coding = compress(body, accept_encoding)
+    if coding != "identity":
+        headers["Content-Encoding"] = coding
+    metrics.incr(f"response.{'msgpack' if kind == MSGPACK else 'json'}.{coding}")
+    return body, headers
+
+
+def compress(body: bytes, accept_encoding: str = None) -> tuple:
+    """(body, coding): `body` compressed with the best coding the client accepts, if it is large enough."""
+    coding = content_encoding(accept_encoding) if len(body) >= COMPRESS_MIN_BYTES else "identity"
+    metrics.incr("response.raw_bytes", len(body))
+    if coding == "br":
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif coding == "gzip":
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    metrics.incr("response.bytes", len(body))
+    return body, coding
@@ -0,0 +1,78 @@
+"""
+FraudShield India — Entity Extraction
+Regex extraction of URLs, UPI VPAs, phone numbers and rupee amounts from a
+message. Other layers use the results to trim prompts, look up reputation
+and fill templates.
+"""
+import re
+from urllib.parse import urlsplit
+
+_TLDS = (
+    "com|in|co\\.in|org|net|gov\\.in|nic\\.in|vip|xyz|top|info|online|site|live|"
+    "club|shop|app|link|ly|me|io|cc|tk|ml|ga|cf|gq|ru|cn|biz|icu|buzz|page"
+)
+URL_RE = re.compile(
+    r"(?:https?://|www\.)[^\s<>\"']+"
+    r"|\b(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+(?:" + _TLDS + r")\b(?:/[^\s<>\"']*)?",
+    re.IGNORECASE,
+)
+# A UPI handle has no dot after the '@' (unlike an e-mail domain).
+VPA_RE = re.compile(r"\b[a-z0-9][a-z0-9.\-_]{1,255}@[a-z][a-z0-9]{1,63}\b(?![.\w])", re.IGNORECASE)
+PHONE_RE = re.compile(r"(?<![\d\w])(?:\+?91[\s-]?)?[6-9]\d{4}[\s-]?\d{5}(?!\d)")
+AMOUNT_RE = re.compile(
+    r"(?:rs\.?|inr|₹)\s?\d[\d,]*(?:\.\d+)?(?:\s?(?:lakh|lac|crore|cr|k)\b)?",
+    re.IGNORECASE,
+)
+
+
+def normalize_phone(number: str) -> str:
+    """Return an Indian mobile number in the graph's '+91-XXXXXXXXXX' form."""
+    digits = re.sub(r"\D", "", number)
+    return f"+91-{digits[-10:]}" if len(digits) >= 10 else number
+
+
+def url_domain(url: str) -> str:
+    """Hostname of a URL or bare domain, lower-cased and without 'www.'; "" if it has none or is malformed."""
+    if "://" not in url:
+        url = "http://" + url
+    try:
+        host = (urlsplit(url).hostname or "").lower()
+    except ValueError:      # e.g. an unclosed IPv6 bracket, "http://[sbi-kyc"
+        return ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def _unique(items):
+    seen = set()
+    out = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            out.append(item)
+    return out
+
+
+def extract_entities(message: str) -> dict:
+    """Extract URLs, VPAs, phone numbers and amounts from a message.
+
+    Returns:
+        dict with keys: urls, domains, vpas, phones, amounts (lists, in order of appearance)
+    """
+    text = message or ""
+    vpas = _unique(m.group(0).lower() for m in VPA_RE.finditer(text))
+    vpa_spans = [m.span() for m in VPA_RE.finditer(text)]
+    urls = _unique(
+        m.group(0).rstrip(".,)")
+        for m in URL_RE.finditer(text)
+        if not any(s <= m.start() < e for s, e in vpa_spans)
+        and text[max(0, m.start() - 1):m.start()] != "@"  # skip e-mail domains
+    )
+    # Drop matches with no usable host, such as "http://[sbi-kyc" in ordinary text.
+    urls = [u for u in urls if url_domain(u)]
+    return {
+        "urls": urls,
+        "domains": _unique(url_domain(u) for u in urls),
+        "vpas": vpas,
+        "phones": _unique(normalize_phone(m.group(0)) for m in PHONE_RE.finditer(text)),
+        "amounts": _unique(m.group(0) for m in AMOUNT_RE.finditer(text)),
+    }
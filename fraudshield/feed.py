@@ -0,0 +1,164 @@
+"""
+FraudShield India — Live Report Feed
+Server-sent events (SSE) for the dashboard map. Every counted FraudEvent
+becomes a small delta: city, category, the increment and the city's new total.
+The delta is encoded once into an SSE frame and kept in a bounded log.
+
+Two ways to serve it:
+
+- stream() is polling. The Functions host buffers a whole HTTP response,
+  so /api/reports/stream on Azure Functions answers with the frames after
+  the client's Last-Event-ID and a `retry:` hint, then closes. EventSource
+  reconnects `retry` ms later with the last ID it saw, so a delta reaches
+  the dashboard up to FRAUDSHIELD_FEED_RETRY_MS late.
+- follow() holds the connection open. It yields the same first body and
+  then each new frame as it is appended, with a comment line as a
+  heartbeat while idle. The standalone server (api/function_app.py) uses
+  it, for a bounded number of clients at a time.
+
+A subscriber costs a slice of pre-encoded bytes, and an event costs one
+encoding however many dashboards are listening. A client whose ID has
+fallen out of the log gets a `resync` event and refetches /api/reports.
+
+Counts and sequence numbers belong to one process, so an event ID is
+"<epoch>-<seq>", where the epoch is the ReportAggregator's random ID.
+A client that reconnects to another instance (or after a restart) gets a
+resync rather than that instance's frames for its own numbering. The resync
+event carries this log's current ID, so EventSource's next reconnect picks
+up from there instead of resyncing again.
+
+Deltas also carry the city's absolute `reports`, `topScam` and the grand
+`total`. A reconnect therefore only needs the newest frame per (state, city),
+and a response is bounded by the number of places rather than the event rate.
+"""
+import json
+import secrets
+import threading
+from collections import deque
+from itertools import islice
+
+from fraudshield import metrics
+
+LOG_SIZE = 2048
+RETRY_MS = 5000
+HEARTBEAT_SECONDS = 15.0
+HEARTBEAT = b": keep-alive\n\n"
+
+
+def encode_frame(delta: dict, epoch: str) -> bytes:
+    data = json.dumps(delta, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {epoch}-{delta['seq']}\nevent: delta\ndata: {data}\n\n".encode()
+
+
+class DeltaLog:
+    """Bounded, ordered log of pre-encoded delta frames keyed by sequence number.
+
+    `epoch` should be the feeding ReportAggregator's, so that /api/reports and the event IDs agree.
+    """
+
+    def __init__(self, size: int = LOG_SIZE, retry_ms: int = RETRY_MS, epoch: str = None):
+        self.retry_ms = retry_ms
+        self.epoch = epoch or secrets.token_hex(4)
+        self._frames = deque(maxlen=size)   # (seq, (state, city), frame)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._closed = False
+
+    @property
+    def latest(self) -> int:
+        frames = self._frames
+        return frames[-1][0] if frames else 0
+
+    def append(self, delta: dict) -> None:
+        """Record a delta; its `seq` must be one more than the previous delta's."""
+        frame = encode_frame(delta, self.epoch)
+        with self._lock:
+            self._frames.append((delta["seq"], (delta.get("state"), delta.get("city")), frame))
+            self._changed.notify_all()
+
+    def close(self) -> None:
+        """End every follow() generator (on server shutdown)."""
+        with self._lock:
+            self._closed = True
+            self._changed.notify_all()
+
+    def since(self, seq: int):
+        """Newest frame per city after `seq`, or None if the client must resync from a snapshot."""
+        return self._since(seq)[0]
+
+    def _since(self, seq: int) -> tuple:
+        """(since(seq), the sequence number the client is at afterwards)."""
+        with self._lock:
+            if not self._frames:
+                return ([], 0) if seq == 0 else (None, seq)
+            first, last = self._frames[0][0], self._frames[-1][0]
+            if seq > last or seq < first - 1:
+                return None, seq
+            entries = list(islice(self._frames, seq - first + 1, None))
+        # Keep only the newest frame per place; older ones are superseded.
+        seen, frames = set(), []
+        for _, place, frame in reversed(entries):
+            if place not in seen:
+                seen.add(place)
+                frames.append(frame)
+        frames.reverse()
+        return frames, last
+
+    def _resync(self) -> bytes:
+        metrics.incr("feed.resyncs")
+        latest = self.latest
+        data = json.dumps({"version": latest, "epoch": self.epoch})
+        return f"id: {self.epoch}-{latest}\nevent: resync\ndata: {data}\n\n".encode()
+
+    def _seq(self, last_event_id) -> int:
+        """The sequence number in an event ID from this log; ValueError for any other ID.
+
+        A bare "0" is a client that has seen nothing yet.
+        """
+        epoch, _, seq = str(last_event_id).rpartition("-")
+        if epoch != self.epoch and not (epoch == "" and seq == "0"):
+            raise ValueError(f"event ID {last_event_id!r} is not from this feed")
+        return int(seq)
+
+    def _open(self, last_event_id) -> tuple:
+        """(first response body, the client's sequence number afterwards or None after a resync)."""
+        head = f"retry: {self.retry_ms}\n\n".encode()
+        try:
+            frames, seq = self._since(self._seq(last_event_id))
+        except ValueError:
+            frames, seq = None, None
+        if frames is None:
+            return head + self._resync(), None
+        metrics.incr("feed.frames_sent", len(frames))
+        return head + b"".join(frames), seq
+
+    def stream(self, last_event_id) -> bytes:
+        """Build a complete SSE response body (one poll) for a client that last saw `last_event_id`."""
+        metrics.incr("feed.polls")
+        return self._open(last_event_id)[0]
+
+    def follow(self, last_event_id, heartbeat: float = HEARTBEAT_SECONDS):
+        """Yield SSE chunks for a held-open connection: stream()'s body, then new frames as they arrive.
+
+        A heartbeat comment is sent after `heartbeat` idle seconds, which also detects a client that
+        has gone away. The generator ends after a resync or close().
+        """
+        metrics.incr("feed.follows")
+        body, seq = self._open(last_event_id)
+        yield body
+        while seq is not None:
+            with self._changed:
+                if not self._closed and self.latest <= seq:
+                    self._changed.wait(heartbeat)
+                if self._closed:
+                    return
+            if self.latest <= seq:
+                yield HEARTBEAT
+                continue
+            frames, seq = self._since(seq)
+            if frames is None:
+                # More than the log's worth of deltas arrived between two wake-ups.
+                yield self._resync()
+                return
+            metrics.incr("feed.frames_sent", len(frames))
+            yield b"".join(frames)
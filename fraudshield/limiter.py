@@ -0,0 +1,208 @@
+"""
+FraudShield India — Adaptive Concurrency Limiter and Circuit Breaker
+Protects the model deployments during a surge.
+
+- AdaptiveLimiter: AIMD concurrency limit. The limit grows by 1/limit after
+  each fast success and is multiplied by `backoff` after a 429 or a slow call.
+  Callers beyond the limit wait in a bounded queue and are shed when the
+  queue is full or their deadline passes.
+- CircuitBreaker: opens after consecutive failures so that callers fail fast,
+  and after `reset_timeout` lets a single probe through.
+- ModelGuard: both of the above, wrapped around a model call. shared_guard()
+  is the process-wide one, so every model caller counts against one limit.
+"""
+import os
+import threading
+import time
+
+from fraudshield import metrics
+from fraudshield.router import is_retryable
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class Overloaded(RuntimeError):
+    """The call was shed because the wait queue is full or its deadline passed."""
+
+
+class CircuitOpen(RuntimeError):
+    """The circuit breaker is open; the model is treated as unavailable."""
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter with a bounded, deadline-aware wait queue."""
+
+    def __init__(self, name: str = "limiter", initial: float = 8, min_limit: float = 1,
+                 max_limit: float = 64, target_latency_ms: float = 8000, backoff: float = 0.7,
+                 max_queue: int = 32, queue_timeout: float = 5.0):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.target_latency_ms = target_latency_ms
+        self.backoff = backoff
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+        self._publish()
+
+    def _capacity(self) -> int:
+        return max(1, int(self.limit))
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"{self.name}.limit", round(self.limit, 2))
+        metrics.set_gauge(f"{self.name}.in_flight", self.in_flight)
+        metrics.set_gauge(f"{self.name}.queue_depth", self.waiting)
+
+    def _shed(self, reason: str):
+        metrics.incr(f"{self.name}.shed")
+        metrics.incr(f"{self.name}.shed.{reason}")
+        self._publish()
+        return Overloaded(f"Model call shed ({reason}); limit={self._capacity()}")
+
+    def acquire(self, deadline: float = None) -> None:
+        """Take a slot, waiting until `deadline` (time.monotonic()) at the latest."""
+        deadline = time.monotonic() + self.queue_timeout if deadline is None else deadline
+        with self._cond:
+            if self.in_flight < self._capacity() and not self.waiting:
+                self.in_flight += 1
+                self._publish()
+                return
+            if self.waiting >= self.max_queue:
+                raise self._shed("queue_full")
+            self.waiting += 1
+            self._publish()
+            try:
+                while self.in_flight >= self._capacity():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._shed("deadline")
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+                self._publish()
+            self.in_flight += 1
+            self._publish()
+
+    def release(self, latency_ms: float, throttled: bool = False, failed: bool = False) -> None:
+        """Return a slot and adapt the limit from the call's outcome."""
+        with self._cond:
+            self.in_flight -= 1
+            if throttled or latency_ms > self.target_latency_ms:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            elif not failed:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._publish()
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """Closed → open after `failure_threshold` consecutive failures → half-open probe."""
+
+    def __init__(self, name: str = "breaker", failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        metrics.set_gauge(f"{self.name}.state", self.state)
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            metrics.set_gauge(f"{self.name}.state", state)
+            metrics.incr(f"{self.name}.{state}")
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._probing = False
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def release_probe(self) -> None:
+        """Give up a half-open probe slot without a verdict (e.g. a 400 error)."""
+        with self._lock:
+            self._probing = False
+
+
+class ModelGuard:
+    """Runs model calls through a CircuitBreaker and an AdaptiveLimiter."""
+
+    def __init__(self, limiter: AdaptiveLimiter, breaker: CircuitBreaker):
+        self.limiter = limiter
+        self.breaker = breaker
+
+    @classmethod
+    def from_env(cls, env=None) -> "ModelGuard":
+        env = os.environ if env is None else env
+        return cls(
+            AdaptiveLimiter(
+                "model.limiter",
+                max_limit=float(env.get("FRAUDSHIELD_MAX_CONCURRENCY", "64")),
+                target_latency_ms=float(env.get("FRAUDSHIELD_TARGET_LATENCY_MS", "8000")),
+                queue_timeout=float(env.get("FRAUDSHIELD_QUEUE_TIMEOUT", "5")),
+            ),
+            CircuitBreaker("model.breaker"),
+        )
+
+    def call(self, fn, *args, deadline: float = None, **kwargs):
+        if not self.breaker.allow():
+            metrics.incr(f"{self.breaker.name}.rejected")
+            raise CircuitOpen("Model circuit is open; failing fast.")
+        try:
+            self.limiter.acquire(deadline)
+        except Overloaded:
+            self.breaker.release_probe()
+            raise
+        t0 = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as exc:
+            latency_ms = (time.perf_counter() - t0) * 1000
+            self.limiter.release(latency_ms, throttled=getattr(exc, "status_code", None) == 429, failed=True)
+            if is_retryable(exc):
+                self.breaker.record_failure()
+            else:
+                self.breaker.release_probe()
+            raise
+        self.limiter.release((time.perf_counter() - t0) * 1000)
+        self.breaker.record_success()
+        return result
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_guard() -> ModelGuard:
+    """The process-wide ModelGuard from the environment, shared by every caller of the model."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = ModelGuard.from_env()
+    return _shared
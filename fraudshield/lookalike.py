@@ -0,0 +1,322 @@
+"""
+FraudShield India — Look-alike Brand Detection
+Finds link domains and UPI VPAs that imitate an Indian bank, wallet,
+government service or well-known brand: `echallane.vip` for e-challan,
+`sbikyc.update@ybl` for SBI, `hdfcb4nk.in` or `xn--pytm-…` for HDFC and Paytm.
+
+Each domain label and VPA part is normalised first: punycode is decoded,
+Unicode confusables (Cyrillic and Greek look-alikes, full-width forms) are
+folded to ASCII, and digit and letter-pair substitutions (0→o, 1→l, rn→m,
+vv→w) are undone. The normalised token is then matched against the brand
+names two ways:
+
+- by name inside it (`sbikyc`, `hdfcbank-netbanking`), with a dict lookup
+  per substring length; names of three letters must start or end the token;
+- by edit distance (`phonpe`, `axls-bank`), with a SymSpell-style deletion
+  index, so a query costs a few hundred dict lookups however many brands
+  there are, instead of one edit distance per brand. Names of at least 5
+  letters match within 1 edit, and of at least 8 within 2.
+
+The brands' own domains and their subsidiaries' (and anything under .gov.in
+or .nic.in) never match. A message's identifiers are checked in tens of
+microseconds. Scam texts often quote those real domains next to the phishing
+link, so is_official_domain() also keeps them out of the reputation table
+and the scam filter.
+
+A domain that only looks like a brand after normalisation, or carries a
+brand name under a TLD no brand uses (.vip, .xyz, …), is a strong signal:
+function_app answers it without the model (tier="lookalike") when
+FRAUDSHIELD_LOOKALIKE_FAST_PATH is on. An edit away from a five-letter name
+is also an ordinary word or brand (`kodak` for Kotak, `filing` for
+eFiling), so a near miss is only strong with a second signal: folding, a
+suspicious TLD, or the brand named in the message text. Every match is also
+added to the verdict's red flags.
+
+Env vars:
+  FRAUDSHIELD_LOOKALIKE_FAST_PATH – "0" to only add red flags (default "1")
+"""
+import re
+import unicodedata
+from typing import NamedTuple
+
+from fraudshield import metrics
+from fraudshield.rules import EXPLANATIONS
+
+# (name tokens, display name, kind, official domains)
+BRANDS = [
+    (("sbi", "onlinesbi", "statebank"), "SBI", "bank",
+     ("sbi.co.in", "onlinesbi.sbi", "sbi.bank.in", "sbicard.com", "sbilife.co.in", "sbimf.com")),
+    (("hdfc", "hdfcbank"), "HDFC Bank", "bank",
+     ("hdfcbank.com", "hdfc.bank.in", "hdfclife.com", "hdfcsec.com", "hdfcergo.com", "hdfcfund.com")),
+    (("icici", "icicibank"), "ICICI Bank", "bank",
+     ("icicibank.com", "icici.bank.in", "icicidirect.com", "iciciprulife.com", "icicilombard.com")),
+    (("axisbank",), "Axis Bank", "bank", ("axisbank.com", "axis.bank.in")),
+    (("kotak", "kotakbank"), "Kotak Mahindra Bank", "bank", ("kotak.com", "kotak.bank.in", "kotaksecurities.com")),
+    (("pnb", "pnbindia", "punjabnational"), "Punjab National Bank", "bank", ("pnbindia.in", "pnb.bank.in")),
+    (("bankofbaroda", "barodabank"), "Bank of Baroda", "bank", ("bankofbaroda.in", "bankofbaroda.bank.in")),
+    (("canarabank",), "Canara Bank", "bank", ("canarabank.com", "canarabank.bank.in")),
+    (("unionbank", "unionbankofindia"), "Union Bank of India", "bank", ("unionbankofindia.co.in",)),
+    (("yesbank",), "Yes Bank", "bank", ("yesbank.in",)),
+    (("indusind",), "IndusInd Bank", "bank", ("indusind.com",)),
+    (("idfcfirst",), "IDFC FIRST Bank", "bank", ("idfcfirstbank.com",)),
+    (("paytm",), "Paytm", "wallet", ("paytm.com", "paytm.in", "paytmbank.com", "paytmmall.com", "paytmmoney.com")),
+    (("phonepe",), "PhonePe", "wallet", ("phonepe.com",)),
+    (("googlepay", "gpay"), "Google Pay", "wallet", ("pay.google.com", "google.com")),
+    (("bhim", "bhimupi"), "BHIM UPI", "wallet", ("bhimupi.org.in",)),
+    (("npci",), "NPCI", "wallet", ("npci.org.in",)),
+    (("mobikwik",), "MobiKwik", "wallet", ("mobikwik.com",)),
+    (("amazonpay",), "Amazon Pay", "wallet", ("amazon.in", "amazon.com")),
+    (("echallan", "parivahan", "vahan"), "e-Challan (Parivahan)", "govt", ()),
+    (("incometax", "efiling"), "Income Tax Department", "govt", ()),
+    (("uidai", "aadhaar", "aadhar"), "UIDAI (Aadhaar)", "govt", ()),
+    (("epfo", "epfindia"), "EPFO", "govt", ()),
+    (("indiapost", "speedpost"), "India Post", "govt", ("indiapost.gov.in",)),
+    (("irctc",), "IRCTC", "govt", ("irctc.co.in",)),
+    (("cybercrime",), "Cyber Crime Portal", "govt", ()),
+    (("customs", "cbic"), "Customs (CBIC)", "govt", ()),
+    (("amazon",), "Amazon", "brand", ("amazon.in", "amazon.com", "amazonaws.com", "amazon.co.in")),
+    (("flipkart",), "Flipkart", "brand", ("flipkart.com", "flipkart.net")),
+    (("jio", "myjio"), "Jio", "brand", ("jio.com", "jiosaavn.com", "jiocinema.com", "jiomart.com")),
+    (("airtel",), "Airtel", "brand", ("airtel.in", "airtel.com", "airtelxstream.in")),
+    (("kbc", "kaunbanegacrorepati"), "KBC", "brand", ("sonyliv.com",)),
+]
+OFFICIAL_SUFFIXES = (".gov.in", ".nic.in")
+OFFICIAL_DOMAINS = frozenset(domain for *_, domains in BRANDS for domain in domains)
+# Tokens that are never brand impersonation on their own however close they are.
+COMMON_WORDS = frozenset({"bank", "banks", "india", "online", "update", "verify", "secure", "login", "offer",
+                          "reward", "rewards", "cashback", "refund", "support", "service", "official", "help"})
+
+_CONFUSABLES = str.maketrans({
+    # Cyrillic
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o", "р": "p", "с": "c",
+    "т": "t", "у": "y", "х": "x", "ѕ": "s", "і": "i", "ї": "i", "ј": "j", "ԁ": "d", "ԛ": "q", "ԝ": "w",
+    "һ": "h", "ӏ": "l",
+    # Greek
+    "α": "a", "β": "b", "ε": "e", "η": "n", "ι": "i", "κ": "k", "ν": "v", "ο": "o", "ρ": "p", "τ": "t",
+    "υ": "u", "χ": "x", "γ": "y",
+    # Latin look-alikes
+    "ı": "i", "ɩ": "i", "ł": "l", "ø": "o", "ß": "ss",
+    # Digits and symbols
+    "0": "o", "1": "l", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b", "@": "a", "$": "s", "|": "l",
+})
+_PAIRS = (("rn", "m"), ("vv", "w"))
+# Top-level domains no Indian bank, wallet or department uses.
+SUSPICIOUS_TLDS = frozenset({"vip", "xyz", "top", "icu", "buzz", "tk", "ml", "ga", "cf", "gq", "live", "club",
+                             "shop", "online", "site", "cc", "ru", "cn"})
+_SPLIT = re.compile(r"[.\-_]+")
+_WORD = re.compile(r"[^\W\d_]+")
+
+STRONG = "strong"
+WEAK = "weak"
+
+
+def is_official_domain(domain: str) -> bool:
+    """Whether `domain` is, or is under, a curated brand's own domain or .gov.in/.nic.in."""
+    labels = domain.split(".")
+    return domain.endswith(OFFICIAL_SUFFIXES) or any(".".join(labels[i:]) in OFFICIAL_DOMAINS
+                                                     for i in range(len(labels)))
+
+
+class Match(NamedTuple):
+    value: str          # the domain or VPA as it appeared
+    kind: str           # "domain" or "vpa"
+    brand: str          # display name
+    brand_kind: str     # bank, wallet, govt or brand
+    token: str          # the normalised token that matched
+    distance: int       # edit distance to the brand name; 0 for a contained name
+    strength: str       # STRONG or WEAK
+
+    @property
+    def red_flag(self) -> str:
+        label = "website" if self.kind == "domain" else "UPI ID"
+        return f"{label} {self.value} imitates {self.brand}"
+
+
+def fold(token: str) -> str:
+    """`token` with punycode decoded, confusables folded to ASCII and substitutions undone."""
+    if token.startswith("xn--"):
+        try:
+            token = token.encode("ascii").decode("idna")
+        except UnicodeError:
+            pass
+    token = unicodedata.normalize("NFKC", token).casefold().translate(_CONFUSABLES)
+    token = "".join(c for c in unicodedata.normalize("NFKD", token) if not unicodedata.combining(c))
+    for pair, letter in _PAIRS:
+        token = token.replace(pair, letter)
+    return token
+
+
+def levenshtein(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _deletes(word: str, depth: int) -> set:
+    """`word` and every string reachable from it by deleting up to `depth` characters."""
+    found, frontier = {word}, {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - found
+        found |= frontier
+    return found
+
+
+class DeletionIndex:
+    """SymSpell-style index for edit-distance lookups.
+
+    Two strings within edit distance k share a string reachable from each by
+    at most k deletions, so every such deletion of every word is indexed.
+    A query looks up its own deletions and computes the exact distance only
+    for the few words they lead to, whatever the number of words.
+    """
+
+    def __init__(self, words=(), max_distance: int = 2):
+        self.max_distance = max_distance
+        self._variants = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        for variant in _deletes(word, self.max_distance):
+            self._variants.setdefault(variant, set()).add(word)
+
+    def search(self, word: str, radius: int) -> list:
+        """[(distance, word)] for every word within `radius` (at most max_distance) of `word`, nearest first."""
+        radius = min(radius, self.max_distance)
+        candidates = set()
+        for variant in _deletes(word, radius):
+            candidates |= self._variants.get(variant, set())
+        return sorted((d, c) for c in candidates if (d := levenshtein(word, c)) <= radius)
+
+
+def _radius(length: int) -> int:
+    return 2 if length >= 8 else 1 if length >= 5 else 0
+
+
+class LookalikeIndex:
+    """Brand names indexed for containment (dict by length) and edit distance (deletion index)."""
+
+    def __init__(self, brands=BRANDS):
+        self._brands = {}
+        self._names = {}
+        self._official = set()
+        for names, display, kind, domains in brands:
+            for name in names:
+                self._brands[name] = (display, kind)
+            self._names[display] = names
+            self._official.update(domains)
+        self._lengths = sorted({len(name) for name in self._brands})
+        self._fuzzy = DeletionIndex(self._brands)
+
+    def is_official(self, domain: str) -> bool:
+        labels = domain.split(".")
+        return (domain.endswith(OFFICIAL_SUFFIXES)
+                or any(".".join(labels[i:]) in self._official for i in range(len(labels))))
+
+    def _match_token(self, raw: str):
+        # "1" stands in for both "l" and "i".
+        variants = [fold(raw)] + ([fold(raw.replace("1", "i"))] if "1" in raw else [])
+        for token in variants:
+            hit = self._match_folded(raw, token)
+            if hit is not None:
+                return hit
+        return None
+
+    def _match_folded(self, raw: str, token: str):
+        if len(token) < 3 or token in COMMON_WORDS:
+            return None
+        best = None
+        for length in self._lengths:
+            if length > len(token):
+                break
+            for start in range(len(token) - length + 1):
+                name = token[start:start + length]
+                if name in self._brands and (length > 3 or start == 0 or start + length == len(token)):
+                    if best is None or length > len(best[0]):
+                        best = (name, 0)
+        if best is None:
+            radius = _radius(len(token))
+            if radius:
+                for d, name in self._fuzzy.search(token, radius):
+                    if len(name) >= 5 and d <= _radius(len(name)):
+                        best = (name, d)
+                        break
+        if best is None:
+            return None
+        name, distance = best
+        return name, distance, token, token != raw.lower()
+
+    def _named(self, display: str, text: str, words: set) -> bool:
+        """Whether the message text names the brand."""
+        return any(name in words for name in self._names[display]) or display.casefold() in text
+
+    def match(self, kind: str, value: str, text: str = "", words: set = None) -> list:
+        """Matches for one domain or VPA (kind "domain" or "vpa"), in a message with `text`."""
+        text = text.casefold()
+        words = set(_WORD.findall(text)) if words is None else words
+        suspicious_tld = False
+        if kind == "domain":
+            if not value or self.is_official(value):
+                return []
+            labels = value.split(".")
+            tokens, suspicious_tld = labels[:-1] or labels, labels[-1] in SUSPICIOUS_TLDS
+        else:
+            tokens = [value.split("@", 1)[0]]
+        matches, seen = [], set()
+        for label in tokens:
+            for part in [label] + (_SPLIT.split(label) if _SPLIT.search(label) else []):
+                hit = self._match_token(part)
+                if hit is None:
+                    continue
+                name, distance, token, folded = hit
+                display, brand_kind = self._brands[name]
+                if display in seen:
+                    continue
+                seen.add(display)
+                if distance == 0:
+                    # A name that only appears after folding is deliberate imitation.
+                    disguised = name not in part.lower()
+                else:
+                    disguised = folded or self._named(display, text, words)
+                strength = STRONG if kind == "domain" and (disguised or suspicious_tld) else WEAK
+                matches.append(Match(value, kind, display, brand_kind, token, distance, strength))
+        return matches
+
+    def scan(self, entities: dict, text: str = "") -> list:
+        """Matches for every domain and VPA in `extract_entities` output of `text`, strong ones first."""
+        text = text.casefold()
+        words = set(_WORD.findall(text))
+        matches = [m for d in entities.get("domains", ()) for m in self.match("domain", d, text, words)]
+        matches += [m for v in entities.get("vpas", ()) for m in self.match("vpa", v, text, words)]
+        metrics.incr("lookalike.checks")
+        if matches:
+            metrics.incr("lookalike.matches", len(matches))
+        return sorted(matches, key=lambda m: m.strength != STRONG)
+
+
+def is_strong(matches: list) -> bool:
+    return any(m.strength == STRONG for m in matches)
+
+
+def lookalike_verdict(matches: list) -> dict:
+    """A full verdict dict from the strongest look-alike match (tier="lookalike")."""
+    top = matches[0]
+    category = "govt_impersonation" if top.brand_kind == "govt" else "phishing_link"
+    explanation_en, explanation_hi = EXPLANATIONS[category]
+    return {
+        "is_scam": True,
+        "category": category,
+        "confidence": 0.9 if top.distance == 0 else 0.85,
+        "risk_level": "high",
+        "explanation_en": f"The website {top.value} imitates {top.brand} but is not its official site. "
+                          f"{explanation_en}",
+        "explanation_hi": f"वेबसाइट {top.value} {top.brand} की नकल है, उसकी आधिकारिक साइट नहीं। {explanation_hi}",
+        "red_flags": [m.red_flag for m in matches],
+        "tier": "lookalike",
+    }
@@ -0,0 +1,95 @@
+"""
+FraudShield India — In-process Metrics
+Thread-safe counters, gauges and rolling latency windows. Each worker keeps
+its own numbers; /api/metrics returns a snapshot of them.
+"""
+import threading
+from collections import deque
+
+TIMING_WINDOW = 1024  # most recent samples kept per timing series
+
+_lock = threading.Lock()
+_counters: dict = {}
+_gauges: dict = {}
+_timings: dict = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    """Add `value` to the counter `name`."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: float) -> None:
+    """Set the gauge `name` to `value`."""
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name: str, ms: float) -> None:
+    """Record a latency sample in milliseconds."""
+    with _lock:
+        series = _timings.get(name)
+        if series is None:
+            series = _timings[name] = deque(maxlen=TIMING_WINDOW)
+        series.append(ms)
+
+
+def counter(name: str) -> float:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def gauge(name: str, default=None):
+    with _lock:
+        return _gauges.get(name, default)
+
+
+def percentile(name: str, pct: float):
+    """Return the `pct` percentile (0-100) of recent samples, or None if empty."""
+    with _lock:
+        samples = sorted(_timings.get(name, ()))
+    return _percentile(samples, pct)
+
+
+def _percentile(samples: list, pct: float):
+    if not samples:
+        return None
+    idx = min(len(samples) - 1, max(0, int(round(pct / 100.0 * (len(samples) - 1)))))
+    return samples[idx]
+
+
+def ratio(numerator: str, denominator: str) -> float:
+    """Return counter(numerator) / counter(denominator), 0.0 when undefined."""
+    with _lock:
+        den = _counters.get(denominator, 0)
+        return _counters.get(numerator, 0) / den if den else 0.0
+
+
+def snapshot() -> dict:
+    """Return all counters, gauges and timing summaries as plain JSON data."""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        timings = {name: sorted(series) for name, series in _timings.items()}
+    return {
+        "counters": counters,
+        "gauges": gauges,
+        "timings": {
+            name: {
+                "count": len(samples),
+                "p50": _percentile(samples, 50),
+                "p95": _percentile(samples, 95),
+                "p99": _percentile(samples, 99),
+            }
+            for name, samples in timings.items()
+        },
+    }
+
+
+def reset() -> None:
+    """Clear every metric (used by tests)."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timings.clear()
@@ -0,0 +1,330 @@
+"""
+FraudShield India — Verdict Parsing
+Turns a chat completion into a validated verdict dict.
+
+Structured JSON output (response_format=json_schema) is requested when the
+deployment supports it. If the API rejects it, it is switched off for the rest
+of the process. Without it, the first balanced JSON object in the completion
+is extracted, light type slips are coerced, and the result is checked against
+a compiled schema. If that still fails, one cheap repair call is made on the
+raw text, rather than re-running the full classification.
+
+Env vars:
+  FRAUDSHIELD_STRUCTURED_OUTPUT – "0" to never request structured output
+"""
+import json
+import logging
+import os
+import threading
+
+from fraudshield import metrics
+from fraudshield.prompting import CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+REPAIR_MAX_TOKENS = 400
+
+CORE_VERDICT_SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["is_scam", "category", "confidence", "risk_level"],
+    "properties": {
+        "is_scam": {"type": "boolean"},
+        "category": {"type": "string", "enum": list(CATEGORIES)},
+        "confidence": {"type": "number", "minimum": 0.0, "maximum": 1.0},
+        "risk_level": {"type": "string", "enum": ["high", "medium", "low"]},
+    },
+}
+
+VERDICT_SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["is_scam", "category", "confidence", "risk_level",
+                 "explanation_en", "explanation_hi", "red_flags"],
+    "properties": {
+        "is_scam": {"type": "boolean"},
+        "category": {"type": "string", "enum": list(CATEGORIES)},
+        "confidence": {"type": "number", "minimum": 0.0, "maximum": 1.0},
+        "risk_level": {"type": "string", "enum": ["high", "medium", "low"]},
+        "explanation_en": {"type": "string"},
+        "explanation_hi": {"type": "string"},
+        "red_flags": {"type": "array", "items": {"type": "string"}},
+    },
+}
+
+COMPLAINT_FORM_SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["portal", "helpline", "evidence_to_collect"],
+    "properties": {
+        "portal": {"type": "string"},
+        "helpline": {"type": "string"},
+        "evidence_to_collect": {"type": "array", "items": {"type": "string"}},
+    },
+}
+
+FULL_VERDICT_SCHEMA = {
+    **VERDICT_SCHEMA,
+    "required": VERDICT_SCHEMA["required"] + ["complaint_form"],
+    "properties": {**VERDICT_SCHEMA["properties"], "complaint_form": COMPLAINT_FORM_SCHEMA},
+}
+
+EXPLAIN_HI_SCHEMA = {
+    **CORE_VERDICT_SCHEMA,
+    "required": CORE_VERDICT_SCHEMA["required"] + ["explanation_hi", "red_flags"],
+    "properties": {**CORE_VERDICT_SCHEMA["properties"],
+                   "explanation_hi": VERDICT_SCHEMA["properties"]["explanation_hi"],
+                   "red_flags": VERDICT_SCHEMA["properties"]["red_flags"]},
+}
+
+# The explanation of an existing verdict (prompting.build_explain_messages).
+EXPLANATION_SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["explanation_en", "explanation_hi", "red_flags"],
+    "properties": {name: VERDICT_SCHEMA["properties"][name] for name in ("explanation_en", "explanation_hi", "red_flags")},
+}
+
+# Output schema per prompt variant (see fraudshield.prompting.PROMPT_VARIANTS).
+SCHEMAS = {
+    "full": FULL_VERDICT_SCHEMA,
+    "compact": VERDICT_SCHEMA,
+    "verdict": CORE_VERDICT_SCHEMA,
+    "explain_hi": EXPLAIN_HI_SCHEMA,
+    "explain": EXPLANATION_SCHEMA,
+}
+
+_DEFAULTS = {
+    "explanation_en": "",
+    "explanation_hi": "",
+    "red_flags": [],
+}
+
+_structured_output = os.environ.get("FRAUDSHIELD_STRUCTURED_OUTPUT", "1") != "0"
+_structured_lock = threading.Lock()
+
+
+class VerdictParseError(ValueError):
+    """The completion could not be turned into a valid verdict, even after repair."""
+
+
+# ── Compiled schema validation ───────────────────────────────────────────────
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "number": (int, float),
+    "integer": int,
+}
+
+
+def _compile(schema: dict):
+    type_name = schema.get("type")
+    expected = _TYPES.get(type_name)
+    numeric = type_name in ("number", "integer")
+    enum = frozenset(schema["enum"]) if "enum" in schema else None
+    minimum = schema.get("minimum")
+    maximum = schema.get("maximum")
+    required = tuple(schema.get("required", ()))
+    properties = {name: _compile(sub) for name, sub in schema.get("properties", {}).items()}
+    items = _compile(schema["items"]) if "items" in schema else None
+
+    def check(value, path, errors):
+        if expected is not None and (not isinstance(value, expected) or (numeric and isinstance(value, bool))):
+            errors.append(f"{path}: expected {type_name}")
+            return
+        if enum is not None and value not in enum:
+            errors.append(f"{path}: must be one of {sorted(enum)}")
+        if minimum is not None and value < minimum:
+            errors.append(f"{path}: must be >= {minimum}")
+        if maximum is not None and value > maximum:
+            errors.append(f"{path}: must be <= {maximum}")
+        for name in required:
+            if name not in value:
+                errors.append(f"{path}.{name}: required")
+        for name, sub in properties.items():
+            if name in value:
+                sub(value[name], f"{path}.{name}", errors)
+        if items is not None:
+            for i, item in enumerate(value):
+                items(item, f"{path}[{i}]", errors)
+
+    return check
+
+
+def compile_schema(schema: dict):
+    """Compile a JSON-schema subset (type, enum, min/max, required, properties, items).
+
+    Returns a function that takes a value and returns a list of error strings.
+    """
+    check = _compile(schema)
+
+    def validate(value) -> list:
+        errors = []
+        check(value, "$", errors)
+        return errors
+
+    return validate
+
+
+_VALIDATORS = {variant: compile_schema(schema) for variant, schema in SCHEMAS.items()}
+
+
+# ── Tolerant extraction ──────────────────────────────────────────────────────
+
+def extract_json_object(text: str) -> dict:
+    """Parse the first balanced {...} object in `text`, ignoring fences and chatter."""
+    start = text.find("{")
+    while start != -1:
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start, len(text)):
+            ch = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        value = json.loads(text[start:i + 1])
+                    except json.JSONDecodeError:
+                        break
+                    if isinstance(value, dict):
+                        return value
+                    break
+        start = text.find("{", start + 1)
+    raise VerdictParseError("No complete JSON object in model output")
+
+
+def _coerce(verdict: dict, variant: str = "full") -> dict:
+    """Fix common type slips: "true" strings, "85%" confidences, upper-case enums."""
+    is_scam = verdict.get("is_scam")
+    if isinstance(is_scam, str):
+        verdict["is_scam"] = is_scam.strip().lower() in ("true", "yes", "1")
+    confidence = verdict.get("confidence")
+    if isinstance(confidence, str):
+        try:
+            confidence = float(confidence.strip().rstrip("%"))
+        except ValueError:
+            pass
+    if isinstance(confidence, (int, float)) and not isinstance(confidence, bool) and 1.0 < confidence <= 100.0:
+        confidence = confidence / 100.0
+    if confidence is not None:
+        verdict["confidence"] = confidence
+    for key in ("category", "risk_level"):
+        if isinstance(verdict.get(key), str):
+            verdict[key] = verdict[key].strip().lower().replace(" ", "_")
+    if isinstance(verdict.get("red_flags"), str):
+        verdict["red_flags"] = [verdict["red_flags"]]
+    properties = SCHEMAS.get(variant, FULL_VERDICT_SCHEMA)["properties"]
+    for key, default in _DEFAULTS.items():
+        if key in properties:
+            verdict.setdefault(key, list(default) if isinstance(default, list) else default)
+    return verdict
+
+
+def parse_verdict(raw: str, variant: str = "full") -> tuple:
+    """Extract, coerce and validate a verdict.
+
+    Returns:
+        (verdict or None, errors) — errors is empty when the verdict is valid
+    """
+    try:
+        verdict = _coerce(extract_json_object(raw or ""), variant)
+    except VerdictParseError as exc:
+        return None, [str(exc)]
+    validator = _VALIDATORS.get(variant, _VALIDATORS["full"])
+    errors = validator(verdict)
+    if variant == "full":
+        # complaint_form is static boilerplate; a missing one is not worth a repair call.
+        errors = [e for e in errors if not e.startswith("$.complaint_form")]
+    return verdict, errors
+
+
+# ── Model call with structured output and repair ────────────────────────────
+
+def response_format(variant: str = "full") -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": f"fraud_verdict_{variant}", "strict": True, "schema": SCHEMAS[variant]},
+    }
+
+
+def structured_output_enabled() -> bool:
+    return _structured_output
+
+
+def _disable_structured_output(exc: Exception) -> None:
+    global _structured_output
+    with _structured_lock:
+        if _structured_output:
+            _structured_output = False
+            logger.warning("Structured output rejected by the API (%s); using tolerant parsing.", exc)
+
+
+def _is_response_format_error(exc: Exception) -> bool:
+    return getattr(exc, "status_code", None) == 400 and "response_format" in str(exc)
+
+
+def _update_failure_rate() -> None:
+    metrics.set_gauge("parse.failure_rate", metrics.ratio("parse.failures", "parse.attempts"))
+
+
+def _repair(create, raw: str, errors: list, variant: str):
+    schema = json.dumps(SCHEMAS.get(variant, VERDICT_SCHEMA)["properties"], separators=(",", ":"))
+    messages = [
+        {"role": "system", "content": "Return only one JSON object that fixes the given text so it "
+                                      f"matches these properties: {schema}. Do not add commentary."},
+        {"role": "user", "content": f"Problems: {'; '.join(errors[:5])}\nText:\n{(raw or '')[:4000]}"},
+    ]
+    return create(messages=messages, max_completion_tokens=REPAIR_MAX_TOKENS)
+
+
+def complete_verdict(create, messages: list, max_completion_tokens: int = 500,
+                     variant: str = "full", **kwargs) -> tuple:
+    """Run a classification completion and return (response, verdict).
+
+    `create` is a chat-completion callable such as ModelRouter.create.
+    Raises VerdictParseError if the output is still invalid after one repair call.
+    """
+    if _structured_output and variant in SCHEMAS:
+        try:
+            response = create(messages=messages, max_completion_tokens=max_completion_tokens,
+                              response_format=response_format(variant), **kwargs)
+        except Exception as exc:
+            if not _is_response_format_error(exc):
+                raise
+            _disable_structured_output(exc)
+            response = create(messages=messages, max_completion_tokens=max_completion_tokens, **kwargs)
+    else:
+        response = create(messages=messages, max_completion_tokens=max_completion_tokens, **kwargs)
+
+    raw = response.choices[0].message.content or ""
+    metrics.incr("parse.attempts")
+    verdict, errors = parse_verdict(raw, variant)
+    if not errors:
+        _update_failure_rate()
+        return response, verdict
+
+    metrics.incr("parse.failures")
+    _update_failure_rate()
+    logger.warning("Verdict failed validation (%s); attempting repair.", "; ".join(errors[:3]))
+    metrics.incr("parse.repairs")
+    repaired = _repair(create, raw, errors, variant)
+    verdict, errors = parse_verdict(repaired.choices[0].message.content or "", variant)
+    if errors:
+        metrics.incr("parse.repair_failures")
+        raise VerdictParseError("Invalid verdict after repair: " + "; ".join(errors[:3]))
+    return response, verdict
@@ -0,0 +1,266 @@
+"""
+FraudShield India — Prompt Building
+Builds the chat messages for a classification and counts their tokens
+locally. Messages over the token budget are trimmed to their most
+signal-rich segments (URLs, VPAs, phone numbers, amounts, imperative
+sentences). System prompt variants: "full" (default), "compact", and the
+client-selectable response profiles "verdict" (no explanations) and
+"explain_hi" (Hindi explanation and red flags only). Profiles that skip the
+explanations generate far fewer completion tokens; build_explain_messages()
+asks for them later, for one verdict, when the user wants them.
+
+Env vars:
+  FRAUDSHIELD_PROMPT_VARIANT     – default variant (full | compact | verdict | explain_hi)
+  FRAUDSHIELD_MAX_MESSAGE_TOKENS – token budget for the user message (default 400)
+"""
+import logging
+import os
+import re
+
+from fraudshield import metrics
+from fraudshield.entities import AMOUNT_RE, PHONE_RE, URL_RE, VPA_RE
+
+logger = logging.getLogger(__name__)
+
+_encoding = None
+_encoding_loaded = False
+
+CATEGORIES = (
+    "fake_cashback", "digital_arrest", "kyc_freeze", "job_scam",
+    "lottery_scam", "govt_impersonation", "phishing_link", "legitimate",
+)
+
+SYSTEM_PROMPT = """You are FraudShield India, an expert UPI fraud detection system.
+Analyze messages for fraud patterns common in India. Classify into one of:
+fake_cashback, digital_arrest, kyc_freeze, job_scam, lottery_scam,
+govt_impersonation, phishing_link, legitimate
+
+Respond ONLY with valid JSON (no markdown, no backticks):
+{
+  "is_scam": true/false,
+  "category": "<category>",
+  "confidence": <0.0-1.0>,
+  "risk_level": "high/medium/low",
+  "explanation_en": "<1-2 sentence English explanation>",
+  "explanation_hi": "<1-2 sentence Hindi explanation>",
+  "red_flags": ["<flag1>", "<flag2>"],
+  "complaint_form": {
+    "portal": "cybercrime.gov.in",
+    "helpline": "1930",
+    "evidence_to_collect": ["screenshot", "sender_id", "transaction_id"]
+  }
+}"""
+
+SYSTEM_PROMPT_COMPACT = """FraudShield India: classify an Indian SMS/chat for UPI fraud.
+Categories: fake_cashback, digital_arrest, kyc_freeze, job_scam, lottery_scam, govt_impersonation, phishing_link, legitimate.
+Reply with one JSON object only:
+{"is_scam":bool,"category":str,"confidence":0-1,"risk_level":"high|medium|low","explanation_en":str,"explanation_hi":str,"red_flags":[str]}"""
+
+SYSTEM_PROMPT_VERDICT = """You are FraudShield India, an expert UPI fraud detection system.
+Classify an Indian SMS/chat message for fraud into one of:
+fake_cashback, digital_arrest, kyc_freeze, job_scam, lottery_scam,
+govt_impersonation, phishing_link, legitimate
+
+Respond ONLY with valid JSON (no markdown, no explanation):
+{"is_scam": true/false, "category": "<category>", "confidence": <0.0-1.0>, "risk_level": "high/medium/low"}"""
+
+SYSTEM_PROMPT_EXPLAIN_HI = """You are FraudShield India, an expert UPI fraud detection system.
+Classify an Indian SMS/chat message for fraud into one of:
+fake_cashback, digital_arrest, kyc_freeze, job_scam, lottery_scam,
+govt_impersonation, phishing_link, legitimate
+
+Respond ONLY with valid JSON (no markdown, no backticks):
+{
+  "is_scam": true/false,
+  "category": "<category>",
+  "confidence": <0.0-1.0>,
+  "risk_level": "high/medium/low",
+  "explanation_hi": "<1-2 sentence Hindi explanation>",
+  "red_flags": ["<flag1>", "<flag2>"]
+}"""
+
+EXPLAIN_PROMPT = """You are FraudShield India. A message has already been classified; do not
+re-classify it. Explain the verdict to the person who received the message.
+
+Respond ONLY with valid JSON (no markdown, no backticks):
+{
+  "explanation_en": "<1-2 sentence English explanation>",
+  "explanation_hi": "<1-2 sentence Hindi explanation>",
+  "red_flags": ["<specific suspicious detail>", "..."]
+}"""
+
+PROMPT_VARIANTS = {
+    "full": SYSTEM_PROMPT,
+    "compact": SYSTEM_PROMPT_COMPACT,
+    "verdict": SYSTEM_PROMPT_VERDICT,
+    "explain_hi": SYSTEM_PROMPT_EXPLAIN_HI,
+}
+# Response profiles a client may pick, smallest output first.
+PROFILES = ("verdict", "explain_hi", "full")
+DEFAULT_VARIANT = os.environ.get("FRAUDSHIELD_PROMPT_VARIANT", "full")
+MAX_MESSAGE_TOKENS = int(os.environ.get("FRAUDSHIELD_MAX_MESSAGE_TOKENS", "400"))
+
+_SEGMENT_SPLIT = re.compile(r"(?<=[.!?।])\s+|\n+")
+_IMPERATIVE = re.compile(
+    r"\b(click|pay|send|share|transfer|update|verify|call|approve|download|install|"
+    r"scan|submit|deposit|register|login|link|bhej\w*|kar\w*|dijiye|kijiye|bharein|jama)\b",
+    re.IGNORECASE,
+)
+_URGENCY = re.compile(
+    r"\b(urgent|immediately|now|today|within|24 ?hours?|turant|abhi|jaldi|blocked?|"
+    r"frozen|freeze|suspend\w*|arrest\w*|warrant|penalty|expired?)\b",
+    re.IGNORECASE,
+)
+ELLIPSIS = " … "
+
+
+def _get_encoding():
+    """Load the o200k tokenizer once; None if tiktoken or its encoding file is unavailable."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            logger.info("tiktoken unavailable; using byte-based token estimates.")
+            _encoding = None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Token count with the o200k tokenizer when available, else a byte-based estimate."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def _segment_score(segment: str) -> int:
+    score = 0
+    score += 3 * len(URL_RE.findall(segment))
+    score += 3 * len(VPA_RE.findall(segment))
+    score += 2 * len(PHONE_RE.findall(segment))
+    score += 2 * len(AMOUNT_RE.findall(segment))
+    score += 1 if _IMPERATIVE.search(segment) else 0
+    score += 1 if _URGENCY.search(segment) else 0
+    return score
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    """Cut text to roughly `max_tokens`, keeping the head."""
+    while text and count_tokens(text) > max_tokens:
+        text = text[: max(1, int(len(text) * 0.8))]
+    return text
+
+
+def compact_message(message: str, max_tokens: int = None) -> tuple:
+    """Trim an over-long message to its most signal-rich segments.
+
+    The first segment is always kept for context; the remaining budget goes to
+    the highest-scoring segments, which are then put back in their original order.
+
+    Returns:
+        (text, truncated) where truncated is True if anything was dropped
+    """
+    max_tokens = MAX_MESSAGE_TOKENS if max_tokens is None else max_tokens
+    if count_tokens(message) <= max_tokens:
+        return message, False
+
+    segments = [s.strip() for s in _SEGMENT_SPLIT.split(message) if s and s.strip()]
+    if len(segments) <= 1:
+        return _clip(message, max_tokens), True
+
+    ellipsis_cost = count_tokens(ELLIPSIS)
+    budget = max_tokens
+    keep = set()
+    ranked = [0] + sorted(range(1, len(segments)), key=lambda i: (-_segment_score(segments[i]), i))
+    for i in ranked:
+        cost = count_tokens(segments[i]) + ellipsis_cost
+        if cost <= budget:
+            keep.add(i)
+            budget -= cost
+        elif i == 0:
+            segments[0] = _clip(segments[0], max(1, budget // 2))
+            keep.add(0)
+            budget -= count_tokens(segments[0]) + ellipsis_cost
+
+    parts = []
+    for i, segment in enumerate(segments):
+        if i in keep:
+            parts.append(segment)
+        elif not parts or parts[-1] != ELLIPSIS.strip():
+            parts.append(ELLIPSIS.strip())
+    return " ".join(parts), True
+
+
+def build_messages(message: str, source: str = "unknown", sender: str = "unknown",
+                   variant: str = None, max_message_tokens: int = None) -> tuple:
+    """Build the chat messages for one classification.
+
+    Returns:
+        (messages, info) where info has keys variant, prompt_tokens, truncated
+    """
+    variant = variant or DEFAULT_VARIANT
+    if variant not in PROMPT_VARIANTS:
+        raise ValueError(f"Unknown prompt variant '{variant}'. Use one of: {', '.join(PROMPT_VARIANTS)}")
+    system = PROMPT_VARIANTS[variant]
+    text, truncated = compact_message(message, max_message_tokens)
+    user = f"Source: {source}\nSender: {sender}\nMessage: {text}"
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+    info = {
+        "variant": variant,
+        "prompt_tokens": count_tokens(system) + count_tokens(user),
+        "truncated": truncated,
+    }
+    if truncated:
+        metrics.incr("prompt.truncated")
+    return messages, info
+
+
+def build_explain_messages(message: str, verdict: dict, max_message_tokens: int = None) -> tuple:
+    """Build the chat messages that explain an existing verdict.
+
+    Returns:
+        (messages, info) like build_messages, with variant "explain"
+    """
+    text, truncated = compact_message(message, max_message_tokens)
+    label = "scam" if verdict.get("is_scam") else "not a scam"
+    user = (f"Verdict: {label}, category {verdict.get('category')}, confidence {verdict.get('confidence')}\n"
+            f"Message: {text}")
+    messages = [
+        {"role": "system", "content": EXPLAIN_PROMPT},
+        {"role": "user", "content": user},
+    ]
+    info = {
+        "variant": "explain",
+        "prompt_tokens": count_tokens(EXPLAIN_PROMPT) + count_tokens(user),
+        "truncated": truncated,
+    }
+    return messages, info
+
+
+def record_usage(response, info: dict) -> None:
+    """Log and count prompt/completion tokens reported by the API for one call."""
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    variant = info.get("variant", DEFAULT_VARIANT)
+    logger.info(
+        "classify tokens: variant=%s prompt=%s (est %s) completion=%s truncated=%s",
+        variant, prompt_tokens, info.get("prompt_tokens"), completion_tokens, info.get("truncated"),
+    )
+    if isinstance(prompt_tokens, int):
+        metrics.incr(f"tokens.{variant}.prompt", prompt_tokens)
+    if isinstance(completion_tokens, int):
+        metrics.incr(f"tokens.{variant}.completion", completion_tokens)
+    # Prompt tokens served from the provider's prefix cache (only for prompts of 1024+ tokens).
+    cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+    if isinstance(cached_tokens, int):
+        metrics.incr(f"tokens.{variant}.cached", cached_tokens)
+    metrics.incr(f"tokens.{variant}.calls")
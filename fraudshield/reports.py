@@ -0,0 +1,171 @@
+"""
+FraudShield India — Live Report Aggregates
+Per-city and per-state scam report counts behind /api/reports. They are updated
+incrementally as FraudEvents arrive, so each event costs O(1). The JSON
+payload is rendered once per change and then served from memory with an
+ETag, however many dashboards poll.
+
+Aggregates are per process. Each Functions instance counts the Event Hub
+partitions it owns, which is enough for the dashboard heat map.
+"""
+import hashlib
+import json
+import secrets
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+
+# city -> (lat, lng, state). Matches the seed cities on dashboard/index.html.
+CITIES = {
+    "Mumbai": (19.076, 72.8777, "Maharashtra"),
+    "Delhi": (28.6139, 77.209, "Delhi"),
+    "Bangalore": (12.9716, 77.5946, "Karnataka"),
+    "Hyderabad": (17.385, 78.4867, "Telangana"),
+    "Chennai": (13.0827, 80.2707, "Tamil Nadu"),
+    "Kolkata": (22.5726, 88.3639, "West Bengal"),
+    "Pune": (18.5204, 73.8567, "Maharashtra"),
+    "Ahmedabad": (23.0225, 72.5714, "Gujarat"),
+    "Jaipur": (26.9124, 75.7873, "Rajasthan"),
+    "Lucknow": (26.8467, 80.9462, "Uttar Pradesh"),
+    "Chandigarh": (30.7333, 76.7794, "Chandigarh"),
+    "Bhopal": (23.2599, 77.4126, "Madhya Pradesh"),
+    "Patna": (25.6093, 85.1376, "Bihar"),
+    "Kochi": (9.9312, 76.2673, "Kerala"),
+    "Guwahati": (26.1445, 91.7362, "Assam"),
+    "Manipal": (13.3525, 74.786, "Karnataka"),
+}
+CITY_ALIASES = {
+    "bengaluru": "Bangalore",
+    "bombay": "Mumbai",
+    "new delhi": "Delhi",
+    "calcutta": "Kolkata",
+    "madras": "Chennai",
+    "cochin": "Kochi",
+    "ernakulam": "Kochi",
+}
+_CITY_LOOKUP = {name.lower(): name for name in CITIES} | CITY_ALIASES
+_STATE_LOOKUP = {state.lower(): state for _, _, state in CITIES.values()}
+
+SEEN_EVENT_IDS = 10_000  # Event Hub delivers at least once; replays within this window are ignored
+
+
+def resolve_city(name: str):
+    """Return the canonical city name for `name`, or None if it is not on the map."""
+    return _CITY_LOOKUP.get(" ".join(str(name or "").split()).lower())
+
+
+def resolve_state(event: dict):
+    """Return the canonical state of an event from its city, or else its `state` field."""
+    city = resolve_city(event.get("city"))
+    if city:
+        return CITIES[city][2]
+    return _STATE_LOOKUP.get(" ".join(str(event.get("state") or "").split()).lower())
+
+
+def _top(counter: Counter) -> str:
+    # Ties go to the alphabetically first category so the payload is deterministic.
+    return min(counter.items(), key=lambda kv: (-kv[1], kv[0]))[0] if counter else "unknown"
+
+
+class ReportAggregator:
+    """Incrementally maintained report counts with a cached, ETagged rendering."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = OrderedDict()
+        self.total = 0
+        self.categories = Counter()
+        self.cities = {}   # city -> Counter(category)
+        self.states = {}   # state -> Counter(category)
+        self.version = 0
+        self.epoch = secrets.token_hex(4)   # tells this process's versions apart from another's
+        self.updated_at = None
+        self._rendered = None  # (version, body, etag)
+        self.listeners = []    # called with each delta, in order, under the lock (see fraudshield/feed.py)
+
+    def ingest(self, event: dict) -> bool:
+        """Count one FraudEvent. Returns False for non-scams, malformed events and replays."""
+        if not isinstance(event, dict) or not event.get("is_scam"):
+            return False
+        category = event.get("category") or "unknown"
+        city = resolve_city(event.get("city"))
+        state = resolve_state(event)
+        event_id = event.get("event_id")
+        with self._lock:
+            if event_id:
+                if event_id in self._seen:
+                    return False
+                self._seen[event_id] = None
+                if len(self._seen) > SEEN_EVENT_IDS:
+                    self._seen.popitem(last=False)
+            self.total += 1
+            self.categories[category] += 1
+            if city:
+                self.cities.setdefault(city, Counter())[category] += 1
+            if state:
+                self.states.setdefault(state, Counter())[category] += 1
+            self.version += 1
+            self.updated_at = time.time()
+            if self.listeners:
+                delta = self._delta(category, city, state)
+                for listener in self.listeners:
+                    listener(delta)
+        return True
+
+    def _delta(self, category: str, city, state) -> dict:
+        delta = {"seq": self.version, "city": city, "state": state, "category": category, "inc": 1,
+                 "total": self.total}
+        if city:
+            counts = self.cities[city]
+            delta["reports"] = sum(counts.values())
+            delta["topScam"] = _top(counts)
+            delta["lat"], delta["lng"] = CITIES[city][:2]
+        return delta
+
+    def payload(self) -> dict:
+        """Build the /api/reports document (the shape dashboard/index.html expects)."""
+        with self._lock:
+            cities = [
+                {"city": city, "lat": CITIES[city][0], "lng": CITIES[city][1], "state": CITIES[city][2],
+                 "reports": sum(counts.values()), "topScam": _top(counts)}
+                for city, counts in self.cities.items()
+            ]
+            states = [
+                {"state": state, "reports": sum(counts.values()), "topScam": _top(counts)}
+                for state, counts in self.states.items()
+            ]
+            updated = self.updated_at
+            doc = {
+                "live": self.total > 0,
+                "total": self.total,
+                "topScam": _top(self.categories),
+                "categories": dict(self.categories.most_common()),
+                "version": self.version,
+                "epoch": self.epoch,
+            }
+        cities.sort(key=lambda c: (-c["reports"], c["city"]))
+        states.sort(key=lambda s: (-s["reports"], s["state"]))
+        doc["cities"] = cities
+        doc["states"] = states
+        doc["updated_at"] = datetime.fromtimestamp(updated, timezone.utc).isoformat() if updated else None
+        return doc
+
+    def render(self) -> tuple:
+        """Return (body_bytes, etag); re-serialised only when the aggregates have changed."""
+        rendered = self._rendered
+        if rendered is not None and rendered[0] == self.version:
+            return rendered[1], rendered[2]
+        doc = self.payload()
+        body = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:20]
+        self._rendered = (doc["version"], body, etag)
+        return body, etag
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """True if an If-None-Match header value covers `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
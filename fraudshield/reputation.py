@@ -0,0 +1,195 @@
+"""
+FraudShield India — Identifier Reputation
+In-memory reputation for senders, UPI VPAs, phone numbers and link domains.
+Each identifier holds a decayed report count per scam category and a
+last-seen time. Old reports lose half their weight every `half_life`
+seconds.
+
+The table is primed from the scam graph seed data and updated from the
+FraudEvent stream. Classification looks up every identifier in a message.
+A strong enough prior on a sender, VPA or phone returns a verdict without
+calling the model. Domain hits and weaker hits are attached to the model's
+verdict as context: a domain is often only quoted by a scam, so a domain
+alone never skips the model. Curated brand and government domains and link
+shorteners are never scored.
+
+Lookups and updates are O(1). The table is an OrderedDict capped at
+`capacity` entries with least-recently-used eviction.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from fraudshield import metrics
+from fraudshield.entities import extract_entities, normalize_phone, url_domain
+from fraudshield.lookalike import is_official_domain
+from fraudshield.rules import EXPLANATIONS
+from fraudshield.shortlinks import SHORTENERS
+
+KINDS = ("sender", "vpa", "phone", "domain")
+DEFAULT_CAPACITY = 100_000
+DEFAULT_HALF_LIFE = 30 * 86400
+DEFAULT_THRESHOLD = 5.0
+
+# Sender values that identify a channel rather than a person; never scored.
+GENERIC_SENDERS = frozenset({"", "unknown", "anonymous", "telegram_user", "evaluator", "batch", "test"})
+# Kinds whose prior alone can answer without the model.
+FAST_PATH_KINDS = ("sender", "vpa", "phone")
+
+_KIND_LABELS = {"sender": "sender", "vpa": "UPI ID", "phone": "phone number", "domain": "website"}
+_KIND_LABELS_HI = {"sender": "भेजने वाला", "vpa": "UPI ID", "phone": "फ़ोन नंबर", "domain": "वेबसाइट"}
+
+
+def is_shared_domain(domain: str) -> bool:
+    """Real brand, government and link-shortener domains, which scams quote but do not own."""
+    return domain in SHORTENERS or is_official_domain(domain)
+
+
+def normalize(kind: str, value: str) -> str:
+    value = str(value or "").strip()
+    if kind == "phone":
+        return normalize_phone(value)
+    if kind == "domain":
+        return url_domain(value)
+    return value.lower()
+
+
+class _Entry:
+    __slots__ = ("counts", "updated", "last_seen")
+
+    def __init__(self, now: float):
+        self.counts = {}       # category -> decayed count as of `updated`
+        self.updated = now
+        self.last_seen = now
+
+
+class ReputationTable:
+    """LRU-bounded map of identifier -> decayed per-category report counts."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, half_life: float = DEFAULT_HALF_LIFE,
+                 clock=time.time):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _decay(self, entry: _Entry, now: float) -> None:
+        elapsed = now - entry.updated
+        if elapsed > 0:
+            factor = 0.5 ** (elapsed / self.half_life)
+            for category in entry.counts:
+                entry.counts[category] *= factor
+            entry.updated = now
+
+    def record(self, kind: str, value: str, category: str, weight: float = 1.0, ts: float = None) -> None:
+        """Add `weight` reports of `category` against an identifier."""
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {KINDS}")
+        key = (kind, normalize(kind, value))
+        if not key[1] or (kind == "sender" and key[1] in GENERIC_SENDERS) or (
+                kind == "domain" and is_shared_domain(key[1])):
+            return
+        now = self.clock()
+        ts = now if ts is None else min(ts, now)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(now)
+                if len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+                    metrics.incr("reputation.evictions")
+            else:
+                self._entries.move_to_end(key)
+                self._decay(entry, now)
+            # A late report has already decayed by the time it is recorded.
+            entry.counts[category] = entry.counts.get(category, 0.0) + weight * 0.5 ** ((now - ts) / self.half_life)
+            entry.last_seen = max(entry.last_seen, ts)
+
+    def lookup(self, kind: str, value: str):
+        """Return {kind, value, score, category, last_seen} for a known identifier, else None."""
+        key = (kind, normalize(kind, value))
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self._decay(entry, now)
+            category, top = max(entry.counts.items(), key=lambda kv: kv[1])
+            score = sum(entry.counts.values())
+            last_seen = entry.last_seen
+        return {"kind": kind, "value": key[1], "score": round(score, 2), "category": category,
+                "category_score": round(top, 2), "last_seen": last_seen}
+
+    def identifiers(self, message: str, sender: str = None, entities: dict = None) -> list:
+        """(kind, value) pairs worth looking up for a message and its sender."""
+        entities = entities or extract_entities(message)
+        pairs = [("sender", sender)] if sender else []
+        pairs += [("vpa", v) for v in entities["vpas"]]
+        pairs += [("phone", p) for p in entities["phones"]]
+        pairs += [("domain", d) for d in entities["domains"]]
+        return pairs
+
+    def assess(self, message: str, sender: str = None, entities: dict = None, pairs: list = None) -> list:
+        """Reputation hits for every known identifier in the message (or in `pairs`), strongest first."""
+        if pairs is None:
+            pairs = self.identifiers(message, sender, entities)
+        hits = [hit for kind, value in pairs if (hit := self.lookup(kind, value)) is not None]
+        hits.sort(key=lambda h: h["score"], reverse=True)
+        metrics.incr("reputation.lookups")
+        if hits:
+            metrics.incr("reputation.hits")
+        return hits
+
+    def record_event(self, event: dict, ts: float = None) -> int:
+        """Update every identifier in a scam FraudEvent. Returns how many were recorded."""
+        if not event.get("is_scam"):
+            return 0
+        category = event.get("category") or "unknown"
+        pairs = self.identifiers(event.get("message", ""), event.get("sender"))
+        for kind, value in pairs:
+            self.record(kind, value, category, ts=ts)
+        return len(pairs)
+
+    def seed(self, upis, phones=(), links=()) -> None:
+        """Prime the table from the scam graph seed rows (see fraudshield/scam_graph.py)."""
+        by_id = {}
+        for uid, vpa, category, count, *_ in upis:
+            self.record("vpa", vpa, category, weight=count)
+            by_id[uid] = (category, count)
+        linked = {}
+        for phone_id, upi_id, _ in links:
+            if upi_id in by_id:
+                linked.setdefault(phone_id, []).append(by_id[upi_id])
+        for pid, number, *_ in phones:
+            for category, count in linked.get(pid, ()):
+                self.record("phone", number, category, weight=count)
+
+
+def is_strong(hits: list, threshold: float = DEFAULT_THRESHOLD, kinds=FAST_PATH_KINDS) -> bool:
+    """Whether a hit of one of `kinds` is strong enough to answer without the model."""
+    return any(h["kind"] in kinds and h["category_score"] >= threshold for h in hits)
+
+
+def reputation_verdict(hits: list, kinds=FAST_PATH_KINDS) -> dict:
+    """A full verdict dict from the strongest reputation hit of one of `kinds` (tier="reputation")."""
+    top = max((h for h in hits if h["kind"] in kinds), key=lambda h: h["category_score"], default=hits[0])
+    category = top["category"] if top["category"] in EXPLANATIONS else "phishing_link"
+    reports = round(top["category_score"])
+    label, label_hi = _KIND_LABELS[top["kind"]], _KIND_LABELS_HI[top["kind"]]
+    explanation_en, explanation_hi = EXPLANATIONS[category]
+    return {
+        "is_scam": True,
+        "category": category,
+        "confidence": round(min(0.98, 0.7 + 0.07 * math.log2(1 + top["category_score"])), 2),
+        "risk_level": "high",
+        "explanation_en": f"This {label} ({top['value']}) has about {reports} recent scam reports. {explanation_en}",
+        "explanation_hi": f"यह {label_hi} ({top['value']}) हाल में लगभग {reports} बार धोखाधड़ी में रिपोर्ट हुआ है। {explanation_hi}",
+        "red_flags": [f"reported {_KIND_LABELS[h['kind']]} {h['value']}" for h in hits],
+        "tier": "reputation",
+    }
@@ -0,0 +1,426 @@
+"""
+FraudShield India — Model Router
+Spreads chat completions across several Azure OpenAI deployments. It keeps
+rolling latency and error rates per deployment, sends each call to the fastest
+healthy one, fails over to another deployment on 429/5xx, and stays within
+each deployment's tokens-per-minute budget.
+
+Hedging: when a call has not returned by the FRAUDSHIELD_HEDGE_PERCENTILE of
+recent call latency, a duplicate is sent (to another deployment when there
+is one) and the first successful response wins. FRAUDSHIELD_HEDGE_BUDGET
+caps duplicates as a fraction of calls (default 5%). A losing call cannot be
+interrupted mid-request; it is cancelled if it has not started, and
+otherwise its response is discarded.
+
+Configure with AZURE_OPENAI_DEPLOYMENTS, a JSON list such as:
+  [{"name": "central-india", "endpoint": "https://...", "key_env": "AOAI_KEY_CI",
+    "deployment": "o4-mini", "tpm": 200000}, ...]
+When it is unset, the single AZURE_OPENAI_ENDPOINT / AZURE_OPENAI_KEY /
+AZURE_OPENAI_DEPLOYMENT deployment is used.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from fraudshield import metrics
+
+logger = logging.getLogger(__name__)
+
+API_VERSION = "2024-12-01-preview"
+EWMA_ALPHA = 0.2           # weight of the newest latency / error sample
+DEFAULT_COOLDOWN = 10.0    # seconds a deployment sits out after a 429/5xx
+MAX_ATTEMPTS = 3           # deployments tried per request
+TPM_WINDOW = 60.0          # seconds
+HEDGE_WINDOW = 200         # recent call latencies the hedge delay is taken from
+
+
+class NoDeploymentAvailable(RuntimeError):
+    """Raised when every deployment is cooling down or out of token budget."""
+
+
+def estimate_tokens(messages: list, max_completion_tokens: int = 0) -> int:
+    """Rough token estimate (4 chars/token) used to reserve TPM budget."""
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + 4 * len(messages) + max_completion_tokens
+
+
+def _status_code(exc: Exception):
+    return getattr(exc, "status_code", None)
+
+
+def is_retryable(exc: Exception) -> bool:
+    """True for throttling, server errors and transport failures."""
+    status = _status_code(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    import openai
+    return isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError))
+
+
+def _retry_after(exc: Exception):
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class Deployment:
+    """One Azure OpenAI deployment plus its rolling health statistics."""
+
+    def __init__(self, name, endpoint, api_key, deployment, tpm=None,
+                 api_version=API_VERSION, client=None):
+        self.name = name
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.deployment = deployment
+        self.tpm = tpm
+        self.api_version = api_version
+        self.latency_ms = None   # EWMA of successful call latency
+        self.error_rate = 0.0    # EWMA of failures (1) vs successes (0)
+        self.cooldown_until = 0.0
+        self._client = client
+        self._tokens = deque()   # [timestamp, tokens] reservations inside the TPM window
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """Lazily built AzureOpenAI client; SDK retries are off, the router retries."""
+        if self._client is None:
+            from openai import AzureOpenAI
+            self._client = AzureOpenAI(
+                api_key=self.api_key,
+                api_version=self.api_version,
+                azure_endpoint=self.endpoint,
+                max_retries=0,
+            )
+        return self._client
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def score(self) -> float:
+        """Lower is better. Unmeasured deployments score 0 so they get probed."""
+        if self.latency_ms is None:
+            return 0.0
+        return self.latency_ms * (1.0 + 4.0 * self.error_rate)
+
+    def tokens_used(self, now: float) -> int:
+        with self._lock:
+            self._expire(now)
+            return sum(entry[1] for entry in self._tokens)
+
+    def reserve(self, tokens: int, now: float):
+        """Reserve `tokens` of TPM budget; returns a handle or None if over budget."""
+        with self._lock:
+            self._expire(now)
+            if self.tpm is not None:
+                used = sum(entry[1] for entry in self._tokens)
+                if used + tokens > self.tpm:
+                    return None
+            entry = [now, tokens]
+            self._tokens.append(entry)
+            return entry
+
+    def settle(self, reservation, actual_tokens) -> None:
+        """Replace an estimated reservation with the tokens actually billed."""
+        if reservation is not None and actual_tokens is not None:
+            with self._lock:
+                reservation[1] = actual_tokens
+
+    def record_success(self, latency_ms: float) -> None:
+        with self._lock:
+            if self.latency_ms is None:
+                self.latency_ms = latency_ms
+            else:
+                self.latency_ms += EWMA_ALPHA * (latency_ms - self.latency_ms)
+            self.error_rate *= 1.0 - EWMA_ALPHA
+
+    def record_failure(self, cooldown: float) -> None:
+        with self._lock:
+            self.error_rate += EWMA_ALPHA * (1.0 - self.error_rate)
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + cooldown)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "name": self.name,
+            "deployment": self.deployment,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "healthy": self.healthy(now),
+            "tokens_last_minute": self.tokens_used(now),
+            "tpm": self.tpm,
+        }
+
+    def _expire(self, now: float) -> None:
+        while self._tokens and now - self._tokens[0][0] >= TPM_WINDOW:
+            self._tokens.popleft()
+
+
+class HedgePolicy:
+    """When to send a duplicate call, and a token bucket that limits how many are sent.
+
+    Every call earns `budget` tokens (capped at `burst`) and every hedge spends
+    one, so over time at most `budget` extra calls are made per call.
+    """
+
+    def __init__(self, percentile: float = 95.0, budget: float = 0.05, min_samples: int = 20,
+                 min_delay_ms: float = 50.0, burst: float = 5.0, max_workers: int = 128):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay_ms = min_delay_ms
+        self.burst = burst
+        self.max_workers = max_workers
+        self._latencies = deque(maxlen=HEDGE_WINDOW)
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, env=None):
+        """The policy from FRAUDSHIELD_HEDGE_*; None when FRAUDSHIELD_HEDGE_PERCENTILE is 0."""
+        env = os.environ if env is None else env
+        percentile = float(env.get("FRAUDSHIELD_HEDGE_PERCENTILE", "95"))
+        if percentile <= 0:
+            return None
+        return cls(percentile=percentile,
+                   budget=float(env.get("FRAUDSHIELD_HEDGE_BUDGET", "0.05")),
+                   min_delay_ms=float(env.get("FRAUDSHIELD_HEDGE_MIN_DELAY_MS", "50")))
+
+    def record(self, latency_ms: float) -> None:
+        with self._lock:
+            self._latencies.append(latency_ms)
+
+    def delay_ms(self):
+        """How long to wait before hedging, or None until enough calls have been seen."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            samples = sorted(self._latencies)
+        idx = min(len(samples) - 1, int(self.percentile / 100.0 * len(samples)))
+        return max(self.min_delay_ms, samples[idx])
+
+    def earn(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+class ModelRouter:
+    """Latency-aware load balancer with failover across deployments."""
+
+    def __init__(self, deployments: list, max_attempts: int = MAX_ATTEMPTS,
+                 cooldown: float = DEFAULT_COOLDOWN, hedge: HedgePolicy = None):
+        if not deployments:
+            raise ValueError("ModelRouter needs at least one deployment.")
+        self.deployments = list(deployments)
+        self.max_attempts = max_attempts
+        self.cooldown = cooldown
+        self.hedge = hedge
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, env=None) -> "ModelRouter":
+        env = os.environ if env is None else env
+        raw = env.get("AZURE_OPENAI_DEPLOYMENTS", "").strip()
+        if raw:
+            specs = json.loads(raw)
+        else:
+            specs = [{
+                "name": "primary",
+                "endpoint": env["AZURE_OPENAI_ENDPOINT"],
+                "key": env["AZURE_OPENAI_KEY"],
+                "deployment": env.get("AZURE_OPENAI_DEPLOYMENT", "o4-mini"),
+            }]
+        deployments = []
+        for i, spec in enumerate(specs):
+            key = spec.get("key") or env.get(spec.get("key_env", ""), "")
+            deployments.append(Deployment(
+                name=spec.get("name", f"deployment-{i}"),
+                endpoint=spec["endpoint"],
+                api_key=key,
+                deployment=spec.get("deployment", "o4-mini"),
+                tpm=spec.get("tpm"),
+                api_version=spec.get("api_version", API_VERSION),
+            ))
+        return cls(deployments, hedge=HedgePolicy.from_env(env))
+
+    def ranked(self) -> list:
+        """Healthy deployments fastest-first, then cooling ones by soonest recovery."""
+        now = time.monotonic()
+        healthy = [d for d in self.deployments if d.healthy(now)]
+        cooling = [d for d in self.deployments if not d.healthy(now)]
+        healthy.sort(key=lambda d: d.score())
+        cooling.sort(key=lambda d: d.cooldown_until)
+        return healthy + cooling
+
+    def create(self, messages: list, max_completion_tokens: int = 500, exclude=(), **kwargs):
+        """Run a chat completion on the best deployment, failing over on 429/5xx and hedging stragglers.
+
+        Returns the SDK response; the serving deployment is available as
+        `response.deployment_name`.
+        """
+        t0 = time.perf_counter()
+        delay_ms = self.hedge.delay_ms() if self.hedge is not None else None
+        if delay_ms is None:
+            response = self._create(messages, max_completion_tokens, exclude, None, kwargs)
+            latency_ms = (time.perf_counter() - t0) * 1000
+            if self.hedge is not None:
+                self.hedge.record(latency_ms)
+            metrics.observe("router.latency_ms", latency_ms)
+            metrics.observe("router.unhedged_latency_ms", latency_ms)
+            return response
+        return self._create_hedged(messages, max_completion_tokens, exclude, kwargs, t0, delay_ms)
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.hedge.max_workers,
+                                                    thread_name_prefix="fraudshield-hedge")
+        return self._pool
+
+    @staticmethod
+    def _hedge_rate() -> None:
+        metrics.set_gauge("router.hedge.rate", round(metrics.ratio("router.hedge.fired", "router.hedge.eligible"), 4))
+
+    def _create_hedged(self, messages, max_completion_tokens, exclude, kwargs, t0, delay_ms):
+        hedge = self.hedge
+        hedge.earn()
+        metrics.incr("router.hedge.eligible")
+        metrics.set_gauge("router.hedge.delay_ms", round(delay_ms, 1))
+        served = []     # deployments the primary call has tried, in order
+        primary = self._executor().submit(self._create, messages, max_completion_tokens, exclude, served, kwargs)
+        hedge_ms = []
+
+        def primary_done(future):
+            # What the caller would have waited without a hedge; also feeds the hedge delay.
+            if future.cancelled() or future.exception() is not None:
+                return
+            latency_ms = (time.perf_counter() - t0) * 1000
+            hedge.record(latency_ms)
+            metrics.observe("router.unhedged_latency_ms", latency_ms)
+            if hedge_ms:
+                metrics.observe("router.hedge.saved_ms", latency_ms - hedge_ms[0])
+
+        try:
+            primary.result(timeout=delay_ms / 1000)
+        except FutureTimeout:
+            pass
+        if primary.done() or not hedge.try_spend():
+            if not primary.done():
+                metrics.incr("router.hedge.denied")
+            self._hedge_rate()
+            primary.add_done_callback(primary_done)
+            response = primary.result()
+            metrics.observe("router.latency_ms", (time.perf_counter() - t0) * 1000)
+            return response
+
+        metrics.incr("router.hedge.fired")
+        self._hedge_rate()
+        # Prefer a different deployment than the straggler when there is one.
+        avoid = tuple(exclude) + tuple(served[:1])
+        if not any(d.name not in avoid for d in self.deployments):
+            avoid = exclude
+        second = self._executor().submit(self._create, messages, max_completion_tokens, avoid, None, kwargs)
+        pending, error = {primary, second}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                if future is second:
+                    hedge_ms.append((time.perf_counter() - t0) * 1000)
+                    metrics.incr("router.hedge.won")
+                    primary.cancel()
+                else:
+                    second.cancel()
+                primary.add_done_callback(primary_done)
+                metrics.observe("router.latency_ms", (time.perf_counter() - t0) * 1000)
+                return future.result()
+        raise error
+
+    def _create(self, messages, max_completion_tokens, exclude, served, kwargs):
+        needed = estimate_tokens(messages, max_completion_tokens)
+        last_exc = None
+        attempts = 0
+        for dep in self.ranked():
+            if attempts >= self.max_attempts:
+                break
+            if dep.name in exclude:
+                continue
+            reservation = dep.reserve(needed, time.monotonic())
+            if reservation is None:
+                metrics.incr("router.budget_skips")
+                continue
+            attempts += 1
+            if served is not None:
+                served.append(dep.name)
+            t0 = time.perf_counter()
+            try:
+                response = dep.client.chat.completions.create(
+                    model=dep.deployment,
+                    messages=messages,
+                    max_completion_tokens=max_completion_tokens,
+                    **kwargs,
+                )
+            except Exception as exc:
+                if not is_retryable(exc):
+                    raise
+                dep.settle(reservation, 0)
+                dep.record_failure(_retry_after(exc) or self.cooldown)
+                metrics.incr("router.failovers")
+                metrics.incr(f"router.{dep.name}.errors")
+                logger.warning("Deployment %s failed (%s); trying next.", dep.name, exc)
+                last_exc = exc
+                continue
+            latency_ms = (time.perf_counter() - t0) * 1000
+            usage = getattr(response, "usage", None)
+            dep.settle(reservation, getattr(usage, "total_tokens", None))
+            dep.record_success(latency_ms)
+            metrics.observe(f"router.{dep.name}.latency_ms", latency_ms)
+            metrics.incr(f"router.{dep.name}.requests")
+            try:
+                response.deployment_name = dep.name
+            except AttributeError:
+                pass
+            return response
+        if last_exc is not None:
+            raise last_exc
+        raise NoDeploymentAvailable("All model deployments are cooling down or over their TPM budget.")
+
+    def stats(self) -> list:
+        return [d.stats() for d in self.deployments]
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_router(build: bool = True):
+    """The process-wide ModelRouter from the environment, so every caller shares its pooled clients.
+
+    With build=False, returns None instead of building it.
+    """
+    global _shared
+    if _shared is None and build:
+        with _shared_lock:
+            if _shared is None:
+                _shared = ModelRouter.from_env()
+    return _shared
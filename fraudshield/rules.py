@@ -0,0 +1,106 @@
+"""
+FraudShield India — Rule-based Detection
+Keyword and pattern rules for the eight scam categories. They give a local
+verdict without calling the model. It is used when the model is unavailable
+or overloaded, and as a cheap pre-filter.
+"""
+import re
+
+from fraudshield.entities import extract_entities
+
+# (category, weight, pattern). A category's score is the sum of its matching weights.
+RULES = [
+    ("fake_cashback", 2, r"\bcash ?back\b|\brefund\b"),
+    ("fake_cashback", 2, r"\bcollect request\b|\bapprove (?:the )?(?:request|payment)\b|approve kar"),
+    ("fake_cashback", 1, r"\b(?:google ?pay|gpay|phonepe|paytm)\b"),
+    ("digital_arrest", 3, r"\bcbi\b|\bnarcotics\b|\benforcement directorate\b|\bdigital arrest\b"),
+    ("digital_arrest", 2, r"\barrest(?:ed)?\b|\bwarrant\b|\bmoney laundering\b|\bcustoms\b|\bpolice\b"),
+    ("kyc_freeze", 3, r"\bkyc\b"),
+    ("kyc_freeze", 2, r"\b(?:share|send|batayein|bataiye)\b.{0,20}\b(?:otp|upi pin|pin)\b|\bupi pin\b"),
+    ("kyc_freeze", 1, r"\b(?:frozen|freeze|blocked|suspended|band ho)\b"),
+    ("job_scam", 3, r"\bwork from home\b|\bpart[ -]?time\b|\blike (?:youtube )?videos\b|\btask\b"),
+    ("job_scam", 2, r"\bearn\b.{0,20}\b(?:daily|per day|rozana)\b|\b(?:daily|per day) income\b"),
+    ("job_scam", 1, r"\b(?:registration|joining|security) (?:fee|deposit)\b|\bdeposit\b"),
+    ("lottery_scam", 3, r"\blottery\b|\blucky draw\b|\bkbc\b|\bjackpot\b"),
+    ("lottery_scam", 2, r"\bjeete?\b|\byou (?:have )?won\b|\bprize\b|\bwinner\b"),
+    ("lottery_scam", 1, r"\bprocessing fee\b|\btax fee\b"),
+    ("govt_impersonation", 3, r"\be-?challan\b|\bincome tax\b|\boverspeeding\b|\btraffic (?:fine|violation)\b"),
+    ("govt_impersonation", 2, r"\belectricity\b.{0,30}\b(?:disconnect|cut)\w*|\bbescom\b|\bcustoms duty\b"),
+    ("phishing_link", 3, r"\b(?:bit\.ly|tinyurl\.com|is\.gd|cutt\.ly|t\.ly|rb\.gy)/"),
+    ("phishing_link", 2, r"\.(?:vip|xyz|top|icu|buzz|tk|ml|ga|cf|gq)\b"),
+    ("phishing_link", 1, r"\bclick\b|\blogin\b|\bverify\b"),
+]
+COMPILED_RULES = [(category, weight, re.compile(pattern, re.IGNORECASE)) for category, weight, pattern in RULES]
+
+URGENCY_RE = re.compile(r"\b(?:urgent|immediately|within 24 ?hours?|turant|abhi|jaldi|today only)\b", re.IGNORECASE)
+SCAM_THRESHOLD = 3
+
+EXPLANATIONS = {
+    "fake_cashback": ("Asks you to approve a UPI request to 'receive' money; approving it sends money instead.",
+                      "पैसे पाने के लिए UPI request approve करने को कहा गया है; approve करने पर पैसे कटते हैं।"),
+    "digital_arrest": ("Impersonates police or a central agency and threatens arrest to extort money.",
+                       "पुलिस या सरकारी एजेंसी बनकर गिरफ्तारी की धमकी देकर पैसे मांगे जा रहे हैं।"),
+    "kyc_freeze": ("Threatens to freeze your account over KYC and asks for OTP/PIN or a link.",
+                   "KYC के नाम पर खाता बंद करने की धमकी देकर OTP/PIN या लिंक भरवाया जा रहा है।"),
+    "job_scam": ("Promises easy income but requires an upfront fee or deposit.",
+                 "आसान कमाई का वादा करके पहले फीस या डिपॉज़िट मांगा जा रहा है।"),
+    "lottery_scam": ("Claims you won a prize and asks for a fee to release it.",
+                     "इनाम जीतने का दावा करके उसे पाने के लिए फीस मांगी जा रही है।"),
+    "govt_impersonation": ("Pretends to be a government notice and pushes a payment link.",
+                           "सरकारी नोटिस बनकर भुगतान लिंक पर पैसे भरवाने की कोशिश है।"),
+    "phishing_link": ("Contains a suspicious link that may steal your banking details.",
+                      "संदिग्ध लिंक है जो आपकी बैंकिंग जानकारी चुरा सकता है।"),
+    "legitimate": ("No known scam pattern was found by the offline rules.",
+                   "ऑफ़लाइन नियमों में कोई ज्ञात धोखाधड़ी पैटर्न नहीं मिला।"),
+}
+
+
+def score_message(message: str) -> dict:
+    """Return {category: score} for every category with at least one matching rule."""
+    scores = {}
+    for category, weight, pattern in COMPILED_RULES:
+        if pattern.search(message):
+            scores[category] = scores.get(category, 0) + weight
+    return scores
+
+
+def rule_verdict(message: str) -> dict:
+    """Classify a message with the local rules only.
+
+    Returns a verdict dict with the same keys as a model verdict, plus
+    tier="rules" and the names of the matched categories as red flags.
+    """
+    scores = score_message(message)
+    entities = extract_entities(message)
+    urgent = bool(URGENCY_RE.search(message))
+    category, score = max(scores.items(), key=lambda kv: kv[1]) if scores else ("legitimate", 0)
+    if urgent and scores:
+        score += 1
+
+    if score >= SCAM_THRESHOLD:
+        is_scam = True
+        confidence = min(0.9, 0.45 + 0.08 * score)
+        risk_level = "high" if score >= 5 else "medium"
+    else:
+        is_scam = False
+        category = "legitimate"
+        confidence = 0.5 if scores else 0.6
+        risk_level = "low"
+
+    red_flags = [f"matches {name.replace('_', ' ')} pattern" for name in sorted(scores, key=scores.get, reverse=True)]
+    if urgent:
+        red_flags.append("creates urgency")
+    red_flags += [f"payment handle {vpa}" for vpa in entities["vpas"]]
+    red_flags += [f"link to {domain}" for domain in entities["domains"]]
+
+    explanation_en, explanation_hi = EXPLANATIONS[category]
+    return {
+        "is_scam": is_scam,
+        "category": category,
+        "confidence": round(confidence, 2),
+        "risk_level": risk_level,
+        "explanation_en": explanation_en,
+        "explanation_hi": explanation_hi,
+        "red_flags": red_flags if is_scam else [],
+        "tier": "rules",
+    }
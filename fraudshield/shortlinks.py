@@ -0,0 +1,351 @@
+"""
+FraudShield India — Short-link Expansion
+Finds where bit.ly, tinyurl and similar links in a message lead, so the
+destination domain goes through the same blocklist, reputation and
+look-alike checks as a domain written out in full.
+
+ShortLinkResolver follows redirects one hop at a time (HEAD, or GET when a
+shortener refuses HEAD) with a per-hop connect/read timeout, an overall
+deadline and a hop limit. It only fetches http(s) URLs whose host resolves
+to public addresses, so a message cannot point the server at internal
+services. The name is resolved again when the connection is made, and a
+DNS server that answers differently the second time (DNS rebinding) could
+still reach one, so every connection's peer address is checked as well.
+Lookups run on a thread pool: submit() returns at once, and
+function_app collects the destinations after the model call has been
+started, never before it.
+
+LinkCache keeps short URL → final URL, hop count, status and the
+destination's verdict in SQLite with a TTL, so a link sent to thousands of
+people is fetched once per TTL and survives restarts. Failed lookups are
+cached for a shorter time. A cached link whose destination was judged a
+scam is answered without the model (shortlink_verdict, tier="shortlink").
+
+Neither the HTTP session (requests) nor the SQLite connection is created at
+import: both are made on first use, or earlier by the warm-up step.
+
+Env vars:
+  FRAUDSHIELD_SHORTLINKS          – "0" to never expand short links (default "1")
+  FRAUDSHIELD_SHORTLINK_DB        – SQLite path (default: temp dir)
+  FRAUDSHIELD_SHORTLINK_TTL       – seconds a resolved link is kept (default 7 days)
+  FRAUDSHIELD_SHORTLINK_FAIL_TTL  – seconds a failed lookup is kept (default 1 hour)
+  FRAUDSHIELD_SHORTLINK_TIMEOUT   – overall seconds per link (default 2.5)
+  FRAUDSHIELD_SHORTLINK_MAX_HOPS  – redirects followed per link (default 5)
+"""
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urljoin, urlsplit
+
+from fraudshield import metrics
+from fraudshield.entities import url_domain
+from fraudshield.rules import EXPLANATIONS
+
+logger = logging.getLogger(__name__)
+
+SHORTENERS = frozenset({
+    "bit.ly", "bitly.com", "tinyurl.com", "is.gd", "v.gd", "cutt.ly", "t.ly", "rb.gy", "goo.gl", "ow.ly",
+    "t.co", "shorturl.at", "tiny.cc", "s.id", "rebrand.ly", "bl.ink", "shorte.st", "adf.ly", "surl.li",
+    "urlz.fr", "qr.ae", "clck.ru", "buff.ly", "lnkd.in", "tr.ee", "linktr.ee",
+})
+REDIRECTS = (301, 302, 303, 307, 308)
+DEFAULT_TTL = 7 * 86400.0
+DEFAULT_FAIL_TTL = 3600.0
+USER_AGENT = "Mozilla/5.0 (Linux; Android 13) FraudShieldLinkCheck/1.0"
+
+OK = "ok"               # reached a page that does not redirect
+TOO_MANY_HOPS = "hops"  # stopped at the hop limit
+BLOCKED = "blocked"     # non-http(s) scheme or a private address
+FAILED = "error"        # network error or timeout
+
+
+def is_shortlink(url: str) -> bool:
+    return url_domain(url) in SHORTENERS
+
+
+def _normalize(url: str) -> str:
+    return url if "://" in url else "http://" + url
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+class LinkCache:
+    """SQLite-backed short URL → expansion map with per-entry expiry."""
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, fail_ttl: float = DEFAULT_FAIL_TTL,
+                 clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.fail_ttl = fail_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn = None       # opened by _db() on first use, off the cold-start path
+
+    @classmethod
+    def from_env(cls) -> "LinkCache":
+        return cls(os.environ.get("FRAUDSHIELD_SHORTLINK_DB",
+                                  os.path.join(tempfile.gettempdir(), "fraudshield_shortlinks.sqlite3")),
+                   ttl=float(os.environ.get("FRAUDSHIELD_SHORTLINK_TTL", str(DEFAULT_TTL))),
+                   fail_ttl=float(os.environ.get("FRAUDSHIELD_SHORTLINK_FAIL_TTL", str(DEFAULT_FAIL_TTL))))
+
+    def _db(self) -> sqlite3.Connection:
+        """The connection, opened on first use; callers hold `_lock`."""
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS links (short TEXT PRIMARY KEY, final TEXT, hops INTEGER, "
+                         "status TEXT, verdict TEXT, expires REAL)")
+            self._conn = conn
+        return self._conn
+
+    def open(self) -> None:
+        """Open the database now (from warm-up) rather than on the first lookup."""
+        with self._lock:
+            self._db()
+
+    def get(self, short: str):
+        """The cached expansion of `short`, or None if missing or expired."""
+        with self._lock:
+            row = self._db().execute("SELECT final, hops, status, verdict, expires FROM links WHERE short = ?",
+                                     (short,)).fetchone()
+        if row is None or row[4] <= self.clock():
+            metrics.incr("shortlinks.cache_misses")
+            return None
+        metrics.incr("shortlinks.cache_hits")
+        final, hops, status, verdict, _ = row
+        return {"short": short, "final": final, "domain": url_domain(final) if final else "", "hops": hops,
+                "status": status, "verdict": json.loads(verdict) if verdict else None}
+
+    def put(self, expansion: dict) -> None:
+        ttl = self.ttl if expansion["status"] in (OK, TOO_MANY_HOPS) else self.fail_ttl
+        verdict = json.dumps(expansion.get("verdict")) if expansion.get("verdict") else None
+        with self._lock:
+            self._db().execute("INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?, ?, ?)",
+                               (expansion["short"], expansion["final"], expansion["hops"], expansion["status"],
+                                verdict, self.clock() + ttl))
+
+    def set_verdict(self, short: str, verdict: dict) -> None:
+        with self._lock:
+            self._db().execute("UPDATE links SET verdict = ? WHERE short = ?", (json.dumps(verdict), short))
+
+    def purge(self) -> int:
+        """Delete expired entries; returns how many."""
+        with self._lock:
+            return self._db().execute("DELETE FROM links WHERE expires <= ?", (self.clock(),)).rowcount
+
+
+# ── Resolver ──────────────────────────────────────────────────────────────────
+
+class PrivateAddress(Exception):
+    """A connection reached a non-public address although its host name resolved to public ones."""
+
+
+def _is_public(address: str) -> bool:
+    return ipaddress.ip_address(address.split("%")[0]).is_global
+
+
+def _public_host(host: str) -> bool:
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except (socket.gaierror, UnicodeError):
+        return False
+    return bool(addresses) and all(_is_public(a) for a in addresses)
+
+
+def _public_only_adapter():
+    """A requests transport adapter that closes any connection whose peer address is not public."""
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class PublicOnly:
+        def _new_conn(self):
+            sock = super()._new_conn()
+            peer = sock.getpeername()[0]
+            if not _is_public(peer):
+                sock.close()
+                raise PrivateAddress(f"{self.host} connected to {peer}")
+            return sock
+
+    pools = {
+        "http": type("PublicHTTPConnectionPool", (HTTPConnectionPool,),
+                     {"ConnectionCls": type("PublicHTTPConnection", (PublicOnly, HTTPConnection), {})}),
+        "https": type("PublicHTTPSConnectionPool", (HTTPSConnectionPool,),
+                      {"ConnectionCls": type("PublicHTTPSConnection", (PublicOnly, HTTPSConnection), {})}),
+    }
+
+    class PublicOnlyAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = pools
+
+    return PublicOnlyAdapter()
+
+
+class Pending:
+    """Expansions started by ShortLinkResolver.submit(): some known at once, the rest in flight."""
+
+    def __init__(self, known: list, futures: list):
+        self.known = known
+        self.futures = futures
+        self.started = time.monotonic()
+
+    def __bool__(self) -> bool:
+        return bool(self.known or self.futures)
+
+    def done(self) -> list:
+        """Expansions available now, without waiting."""
+        return self.known + [f.result() for f in self.futures if f.done()]
+
+    def wait(self, timeout: float) -> list:
+        """Expansions available within `timeout` seconds; stragglers keep running and fill the cache."""
+        if self.futures:
+            wait(self.futures, timeout=max(0.0, timeout))
+        late = [f for f in self.futures if not f.done()]
+        if late:
+            metrics.incr("shortlinks.late", len(late))
+        return self.done()
+
+
+class ShortLinkResolver:
+    """Follows short-link redirects on a thread pool, through a LinkCache."""
+
+    def __init__(self, cache: LinkCache, session=None, timeout: float = 2.5, max_hops: int = 5,
+                 workers: int = 16, allow_private: bool = False):
+        self.cache = cache
+        self._session = session     # created by the `session` property on first use; requests costs ~75 ms
+        self.timeout = timeout
+        self.max_hops = max_hops
+        self.allow_private = allow_private
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fraudshield-links")
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    session = requests.Session()
+                    session.headers["User-Agent"] = USER_AGENT
+                    if not self.allow_private:
+                        adapter = _public_only_adapter()
+                        session.mount("http://", adapter)
+                        session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def warm(self) -> None:
+        """Create the HTTP session and open the cache, so the first short link does not pay for them."""
+        self.session
+        self.cache.open()
+
+    @classmethod
+    def from_env(cls):
+        """A resolver configured from FRAUDSHIELD_SHORTLINK_*, or None if expansion is switched off."""
+        if os.environ.get("FRAUDSHIELD_SHORTLINKS", "1") == "0":
+            return None
+        return cls(LinkCache.from_env(),
+                   timeout=float(os.environ.get("FRAUDSHIELD_SHORTLINK_TIMEOUT", "2.5")),
+                   max_hops=int(os.environ.get("FRAUDSHIELD_SHORTLINK_MAX_HOPS", "5")))
+
+    def submit(self, urls) -> Pending:
+        """Start expanding every short link in `urls`; cached ones are known immediately."""
+        known, futures = [], []
+        for url in dict.fromkeys(_normalize(u) for u in urls if is_shortlink(u)):
+            cached = self.cache.get(url)
+            if cached is not None:
+                known.append(cached)
+                continue
+            with self._lock:
+                future = self._inflight.get(url)
+                if future is None:
+                    future = self._inflight[url] = self._pool.submit(self._resolve_and_store, url)
+                    future.add_done_callback(lambda _, url=url: self._forget(url))
+            futures.append(future)
+        return Pending(known, futures)
+
+    def _forget(self, url: str) -> None:
+        with self._lock:
+            self._inflight.pop(url, None)
+
+    def _resolve_and_store(self, url: str) -> dict:
+        t0 = time.perf_counter()
+        expansion = self.resolve(url)
+        metrics.observe("shortlinks.resolve_ms", (time.perf_counter() - t0) * 1000)
+        metrics.incr(f"shortlinks.{expansion['status']}")
+        try:
+            self.cache.put(expansion)
+        except sqlite3.Error as exc:
+            logger.warning("Could not cache expansion of %s: %s", url, exc)
+        return expansion
+
+    def resolve(self, url: str) -> dict:
+        """Follow `url`'s redirects now, without the cache."""
+        deadline = time.monotonic() + self.timeout
+        current, hops, status = url, 0, OK
+        while True:
+            parts = urlsplit(current)
+            if parts.scheme not in ("http", "https") or not parts.hostname or (
+                    not self.allow_private and not _public_host(parts.hostname)):
+                status = BLOCKED
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                status = FAILED
+                break
+            try:
+                response = self._fetch(current, remaining)
+            except PrivateAddress as exc:
+                logger.warning("Short link %s blocked at %s: %s", url, current, exc)
+                status = BLOCKED
+                break
+            except Exception as exc:   # requests raises many types; any of them ends the walk
+                logger.info("Short link %s failed at %s: %s", url, current, exc)
+                status = FAILED
+                break
+            location = response.headers.get("Location")
+            if response.status_code not in REDIRECTS or not location:
+                break
+            if hops == self.max_hops:
+                status = TOO_MANY_HOPS
+                break
+            current, hops = urljoin(current, location), hops + 1
+        return {"short": url, "final": current, "domain": url_domain(current), "hops": hops, "status": status,
+                "verdict": None}
+
+    def _fetch(self, url: str, remaining: float):
+        timeout = (min(1.0, remaining), remaining)
+        response = self.session.head(url, allow_redirects=False, timeout=timeout)
+        if response.status_code in (403, 405, 501):
+            response = self.session.get(url, allow_redirects=False, timeout=timeout, stream=True)
+            response.close()
+        return response
+
+
+def shortlink_verdict(expansion: dict) -> dict:
+    """A full verdict dict (tier="shortlink") for a short link whose destination was judged a scam before."""
+    category = expansion["verdict"]["category"]
+    explanation_en, explanation_hi = EXPLANATIONS[category]
+    return {
+        "is_scam": True,
+        "category": category,
+        "confidence": 0.85,
+        "risk_level": "high",
+        "explanation_en": f"The short link {expansion['short']} leads to {expansion['domain']}, a known scam site. "
+                          f"{explanation_en}",
+        "explanation_hi": f"छोटा लिंक {expansion['short']} {expansion['domain']} पर ले जाता है, जो एक ज्ञात "
+                          f"धोखाधड़ी साइट है। {explanation_hi}",
+        "red_flags": [f"short link leads to {expansion['domain']}"],
+        "tier": "shortlink",
+    }
@@ -0,0 +1,244 @@
+"""
+FraudShield India — SMS Template Mining
+Streaming template miner in the style of Drain (He et al., ICWS 2017): each
+message becomes (template ID, slot values), e.g.
+
+  "Aapne KBC me Rs.25,000 jeete. Fee Rs.5000 bhejein"
+  → "aapne kbc me <AMT> jeete. fee <AMT> bhejein", slots ["Rs.25,000", "Rs.5000"]
+
+- Tokens are whitespace-split and case-folded. URLs, UPI IDs, phone
+  numbers, amounts and other numbers are masked (<URL>, <VPA>, <PHONE>,
+  <AMT>, <NUM>) before matching.
+- A fixed-depth prefix tree routes a message by its token count and then by
+  its first `depth` tokens (masked or over-full positions go to "<*>"). The
+  leaf holds at most `max_leaf` templates; the message joins the one with
+  the most equal tokens if at least `similarity` of its tokens agree,
+  and positions that differ become "<*>". Otherwise it starts a new one.
+  The work per message is O(tokens).
+- Templates are kept least recently seen first; beyond `capacity` the
+  oldest are evicted and emptied tree branches pruned, so memory stays
+  bounded however many distinct messages arrive.
+
+Template IDs are stable for the life of a template, but a template's text
+is not: merging turns word positions into "<*>". classify_message's
+coalescing and verdict-cache key is therefore the template ID together with
+the current template text, the words at its "<*>" positions (`wildcards`)
+and the message's URLs, VPAs and phones, and only when the template is
+specific enough (is_specific()). /api/templates reports volume, first seen
+and last seen per template.
+
+Env vars:
+  FRAUDSHIELD_TEMPLATE_MINER          – "0" to switch mining off (default "1")
+  FRAUDSHIELD_TEMPLATE_MINER_CAPACITY – templates kept (default 20000)
+  FRAUDSHIELD_TEMPLATE_MINER_SIM      – share of tokens that must agree to join a template (default 0.5)
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import NamedTuple
+
+from fraudshield import metrics
+
+WILDCARD = "<*>"
+MASKS = ("<URL>", "<VPA>", "<PHONE>", "<AMT>", "<NUM>")
+DEFAULT_DEPTH = 2
+DEFAULT_SIMILARITY = 0.5
+DEFAULT_MAX_CHILDREN = 100
+DEFAULT_MAX_LEAF = 32
+DEFAULT_CAPACITY = 20_000
+# A template with fewer fixed tokens than this, or fixed tokens under half its length, is too loose
+# to stand in for the message (e.g. "<*> <*> <NUM>") and is not used as a cache key.
+MIN_FIXED_TOKENS = 3
+
+_EDGE = ".,;:!?()[]{}\"'"
+_URL = re.compile(r"^(?:https?://|www\.)\S+$|^[\w-]+(?:\.[\w-]+)*\.[a-z]{2,}(?:/\S*)?$")
+_VPA = re.compile(r"^[\w.-]+@[a-z]+$")
+_PHONE = re.compile(r"^(?:\+?91[-\s]?)?[6-9]\d{9}$")
+_AMOUNT = re.compile(r"^(?:rs\.?|inr|₹)\s*\d[\d,]*(?:\.\d+)?(?:/-)?$")
+_DIGIT = re.compile(r"\d")
+
+
+def mask_token(token: str) -> str:
+    """The mask for a variable token, or the token itself."""
+    core = token.strip(_EDGE)
+    if _AMOUNT.match(core):
+        return "<AMT>"
+    if _VPA.match(core):
+        return "<VPA>"
+    if _PHONE.match(core):
+        return "<PHONE>"
+    if _URL.match(core) and not core.replace(".", "").isdigit():
+        return "<URL>"
+    if _DIGIT.search(core):
+        return "<NUM>"
+    return token
+
+
+def is_slot(token: str) -> bool:
+    return token == WILDCARD or token in MASKS
+
+
+class Mined(NamedTuple):
+    template_id: str
+    template: str
+    slots: list
+    specific: bool
+    wildcards: list     # case-folded words at "<*>" positions; they may carry the meaning
+
+
+class _Node:
+    __slots__ = ("children", "templates")
+
+    def __init__(self):
+        self.children = {}
+        self.templates = []     # template IDs, at leaves only
+
+
+class _Template:
+    __slots__ = ("id", "tokens", "count", "first_seen", "last_seen", "path")
+
+    def __init__(self, id: str, tokens: list, now: float, path: list):
+        self.id = id
+        self.tokens = tokens
+        self.count = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.path = path        # [(node, key)] from the root to the leaf, for pruning
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.tokens)
+
+    def stats(self) -> dict:
+        return {"template_id": self.id, "template": self.text, "count": self.count,
+                "first_seen": self.first_seen, "last_seen": self.last_seen, "specific": is_specific(self.tokens)}
+
+
+def is_specific(tokens: list) -> bool:
+    """Whether a template has enough fixed text to stand in for the messages that match it."""
+    fixed = sum(not is_slot(t) for t in tokens)
+    return fixed >= MIN_FIXED_TOKENS and 2 * fixed >= len(tokens)
+
+
+class TemplateMiner:
+    """Drain-style online template miner with bounded memory."""
+
+    def __init__(self, depth: int = DEFAULT_DEPTH, similarity: float = DEFAULT_SIMILARITY,
+                 max_children: int = DEFAULT_MAX_CHILDREN, max_leaf: int = DEFAULT_MAX_LEAF,
+                 capacity: int = DEFAULT_CAPACITY, clock=time.time):
+        self.depth = depth
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_leaf = max_leaf
+        self.capacity = capacity
+        self.clock = clock
+        self._root = _Node()
+        self._templates = OrderedDict()     # id -> _Template, least recently seen first
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """A miner configured from FRAUDSHIELD_TEMPLATE_MINER_*, or None if mining is switched off."""
+        if os.environ.get("FRAUDSHIELD_TEMPLATE_MINER", "1") == "0":
+            return None
+        return cls(similarity=float(os.environ.get("FRAUDSHIELD_TEMPLATE_MINER_SIM", str(DEFAULT_SIMILARITY))),
+                   capacity=int(os.environ.get("FRAUDSHIELD_TEMPLATE_MINER_CAPACITY", str(DEFAULT_CAPACITY))))
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def _leaf(self, masked: list) -> tuple:
+        """(leaf node, path) for a message's masked tokens, creating nodes on the way."""
+        node = self._root.children.get(len(masked))
+        if node is None:
+            node = self._root.children[len(masked)] = _Node()
+        path = [(self._root, len(masked))]
+        for token in masked[:self.depth]:
+            key = WILDCARD if is_slot(token) else token
+            if key not in node.children and len(node.children) >= self.max_children:
+                key = WILDCARD
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = _Node()
+            path.append((node, key))
+            node = child
+        return node, path
+
+    def _best(self, leaf: _Node, masked: list):
+        best, best_score = None, (-1, -1)
+        for template_id in leaf.templates:
+            template = self._templates[template_id]
+            equal = wildcards = 0
+            for t, m in zip(template.tokens, masked):
+                if t == WILDCARD:
+                    wildcards += 1
+                elif t == m:
+                    equal += 1
+            score = (equal, wildcards)
+            if score > best_score:
+                best, best_score = template, score
+        if best is None or best_score[0] < self.similarity * len(masked):
+            return None
+        return best
+
+    def mine(self, message: str, ts: float = None):
+        """(template ID, template, slot values, specific) for `message`, or None if it has no text."""
+        tokens = unicodedata.normalize("NFKC", message or "").split()
+        if not tokens:
+            return None
+        masked = [mask_token(t.casefold()) for t in tokens]
+        now = self.clock() if ts is None else ts
+        with self._lock:
+            leaf, path = self._leaf(masked)
+            template = self._best(leaf, masked)
+            if template is None:
+                template_id = hashlib.blake2b(" ".join(masked).encode("utf-8"), digest_size=6).hexdigest()
+                template = self._templates.get(template_id)
+                if template is None:
+                    template = self._templates[template_id] = _Template(template_id, masked, now, path)
+                    leaf.templates.append(template_id)
+                    metrics.incr("template_miner.created")
+                    if len(leaf.templates) > self.max_leaf:
+                        self._drop(min((self._templates[i] for i in leaf.templates), key=lambda t: t.last_seen))
+                    while len(self._templates) > self.capacity:
+                        self._drop(next(iter(self._templates.values())))
+            else:
+                template.tokens = [t if t == m else WILDCARD for t, m in zip(template.tokens, masked)]
+                metrics.incr("template_miner.matched")
+            template.count += 1
+            template.last_seen = max(template.last_seen, now)
+            self._templates.move_to_end(template.id)
+            slots = [raw for raw, t in zip(tokens, template.tokens) if is_slot(t)]
+            wildcards = [m for m, t in zip(masked, template.tokens) if t == WILDCARD]
+            return Mined(template.id, template.text, slots, is_specific(template.tokens), wildcards)
+
+    def _drop(self, template: _Template) -> None:
+        del self._templates[template.id]
+        metrics.incr("template_miner.evictions")
+        parent, key = template.path[-1]
+        leaf = parent.children[key]
+        leaf.templates.remove(template.id)
+        # Prune branches that no longer lead to any template.
+        node = leaf
+        for parent, key in reversed(template.path):
+            if node.templates or node.children:
+                break
+            del parent.children[key]
+            node = parent
+
+    def get(self, template_id: str):
+        """Statistics for one template, or None if it is unknown or was evicted."""
+        with self._lock:
+            template = self._templates.get(template_id)
+            return template.stats() if template is not None else None
+
+    def top(self, limit: int = 20, since: float = None) -> list:
+        """The highest-volume templates, optionally only those seen at or after `since`."""
+        with self._lock:
+            templates = [t for t in self._templates.values() if since is None or t.last_seen >= since]
+            templates.sort(key=lambda t: (-t.count, -t.last_seen))
+            return [t.stats() for t in templates[:limit]]
@@ -0,0 +1,318 @@
+"""
+FraudShield India — Explanation Templates
+Vetted English, Hindi and Hinglish explanations and red flags for each of
+the eight categories, with slots filled from the message's entities:
+{amount}, {vpa}, {domain}, {phone}, and the organisation it names as
+{bank}, {agency}, {govt} or {brand} (any of them).
+
+Each explanation is a list of sentences; each sentence lists alternatives
+from most to least specific, and the first one whose slots are all known is
+used. A sentence with no usable alternative is left out. Every sentence
+should read correctly with any slot value, so slots never open a sentence
+whose language has capitals.
+
+function_app uses templates instead of model-written text for verdicts from
+a fast tier (reputation, look-alike, short link, distilled model, rules) and for confident
+verdict-only profile verdicts, so those responses need no generation.
+
+Env vars:
+  FRAUDSHIELD_TEMPLATE_MIN_CONFIDENCE – verdict-profile confidence needed for templates (default 0.8)
+"""
+import os
+import re
+import string
+
+from fraudshield.entities import extract_entities
+from fraudshield.rules import URGENCY_RE
+
+FAST_TIERS = ("reputation", "lookalike", "shortlink", "campaign", "distilled", "rules", "template")
+# Tiers whose own explanations name the identifier that gave the message away.
+OWN_TEXT_TIERS = ("reputation", "lookalike", "shortlink")
+MIN_CONFIDENCE = float(os.environ.get("FRAUDSHIELD_TEMPLATE_MIN_CONFIDENCE", "0.8"))
+
+# pattern -> (kind, English name, Hindi name, Hinglish name)
+ORGANISATIONS = [
+    (r"\bsbi\b|\bstate bank\b", "bank", "SBI", "SBI", "SBI"),
+    (r"\bhdfc\b", "bank", "HDFC Bank", "HDFC बैंक", "HDFC Bank"),
+    (r"\bicici\b", "bank", "ICICI Bank", "ICICI बैंक", "ICICI Bank"),
+    (r"\baxis\b", "bank", "Axis Bank", "एक्सिस बैंक", "Axis Bank"),
+    (r"\bpnb\b|\bpunjab national\b", "bank", "PNB", "PNB", "PNB"),
+    (r"\bkotak\b", "bank", "Kotak Bank", "कोटक बैंक", "Kotak Bank"),
+    (r"\bbank of baroda\b|\bbob\b", "bank", "Bank of Baroda", "बैंक ऑफ़ बड़ौदा", "Bank of Baroda"),
+    (r"\bpaytm\b", "bank", "Paytm", "Paytm", "Paytm"),
+    (r"\bphonepe\b", "brand", "PhonePe", "PhonePe", "PhonePe"),
+    (r"\bgoogle ?pay\b|\bgpay\b", "brand", "Google Pay", "Google Pay", "Google Pay"),
+    (r"\bamazon\b", "brand", "Amazon", "Amazon", "Amazon"),
+    (r"\bflipkart\b", "brand", "Flipkart", "Flipkart", "Flipkart"),
+    (r"\bkbc\b|\bkaun banega crorepati\b", "brand", "KBC", "KBC", "KBC"),
+    (r"\bjio\b", "brand", "Jio", "Jio", "Jio"),
+    (r"\bairtel\b", "brand", "Airtel", "Airtel", "Airtel"),
+    (r"\bcbi\b", "agency", "the CBI", "CBI", "CBI"),
+    (r"\bnarcotics\b|\bncb\b", "agency", "the Narcotics Control Bureau", "नारकोटिक्स ब्यूरो", "Narcotics Bureau"),
+    (r"\benforcement directorate\b", "agency", "the Enforcement Directorate", "प्रवर्तन निदेशालय (ED)", "ED"),
+    (r"\bcustoms\b", "agency", "Customs", "कस्टम विभाग", "Customs"),
+    (r"\btrai\b", "agency", "TRAI", "TRAI", "TRAI"),
+    (r"\bcyber ?crime\b|\bcyber cell\b", "agency", "the cyber crime cell", "साइबर क्राइम सेल", "cyber crime cell"),
+    (r"\bpolice\b", "agency", "the police", "पुलिस", "police"),
+    (r"\bincome tax\b|\bitr\b", "govt", "the Income Tax Department", "आयकर विभाग", "Income Tax Department"),
+    (r"\be-?challan\b|\bparivahan\b|\btraffic\b", "govt", "the traffic police (e-challan)", "ट्रैफ़िक पुलिस (ई-चालान)",
+     "traffic police (e-challan)"),
+    (r"\belectricity\b|\bbijli\b|\bbescom\b", "govt", "your electricity board", "बिजली विभाग", "bijli vibhag"),
+    (r"\buidai\b|\baadhaar\b", "govt", "UIDAI (Aadhaar)", "UIDAI (आधार)", "UIDAI (Aadhaar)"),
+    (r"\bindia post\b", "govt", "India Post", "इंडिया पोस्ट", "India Post"),
+]
+_ORGANISATIONS = [(re.compile(p, re.IGNORECASE), kind, names) for p, kind, *names in ORGANISATIONS]
+LANGUAGES = ("en", "hi", "hinglish")
+
+EXPLANATIONS = {
+    "fake_cashback": {
+        "en": [
+            ["This is a fake cashback or refund offer."],
+            ["Approving the UPI request from {vpa} will take {amount} out of your account, not add it.",
+             "Approving the UPI request from {vpa} will take money out of your account, not add it.",
+             "Approving a UPI request takes money out of your account; it never adds money."],
+            ["You never need to enter your UPI PIN to receive money."],
+        ],
+        "hi": [
+            ["यह नकली कैशबैक या रिफ़ंड का झांसा है।"],
+            ["{vpa} का UPI अनुरोध स्वीकार करने पर आपके खाते से {amount} कटेंगे, आएँगे नहीं।",
+             "{vpa} का UPI अनुरोध स्वीकार करने पर आपके खाते से पैसे कटेंगे, आएँगे नहीं।",
+             "UPI अनुरोध स्वीकार करने पर आपके खाते से पैसे कटते हैं, आते नहीं।"],
+            ["पैसे पाने के लिए कभी UPI PIN डालने की ज़रूरत नहीं होती।"],
+        ],
+        "hinglish": [
+            ["Yeh fake cashback ya refund ka jhansa hai."],
+            ["UPI handle {vpa} ki request approve karne par aapke account se {amount} katenge, aayenge nahi.",
+             "UPI handle {vpa} ki request approve karne par aapke account se paise katenge, aayenge nahi.",
+             "UPI request approve karne par account se paise katte hain, aate nahi."],
+            ["Paise receive karne ke liye UPI PIN kabhi nahi daalna padta."],
+        ],
+    },
+    "digital_arrest": {
+        "en": [
+            ["This message pretends to be from {agency} and threatens arrest to frighten you into paying.",
+             "This message pretends to be from the police or a central agency and threatens arrest to frighten "
+             "you into paying."],
+            ["There is no 'digital arrest' in Indian law; real officers never demand money over calls, video calls "
+             "or UPI."],
+            ["Do not transfer {amount} or any other amount.", "Do not transfer any money."],
+            ["Do not call {phone} back."],
+        ],
+        "hi": [
+            ["यह संदेश {agency} का अधिकारी बनकर गिरफ़्तारी की धमकी देता है ताकि आप डरकर पैसे भेजें।",
+             "यह संदेश पुलिस या किसी केंद्रीय एजेंसी का अधिकारी बनकर गिरफ़्तारी की धमकी देता है ताकि आप डरकर पैसे भेजें।"],
+            ["क़ानून में 'डिजिटल अरेस्ट' जैसा कुछ नहीं होता; असली अधिकारी कॉल, वीडियो कॉल या UPI से पैसे नहीं माँगते।"],
+            ["{amount} या कोई भी राशि ट्रांसफ़र न करें।", "कोई भी पैसा ट्रांसफ़र न करें।"],
+            ["{phone} पर वापस कॉल न करें।"],
+        ],
+        "hinglish": [
+            ["Yeh message {agency} ka officer ban kar arrest ki dhamki de raha hai taaki aap darr kar paise bhejein.",
+             "Yeh message police ya kisi central agency ka officer ban kar arrest ki dhamki de raha hai taaki aap "
+             "darr kar paise bhejein."],
+            ["'Digital arrest' jaisa kuch nahi hota; asli officer call, video call ya UPI par paise nahi maangte."],
+            ["{amount} ya koi bhi amount transfer mat kijiye.", "Koi bhi paisa transfer mat kijiye."],
+            ["Number {phone} par wapas call mat kijiye."],
+        ],
+    },
+    "kyc_freeze": {
+        "en": [
+            ["This message falsely says your KYC has expired or your account will be blocked, to rush you."],
+            ["{bank} never asks you to update KYC through an SMS link, or for your OTP or UPI PIN.",
+             "Banks never ask you to update KYC through an SMS link, or for your OTP or UPI PIN."],
+            ["The site {domain} is not an official bank website; do not open it."],
+            ["Do not call {phone}."],
+        ],
+        "hi": [
+            ["यह संदेश झूठा दावा करता है कि आपका KYC समाप्त हो गया है या खाता बंद हो जाएगा, ताकि आप जल्दबाज़ी करें।"],
+            ["{bank} कभी SMS लिंक से KYC अपडेट करने या OTP/UPI PIN बताने को नहीं कहता।",
+             "बैंक कभी SMS लिंक से KYC अपडेट करने या OTP/UPI PIN बताने को नहीं कहते।"],
+            ["{domain} कोई आधिकारिक बैंक वेबसाइट नहीं है; इसे न खोलें।"],
+            ["{phone} पर कॉल न करें।"],
+        ],
+        "hinglish": [
+            ["Yeh message jhootha keh raha hai ki aapka KYC expire ho gaya hai ya account block ho jayega."],
+            ["{bank} kabhi SMS link se KYC update ya OTP/UPI PIN nahi maangta.",
+             "Bank kabhi SMS link se KYC update ya OTP/UPI PIN nahi maangte."],
+            ["Site {domain} official bank website nahi hai; ise mat kholiye."],
+            ["Number {phone} par call mat kijiye."],
+        ],
+    },
+    "job_scam": {
+        "en": [
+            ["This is a fake job or task offer."],
+            ["Genuine employers never ask you to pay {amount} as a deposit or registration fee.",
+             "Genuine employers never ask you to pay a deposit, registration fee or 'task' money."],
+            ["Do not pay {vpa}."],
+        ],
+        "hi": [
+            ["यह नकली नौकरी या टास्क का ऑफ़र है।"],
+            ["असली कंपनियाँ कभी {amount} जमा राशि या रजिस्ट्रेशन फ़ीस के रूप में नहीं माँगतीं।",
+             "असली कंपनियाँ कभी जमा राशि, रजिस्ट्रेशन फ़ीस या टास्क के पैसे नहीं माँगतीं।"],
+            ["{vpa} पर भुगतान न करें।"],
+        ],
+        "hinglish": [
+            ["Yeh fake job ya task offer hai."],
+            ["Asli company kabhi {amount} deposit ya registration fee ke roop mein nahi maangti.",
+             "Asli company kabhi deposit, registration fee ya task ke paise nahi maangti."],
+            ["Handle {vpa} par payment mat kijiye."],
+        ],
+    },
+    "lottery_scam": {
+        "en": [
+            ["This is a fake prize or lottery in the name of {brand}.", "This is a fake prize or lottery."],
+            ["You cannot win a lottery you never entered, and real prizes never ask for a fee or tax up front."],
+            ["Do not pay the {amount} fee.", "Do not pay any fee."],
+        ],
+        "hi": [
+            ["यह {brand} के नाम पर नकली इनाम या लॉटरी है।", "यह नकली इनाम या लॉटरी है।"],
+            ["जिस लॉटरी में आपने भाग ही नहीं लिया, उसे आप जीत नहीं सकते; असली इनाम के लिए पहले कोई फ़ीस या टैक्स नहीं देना पड़ता।"],
+            ["{amount} की फ़ीस न भरें।", "कोई भी फ़ीस न भरें।"],
+        ],
+        "hinglish": [
+            ["Yeh {brand} ke naam par fake inaam ya lottery hai.", "Yeh fake inaam ya lottery hai."],
+            ["Jis lottery mein aapne hissa hi nahi liya, woh aap jeet nahi sakte; asli inaam ke liye pehle koi fee "
+             "ya tax nahi dena padta."],
+            ["{amount} ki fee mat bhariye.", "Koi bhi fee mat bhariye."],
+        ],
+    },
+    "govt_impersonation": {
+        "en": [
+            ["This message pretends to be from {govt} to make you pay or enter details on a fake site.",
+             "This message pretends to be a government notice (e-challan, tax, electricity) to make you pay on a "
+             "fake site."],
+            ["The site {domain} is not an official government website; official sites end in .gov.in or .nic.in.",
+             "Check notices only on official sites ending in .gov.in or .nic.in."],
+        ],
+        "hi": [
+            ["यह संदेश {govt} के नाम से आपसे नकली साइट पर भुगतान या जानकारी भरवाना चाहता है।",
+             "यह संदेश सरकारी नोटिस (ई-चालान, टैक्स, बिजली) बनकर आपसे नकली साइट पर भुगतान करवाना चाहता है।"],
+            ["{domain} सरकारी वेबसाइट नहीं है; आधिकारिक साइटें .gov.in या .nic.in पर होती हैं।",
+             "नोटिस केवल .gov.in या .nic.in वाली आधिकारिक साइटों पर ही जाँचें।"],
+        ],
+        "hinglish": [
+            ["Yeh message {govt} ke naam se aapse fake site par payment ya details bharwana chahta hai.",
+             "Yeh message sarkari notice (e-challan, tax, bijli) ban kar fake site par payment karwana chahta hai."],
+            ["Site {domain} sarkari website nahi hai; official sites .gov.in ya .nic.in par hoti hain.",
+             "Notice sirf .gov.in ya .nic.in wali official sites par hi check kijiye."],
+        ],
+    },
+    "phishing_link": {
+        "en": [
+            ["The link {domain} is designed to steal your login, card or UPI details.",
+             "The link in this message is designed to steal your login, card or UPI details."],
+            ["Do not open it or enter any details; use {brand}'s official app or website instead.",
+             "Do not open it or enter any details; use the official app or website instead."],
+        ],
+        "hi": [
+            ["{domain} लिंक आपकी लॉगिन, कार्ड या UPI जानकारी चुराने के लिए बनाया गया है।",
+             "इस संदेश का लिंक आपकी लॉगिन, कार्ड या UPI जानकारी चुराने के लिए बनाया गया है।"],
+            ["इसे न खोलें और कोई जानकारी न भरें; {brand} का आधिकारिक ऐप या वेबसाइट ही इस्तेमाल करें।",
+             "इसे न खोलें और कोई जानकारी न भरें; केवल आधिकारिक ऐप या वेबसाइट इस्तेमाल करें।"],
+        ],
+        "hinglish": [
+            ["Link {domain} aapki login, card ya UPI details churane ke liye banaya gaya hai.",
+             "Is message ka link aapki login, card ya UPI details churane ke liye banaya gaya hai."],
+            ["Ise mat kholiye aur koi details mat bhariye; {brand} ka official app ya website hi use kijiye.",
+             "Ise mat kholiye aur koi details mat bhariye; sirf official app ya website use kijiye."],
+        ],
+    },
+    "legitimate": {
+        "en": [["No common scam pattern was found in this message."],
+               ["Still, never share your OTP or UPI PIN with anyone."]],
+        "hi": [["इस संदेश में कोई आम धोखाधड़ी पैटर्न नहीं मिला।"],
+               ["फिर भी, अपना OTP या UPI PIN किसी के साथ साझा न करें।"]],
+        "hinglish": [["Is message mein koi common scam pattern nahi mila."],
+                     ["Phir bhi, apna OTP ya UPI PIN kisi ko mat batayiye."]],
+    },
+}
+
+RED_FLAGS = {
+    "fake_cashback": ["asks you to approve a UPI request to receive money"],
+    "digital_arrest": ["threatens arrest or legal action", "demands money to close a case"],
+    "kyc_freeze": ["claims your KYC expired or account will be blocked", "asks for OTP, UPI PIN or KYC update"],
+    "job_scam": ["job or task offer that asks for money up front"],
+    "lottery_scam": ["prize you never entered for", "asks for a fee to release the prize"],
+    "govt_impersonation": ["pretends to be a government notice"],
+    "phishing_link": ["link to an unofficial website"],
+    "legitimate": [],
+}
+# Entity red flags, in order: (slot, flag).
+ENTITY_FLAGS = [
+    ("organisation", "uses the name of {organisation}"),
+    ("vpa", "payment handle {vpa}"),
+    ("domain", "link to {domain}"),
+    ("phone", "asks you to contact {phone}"),
+    ("amount", "mentions {amount}"),
+]
+
+_FORMATTER = string.Formatter()
+
+
+def slots(message: str, entities: dict = None, language: str = "en") -> dict:
+    """Slot values for a message: its first amount, VPA, domain and phone, and the organisations it names."""
+    entities = entities if entities is not None else extract_entities(message)
+    values = {}
+    for slot, key in (("amount", "amounts"), ("vpa", "vpas"), ("domain", "domains"), ("phone", "phones")):
+        if entities.get(key):
+            values[slot] = entities[key][0]
+    index = LANGUAGES.index(language)
+    for pattern, kind, names in _ORGANISATIONS:
+        if pattern.search(message or ""):
+            values.setdefault(kind, names[index])
+            values.setdefault("brand", names[index])
+            values.setdefault("organisation", names[0])
+    return values
+
+
+def _render(alternatives, values: dict):
+    for template in alternatives:
+        needed = [name for _, name, _, _ in _FORMATTER.parse(template) if name]
+        if all(name in values for name in needed):
+            return template.format(**values)
+    return None
+
+
+def explanation(category: str, message: str, entities: dict = None, language: str = "en") -> str:
+    """The templated explanation for `category` in `language` (en, hi or hinglish)."""
+    values = slots(message, entities, language)
+    sentences = (_render(alternatives, values) for alternatives in EXPLANATIONS[category][language])
+    return " ".join(s for s in sentences if s)
+
+
+def red_flags(category: str, message: str, entities: dict = None) -> list:
+    if category == "legitimate":
+        return []
+    values = slots(message, entities)
+    flags = list(RED_FLAGS[category])
+    flags += [flag.format(**values) for slot, flag in ENTITY_FLAGS if slot in values]
+    if URGENCY_RE.search(message or ""):
+        flags.append("creates urgency")
+    return flags
+
+
+def eligible(verdict: dict, profile: str = None) -> bool:
+    """Whether templates should supply this verdict's explanation instead of the model."""
+    if verdict.get("category") not in EXPLANATIONS:
+        return False
+    if verdict.get("tier") in FAST_TIERS:
+        return True
+    return profile == "verdict" and verdict.get("confidence", 0) >= MIN_CONFIDENCE
+
+
+def apply(verdict: dict, message: str, entities: dict = None) -> dict:
+    """Fill explanation_en/_hi/_hinglish and red_flags from the templates, in place.
+
+    Reputation, look-alike and short-link verdicts keep their own explanations, which name the identifier.
+    """
+    category = verdict["category"]
+    entities = entities if entities is not None else extract_entities(message)
+    keep = verdict.get("tier") in OWN_TEXT_TIERS and verdict.get("explanation_en")
+    for language in LANGUAGES:
+        if keep and language != "hinglish":
+            continue
+        verdict[f"explanation_{language}"] = explanation(category, message, entities, language)
+    flags = red_flags(category, message, entities) if verdict.get("is_scam", category != "legitimate") else []
+    extra = [flag for flag in verdict.get("red_flags", []) if flag not in flags and " pattern" not in flag]
+    verdict["red_flags"] = flags + extra
+    verdict["explanation_source"] = "template"
+    return verdict
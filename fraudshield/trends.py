@@ -0,0 +1,221 @@
+"""
+FraudShield India — Rolling Trend Counters
+Time-windowed report counts keyed by category × state × source, served by
+/api/trends ("digital_arrest reports in Karnataka in the last hour").
+
+Each key has three fixed-size rings of buckets: minutes (2 hours), hours
+(2 days) and days (90 days). A new event lands in the current minute. When
+a minute closes it is rolled up into its hour, and a closed hour is rolled
+up into its day. Memory per key is fixed, and answering a query never
+touches raw events.
+
+Stores are per process. They can be snapshotted to disk and restored on
+start, so a restarted instance keeps its history.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+
+from fraudshield import metrics
+
+logger = logging.getLogger(__name__)
+
+# (name, bucket width in seconds, slots kept)
+LEVELS = (("minute", 60, 120), ("hour", 3600, 48), ("day", 86400, 90))
+RESOLUTIONS = {name: i for i, (name, _, _) in enumerate(LEVELS)}
+DIMENSIONS = ("category", "state", "source")
+MAX_KEYS = 4096
+SNAPSHOT_VERSION = 1
+
+
+class Series:
+    """Minute/hour/day rings for one key. Not thread-safe; TrendStore holds the lock."""
+
+    __slots__ = ("counts", "stamps", "cursor")
+
+    def __init__(self):
+        self.counts = [array("q", bytes(8 * slots)) for _, _, slots in LEVELS]
+        self.stamps = [array("q", [-1]) * slots for _, _, slots in LEVELS]
+        self.cursor = [-1] * len(LEVELS)   # the open (not yet rolled up) bucket per level
+
+    def _get(self, level: int, index: int) -> int:
+        slot = index % LEVELS[level][2]
+        return self.counts[level][slot] if self.stamps[level][slot] == index else 0
+
+    def _bump(self, level: int, index: int, n: int) -> None:
+        slot = index % LEVELS[level][2]
+        if self.stamps[level][slot] != index:
+            if index < self.stamps[level][slot]:
+                return  # older than the ring's retention
+            self.stamps[level][slot] = index
+            self.counts[level][slot] = 0
+        self.counts[level][slot] += n
+
+    def advance(self, now: float) -> None:
+        """Close the open bucket at each level if `now` is past it, rolling it into the next level.
+
+        Only the open bucket can hold counts its parent has not seen (late
+        events are added to the parent directly), so only it is rolled up.
+        """
+        for level, (_, width, _) in enumerate(LEVELS):
+            current = int(now // width)
+            previous = self.cursor[level]
+            if current <= previous:
+                continue
+            if previous >= 0 and level + 1 < len(LEVELS):
+                n = self._get(level, previous)
+                if n:
+                    self._bump(level + 1, previous * width // LEVELS[level + 1][1], n)
+            self.cursor[level] = current
+
+    def add(self, ts: float, n: int = 1) -> None:
+        """Count `n` events at `ts`. Late events go into buckets that were already rolled up, too."""
+        for level, (_, width, _) in enumerate(LEVELS):
+            index = int(ts // width)
+            self._bump(level, index, n)
+            if index >= self.cursor[level]:
+                return
+            # This bucket is already closed, so its parent did not see these events.
+
+    def value(self, level: int, index: int) -> int:
+        """Count for bucket `index` at `level`, including finer buckets not yet rolled up."""
+        total = self._get(level, index)
+        for finer in range(level):
+            open_index = self.cursor[finer]
+            if open_index >= 0 and open_index * LEVELS[finer][1] // LEVELS[level][1] == index:
+                total += self._get(finer, open_index)
+        return total
+
+    def to_dict(self) -> dict:
+        return {"counts": [list(c) for c in self.counts], "stamps": [list(s) for s in self.stamps],
+                "cursor": list(self.cursor)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Series":
+        series = cls()
+        for level, (_, _, slots) in enumerate(LEVELS):
+            if len(data["counts"][level]) != slots or len(data["stamps"][level]) != slots:
+                raise ValueError("ring size mismatch")
+            series.counts[level] = array("q", data["counts"][level])
+            series.stamps[level] = array("q", data["stamps"][level])
+        series.cursor = list(data["cursor"])
+        return series
+
+
+def _norm(value, default="unknown") -> str:
+    value = " ".join(str(value or "").split())
+    return value or default
+
+
+class TrendStore:
+    """Rolling counters for every (category, state, source) key."""
+
+    def __init__(self, max_keys: int = MAX_KEYS, clock=time.time):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def add(self, category: str, state: str, source: str, ts: float = None, n: int = 1) -> None:
+        key = (_norm(category), _norm(state), _norm(source).lower())
+        now = self.clock()
+        ts = now if ts is None else min(ts, now)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                if len(self._series) >= self.max_keys:
+                    # Keep memory bounded; the category total stays right.
+                    metrics.incr("trends.key_overflow")
+                    key = (key[0], "other", "other")
+                    series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = Series()
+            series.advance(now)
+            series.add(ts, n)
+
+    def query(self, window: float, resolution: str = "minute", end: float = None, **filters) -> dict:
+        """Bucketed counts over the last `window` seconds for keys matching `filters`.
+
+        `filters` may name any of DIMENSIONS (case-insensitive). An optional
+        `group_by` gives per-group totals over the same window.
+        """
+        group_by = filters.pop("group_by", None)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {list(RESOLUTIONS)}")
+        if group_by is not None and group_by not in DIMENSIONS:
+            raise ValueError(f"group_by must be one of {list(DIMENSIONS)}")
+        unknown = set(filters) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"unknown filter {sorted(unknown)[0]!r}")
+        level = RESOLUTIONS[resolution]
+        _, width, slots = LEVELS[level]
+        now = self.clock()
+        end = now if end is None else min(end, now)
+        last = int(end // width)
+        first = max(int((end - window) // width) + 1, last - slots + 1)
+        wanted = {DIMENSIONS.index(d): str(v).lower() for d, v in filters.items() if v not in (None, "")}
+
+        counts = [0] * (last - first + 1)
+        groups = {}
+        with self._lock:
+            for key, series in self._series.items():
+                if any(key[i].lower() != v for i, v in wanted.items()):
+                    continue
+                series.advance(now)
+                subtotal = 0
+                for offset, index in enumerate(range(first, last + 1)):
+                    n = series.value(level, index)
+                    counts[offset] += n
+                    subtotal += n
+                if group_by and subtotal:
+                    group = key[DIMENSIONS.index(group_by)]
+                    groups[group] = groups.get(group, 0) + subtotal
+
+        result = {
+            "resolution": resolution,
+            "window_seconds": (last - first + 1) * width,
+            "filters": {DIMENSIONS[i]: v for i, v in wanted.items()},
+            "total": sum(counts),
+            "buckets": [
+                {"start": datetime.fromtimestamp((first + i) * width, timezone.utc).isoformat(), "count": n}
+                for i, n in enumerate(counts)
+            ],
+        }
+        if group_by:
+            result["group_by"] = group_by
+            result["groups"] = dict(sorted(groups.items(), key=lambda kv: (-kv[1], kv[0])))
+        return result
+
+    def snapshot(self, path: str) -> None:
+        """Write every series to `path` atomically."""
+        with self._lock:
+            data = {"version": SNAPSHOT_VERSION, "saved_at": self.clock(),
+                    "series": [[list(key), series.to_dict()] for key, series in self._series.items()]}
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def restore(self, path: str) -> bool:
+        """Load a snapshot written by `snapshot`. Returns False if there is none or it is unusable."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"snapshot version {data.get('version')}")
+            series = {tuple(key): Series.from_dict(s) for key, s in data["series"]}
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning("Ignoring trends snapshot %s: %s", path, exc)
+            return False
+        with self._lock:
+            self._series = series
+        return True
@@ -0,0 +1,102 @@
+"""
+FraudShield India — Cold-start Warm-up
+Moves the expensive parts of the first classification off the request path.
+
+- Imports the heavy SDKs (openai ~0.5s, requests).
+- Builds the model router and its clients.
+- Loads the tiktoken encoding, which may download its BPE file.
+- Opens a TLS connection to every deployment so the first model call
+  reuses a pooled connection instead of doing a fresh handshake.
+- Runs any `extra` steps the app registers (e.g. the short-link resolver's
+  HTTP session and SQLite cache).
+
+The steps run once per process, from a background thread at load and from
+the Functions warm-up trigger, whichever comes first. Step timings go to
+metrics as `warmup.<step>_ms`.
+"""
+import importlib
+import logging
+import threading
+import time
+
+from fraudshield import metrics
+
+logger = logging.getLogger(__name__)
+
+MODULES = ("openai", "requests")
+TLS_TIMEOUT = 5.0
+
+
+def _import_modules() -> None:
+    for name in MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            logger.debug("Warm-up: %s not installed", name)
+
+
+def _load_tokenizer() -> None:
+    from fraudshield.prompting import _get_encoding
+    _get_encoding()
+
+
+def _build_clients(get_router) -> None:
+    for deployment in get_router().deployments:
+        deployment.client
+
+
+def _open_connections(router) -> None:
+    for deployment in router.deployments:
+        try:
+            # A cheap authenticated call through the SDK's public API; any response will do, the
+            # point is the pooled TLS connection it leaves behind (with_options shares the pool).
+            deployment.client.with_options(timeout=TLS_TIMEOUT, max_retries=0).models.list()
+        except Exception as exc:
+            logger.debug("Warm-up: TLS to %s failed: %s", deployment.name, exc)
+
+
+class Warmup:
+    """Runs the warm-up steps once; concurrent callers wait for the first run."""
+
+    def __init__(self, get_router, tls: bool = True, extra=()):
+        self.get_router = get_router
+        self.tls = tls
+        self.extra = list(extra)    # (name, fn) steps run after the built-in ones
+        self.done = threading.Event()
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def _step(self, name: str, fn, *args) -> None:
+        t0 = time.perf_counter()
+        try:
+            fn(*args)
+        except Exception as exc:
+            logger.warning("Warm-up step %s failed: %s", name, exc)
+        ms = round((time.perf_counter() - t0) * 1000, 1)
+        self.timings[name] = ms
+        metrics.set_gauge(f"warmup.{name}_ms", ms)
+
+    def run(self) -> dict:
+        """Run every step (once per process) and return their timings in ms."""
+        with self._lock:
+            if self.done.is_set():
+                return self.timings
+            t0 = time.perf_counter()
+            self._step("imports", _import_modules)
+            self._step("clients", _build_clients, self.get_router)
+            self._step("tokenizer", _load_tokenizer)
+            if self.tls:
+                self._step("tls", _open_connections, self.get_router())
+            for name, fn in self.extra:
+                self._step(name, fn)
+            self.timings["total"] = round((time.perf_counter() - t0) * 1000, 1)
+            metrics.set_gauge("warmup.total_ms", self.timings["total"])
+            metrics.set_gauge("warmup.done", True)
+            self.done.set()
+            logger.info("Warm-up finished: %s", self.timings)
+            return self.timings
+
+    def start_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.run, name="fraudshield-warmup", daemon=True)
+        thread.start()
+        return thread
@@ -1,5 +1,8 @@
 import sys
 import os
+import time
+
+_LOAD_STARTED = time.perf_counter()
 
 # Ensure bundled packages are found (WEBSITE_RUN_FROM_PACKAGE deployment)
 _pkg_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".python_packages", "lib", "site-packages")
@@ -7,60 +10,347 @@ if os.path.isdir(_pkg_path) and _pkg_path not in sys.path:
     sys.path.insert(0, _pkg_path)
 
 import azure.functions as func
+import copy
+import hashlib
+import io
 import json
 import logging
+import secrets
+import tempfile
+import threading
+from datetime import datetime
+
+from fraudshield import encoding, metrics, templates
+from fraudshield.bloom import ASSET_PATH, add_event, load_scam_filter, screen
+from fraudshield.bulk import FORMATS, encode, read_records, scan
+from fraudshield.bundle import DELTA_MEDIA_TYPE, MEDIA_TYPE as BUNDLE_MEDIA_TYPE, BundleStore
+from fraudshield.cache import VerdictCache, shared_cache
+from fraudshield.campaigns import CampaignIndex, campaign_verdict
+from fraudshield.classifier import DetectionClassifier
+from fraudshield.coalesce import CoalesceTimeout, fingerprint, shared_inflight
+from fraudshield.distill import ASSET_PATH as DISTILL_ASSET_PATH, MODES as DISTILL_MODES
+from fraudshield.distill import DistilledModel, ShadowStats, VerdictLog
+from fraudshield.entities import extract_entities
+from fraudshield.limiter import shared_guard
+from fraudshield.lookalike import LookalikeIndex, lookalike_verdict
+from fraudshield.lookalike import is_strong as is_lookalike
+from fraudshield.prompting import PROFILES, PROMPT_VARIANTS
+from fraudshield.feed import DeltaLog
+from fraudshield.reports import ReportAggregator, etag_matches, resolve_state
+from fraudshield.reputation import ReputationTable, is_strong, reputation_verdict
+from fraudshield.rules import rule_verdict
+from fraudshield.scam_graph import LINKS, SCAM_PHONES, SCAM_UPIS
+from fraudshield.shortlinks import SHORTENERS, ShortLinkResolver, shortlink_verdict
+from fraudshield.template_miner import TemplateMiner
+from fraudshield.router import shared_router
+from fraudshield.trends import TrendStore
+from fraudshield.warmup import Warmup
 
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
-_client = None
 MODEL = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "o4-mini")
 
 
+def _get_router():
+    """Return the shared ModelRouter over every configured deployment."""
+    return shared_router()
+
+
 def _get_client():
-    global _client
-    if _client is None:
-        from openai import AzureOpenAI
-        _client = AzureOpenAI(
-            api_key=os.environ["AZURE_OPENAI_KEY"],
-            api_version="2024-12-01-preview",
-            azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
-        )
-    return _client
-
-SYSTEM_PROMPT = """You are FraudShield India, an expert UPI fraud detection system.
-Analyze messages for fraud patterns common in India. Classify into one of:
-fake_cashback, digital_arrest, kyc_freeze, job_scam, lottery_scam,
-govt_impersonation, phishing_link, legitimate
-
-Respond ONLY with valid JSON (no markdown, no backticks):
-{
-  "is_scam": true/false,
-  "category": "<category>",
-  "confidence": <0.0-1.0>,
-  "risk_level": "high/medium/low",
-  "explanation_en": "<1-2 sentence English explanation>",
-  "explanation_hi": "<1-2 sentence Hindi explanation>",
-  "red_flags": ["<flag1>", "<flag2>"],
-  "complaint_form": {
-    "portal": "cybercrime.gov.in",
-    "helpline": "1930",
-    "evidence_to_collect": ["screenshot", "sender_id", "transaction_id"]
-  }
-}"""
-
-
-def classify_message(message, source="unknown", sender="unknown"):
-    response = _get_client().chat.completions.create(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"Source: {source}\nSender: {sender}\nMessage: {message}"},
-        ],
-        max_completion_tokens=500,
-    )
-    raw = response.choices[0].message.content.strip()
-    raw = raw.replace("```json", "").replace("```", "").strip()
-    result = json.loads(raw)
+    """Return the client of the first configured deployment."""
+    return _get_router().deployments[0].client
+
+
+# Identical messages classified concurrently (SMS blasts) share one model call. This and the guard
+# and verdict cache below are the process-wide instances DetectionClassifier.from_env() also uses.
+_inflight = shared_inflight()
+
+# Surge protection: adaptive concurrency limit plus a circuit breaker around model calls.
+_model_guard = shared_guard()
+
+
+# Dashboard aggregates, fed by the Event Hub trigger below and served by /api/reports;
+# /api/reports/stream pushes each change as an SSE delta.
+_reports = ReportAggregator()
+_feed = DeltaLog(retry_ms=int(os.environ.get("FRAUDSHIELD_FEED_RETRY_MS", "5000")), epoch=_reports.epoch)
+_reports.listeners.append(_feed.append)
+
+# Rolling per-minute/hour/day counts by category × state × source for /api/trends,
+# restored from the last snapshot so a restart keeps its history.
+_trends = TrendStore()
+_TRENDS_PATH = os.environ.get("FRAUDSHIELD_TRENDS_PATH", os.path.join(tempfile.gettempdir(), "fraudshield_trends.json"))
+_TRENDS_SNAPSHOT_SECONDS = float(os.environ.get("FRAUDSHIELD_TRENDS_SNAPSHOT_SECONDS", "60"))
+_trends_saved_at = time.monotonic()
+_trends.restore(_TRENDS_PATH)
+
+# Decayed scam-report counts per sender, VPA, phone and domain, seeded from the scam graph
+# and kept current from the same FraudEvent stream. A strong sender, VPA or phone prior skips the model.
+_reputation = ReputationTable(
+    capacity=int(os.environ.get("FRAUDSHIELD_REPUTATION_CAPACITY", "100000")),
+    half_life=float(os.environ.get("FRAUDSHIELD_REPUTATION_HALF_LIFE_DAYS", "30")) * 86400,
+)
+_reputation.seed(SCAM_UPIS, SCAM_PHONES, LINKS)
+_REPUTATION_THRESHOLD = float(os.environ.get("FRAUDSHIELD_REPUTATION_THRESHOLD", "5"))
+
+# Bloom filter over every reported VPA, phone and bad domain; only its positives are looked up.
+_SCAM_FILTER_PATH = os.environ.get("FRAUDSHIELD_SCAM_FILTER_PATH", ASSET_PATH)
+_scam_filter = load_scam_filter(_SCAM_FILTER_PATH)
+
+# Curated bank, wallet, government and brand names; look-alike domains are answered locally.
+_lookalikes = LookalikeIndex()
+_LOOKALIKE_FAST_PATH = os.environ.get("FRAUDSHIELD_LOOKALIKE_FAST_PATH", "1") != "0"
+
+# Short links are expanded on a thread pool while the model runs; expansions are cached in SQLite.
+_shortlinks = ShortLinkResolver.from_env()
+
+# Near-duplicate campaigns (MinHash/LSH over masked message text); a campaign's first confident
+# model verdict answers its later variants. Snapshotted in the background and restored on start.
+_campaigns = CampaignIndex.from_env()
+_CAMPAIGNS_PATH = os.environ.get("FRAUDSHIELD_CAMPAIGNS_PATH",
+                                 os.path.join(tempfile.gettempdir(), "fraudshield_campaigns.json"))
+_CAMPAIGNS_SNAPSHOT_SECONDS = float(os.environ.get("FRAUDSHIELD_CAMPAIGNS_SNAPSHOT_SECONDS", "300"))
+_CAMPAIGN_MIN_CONFIDENCE = float(os.environ.get("FRAUDSHIELD_CAMPAIGN_MIN_CONFIDENCE", "0.8"))
+_campaigns_saved_at = time.monotonic()
+_campaigns_saving = threading.Lock()
+if _campaigns is not None:
+    _campaigns.restore(_CAMPAIGNS_PATH)
+
+# Messages are mined into templates (amounts, links, numbers as slots). A specific template's ID,
+# not the exact text, keys model-call coalescing and the verdict cache below; /api/templates lists them.
+_template_miner = TemplateMiner.from_env()
+_template_verdicts = VerdictCache(capacity=int(os.environ.get("FRAUDSHIELD_TEMPLATE_CACHE_SIZE", "20000")),
+                                  ttl=float(os.environ.get("FRAUDSHIELD_TEMPLATE_CACHE_TTL", "3600")),
+                                  name="template_cache")
+
+# The process-wide verdict cache; /api/bulk keeps its verdicts there under "bulk:" keys.
+_verdict_cache = shared_cache()
+_BULK_WORKERS = int(os.environ.get("FRAUDSHIELD_BULK_WORKERS", "8"))
+
+
+def _guarded_create(**kwargs):
+    return _model_guard.call(_get_router().create, **kwargs)
+
+
+# The model path shared with the detection agent and pipeline (stable system prompt, rule fallback).
+_detector = DetectionClassifier(_guarded_create)
+
+
+# Verdicts returned by /api/classify, by verdict ID, so /api/explain can explain one later
+# without the client sending the message again or the model re-classifying it.
+_verdict_store = VerdictCache(capacity=int(os.environ.get("FRAUDSHIELD_VERDICT_STORE_SIZE", "50000")),
+                              ttl=float(os.environ.get("FRAUDSHIELD_VERDICT_STORE_TTL", "86400")),
+                              name="verdict_store")
+
+# Distillation: model verdicts are logged for training the local classifier (only when
+# FRAUDSHIELD_DISTILL_LOG is set), which then runs in shadow (compared with every model
+# verdict) or cascade (answers when confident) mode.
+_verdict_log = VerdictLog.from_env()
+_distilled = DistilledModel.load(os.environ.get("FRAUDSHIELD_DISTILL_MODEL", DISTILL_ASSET_PATH))
+_DISTILL_MODE = os.environ.get("FRAUDSHIELD_DISTILL_MODE", "shadow")
+if _DISTILL_MODE not in DISTILL_MODES:
+    logging.warning("Unknown FRAUDSHIELD_DISTILL_MODE %r; using 'off'", _DISTILL_MODE)
+    _DISTILL_MODE = "off"
+_shadow = ShadowStats()
+
+_bundle_filter = (None, None)     # (asset mtime, filter) for the bundle
+
+
+def _bundle_sources():
+    """The scam filter asset as every instance has it, and the distilled model.
+
+    _scam_filter also takes this instance's Event Hub reports, so a bundle built from it would get
+    another version on every instance. The asset is reloaded when its file changes.
+    """
+    global _bundle_filter
+    try:
+        mtime = os.path.getmtime(_SCAM_FILTER_PATH)
+    except OSError:
+        mtime = None
+    if _bundle_filter[1] is None or _bundle_filter[0] != mtime:
+        _bundle_filter = (mtime, load_scam_filter(_SCAM_FILTER_PATH))
+    return _bundle_filter[1], _distilled
+
+
+# Bundle of the rules, scam filter and distilled model for on-device classification (/api/bundle);
+# None, and the route disabled, when FRAUDSHIELD_BUNDLE is "0".
+_bundles = BundleStore.from_env(_bundle_sources)
+
+
+def _classify_with_model(message, source, sender, prompt_variant=None):
+    verdict = _detector.model_verdict(message, source, sender, prompt_variant)
+    if _verdict_log is not None:
+        _verdict_log.append(message, verdict)
+    if _distilled is not None and _DISTILL_MODE == "shadow" and "tier" not in verdict:
+        category, confidence = _distilled.predict(message)
+        _shadow.record(category, confidence, _distilled.threshold, verdict.get("category"))
+    return verdict
+
+
+def _local_verdict(message):
+    """The distilled classifier's verdict in cascade mode when it clears its threshold, else None."""
+    if _distilled is None or _DISTILL_MODE != "cascade":
+        return None
+    category, confidence = _distilled.predict(message)
+    if confidence < _distilled.threshold:
+        metrics.incr("distill.cascade.escalated")
+        return None
+    metrics.incr("distill.cascade.local")
+    return _distilled.verdict(message, category, confidence)
+
+
+# Cold start: heavy imports, clients, tokenizer, TLS and the short-link resolver are warmed
+# off the request path (see the end of this file); the first request's latency is reported on its own.
+_warmup = Warmup(_get_router, tls=os.environ.get("FRAUDSHIELD_WARMUP_TLS", "1") != "0",
+                 extra=[("shortlinks", _shortlinks.warm)] if _shortlinks is not None else ())
+_first_request_lock = threading.Lock()
+_first_request_pending = True
+
+
+def _record_request_latency(ms: float) -> None:
+    global _first_request_pending
+    with _first_request_lock:
+        first, _first_request_pending = _first_request_pending, False
+    if first:
+        metrics.set_gauge("cold_start.first_request_ms", round(ms, 1))
+        metrics.set_gauge("cold_start.warm_before_first_request", _warmup.done.is_set())
+    else:
+        metrics.observe("classify.latency_ms", ms)
+
+
+def _save_campaigns() -> None:
+    """Snapshot the campaign index on a background thread, at most every FRAUDSHIELD_CAMPAIGNS_SNAPSHOT_SECONDS."""
+    global _campaigns_saved_at
+    if time.monotonic() - _campaigns_saved_at < _CAMPAIGNS_SNAPSHOT_SECONDS or not _campaigns_saving.acquire(False):
+        return
+    _campaigns_saved_at = time.monotonic()
+
+    def save():
+        try:
+            _campaigns.snapshot(_CAMPAIGNS_PATH)
+        except OSError as exc:
+            logging.warning("Could not save campaign snapshot: %s", exc)
+        finally:
+            _campaigns_saving.release()
+
+    threading.Thread(target=save, name="fraudshield-campaigns", daemon=True).start()
+
+
+def _verdict_key(message, mined, prompt_variant, entities):
+    """Coalescing and verdict-cache key: the template when it is specific, else the fingerprint.
+
+    A template key also covers the template's current text (a position that has since become "<*>"
+    gives a new key), the words at its "<*>" positions and the URLs, VPAs and phones its masks hide,
+    so "credited ... via onlinesbi.sbi" and "blocked ... via secure-refunds.in" never share a verdict.
+    """
+    if mined is None or not mined.specific:
+        return f"{fingerprint(message)}:{prompt_variant or ''}"
+    parts = [mined.template, *mined.wildcards, *entities["domains"], *entities["vpas"], *entities["phones"]]
+    digest = hashlib.blake2b("\n".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+    return f"t:{mined.template_id}:{digest}:{prompt_variant or ''}"
+
+
+def _screen_identifiers(message, sender, entities):
+    """(reputation hits, look-alike matches) for the identifiers in `entities` and the sender."""
+    suspects = screen(_scam_filter, entities)
+    metrics.incr("scam_filter.checks")
+    if suspects:
+        metrics.incr("scam_filter.positives")
+    hits = _reputation.assess(message, pairs=([("sender", sender)] if sender else []) + suspects)
+    # Positives with no exact match are filter false positives (or evicted from the table).
+    metrics.incr("scam_filter.unconfirmed", len(suspects) - sum(h["kind"] != "sender" for h in hits))
+    return hits, _lookalikes.scan(entities, message)
+
+
+def _with_destinations(entities, expansions):
+    domains = [e["domain"] for e in expansions if e["domain"] and e["domain"] not in SHORTENERS]
+    return {**entities, "domains": list(dict.fromkeys(entities["domains"] + domains))}
+
+
+def _follow_links(result, pending, seen, message):
+    """Check short-link destinations that were not known before the verdict; returns (result, hits, lookalikes).
+
+    A verdict that is already a scam does not wait for lookups still in flight.
+    """
+    if result.get("is_scam"):
+        expansions = pending.done()
+    else:
+        expansions = pending.wait(_shortlinks.timeout - (time.monotonic() - pending.started))
+    late = [e for e in expansions if e not in seen]
+    hits, lookalikes = [], []
+    if late:
+        hits, lookalikes = _screen_identifiers(message, None, _with_destinations({"vpas": [], "phones": [], "domains": []}, late))
+        # Only a look-alike destination overrides the verdict; domain reputation alone is context.
+        verdict = lookalike_verdict(lookalikes) if is_lookalike(lookalikes) else None
+        if verdict is not None:
+            for e in late:
+                _shortlinks.cache.set_verdict(e["short"], {"category": verdict["category"], "tier": verdict["tier"]})
+            if not result.get("is_scam"):
+                metrics.incr("classify.shortlink_upgrades")
+                result = verdict
+    if "red_flags" in result:
+        result["red_flags"] += [f"short link leads to {e['domain']}" for e in expansions
+                                if e["domain"] and f"short link leads to {e['domain']}" not in result["red_flags"]]
+    result["links"] = [{"short": e["short"], "final": e["final"], "status": e["status"]} for e in expansions]
+    return result, hits, lookalikes
+
+
+def classify_message(message, source="unknown", sender="unknown", prompt_variant=None):
+    entities = extract_entities(message)
+    # Lookups start before anything else and are only collected after the verdict.
+    pending = _shortlinks.submit(entities["urls"]) if _shortlinks is not None else None
+    expanded = pending.done() if pending else []
+    hits, lookalikes = _screen_identifiers(message, sender, _with_destinations(entities, expanded))
+    known_scam_link = next((e for e in expanded if (e.get("verdict") or {}).get("category")), None)
+    campaign = (_campaigns.assign(message, identifiers=entities["domains"] + entities["vpas"])
+                if _campaigns is not None else None)
+    mined = _template_miner.mine(message) if _template_miner is not None else None
+    key = _verdict_key(message, mined, prompt_variant, entities)
+    if is_strong(hits, _REPUTATION_THRESHOLD):
+        metrics.incr("classify.reputation_fast_path")
+        result = reputation_verdict(hits)
+    elif _LOOKALIKE_FAST_PATH and is_lookalike(lookalikes):
+        metrics.incr("classify.lookalike_fast_path")
+        result = lookalike_verdict(lookalikes)
+    elif known_scam_link is not None:
+        metrics.incr("classify.shortlink_fast_path")
+        result = shortlink_verdict(known_scam_link)
+    elif (cached := _template_verdicts.get(key)) is not None:
+        metrics.incr("classify.template_cache_hits")
+        result = dict(cached, tier="template")
+    elif (prompt_variant in (None, "verdict") and campaign is not None and campaign["verdict"] is not None
+          and not campaign["unseen"]):
+        metrics.incr("classify.campaign_fast_path")
+        result = campaign_verdict(campaign)
+    elif prompt_variant in (None, "verdict") and (local := _local_verdict(message)) is not None:
+        result = local
+    else:
+        try:
+            verdict = _inflight.do(key, lambda: _classify_with_model(message, source, sender, prompt_variant))
+        except CoalesceTimeout as exc:
+            logging.warning("Shared model call timed out (%s); returning rule-based verdict.", exc)
+            metrics.incr("classify.rule_fallback")
+            verdict = rule_verdict(message)
+        result = copy.deepcopy(verdict)
+        if "tier" not in result:
+            _template_verdicts.put(key, result)
+        if (campaign is not None and "tier" not in result and result.get("is_scam")
+                and result.get("confidence", 0) >= _CAMPAIGN_MIN_CONFIDENCE):
+            _campaigns.set_verdict(campaign["campaign_id"], result, entities["domains"] + entities["vpas"])
+    if pending:
+        result, late_hits, late_lookalikes = _follow_links(result, pending, expanded, message)
+        hits, lookalikes = hits + late_hits, lookalikes + late_lookalikes
+    if templates.eligible(result, prompt_variant):
+        templates.apply(result, message, entities)
+        metrics.incr("classify.templated")
+    if lookalikes and "red_flags" in result:
+        result["red_flags"] += [m.red_flag for m in lookalikes if m.red_flag not in result["red_flags"]]
+    if hits:
+        result["reputation"] = hits
+    if mined is not None:
+        result["template_id"] = mined.template_id
+    if campaign is not None:
+        result["campaign_id"] = campaign["campaign_id"]
+        _save_campaigns()
     result["message"] = message
     result["source"] = source
     result["sender"] = sender
@@ -77,6 +367,7 @@ def classify(req: func.HttpRequest) -> func.HttpResponse:
     }
     if req.method == "OPTIONS":
         return func.HttpResponse(status_code=204, headers=cors_headers)
+    t0 = time.perf_counter()
     try:
         body = req.get_json()
     except ValueError:
@@ -84,15 +375,96 @@ def classify(req: func.HttpRequest) -> func.HttpResponse:
     message = body.get("message", "").strip()
     if not message:
         return func.HttpResponse(json.dumps({"error": "'message' required"}), status_code=400, headers=cors_headers)
+    prompt_variant = body.get("prompt_variant")
+    if prompt_variant is not None and prompt_variant not in PROMPT_VARIANTS:
+        return func.HttpResponse(json.dumps({"error": f"'prompt_variant' must be one of {sorted(PROMPT_VARIANTS)}"}), status_code=400, headers=cors_headers)
+    profile = body.get("profile")
+    if profile is not None:
+        if profile not in PROFILES:
+            return func.HttpResponse(json.dumps({"error": f"'profile' must be one of {list(PROFILES)}"}), status_code=400, headers=cors_headers)
+        prompt_variant = profile
     try:
-        result = classify_message(message, body.get("source", "unknown"), body.get("sender", "unknown"))
+        result = classify_message(message, body.get("source", "unknown"), body.get("sender", "unknown"),
+                                  prompt_variant=prompt_variant)
+        result["verdict_id"] = _remember(result)
         if result.get("is_scam") and result.get("confidence", 0) > 0.7:
             result["action_required"] = True
             result["report_url"] = "https://cybercrime.gov.in"
             result["helpline"] = "1930"
         else:
             result["action_required"] = False
-        return func.HttpResponse(json.dumps(result, ensure_ascii=False), status_code=200, headers=cors_headers)
+        _record_request_latency((time.perf_counter() - t0) * 1000)
+        return _respond(req, encoding.select(result, body.get("fields"), body.get("echo", True)), cors_headers)
+    except Exception as e:
+        logging.exception(e)
+        return func.HttpResponse(json.dumps({"error": str(e)}), status_code=500, headers=cors_headers)
+
+
+def _respond(req: func.HttpRequest, result, headers: dict) -> func.HttpResponse:
+    """A 200 response in the encoding the client's Accept and Accept-Encoding headers ask for."""
+    accept, accept_encoding = (req.headers.get(name) for name in ("Accept", "Accept-Encoding"))
+    data, encoded = encoding.encode(result, accept if isinstance(accept, str) else None,
+                                    accept_encoding if isinstance(accept_encoding, str) else None)
+    return func.HttpResponse(data, status_code=200, headers={**headers, **encoded})
+
+
+def _remember(result: dict) -> str:
+    verdict_id = secrets.token_urlsafe(12)
+    _verdict_store.put(verdict_id, {k: v for k, v in result.items() if k != "reputation"})
+    return verdict_id
+
+
+def _has_explanation(verdict: dict) -> bool:
+    return bool(verdict.get("explanation_en")) and bool(verdict.get("explanation_hi")) and "red_flags" in verdict
+
+
+@app.route(route="explain", methods=["POST", "OPTIONS"], auth_level=func.AuthLevel.FUNCTION)
+def explain(req: func.HttpRequest) -> func.HttpResponse:
+    """English and Hindi explanation for a verdict returned earlier by /api/classify.
+
+    Clients that asked for a small `profile` call this only when the user opens the details.
+    Send {"verdict_id": ...}; if the ID has expired or was issued by another instance, also
+    send "message" and it is classified again first.
+    """
+    cors_headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "POST, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, x-functions-key",
+        "Content-Type": "application/json",
+    }
+    if req.method == "OPTIONS":
+        return func.HttpResponse(status_code=204, headers=cors_headers)
+    try:
+        body = req.get_json()
+    except ValueError:
+        return func.HttpResponse(json.dumps({"error": "Invalid JSON"}), status_code=400, headers=cors_headers)
+    verdict_id = str(body.get("verdict_id") or "")
+    message = (body.get("message") or "").strip()
+    if not verdict_id and not message:
+        return func.HttpResponse(json.dumps({"error": "'verdict_id' or 'message' required"}), status_code=400, headers=cors_headers)
+    try:
+        verdict = _verdict_store.get(verdict_id) if verdict_id else None
+        if verdict is None:
+            if not message:
+                return func.HttpResponse(json.dumps({"error": "Unknown or expired verdict_id; send 'message' too"}), status_code=404, headers=cors_headers)
+            metrics.incr("explain.reclassified")
+            verdict = classify_message(message, body.get("source", "unknown"), body.get("sender", "unknown"),
+                                       prompt_variant="verdict")
+            verdict_id = verdict_id or secrets.token_urlsafe(12)
+        if _has_explanation(verdict):
+            metrics.incr("explain.stored")
+        else:
+            metrics.incr("explain.generated")
+            explanation = _detector.explain(verdict["message"], verdict)
+            verdict.update((k, explanation[k]) for k in ("explanation_en", "explanation_hi", "red_flags"))
+            _verdict_store.put(verdict_id, verdict)
+        result = {k: verdict[k] for k in ("is_scam", "category", "confidence", "risk_level", "explanation_en",
+                                          "explanation_hi", "red_flags") if k in verdict}
+        result["verdict_id"] = verdict_id
+        if result.get("is_scam"):
+            result["report_url"] = "https://cybercrime.gov.in"
+            result["helpline"] = "1930"
+        return _respond(req, encoding.select(result, body.get("fields")), cors_headers)
     except Exception as e:
         logging.exception(e)
         return func.HttpResponse(json.dumps({"error": str(e)}), status_code=500, headers=cors_headers)
@@ -107,11 +479,35 @@ def batch_classify(req: func.HttpRequest) -> func.HttpResponse:
         if not messages or len(messages) > 20:
             return func.HttpResponse(json.dumps({"error": "Provide 1-20 messages"}), status_code=400, headers=cors_headers)
         results = [classify_message(m.get("message", ""), m.get("source", "batch"), m.get("sender", "unknown")) for m in messages]
-        return func.HttpResponse(json.dumps({"results": results, "count": len(results)}, ensure_ascii=False), status_code=200, headers=cors_headers)
+        results = [encoding.select(r, body.get("fields"), body.get("echo", True)) for r in results]
+        return _respond(req, {"results": results, "count": len(results)}, cors_headers)
     except Exception as e:
         return func.HttpResponse(json.dumps({"error": str(e)}), status_code=500, headers=cors_headers)
 
 
+@app.route(route="bulk", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+def bulk_scan(req: func.HttpRequest) -> func.HttpResponse:
+    """Scan an NDJSON or CSV inbox export; one NDJSON line per record, progress and a summary.
+
+    The Functions host buffers request and response bodies, so here the scan runs to completion
+    before the body is sent; the standalone server (api/function_app.py) streams it as it goes.
+    """
+    headers = {"Access-Control-Allow-Origin": "*", "Content-Type": "application/x-ndjson"}
+    fmt = req.params.get("format")
+    if fmt is None and "csv" in (req.headers.get("Content-Type") or ""):
+        fmt = "csv"
+    try:
+        progress_every = int(req.params.get("progress_every", "500"))
+        if fmt is not None and fmt not in FORMATS:
+            raise ValueError(f"'format' must be one of {list(FORMATS)}")
+    except ValueError as exc:
+        return func.HttpResponse(json.dumps({"error": str(exc)}), status_code=400,
+                                 headers={"Content-Type": "application/json"})
+    lines = io.StringIO(req.get_body().decode("utf-8", errors="replace"), newline="")
+    outputs = scan(read_records(lines, fmt), classify_message, _verdict_cache, _BULK_WORKERS, progress_every)
+    return func.HttpResponse(b"".join(encode(out) for out in outputs), status_code=200, headers=headers)
+
+
 @app.route(route="health", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
 def health(req: func.HttpRequest) -> func.HttpResponse:
     return func.HttpResponse(
@@ -121,6 +517,197 @@ def health(req: func.HttpRequest) -> func.HttpResponse:
     )
 
 
+@app.route(route="metrics", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+def metrics_endpoint(req: func.HttpRequest) -> func.HttpResponse:
+    body = metrics.snapshot()
+    router = shared_router(build=False)
+    body["deployments"] = router.stats() if router is not None else []
+    body["distilled"] = {"mode": _DISTILL_MODE, "version": _distilled.version if _distilled else None,
+                         "threshold": _distilled.threshold if _distilled else None, "shadow": _shadow.summary()}
+    return func.HttpResponse(json.dumps(body), status_code=200, headers={"Content-Type": "application/json"})
+
+
+@app.route(route="bundle", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+def bundle(req: func.HttpRequest) -> func.HttpResponse:
+    """The on-device detection bundle, or a delta from the version the app already has.
+
+    Send ?have=<version> (or If-None-Match with the bundle's ETag). The response is 304 if
+    that is current, a delta if the version is still kept, and the full bundle otherwise.
+    X-Bundle-Version names the version the app ends up with.
+    """
+    if _bundles is None:
+        return func.HttpResponse(json.dumps({"error": "Bundle disabled"}), status_code=503,
+                                 headers={"Content-Type": "application/json"})
+    version, data = _bundles.current()
+    etag = f'"{version}"'
+    have = req.params.get("have") or ""
+    headers = {"ETag": etag, "X-Bundle-Version": version, "Cache-Control": "private, no-cache",
+               "Vary": "Accept-Encoding"}
+    if have == version or etag_matches(req.headers.get("If-None-Match"), etag):
+        metrics.incr("bundle.not_modified")
+        return func.HttpResponse(status_code=304, headers=headers)
+    delta = _bundles.delta(have) if have else None
+    if delta is not None:
+        metrics.incr("bundle.deltas")
+        body, headers["Content-Type"], headers["X-Bundle-Base"] = delta, DELTA_MEDIA_TYPE, have
+    else:
+        metrics.incr("bundle.full")
+        body, headers["Content-Type"] = data, BUNDLE_MEDIA_TYPE
+    body, coding = encoding.compress(body, req.headers.get("Accept-Encoding"))
+    if coding != "identity":
+        headers["Content-Encoding"] = coding
+    return func.HttpResponse(body, status_code=200, headers=headers)
+
+
+@app.route(route="reports", methods=["GET", "OPTIONS"], auth_level=func.AuthLevel.ANONYMOUS)
+def reports(req: func.HttpRequest) -> func.HttpResponse:
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, OPTIONS",
+        "Access-Control-Allow-Headers": "If-None-Match",
+        "Access-Control-Expose-Headers": "ETag",
+        "Cache-Control": f"public, max-age={os.environ.get('FRAUDSHIELD_REPORTS_MAX_AGE', '15')}",
+    }
+    if req.method == "OPTIONS":
+        return func.HttpResponse(status_code=204, headers=headers)
+    body, etag = _reports.render()
+    headers["ETag"] = etag
+    if etag_matches(req.headers.get("If-None-Match"), etag):
+        metrics.incr("reports.not_modified")
+        return func.HttpResponse(status_code=304, headers=headers)
+    metrics.incr("reports.served")
+    headers["Content-Type"] = "application/json"
+    return func.HttpResponse(body, status_code=200, headers=headers)
+
+
+# Polling, not push: the Functions host buffers the whole response, so each call returns the
+# deltas after Last-Event-ID and a retry: hint, and EventSource polls again FRAUDSHIELD_FEED_RETRY_MS
+# later. The standalone server (api/function_app.py) holds the stream open instead.
+@app.route(route="reports/stream", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+def reports_stream(req: func.HttpRequest) -> func.HttpResponse:
+    last_event_id = req.headers.get("Last-Event-ID") or req.params.get("since")
+    return func.HttpResponse(
+        _feed.stream(last_event_id),
+        status_code=200,
+        headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "Access-Control-Allow-Origin": "*",
+        },
+    )
+
+
+_WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_window(value: str) -> float:
+    """'90m', '1h', '7d' or plain seconds."""
+    value = (value or "1h").strip().lower()
+    unit = _WINDOW_UNITS.get(value[-1:])
+    number = float(value[:-1] if unit else value)
+    if number <= 0:
+        raise ValueError("window must be positive")
+    return number * (unit or 1)
+
+
+@app.route(route="trends", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+def trends(req: func.HttpRequest) -> func.HttpResponse:
+    headers = {"Access-Control-Allow-Origin": "*", "Content-Type": "application/json", "Cache-Control": "public, max-age=30"}
+    try:
+        window = _parse_window(req.params.get("window"))
+        result = _trends.query(
+            window,
+            resolution=req.params.get("resolution", "minute"),
+            category=req.params.get("category"),
+            state=req.params.get("state"),
+            source=req.params.get("source"),
+            group_by=req.params.get("group_by"),
+        )
+    except ValueError as exc:
+        return func.HttpResponse(json.dumps({"error": str(exc)}), status_code=400, headers=headers)
+    return func.HttpResponse(json.dumps(result, ensure_ascii=False), status_code=200, headers=headers)
+
+
+@app.route(route="templates", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+def message_templates(req: func.HttpRequest) -> func.HttpResponse:
+    """Mined SMS templates by volume, with first and last seen; `?id=` for one, `?window=1h` for recent ones."""
+    headers = {"Access-Control-Allow-Origin": "*", "Content-Type": "application/json", "Cache-Control": "public, max-age=30"}
+    if _template_miner is None:
+        return func.HttpResponse(json.dumps({"error": "Template mining is disabled"}), status_code=503, headers=headers)
+    template_id = req.params.get("id")
+    if template_id:
+        stats = _template_miner.get(template_id)
+        if stats is None:
+            return func.HttpResponse(json.dumps({"error": "Unknown template"}), status_code=404, headers=headers)
+        return func.HttpResponse(json.dumps(stats, ensure_ascii=False), status_code=200, headers=headers)
+    try:
+        limit = min(max(int(req.params.get("limit", "20")), 1), 200)
+        window = req.params.get("window")
+        since = time.time() - _parse_window(window) if window else None
+    except ValueError as exc:
+        return func.HttpResponse(json.dumps({"error": str(exc)}), status_code=400, headers=headers)
+    result = {"total": len(_template_miner), "templates": _template_miner.top(limit, since)}
+    return func.HttpResponse(json.dumps(result, ensure_ascii=False), status_code=200, headers=headers)
+
+
+def _event_time(event, body: dict):
+    """Epoch seconds of a FraudEvent: its own `timestamp`, else when Event Hub enqueued it."""
+    ts = body.get("timestamp")
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    if isinstance(ts, str):
+        try:
+            return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    enqueued = getattr(event, "enqueued_time", None)
+    return enqueued.timestamp() if isinstance(enqueued, datetime) else None
+
+
+def _save_trends() -> None:
+    global _trends_saved_at
+    if time.monotonic() - _trends_saved_at < _TRENDS_SNAPSHOT_SECONDS:
+        return
+    _trends_saved_at = time.monotonic()
+    try:
+        _trends.snapshot(_TRENDS_PATH)
+    except OSError as exc:
+        logging.warning("Could not save trends snapshot: %s", exc)
+
+
+def ingest_fraud_events(events) -> int:
+    """Fold a batch of Event Hub FraudEvents into the report aggregates, trend counters, reputation and scam filter."""
+    counted = 0
+    for event in events:
+        try:
+            body = json.loads(event.get_body().decode("utf-8"))
+        except ValueError:
+            logging.warning("Skipping malformed fraud event.")
+            continue
+        if _reports.ingest(body):
+            counted += 1
+            ts = _event_time(event, body)
+            _trends.add(body.get("category"), resolve_state(body), body.get("source"), ts=ts)
+            _reputation.record_event(body, ts=ts)
+            add_event(_scam_filter, body)
+    metrics.incr("reports.events", counted)
+    _save_trends()
+    return counted
+
+
+# Only registered where an Event Hub is configured, so local runs and tests need none.
+if os.environ.get("EVENT_HUB_CONNECTION"):
+    @app.event_hub_message_trigger(
+        arg_name="events",
+        event_hub_name=os.environ.get("EVENT_HUB_NAME", "fraud-events"),
+        connection="EVENT_HUB_CONNECTION",
+        consumer_group=os.environ.get("EVENT_HUB_REPORTS_CONSUMER_GROUP", "$Default"),
+        cardinality="many",
+    )
+    def reports_consumer(events: list):
+        ingest_fraud_events(events)
+
+
 # ── Telegram Bot ───────────────────────────────────────────────────────────────
 
 _BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
@@ -271,3 +858,19 @@ def telegram_webhook(req: func.HttpRequest) -> func.HttpResponse:
     except Exception as e:
         logging.error("webhook error: %s", e)
     return func.HttpResponse("OK", status_code=200)
+
+
+# ── Cold start ─────────────────────────────────────────────────────────────────
+
+@app.warm_up_trigger("warmup")
+def warmup(warmup) -> None:
+    """Runs on scale-out before the instance takes traffic (Premium/Dedicated plans)."""
+    _warmup.run()
+
+
+metrics.set_gauge("cold_start.module_load_ms", round((time.perf_counter() - _LOAD_STARTED) * 1000, 1))
+
+# "auto" warms in the background only inside the Functions host, so tests and scripts stay offline.
+_WARMUP_MODE = os.environ.get("FRAUDSHIELD_WARMUP", "auto")
+if _WARMUP_MODE == "1" or (_WARMUP_MODE == "auto" and os.environ.get("FUNCTIONS_WORKER_RUNTIME")):
+    _warmup.start_background()
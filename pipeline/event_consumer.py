@@ -1,14 +1,22 @@
 """
 FraudShield India — Event Hub Consumer
 Reads fraud classification events from Azure Event Hub and writes
-results to Cosmos DB Gremlin graph.
+results to Cosmos DB Gremlin graph. Identifiers in scam events are also
+added to the known-identifier filter, which is saved periodically to
+FRAUDSHIELD_SCAM_FILTER_PATH (default: temp dir), never over the shipped
+fraudshield/assets/scam_filter.bin.
 """
 import json
 import logging
 import os
+import sys
+import tempfile
 import time
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from fraudshield.bloom import ASSET_PATH, add_event, load_scam_filter  # noqa: E402
+
 load_dotenv()
 
 try:
@@ -23,6 +31,30 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+_FILTER_PATH = os.environ.get("FRAUDSHIELD_SCAM_FILTER_PATH",
+                              os.path.join(tempfile.gettempdir(), "fraudshield_scam_filter.bin"))
+if os.path.abspath(_FILTER_PATH) == ASSET_PATH:
+    logger.warning("FRAUDSHIELD_SCAM_FILTER_PATH is the shipped asset; saving updates to the temp dir instead.")
+    _FILTER_PATH = os.path.join(tempfile.gettempdir(), "fraudshield_scam_filter.bin")
+_FILTER_SAVE_SECONDS = float(os.environ.get("FRAUDSHIELD_SCAM_FILTER_SAVE_SECONDS", "60"))
+_scam_filter = load_scam_filter(_FILTER_PATH)
+_filter_dirty = False
+_filter_saved_at = time.monotonic()
+
+
+def _update_filter(event: dict) -> None:
+    """Add the event's identifiers to the scam filter and save it at most every _FILTER_SAVE_SECONDS."""
+    global _filter_dirty, _filter_saved_at
+    if add_event(_scam_filter, event):
+        _filter_dirty = True
+    if _filter_dirty and time.monotonic() - _filter_saved_at >= _FILTER_SAVE_SECONDS:
+        try:
+            _scam_filter.save(_FILTER_PATH)
+            _filter_dirty = False
+        except OSError as exc:
+            logger.error("Failed to save scam filter: %s", exc)
+        _filter_saved_at = time.monotonic()
+
 
 def _get_gremlin_client():
     """Return a connected Gremlin client for Cosmos DB."""
@@ -53,6 +85,8 @@ def _write_to_graph(gremlin, event: dict) -> None:
         ".property('risk_level', risk_level)"
         ".property('source', source)"
         ".property('sender', sender)"
+        ".property('city', city)"
+        ".property('state', state)"
         ".property('pk', category)"
     )
     bindings = {
@@ -62,6 +96,8 @@ def _write_to_graph(gremlin, event: dict) -> None:
         "risk_level": event.get("risk_level", "low"),
         "source": event.get("source", "unknown"),
         "sender": event.get("sender", "unknown"),
+        "city": event.get("city") or "unknown",
+        "state": event.get("state") or "unknown",
     }
     try:
         gremlin.submitAsync(q, bindings=bindings).result()
@@ -84,6 +120,7 @@ def on_event(partition_context, event):
             _write_to_graph(gremlin, body)
         finally:
             gremlin.close()
+        _update_filter(body)
         partition_context.update_checkpoint(event)
     except Exception as exc:
         logger.error("Error processing event: %s", exc)
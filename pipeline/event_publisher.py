@@ -33,7 +33,8 @@ def publish_fraud_event(event: dict) -> None:
 
     Args:
         event: dict with at minimum keys: message, source, sender,
-               is_scam, category, confidence, risk_level.
+               is_scam, category, confidence, risk_level. Optional
+               city/state place the report on the dashboard map.
     """
     producer = get_producer()
     try:
@@ -57,6 +58,7 @@ if __name__ == "__main__":
         "message": "Google Pay se Rs.1500 cashback mila hai. Approve karein.",
         "source": "test",
         "sender": "unknown",
+        "city": "Mumbai",
         "is_scam": True,
         "category": "fake_cashback",
         "confidence": 0.97,
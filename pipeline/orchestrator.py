@@ -1,40 +1,236 @@
 """
-Direct pipeline for demo reliability.
-Calls all three agents sequentially without Event Hub.
+Direct pipeline for demo reliability and batch runs.
+Runs detection, graph investigation and response as concurrent stages
+without Event Hub.
+
+Each stage has its own worker threads and a bounded input queue. A slow
+stage fills its queue and blocks the stage before it, back to the source
+iterator, so memory stays bounded however many messages are fed in.
+Per-stage throughput and queue-depth stats are kept on the Pipeline.
+
+  pipeline = Pipeline()
+  for item in pipeline.run(messages):       # any iterable of str
+      print(item["index"], item["result"]["category"])
+  print(pipeline.stats())
+
+Stage functions take and return the item dict, so local stubs can stand
+in for the agents (see evaluation/bench_pipeline.py).
 """
 import sys, os, json, time
+import threading
+from queue import Queue
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
-from agents.detection.detection_agent import classify_message
 
-def run_pipeline(message):
-    print("=" * 60)
-    print("FRAUDSHIELD PIPELINE")
-    print("=" * 60)
+QUEUE_SIZE = int(os.environ.get("FRAUDSHIELD_PIPELINE_QUEUE_SIZE", "32"))
+ACTION_CONFIDENCE = 0.7
+
+_DONE = object()
+
+
+# ── Default stages ────────────────────────────────────────────────────────────
+
+def detect(item):
+    from agents.detection.detection_agent import classify_message
+    item["result"] = classify_message(item["message"])
+    return item
+
+
+_investigator = None
+
+
+def investigate(item):
+    """Graph lookups for the UPI IDs and phones in actionable scams only."""
+    global _investigator
+    result = item["result"]
+    if not (result.get("is_scam") and result.get("confidence", 0) > ACTION_CONFIDENCE):
+        return item
+    if _investigator is None:
+        try:
+            from agents.investigation.investigation_agent import investigate_message
+            _investigator = investigate_message
+        except (ImportError, RuntimeError) as exc:
+            _investigator = lambda message, exc=exc: {"error": str(exc)}
+    try:
+        item["investigation"] = _investigator(item["message"])
+    except Exception as exc:
+        item["investigation"] = {"error": str(exc)}
+    return item
+
+
+def respond(item):
+    result = item["result"]
+    if result.get("is_scam") and result.get("confidence", 0) > ACTION_CONFIDENCE:
+        item["response"] = {
+            "action_required": True,
+            "report_url": "https://cybercrime.gov.in",
+            "helpline": "1930",
+            "red_flags": result.get("red_flags", []),
+        }
+    else:
+        item["response"] = {"action_required": False}
+    return item
+
 
-    # Stage 1: Detection
-    print("\n--- STAGE 1: DETECTION ---")
-    result = classify_message(message)
+DEFAULT_STAGES = [("detection", detect, 8), ("investigation", investigate, 4), ("response", respond, 2)]
+
+
+# ── Pipeline ──────────────────────────────────────────────────────────────────
+
+class _Stage:
+    def __init__(self, name, fn, workers, queue_size):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue = Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.live = workers
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self.depth_max = 0
+        self.started = None
+        self.finished = None
+
+    def sample_depth(self):
+        depth = self.queue.qsize()
+        with self.lock:
+            self.depth_total += depth
+            self.depth_samples += 1
+            self.depth_max = max(self.depth_max, depth)
+
+    def stats(self):
+        elapsed = ((self.finished or time.perf_counter()) - self.started) if self.started else 0.0
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "errors": self.errors,
+            "throughput_per_s": round(self.processed / elapsed, 2) if elapsed else 0.0,
+            "busy_s": round(self.busy, 3),
+            "utilization": round(self.busy / (elapsed * self.workers), 3) if elapsed else 0.0,
+            "queue_capacity": self.queue.maxsize,
+            "queue_depth_avg": round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0.0,
+            "queue_depth_max": self.depth_max,
+        }
+
+
+class Pipeline:
+    """Concurrent stages joined by bounded queues; `run` yields finished items as they complete."""
+
+    def __init__(self, stages=None, queue_size=QUEUE_SIZE):
+        self.stages = [_Stage(name, fn, workers, queue_size) for name, fn, workers in (stages or DEFAULT_STAGES)]
+        self.started = None
+        self.finished = None
+
+    def _feed(self, messages):
+        first = self.stages[0]
+        try:
+            for index, message in enumerate(messages):
+                first.queue.put({"index": index, "message": message})   # blocks while the stage is full
+                first.sample_depth()
+        finally:
+            for _ in range(first.workers):
+                first.queue.put(_DONE)
+
+    def _work(self, stage, downstream, consumers):
+        while True:
+            item = stage.queue.get()
+            if item is _DONE:
+                break
+            stage.sample_depth()
+            t0 = time.perf_counter()
+            with stage.lock:
+                stage.started = stage.started or t0
+            if "error" not in item:
+                try:
+                    item = stage.fn(item)
+                except Exception as exc:
+                    item["error"] = f"{stage.name}: {exc}"
+                    with stage.lock:
+                        stage.errors += 1
+            with stage.lock:
+                stage.processed += 1
+                stage.busy += time.perf_counter() - t0
+            downstream.put(item)
+        with stage.lock:
+            stage.live -= 1
+            last = stage.live == 0
+            if last:
+                stage.finished = time.perf_counter()
+        if last:
+            for _ in range(consumers):
+                downstream.put(_DONE)
+
+    def run(self, messages):
+        """Process an iterable of messages; yields item dicts (index, message, result, ...) in completion order."""
+        if isinstance(messages, str):
+            messages = [messages]
+        output = Queue(maxsize=self.stages[-1].queue.maxsize)
+        threads = [threading.Thread(target=self._feed, args=(messages,), name="pipeline-feed", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            if i + 1 < len(self.stages):
+                downstream, consumers = self.stages[i + 1].queue, self.stages[i + 1].workers
+            else:
+                downstream, consumers = output, 1
+            threads += [threading.Thread(target=self._work, args=(stage, downstream, consumers),
+                                         name=f"pipeline-{stage.name}-{n}", daemon=True)
+                        for n in range(stage.workers)]
+        self.started, self.finished = time.perf_counter(), None
+        for thread in threads:
+            thread.start()
+        while True:
+            item = output.get()
+            if item is _DONE:
+                break
+            yield item
+        self.finished = time.perf_counter()
+
+    def stats(self):
+        elapsed = ((self.finished or time.perf_counter()) - self.started) if self.started else 0.0
+        completed = self.stages[-1].processed
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "completed": completed,
+            "throughput_per_s": round(completed / elapsed, 2) if elapsed else 0.0,
+            "stages": {stage.name: stage.stats() for stage in self.stages},
+        }
+
+
+# ── Demo ──────────────────────────────────────────────────────────────────────
+
+def print_item(item):
+    print("=" * 60)
+    print(f"[{item['index']}] {item['message'][:60]}")
+    if "error" in item:
+        print(f"Error: {item['error']}")
+        return
+    result = item["result"]
     print(f"Category: {result['category']}")
     print(f"Confidence: {result['confidence']}")
     print(f"Risk: {result['risk_level']}")
-    print(f"Hindi: {result['explanation_hi']}")
-
-    if result.get("is_scam") and result.get("confidence", 0) > 0.7:
-        # Stage 2: Investigation
-        print("\n--- STAGE 2: INVESTIGATION ---")
-        print("Checking scam database...")
-        # TODO: Add Cosmos DB lookup when Person 2 has it ready
-        print("Known scam pattern detected" if result["confidence"] > 0.8 else "New pattern - flagged for review")
-
-        # Stage 3: Response
-        print("\n--- STAGE 3: RESPONSE ---")
-        print(f"Complaint form: https://cybercrime.gov.in")
-        print(f"Helpline: 1930")
+    print(f"Hindi: {result.get('explanation_hi', '')}")
+    if item["response"]["action_required"]:
+        investigation = item.get("investigation", {})
+        if "error" in investigation:
+            print(f"Investigation unavailable: {investigation['error']}")
+        else:
+            print(f"Known UPI IDs: {len(investigation.get('upis', []))}, "
+                  f"known phones: {len(investigation.get('phones', []))}")
+        print("Complaint form: https://cybercrime.gov.in")
+        print("Helpline: 1930")
         print(f"Red flags: {', '.join(result.get('red_flags', []))}")
     else:
-        print("\nMessage appears safe. No action required.")
+        print("Message appears safe. No action required.")
 
-    return result
+
+def run_pipeline(message):
+    """Run a single message through every stage and return its detection result."""
+    item, = Pipeline().run([message])
+    print_item(item)
+    if "error" in item:
+        raise RuntimeError(item["error"])
+    return item["result"]
 
 
 if __name__ == "__main__":
@@ -47,7 +243,7 @@ if __name__ == "__main__":
         "Hey, dinner at 8pm tonight? Send me Rs.300.",
     ]
 
-    for msg in demo_messages:
-        run_pipeline(msg)
-        print("\n")
-        time.sleep(3)
+    pipeline = Pipeline()
+    for item in pipeline.run(demo_messages):
+        print_item(item)
+    print("\n" + json.dumps(pipeline.stats(), indent=2))
@@ -0,0 +1,84 @@
+"""Local stand-in for an Azure OpenAI chat completions endpoint, used by tests."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def completion_body(content: str, prompt_tokens: int = 50, completion_tokens: int = 20) -> dict:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "o4-mini",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class StubEndpoint:
+    """Serves /openai/deployments/<name>/chat/completions on a random local port.
+
+    `status`, `delay` and `content` may be changed between requests; every
+    request body is appended to `requests`.
+    """
+
+    def __init__(self, content: str = '{"is_scam": false}', status: int = 200,
+                 delay: float = 0.0, retry_after=None):
+        self.content = content
+        self.status = status
+        self.delay = delay
+        self.retry_after = retry_after
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                stub.requests.append(json.loads(self.rfile.read(length) or b"{}"))
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if stub.status == 200:
+                    payload = completion_body(stub.content)
+                else:
+                    payload = {"error": {"code": str(stub.status), "message": "stub error"}}
+                data = json.dumps(payload).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if stub.retry_after is not None:
+                    self.send_header("retry-after", str(stub.retry_after))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    @property
+    def hits(self) -> int:
+        return len(self.requests)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
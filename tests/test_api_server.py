@@ -0,0 +1,234 @@
+"""Tests for the standalone pooled keep-alive API server in api/function_app.py."""
+
+import http.client
+import importlib.util
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+_PATH = os.path.join(os.path.dirname(__file__), "..", "api", "function_app.py")
+_spec = importlib.util.spec_from_file_location("fraudshield_api_server", _PATH)
+api = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(api)
+
+SCAM = {"is_scam": True, "category": "kyc_freeze", "confidence": 0.95, "risk_level": "high",
+        "explanation_en": "Fake KYC update.", "explanation_hi": "नकली KYC अपडेट।", "red_flags": []}
+
+
+@pytest.fixture(autouse=True)
+def reports(monkeypatch):
+    """Fresh report counts and feed per test; shutting a server down closes the feed."""
+    agg = api.ReportAggregator()
+    feed = api.DeltaLog(retry_ms=1000, epoch=agg.epoch)
+    agg.listeners.append(feed.append)
+    monkeypatch.setattr(api, "_reports", agg)
+    monkeypatch.setattr(api, "_feed", feed)
+    return agg
+
+
+@pytest.fixture
+def server(monkeypatch):
+    started = []
+
+    def start(classify=lambda message: dict(SCAM), **kwargs):
+        monkeypatch.setattr(api, "classify_message", classify)
+        srv = api.PooledHTTPServer(("127.0.0.1", 0), api.Handler, **kwargs)
+        threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True).start()
+        started.append(srv)
+        return srv
+
+    yield start
+    for srv in started:
+        srv.shutdown()
+        srv.server_close()
+
+
+def _post(conn, path, payload):
+    conn.request("POST", path, body=json.dumps(payload), headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    return resp, json.loads(resp.read())
+
+
+def _conn(srv):
+    return http.client.HTTPConnection("127.0.0.1", srv.server_address[1], timeout=5)
+
+
+class TestContract:
+    def test_classify_adds_report_fields(self, server):
+        resp, body = _post(_conn(server()), "/api/classify", {"message": "KYC expired", "source": "sms"})
+        assert resp.status == 200
+        assert body["action_required"] is True
+        assert body["helpline"] == "1930"
+        assert body["source"] == "sms"
+        assert body["original_message"] == "KYC expired"
+
+    def test_missing_message_is_400(self, server):
+        resp, body = _post(_conn(server()), "/api/classify", {})
+        assert resp.status == 400
+        assert body == {"error": "No message"}
+
+    def test_invalid_json_is_400(self, server):
+        conn = _conn(server())
+        conn.request("POST", "/api/classify", body="{not json", headers={"Content-Type": "application/json"})
+        assert conn.getresponse().status == 400
+
+    def test_health_get_and_unknown_path(self, server):
+        conn = _conn(server())
+        conn.request("GET", "/api/health")
+        resp = conn.getresponse()
+        assert json.loads(resp.read())["status"] == "healthy"
+        conn.request("GET", "/nope")
+        assert conn.getresponse().status == 404
+
+    def test_bulk_streams_ndjson_and_keeps_connection(self, server, monkeypatch):
+        monkeypatch.setattr(api, "_verdict_cache", api.VerdictCache())
+        conn = _conn(server())
+        upload = "address,body\nVM-SBI,Your KYC expired update at bit.ly/x\nMom,dinner at 8?\n"
+        conn.request("POST", "/api/bulk", body=upload, headers={"Content-Type": "text/csv"})
+        resp = conn.getresponse()
+        assert resp.getheader("Transfer-Encoding") == "chunked"
+        lines = [json.loads(line) for line in resp.read().splitlines()]
+        assert [line["type"] for line in lines] == ["verdict", "verdict", "summary"]
+        assert lines[-1]["by_stage"] == {"prefilter": 1, "model": 1}
+        conn.request("GET", "/api/health")
+        assert conn.getresponse().status == 200
+
+    def test_bulk_ends_the_chunked_body_after_a_bad_csv_row(self, server, monkeypatch):
+        monkeypatch.setattr(api, "_verdict_cache", api.VerdictCache())
+        conn = _conn(server())
+        upload = f"body\n{'x' * 140_000}\nYour KYC expired update at bit.ly/x\n"
+        conn.request("POST", "/api/bulk", body=upload, headers={"Content-Type": "text/csv"})
+        lines = [json.loads(line) for line in conn.getresponse().read().splitlines()]
+        assert [line["type"] for line in lines] == ["error", "verdict", "summary"]
+        conn.request("GET", "/api/health")
+        assert conn.getresponse().status == 200
+
+    def test_classifier_error_is_500(self, server):
+        def boom(message):
+            raise RuntimeError("model down")
+
+        resp, body = _post(_conn(server(boom)), "/api/classify", {"message": "hi"})
+        assert resp.status == 500
+        assert body["error"] == "model down"
+
+
+class TestReports:
+    def test_classified_scams_are_counted(self, server, reports):
+        srv = server()
+        conn = _conn(srv)
+        _post(conn, "/api/classify", {"message": "KYC expired", "city": "Pune"})
+        conn.request("GET", "/api/reports")
+        resp = conn.getresponse()
+        body = json.loads(resp.read())
+        assert resp.status == 200 and reports.total == 1
+        conn.request("GET", "/api/reports", headers={"If-None-Match": resp.getheader("ETag")})
+        assert conn.getresponse().status == 304
+        assert body == json.loads(reports.render()[0])
+
+    def test_stream_is_held_open_and_pushes_deltas(self, server, reports):
+        srv = server()
+        stream = _conn(srv)
+        stream.request("GET", "/api/reports/stream?since=0")
+        resp = stream.getresponse()
+        assert resp.getheader("Content-Type") == "text/event-stream"
+        assert resp.readline() == b"retry: 1000\n"
+        _post(_conn(srv), "/api/classify", {"message": "KYC expired", "city": "Delhi"})
+        lines = [resp.readline() for _ in range(4)]
+        assert lines[:2] == [b"\n", f"id: {reports.epoch}-1\n".encode()]
+        assert json.loads(lines[3].split(b": ", 1)[1])["city"] == "Delhi"
+
+    def test_streams_beyond_the_cap_get_one_poll(self, server, monkeypatch):
+        monkeypatch.setattr(api, "_stream_slots", threading.BoundedSemaphore(1))
+        api._stream_slots.acquire()
+        conn = _conn(server())
+        conn.request("GET", "/api/reports/stream?since=0")
+        resp = conn.getresponse()
+        assert resp.getheader("Content-Length") is not None
+        assert resp.read() == b"retry: 1000\n\n"
+
+
+class TestConnectionHandling:
+    def test_keep_alive_reuses_connection(self, server):
+        conn = _conn(server())
+        _post(conn, "/api/classify", {"message": "one"})
+        sock = conn.sock
+        resp, _ = _post(conn, "/api/classify", {"message": "two"})
+        assert resp.status == 200
+        assert conn.sock is sock
+        assert resp.getheader("Content-Length")
+
+    def test_oversized_body_is_413_and_closes(self, server, monkeypatch):
+        monkeypatch.setattr(api, "MAX_BODY_BYTES", 100)
+        resp, _ = _post(_conn(server()), "/api/classify", {"message": "x" * 500})
+        assert resp.status == 413
+        assert resp.getheader("Connection") == "close"
+
+    def test_slow_classification_does_not_block_health(self, server):
+        release = threading.Event()
+        srv = server(lambda message: release.wait(5) and dict(SCAM))
+        slow = threading.Thread(target=_post, args=(_conn(srv), "/api/classify", {"message": "slow"}))
+        slow.start()
+        time.sleep(0.05)
+        conn = _conn(srv)
+        conn.request("GET", "/api/health")
+        assert conn.getresponse().status == 200
+        release.set()
+        slow.join()
+
+    def test_rejects_connections_beyond_pool_and_queue(self, server):
+        release = threading.Event()
+        srv = server(lambda message: release.wait(5) and dict(SCAM), max_workers=1, max_pending=0)
+        busy = threading.Thread(target=_post, args=(_conn(srv), "/api/classify", {"message": "busy"}))
+        busy.start()
+        time.sleep(0.05)
+        sock = socket.create_connection(srv.server_address, timeout=5)
+        assert sock.recv(64).startswith(b"HTTP/1.1 503")
+        sock.close()
+        release.set()
+        busy.join()
+
+    def test_handles_100_concurrent_clients(self, server):
+        srv = server(lambda message: time.sleep(0.05) or dict(SCAM), max_workers=100)
+
+        def client(_):
+            conn = _conn(srv)
+            return [_post(conn, "/api/classify", {"message": "m"})[0].status for _ in range(3)]
+
+        t0 = time.monotonic()
+        with ThreadPoolExecutor(max_workers=100) as pool:
+            statuses = [s for batch in pool.map(client, range(100)) for s in batch]
+        assert statuses == [200] * 300
+        assert time.monotonic() - t0 < 5
+
+
+class TestGracefulShutdown:
+    def test_in_flight_request_completes(self, monkeypatch):
+        started, release = threading.Event(), threading.Event()
+
+        def slow(message):
+            started.set()
+            release.wait(5)
+            return dict(SCAM)
+
+        monkeypatch.setattr(api, "classify_message", slow)
+        srv = api.PooledHTTPServer(("127.0.0.1", 0), api.Handler)
+        loop = threading.Thread(target=srv.serve_forever, args=(0.05,))
+        loop.start()
+        result = {}
+        client = threading.Thread(target=lambda: result.update(
+            zip(("resp", "body"), _post(_conn(srv), "/api/classify", {"message": "x"})))
+        )
+        client.start()
+        started.wait(5)
+        srv.begin_shutdown()
+        loop.join(5)
+        threading.Timer(0.05, release.set).start()
+        srv.server_close()
+        client.join(5)
+        assert result["resp"].status == 200
+        assert result["resp"].getheader("Connection") == "close"
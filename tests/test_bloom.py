@@ -0,0 +1,104 @@
+"""Tests for the known scam identifier Bloom filter."""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics
+from fraudshield.bloom import (
+    ASSET_PATH, BloomFilter, add_event, build_scam_filter, identifier_key, load_scam_filter, measure_fp_rate, screen,
+)
+from fraudshield.entities import extract_entities
+from fraudshield.reputation import ReputationTable
+from fraudshield.scam_graph import KNOWN_BAD_DOMAINS, SCAM_PHONES, SCAM_UPIS
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    metrics.reset()
+
+
+class TestBloomFilter:
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(5000, 0.01)
+        for i in range(5000):
+            bloom.add(f"vpa:user{i}@ybl")
+        assert all(f"vpa:user{i}@ybl" in bloom for i in range(5000))
+
+    @pytest.mark.parametrize("fp_rate", [0.01, 0.001])
+    def test_false_positive_rate_is_tunable(self, fp_rate):
+        bloom = BloomFilter(20_000, fp_rate)
+        for i in range(20_000):
+            bloom.add(f"phone:+91-{9000000000 + i}")
+        assert bloom.estimated_fp_rate() == pytest.approx(fp_rate, rel=0.1)
+        assert measure_fp_rate(bloom, probes=50_000) < fp_rate * 2
+
+    def test_add_reports_new_items(self):
+        bloom = BloomFilter(100)
+        assert bloom.add("vpa:a@ybl") is True
+        assert bloom.add("vpa:a@ybl") is False
+        assert len(bloom) == 1
+
+    def test_round_trip_and_corrupt_file(self, tmp_path):
+        bloom = build_scam_filter(["x@ybl"], ["9876543210"], ["bad.in"], capacity=1000)
+        path = str(tmp_path / "filter.bin")
+        bloom.save(path)
+        loaded = BloomFilter.load(path)
+        assert (loaded.bits, loaded.hashes, len(loaded)) == (bloom.bits, bloom.hashes, 3)
+        assert identifier_key("phone", "+91 98765 43210") in loaded
+        (tmp_path / "bad.bin").write_bytes(b"FSBF garbage")
+        assert BloomFilter.load(str(tmp_path / "bad.bin")) is None
+        assert BloomFilter.load(str(tmp_path / "missing.bin")) is None
+
+    def test_bundled_asset_covers_seed_data(self):
+        bloom = BloomFilter.load(ASSET_PATH)
+        assert bloom is not None
+        assert all(identifier_key("vpa", u[1]) in bloom for u in SCAM_UPIS)
+        assert all(identifier_key("phone", p[1]) in bloom for p in SCAM_PHONES)
+        assert all(identifier_key("domain", d) in bloom for d in KNOWN_BAD_DOMAINS)
+
+    def test_missing_data_path_falls_back_to_the_shipped_asset(self, tmp_path):
+        bloom = load_scam_filter(str(tmp_path / "none.bin"))
+        assert bloom.to_bytes() == BloomFilter.load(ASSET_PATH).to_bytes()
+
+    def test_missing_asset_falls_back_to_seed(self, tmp_path):
+        with patch("fraudshield.bloom.ASSET_PATH", str(tmp_path / "asset.bin")):
+            bloom = load_scam_filter(str(tmp_path / "none.bin"))
+        assert identifier_key("vpa", SCAM_UPIS[0][1]) in bloom
+
+
+class TestScreening:
+    def test_screen_returns_only_positives(self):
+        bloom = build_scam_filter(["taskpay.earn@ybl"], domains=["sbi-kyc-update.in"], capacity=1000)
+        entities = extract_entities("Pay taskpay.earn@ybl or friend@okaxis, see https://www.sbi-kyc-update.in/x")
+        assert screen(bloom, entities) == [("vpa", "taskpay.earn@ybl"), ("domain", "sbi-kyc-update.in")]
+
+    def test_add_event_only_for_scams(self):
+        bloom = BloomFilter(1000)
+        assert add_event(bloom, {"is_scam": True, "message": "Call 98765 11111, pay new.scam@ybl"}) == 2
+        assert add_event(bloom, {"is_scam": False, "message": "pay mom@ybl"}) == 0
+        assert identifier_key("phone", "9876511111") in bloom
+
+    def test_add_event_skips_quoted_brand_domains(self):
+        bloom = BloomFilter(1000)
+        event = {"is_scam": True, "message": "SBI notice (sbi.co.in): update KYC at sbi-kyc-fix.xyz or bit.ly/kyc"}
+        assert add_event(bloom, event) == 1
+        assert identifier_key("domain", "sbi-kyc-fix.xyz") in bloom
+        assert identifier_key("domain", "sbi.co.in") not in bloom
+        assert identifier_key("domain", "bit.ly") not in bloom
+
+    def test_classify_looks_up_only_filter_positives(self):
+        table = MagicMock(wraps=ReputationTable())
+        bloom = build_scam_filter(["known@ybl"], capacity=1000)
+        with patch.object(function_app, "_reputation", table), \
+             patch.object(function_app, "_scam_filter", bloom), \
+             patch.object(function_app, "_inflight", MagicMock(do=lambda key, fn: {"is_scam": False})):
+            function_app.classify_message("pay known@ybl and other@ybl", "sms", "unknown")
+        assert table.assess.call_args.kwargs["pairs"] == [("sender", "unknown"), ("vpa", "known@ybl")]
+        assert metrics.counter("scam_filter.positives") == 1
+        assert metrics.counter("scam_filter.unconfirmed") == 1
@@ -0,0 +1,193 @@
+"""Tests for the streaming bulk inbox scan (fraudshield/bulk.py and /api/bulk)."""
+
+import io
+import json
+import os
+import threading
+from unittest.mock import patch
+
+import azure.functions as func
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import bulk, metrics
+from fraudshield.bulk import read_records, scan
+from fraudshield.cache import VerdictCache
+from fraudshield.coalesce import fingerprint
+
+SCAM = {"is_scam": True, "category": "kyc_freeze", "confidence": 0.92, "risk_level": "high",
+        "explanation_en": "Fake KYC.", "explanation_hi": "नकली KYC।", "red_flags": ["kyc"]}
+KYC = "Your SBI KYC has expired, update now at bit.ly/sbi-kyc"
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    metrics.reset()
+
+
+class Model:
+    def __init__(self, verdict=SCAM):
+        self.verdict = verdict
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, message, source, sender):
+        with self.lock:
+            self.calls.append(message)
+        return dict(self.verdict)
+
+
+def _by_type(outputs):
+    out = {}
+    for item in outputs:
+        out.setdefault(item["type"], []).append(item)
+    return out
+
+
+class TestReadRecords:
+    def test_csv_with_backup_app_columns(self):
+        data = "\ufeff_id,address,body,date\n7,VM-SBIINB,\"KYC expired,\nupdate now\",1700000000\n8,Mom,hi,1700000001\n"
+        records = list(read_records(io.StringIO(data, newline="")))
+        assert records[0] == {"line": 1, "id": "7", "sender": "VM-SBIINB", "source": "sms",
+                              "message": "KYC expired,\nupdate now"}
+        assert records[1]["line"] == 2
+
+    def test_ndjson_with_bad_lines(self):
+        data = '{"message": "hi", "sender": "x"}\n\nnot json\n[1]\n{"text": "hello"}\n'
+        records = list(read_records(data.splitlines(keepends=True)))
+        assert [r.get("error") for r in records] == [None, "invalid JSON", "not a JSON object", None]
+        assert records[3]["message"] == "hello"
+
+    def test_oversized_csv_field_is_an_error_line(self):
+        data = f"message\nfirst\n{'x' * 140_000}\nlast\n"
+        records = list(read_records(io.StringIO(data, newline="")))
+        assert [r.get("message") for r in records] == ["first", None, "last"]
+        assert records[1]["line"] == 2 and records[1]["error"].startswith("invalid CSV")
+
+    def test_empty_input_and_bad_format(self):
+        assert list(read_records(["", "\n"])) == []
+        with pytest.raises(ValueError):
+            list(read_records(["a,b\n"], fmt="xml"))
+
+
+class TestScan:
+    def _records(self, messages):
+        return ({"line": i + 1, "message": m, "sender": "s", "source": "sms"} for i, m in enumerate(messages))
+
+    def test_pipeline_stages_and_summary(self):
+        model = Model()
+        messages = [KYC, "See you at 8", KYC.upper(), "Pay Rs 500 to shop@ybl", ""]
+        records = list(self._records(messages))
+        records[-1]["error"] = "no message field"
+        out = _by_type(scan(iter(records), model, VerdictCache(), workers=2))
+        verdicts = {v["line"]: v for v in out["verdict"]}
+        assert verdicts[2]["stage"] == "prefilter" and verdicts[2]["is_scam"] is False
+        assert verdicts[3] == {"type": "verdict", "line": 3, "duplicate_of": 1, "stage": "duplicate"}
+        assert verdicts[1]["stage"] == verdicts[4]["stage"] == "model"
+        assert sorted(model.calls) == sorted([KYC, "Pay Rs 500 to shop@ybl"])
+        assert out["error"] == [{"type": "error", "line": 5, "error": "no message field"}]
+        summary = out["summary"][0]
+        assert summary["total"] == 5 and summary["scams"] == 2 and summary["errors"] == 1
+        assert summary["by_stage"] == {"prefilter": 1, "duplicate": 1, "model": 2}
+        assert summary["by_category"] == {"kyc_freeze": 2}
+
+    def test_cache_skips_the_model_on_the_next_scan(self):
+        cache, model = VerdictCache(), Model()
+        list(scan(self._records([KYC]), model, cache))
+        out = _by_type(scan(self._records([KYC]), model, cache))
+        assert len(model.calls) == 1
+        assert out["verdict"][0]["stage"] == "cache"
+        assert metrics.counter("verdict_cache.hits") == 1
+
+    def test_cache_entries_are_bulk_verdicts_only(self):
+        cache = VerdictCache()
+        full = dict(SCAM, message=KYC, sender="AX-SBI", campaign_id="c1", links=[], reputation=[])
+        list(scan(self._records([KYC]), Model(full), cache))
+        assert cache.get(fingerprint(KYC)) is None
+        assert cache.get(bulk.CACHE_PREFIX + fingerprint(KYC)) == SCAM
+
+    def test_rule_fallbacks_are_not_cached(self):
+        cache = VerdictCache()
+        list(scan(self._records([KYC]), Model(dict(SCAM, tier="rules")), cache))
+        assert len(cache) == 0
+
+    def test_model_errors_become_error_lines(self):
+        def broken(message, source, sender):
+            raise RuntimeError("model down")
+
+        out = _by_type(scan(self._records([KYC]), broken))
+        assert out["error"][0]["error"] == "model down"
+        assert out["summary"][0]["errors"] == 1
+
+    def test_a_failing_record_does_not_end_the_scan(self):
+        real = bulk.extract_entities
+
+        def flaky(message):
+            if "boom" in message:
+                raise ValueError("Invalid IPv6 URL")
+            return real(message)
+
+        with patch.object(bulk, "extract_entities", side_effect=flaky):
+            out = _by_type(scan(self._records(["boom http://[sbi-kyc", KYC, "KYC at http://[sbi-kyc now"]), Model()))
+        assert [e["line"] for e in out["error"]] == [1]
+        assert sorted(v["line"] for v in out["verdict"]) == [2, 3]
+        assert out["summary"][0]["errors"] == 1
+
+    def test_a_failing_pipeline_still_ends_with_a_summary(self):
+        def records():
+            yield from self._records([KYC])
+            raise RuntimeError("upload cut off")
+
+        out = list(scan(records(), Model()))
+        assert [o["type"] for o in out] == ["verdict", "error", "summary"]
+        assert out[1]["error"] == "scan stopped: upload cut off"
+        assert out[-1]["total"] == 1 and out[-1]["errors"] == 1
+
+    def test_reads_input_lazily(self):
+        pulled = []
+
+        def source():
+            for i in range(10_000):
+                pulled.append(i)
+                yield {"line": i + 1, "message": f"Pay Rs {i} to shop{i}@ybl", "sender": "s", "source": "sms"}
+
+        outputs = scan(source(), Model(), workers=4, progress_every=0)
+        next(outputs)
+        assert len(pulled) <= 8
+        assert sum(1 for _ in outputs) == 10_000      # 9,999 verdicts + the summary
+
+    def test_progress_lines(self):
+        messages = [f"Pay Rs {i} to shop{i}@ybl" for i in range(10)]
+        out = _by_type(scan(self._records(messages), Model(), progress_every=4))
+        assert [p["processed"] for p in out["progress"]] == [4, 8]
+
+
+class TestBulkEndpoint:
+    def _post(self, body, content_type="application/x-ndjson", **params):
+        return func.HttpRequest(method="POST", url="/api/bulk", body=body.encode(), params=params,
+                                headers={"Content-Type": content_type})
+
+    def test_csv_upload(self):
+        with patch.object(function_app, "classify_message", Model()), \
+             patch.object(function_app, "_verdict_cache", VerdictCache()):
+            resp = function_app.bulk_scan(self._post(f"sender,message\nAX-SBI,{KYC}\nMom,hi\n", "text/csv"))
+        lines = [json.loads(line) for line in resp.get_body().decode().splitlines()]
+        assert resp.status_code == 200
+        assert resp.headers["Content-Type"] == "application/x-ndjson"
+        assert lines[0]["sender"] in ("AX-SBI", "Mom")
+        assert lines[-1]["type"] == "summary" and lines[-1]["total"] == 2
+
+    def test_oversized_csv_field_is_not_a_500(self):
+        with patch.object(function_app, "classify_message", Model()), \
+             patch.object(function_app, "_verdict_cache", VerdictCache()):
+            resp = function_app.bulk_scan(self._post(f"message\n{'x' * 140_000}\n{KYC}\n", "text/csv"))
+        lines = [json.loads(line) for line in resp.get_body().decode().splitlines()]
+        assert resp.status_code == 200
+        assert [line["type"] for line in lines] == ["error", "verdict", "summary"]
+
+    @pytest.mark.parametrize("params", [{"format": "xml"}, {"progress_every": "often"}])
+    def test_bad_parameters_are_400(self, params):
+        assert function_app.bulk_scan(self._post("{}", **params)).status_code == 400
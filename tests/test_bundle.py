@@ -0,0 +1,151 @@
+"""Tests for the on-device detection bundle and its deltas."""
+
+import gzip
+import json
+import os
+import struct
+from unittest.mock import patch
+
+import azure.functions as func
+import numpy as np
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import bundle, metrics
+from fraudshield.bloom import BloomFilter, build_scam_filter, identifier_key
+from fraudshield.distill import DistilledModel
+from fraudshield.prompting import CATEGORIES
+
+
+def _filter(n=50):
+    return build_scam_filter([f"scam{i}@ybl" for i in range(n)], ["9876543210"], ["sbi-kyc.xyz"], capacity=5000)
+
+
+def _model(version="v1", seed=0):
+    rng = np.random.default_rng(seed)
+    meta = {"format": 1, "version": version, "categories": list(CATEGORIES), "dim": 64, "threshold": 0.9}
+    return DistilledModel(rng.normal(size=(64, len(CATEGORIES))), rng.normal(size=len(CATEGORIES)), meta)
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    metrics.reset()
+
+
+class TestFormat:
+    def test_round_trip(self):
+        bloom, model = _filter(), _model()
+        version, data = bundle.build(bloom, model)
+        parsed_version, sections = bundle.parse(data)
+        assert parsed_version == version and list(sections) == ["FLTR", "MODL", "RULE"]
+
+        bits, hashes, count = struct.unpack_from("<QBQ", sections["FLTR"])
+        restored = BloomFilter(bits=bits, hashes=hashes)
+        restored._array = bytearray(sections["FLTR"][struct.calcsize("<QBQ"):])
+        assert identifier_key("vpa", "scam7@ybl") in restored and count == len(bloom)
+
+        meta_len = struct.unpack_from("<I", sections["MODL"])[0]
+        meta = json.loads(sections["MODL"][4:4 + meta_len])
+        weights = np.frombuffer(sections["MODL"][4 + meta_len:4 + meta_len + 64 * len(CATEGORIES) * 2], "<f2")
+        assert meta["version"] == "v1"
+        assert np.allclose(weights.reshape(64, -1), model.weights, atol=1e-2)
+
+        rules = json.loads(sections["RULE"])
+        assert rules["categories"] == list(CATEGORIES) and rules["rules"]
+
+    def test_version_depends_on_content_only(self):
+        assert bundle.build(_filter())[0] == bundle.build(_filter())[0]
+        assert bundle.build(_filter())[0] != bundle.build(_filter(51))[0]
+
+    def test_corruption_is_detected(self):
+        _, data = bundle.build(_filter())
+        corrupt = bytearray(data)
+        corrupt[40] ^= 1
+        with pytest.raises(bundle.BundleError):
+            bundle.parse(bytes(corrupt))
+        with pytest.raises(bundle.BundleError):
+            bundle.parse(data[:-1])
+
+
+class TestDelta:
+    def test_growing_blocklist_delta_is_small(self):
+        bloom = _filter()
+        _, base = bundle.build(bloom, _model())
+        for i in range(20):
+            bloom.add(identifier_key("vpa", f"new{i}@paytm"))
+        _, target = bundle.build(bloom, _model())
+        delta = bundle.diff(base, target)
+        assert bundle.apply_delta(base, delta) == target
+        assert len(delta) < len(target) // 10
+
+    def test_model_added_and_removed(self):
+        _, small = bundle.build(_filter(), None)
+        _, large = bundle.build(_filter(), _model())
+        assert bundle.apply_delta(small, bundle.diff(small, large)) == large
+        assert bundle.apply_delta(large, bundle.diff(large, small)) == small
+
+    def test_wrong_base_is_rejected(self):
+        _, a = bundle.build(_filter(), None)
+        _, b = bundle.build(_filter(60), None)
+        _, c = bundle.build(_filter(70), None)
+        with pytest.raises(bundle.BundleError):
+            bundle.apply_delta(c, bundle.diff(a, b))
+
+
+class TestStore:
+    def test_rebuilds_on_change_and_keeps_history(self):
+        bloom, now = _filter(), [0.0]
+        store = bundle.BundleStore(lambda: (bloom, None), history=2, min_interval=10, clock=lambda: now[0])
+        v1, _ = store.current()
+        bloom.add(identifier_key("vpa", "fresh@ybl"))
+        assert store.current()[0] == v1          # not rechecked yet
+        now[0] = 11
+        v2, data = store.current()
+        assert v2 != v1
+        assert bundle.apply_delta(store._bundles[v1], store.delta(v1)) == data
+        assert store.delta(v2) is None and store.delta("unknown") is None
+        assert metrics.counter("bundle.builds") == 2
+
+
+class TestRoute:
+    def _get(self, headers=None, **params):
+        return func.HttpRequest(method="GET", url="/api/bundle", params=params, headers=headers or {}, body=b"")
+
+    def test_disabled(self):
+        with patch.object(function_app, "_bundles", None):
+            assert function_app.bundle(self._get()).status_code == 503
+
+    def test_full_delta_and_not_modified(self):
+        bloom = _filter()
+        store = bundle.BundleStore(lambda: (bloom, None), min_interval=0)
+        with patch.object(function_app, "_bundles", store):
+            full = function_app.bundle(self._get({"Accept-Encoding": "gzip"}))
+            assert full.headers["Content-Type"] == bundle.MEDIA_TYPE
+            data = gzip.decompress(full.get_body())
+            version = full.headers["X-Bundle-Version"]
+            assert bundle.parse(data)[0] == version
+
+            assert function_app.bundle(self._get(have=version)).status_code == 304
+            assert function_app.bundle(self._get({"If-None-Match": full.headers["ETag"]})).status_code == 304
+
+            bloom.add(identifier_key("phone", "9123456780"))
+            resp = function_app.bundle(self._get(have=version))
+            assert resp.headers["Content-Type"] == bundle.DELTA_MEDIA_TYPE
+            updated = bundle.apply_delta(data, resp.get_body())
+            assert bundle.parse(updated)[0] == resp.headers["X-Bundle-Version"] != version
+
+    def test_built_from_the_shared_asset_not_this_instance(self, tmp_path):
+        path = str(tmp_path / "scam_filter.bin")
+        _filter().save(path)
+        store = bundle.BundleStore(function_app._bundle_sources, min_interval=0)
+        with patch.object(function_app, "_SCAM_FILTER_PATH", path), \
+                patch.object(function_app, "_bundle_filter", (None, None)), \
+                patch.object(function_app, "_scam_filter", _filter()) as instance, \
+                patch.object(function_app, "_distilled", None), patch.object(function_app, "_bundles", store):
+            version = function_app.bundle(self._get()).headers["X-Bundle-Version"]
+            assert function_app.add_event(instance, {"is_scam": True, "message": "Pay to fresh@ybl"}) == 1
+            assert function_app.bundle(self._get(have=version)).status_code == 304
+            assert version == bundle.build(_filter())[0]
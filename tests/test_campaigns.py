@@ -0,0 +1,179 @@
+"""Tests for MinHash/LSH campaign detection and campaign verdict reuse in classify_message."""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics
+from fraudshield.cache import VerdictCache
+from fraudshield.campaigns import CampaignIndex, campaign_verdict, mask
+
+BLAST = [
+    "Dear customer, your SBI account will be blocked today. Update KYC at http://sbi-kyc.xyz/a1 or call "
+    "9876543210. Rs.5,000 penalty.",
+    "Dear customer your SBI account will be blocked today!! Update KYC at https://sbl-update.top/x9 or call "
+    "9123456780. Rs.2,500 penalty.",
+    "Dear Ramesh, your SBI account will be blocked today. Update KYC at bit.ly/3kx or call 9000000000. "
+    "Rs. 10000 penalty.",
+]
+# One blast that keeps its link; the variants above each carry another one.
+SAME_LINK = [
+    "Dear customer, your SBI account will be blocked today. Update KYC at http://sbi-kyc.xyz/a1 or call "
+    "9876543210. Rs.5,000 penalty.",
+    "Dear customer your SBI account will be blocked today!! Update KYC at http://sbi-kyc.xyz/b7 or call "
+    "9123456780. Rs.2,500 penalty.",
+    "Dear Ramesh, your SBI account will be blocked today. Update KYC at sbi-kyc.xyz/c3 or call 9000000000. "
+    "Rs. 10000 penalty.",
+]
+OTHER = "Your Amazon order 402-1234 has been shipped and will arrive tomorrow."
+VERDICT = {"is_scam": True, "category": "kyc_freeze", "confidence": 0.93, "risk_level": "high",
+           "explanation_en": "x", "explanation_hi": "y", "red_flags": []}
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    metrics.reset()
+
+
+class TestIndex:
+    def test_mask(self):
+        assert mask("Pay Rs.5,000 at https://x.in/a or 98765 43210") == "pay <amt> at <url> or 0 0"
+
+    def test_variants_share_a_campaign(self):
+        index = CampaignIndex()
+        ids = {index.assign(m)["campaign_id"] for m in BLAST}
+        assert len(ids) == 1
+        assert index.assign(OTHER)["campaign_id"] not in ids
+        assert index.get(ids.pop())["size"] == 3
+        assert metrics.counter("campaigns.created") == 2 and metrics.counter("campaigns.matched") == 2
+
+    def test_empty_message(self):
+        assert CampaignIndex().assign("   ") is None
+
+    def test_verdict_is_kept_once(self):
+        index = CampaignIndex()
+        campaign_id = index.assign(BLAST[0])["campaign_id"]
+        assert index.set_verdict(campaign_id, VERDICT)
+        assert not index.set_verdict(campaign_id, {**VERDICT, "category": "lottery_scam"})
+        summary = index.assign(BLAST[1])
+        assert summary["verdict"] == {"is_scam": True, "category": "kyc_freeze", "confidence": 0.93,
+                                      "risk_level": "high"}
+        verdict = campaign_verdict(summary)
+        assert verdict["tier"] == "campaign" and verdict["red_flags"] == ["part of a campaign of 2 similar messages"]
+
+    def test_only_scam_verdicts_are_kept(self):
+        index = CampaignIndex()
+        campaign_id = index.assign(BLAST[0])["campaign_id"]
+        assert not index.set_verdict(campaign_id, {**VERDICT, "is_scam": False, "category": "legitimate"})
+        assert index.assign(BLAST[1])["verdict"] is None
+
+    def test_identifiers_not_seen_with_the_verdict_are_listed(self):
+        index = CampaignIndex()
+        campaign_id = index.assign(BLAST[0], identifiers=["sbi-kyc.xyz"])["campaign_id"]
+        index.set_verdict(campaign_id, VERDICT, ["sbi-kyc.xyz"])
+        assert index.assign(SAME_LINK[1], identifiers=["sbi-kyc.xyz"])["unseen"] == []
+        assert index.assign(BLAST[1], identifiers=["sbl-update.top"])["unseen"] == ["sbl-update.top"]
+        index.set_verdict(campaign_id, VERDICT, ["sbl-update.top"])
+        assert index.assign(BLAST[1], identifiers=["sbl-update.top"])["unseen"] == []
+
+    def test_ageing(self):
+        clock = Clock()
+        index = CampaignIndex(max_age=60, clock=clock)
+        first = index.assign(BLAST[0])["campaign_id"]
+        clock.now += 61
+        summary = index.assign(BLAST[1])
+        assert summary["campaign_id"] != first and summary["size"] == 1 and index.get(first) is None
+        assert metrics.counter("campaigns.expired") == 1
+
+    def test_capacity(self):
+        index = CampaignIndex(capacity=2)
+        first = index.assign(BLAST[0])["campaign_id"]
+        index.assign(OTHER)
+        index.assign("Hi, are we still meeting for lunch at 1?")
+        assert len(index) == 2 and index.get(first) is None
+        assert all(first not in bucket.values() for bucket in index._buckets)
+
+    def test_snapshot_round_trip(self, tmp_path):
+        path = str(tmp_path / "campaigns.json")
+        index = CampaignIndex()
+        campaign_id = index.assign(BLAST[0])["campaign_id"]
+        index.set_verdict(campaign_id, VERDICT, ["sbi-kyc.xyz"])
+        index.snapshot(path)
+
+        restored = CampaignIndex()
+        assert restored.restore(path)
+        summary = restored.assign(BLAST[2], identifiers=["sbi-kyc.xyz"])
+        assert summary["campaign_id"] == campaign_id and summary["verdict"]["category"] == "kyc_freeze"
+        assert summary["unseen"] == []
+        assert not CampaignIndex(seed=2).restore(path)
+        assert not CampaignIndex().restore(str(tmp_path / "missing.json"))
+
+
+class TestClassify:
+    @pytest.fixture(autouse=True)
+    def _isolated(self):
+        with patch.object(function_app, "_campaigns", CampaignIndex()), \
+                patch.object(function_app, "_template_verdicts", VerdictCache(name="template_cache")), \
+                patch.object(function_app, "_shortlinks", None), \
+                patch.object(function_app, "_distilled", None), \
+                patch.object(function_app, "_LOOKALIKE_FAST_PATH", False), \
+                patch.object(function_app, "_reputation", MagicMock(assess=MagicMock(return_value=[]))):
+            yield
+
+    def test_variants_reuse_the_model_verdict(self):
+        with patch.object(function_app, "_classify_with_model", return_value=dict(VERDICT)) as model:
+            results = [function_app.classify_message(m) for m in SAME_LINK]
+        assert model.call_count == 1
+        assert [r["tier"] for r in results[1:]] == ["campaign", "campaign"]
+        assert len({r["campaign_id"] for r in results}) == 1
+        assert results[2]["category"] == "kyc_freeze" and results[2]["explanation_source"] == "template"
+        assert metrics.counter("classify.campaign_fast_path") == 2
+
+    def test_variants_with_another_link_ask_the_model(self):
+        with patch.object(function_app, "_template_miner", None), \
+                patch.object(function_app, "_classify_with_model", return_value=dict(VERDICT)) as model:
+            results = [function_app.classify_message(m) for m in BLAST]
+            assert model.call_count == 3
+            assert all("tier" not in r for r in results)
+            again = function_app.classify_message(BLAST[1].replace("9123456780", "9111111111"))
+        assert model.call_count == 3 and again["tier"] == "campaign"
+
+    def test_legitimate_verdicts_are_not_reused(self):
+        alert = ("Dear Customer, Rs.5,000 debited from A/c XX1234 on 12-05-24 by UPI ref 412345678901. "
+                 "Not you? Call 1800-111-109 - SBI")
+        phish = alert.replace("Call 1800-111-109", "Block at https://sbi-secure-verify.xyz/block")
+        legitimate = {"is_scam": False, "category": "legitimate", "confidence": 0.95, "risk_level": "low",
+                      "explanation_en": "x", "explanation_hi": "y", "red_flags": []}
+        with patch.object(function_app, "_template_miner", None), \
+                patch.object(function_app, "_classify_with_model",
+                             side_effect=[legitimate, dict(VERDICT, category="phishing_link")]) as model:
+            function_app.classify_message(alert)
+            result = function_app.classify_message(phish)
+        assert model.call_count == 2
+        assert result["category"] == "phishing_link" and result.get("tier") != "campaign"
+
+    def test_unsure_verdicts_are_not_reused(self):
+        with patch.object(function_app, "_classify_with_model",
+                          return_value={**VERDICT, "confidence": 0.6}) as model:
+            for m in BLAST:
+                function_app.classify_message(m)
+        assert model.call_count == 3
+
+    def test_other_profiles_ask_the_model(self):
+        with patch.object(function_app, "_classify_with_model", return_value=dict(VERDICT)) as model:
+            function_app.classify_message(BLAST[0])
+            function_app.classify_message(BLAST[1], prompt_variant="explain_hi")
+        assert model.call_count == 2
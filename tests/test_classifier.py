@@ -0,0 +1,159 @@
+"""Tests for the shared DetectionClassifier and the detection agent built on it."""
+
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from agents.detection import detection_agent
+from fraudshield import metrics, router as router_module
+from fraudshield.cache import VerdictCache
+from fraudshield.classifier import DetectionClassifier
+from fraudshield.coalesce import CoalesceTimeout
+from fraudshield.limiter import Overloaded
+from fraudshield.parsing import VerdictParseError
+from fraudshield.router import NoDeploymentAvailable
+from fraudshield.prompting import SYSTEM_PROMPT
+
+VERDICT = {"is_scam": True, "category": "kyc_freeze", "confidence": 0.9, "risk_level": "high",
+           "explanation_en": "Fake KYC.", "explanation_hi": "नकली KYC।", "red_flags": ["otp"]}
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    metrics.reset()
+
+
+class FakeCreate:
+    def __init__(self, delay=0.0, cached_tokens=0):
+        self.delay = delay
+        self.cached_tokens = cached_tokens
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, messages, **kwargs):
+        with self.lock:
+            self.calls.append(messages)
+        time.sleep(self.delay)
+        text = messages[-1]["content"]
+        verdict = dict(VERDICT, is_scam="KYC" in text, category="kyc_freeze" if "KYC" in text else "legitimate")
+        usage = SimpleNamespace(prompt_tokens=300, completion_tokens=60, total_tokens=360,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=self.cached_tokens))
+        message = SimpleNamespace(content=json.dumps(verdict))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def _status_error(status_code):
+    """An exception shaped like the openai SDK's APIStatusError."""
+    error = Exception(f"HTTP {status_code}")
+    error.status_code = status_code
+    return error
+
+
+class TestDetectionClassifier:
+    def test_prompt_is_a_stable_system_message(self):
+        create = FakeCreate()
+        clf = DetectionClassifier(create)
+        clf.classify("Your KYC expired", "sms", "AX-SBI")
+        clf.classify("Dinner at 8?", "whatsapp", "Mom")
+        first, second = create.calls
+        assert first[0] == second[0] == {"role": "system", "content": SYSTEM_PROMPT}
+        assert SYSTEM_PROMPT not in first[1]["content"]
+        assert "Your KYC expired" in first[1]["content"]
+
+    def test_cache_and_cached_token_metrics(self):
+        create = FakeCreate(cached_tokens=256)
+        clf = DetectionClassifier(create, cache=VerdictCache())
+        first = clf.classify("Your KYC expired")
+        first["red_flags"].append("mutated")
+        second = clf.classify("your  KYC expired")
+        assert len(create.calls) == 1
+        assert second["red_flags"] == ["otp"]
+        assert metrics.counter("tokens.full.cached") == 256
+
+    def test_rule_fallback_is_not_cached(self):
+        def shed(**kwargs):
+            raise Overloaded("queue full")
+
+        cache = VerdictCache()
+        verdict = DetectionClassifier(shed, cache=cache).classify("Your KYC expired, share OTP")
+        assert verdict["tier"] == "rules"
+        assert len(cache) == 0
+
+    @pytest.mark.parametrize("error", [NoDeploymentAvailable("all cooling down"), VerdictParseError("no JSON"),
+                                       _status_error(429), _status_error(503)])
+    def test_model_unavailable_falls_back_to_rules(self, error):
+        def failing(**kwargs):
+            raise error
+
+        cache = VerdictCache()
+        verdict = DetectionClassifier(failing, cache=cache).classify("Your KYC expired, share OTP")
+        assert verdict["tier"] == "rules"
+        assert len(cache) == 0
+        assert metrics.counter("classify.rule_fallback") == 1
+
+    def test_coalesce_timeout_falls_back_to_rules(self):
+        inflight = MagicMock()
+        inflight.do.side_effect = CoalesceTimeout("timed out")
+        cache = VerdictCache()
+        verdict = DetectionClassifier(FakeCreate(), inflight=inflight, cache=cache).classify("Your KYC expired")
+        assert verdict["tier"] == "rules"
+        assert len(cache) == 0
+
+    def test_bad_requests_still_raise(self):
+        def rejected(**kwargs):
+            raise _status_error(400)
+
+        with pytest.raises(Exception, match="HTTP 400"):
+            DetectionClassifier(rejected).classify("Your KYC expired")
+
+    def test_classify_many_keeps_order_and_runs_concurrently(self):
+        create = FakeCreate(delay=0.1)
+        messages = ["KYC expired"] + [{"message": f"hello {i}", "sender": "friend"} for i in range(7)]
+        t0 = time.perf_counter()
+        results = DetectionClassifier(create).classify_many(messages, workers=8)
+        assert time.perf_counter() - t0 < 0.5
+        assert [r["is_scam"] for r in results] == [True] + [False] * 7
+        assert "Sender: friend" in create.calls[-1][1]["content"]
+
+    def test_classify_many_reports_errors_in_place(self):
+        def flaky(messages, **kwargs):
+            if "boom" in messages[-1]["content"]:
+                raise ValueError("bad request")
+            return FakeCreate()(messages)
+
+        results = DetectionClassifier(flaky).classify_many(["KYC expired", "boom"])
+        assert results[0]["is_scam"] is True
+        assert results[1] == {"error": "bad request"}
+
+
+class TestDetectionAgent:
+    def test_import_does_not_build_a_client(self):
+        assert detection_agent._classifier is None
+
+    def test_agent_and_function_app_share_one_router(self):
+        shared = MagicMock()
+        shared.create.side_effect = FakeCreate()
+        with patch.object(router_module, "_shared", shared), patch.object(detection_agent, "_classifier", None):
+            verdict = detection_agent.classify_message("Your KYC expired", "sms")
+            assert function_app._get_router() is shared
+        assert verdict["category"] == "kyc_freeze"
+        shared.create.assert_called_once()
+
+    def test_agent_uses_function_apps_guard_coalescer_and_cache(self):
+        with patch.object(detection_agent, "_classifier", None):
+            clf = detection_agent.get_classifier()
+            with patch.object(function_app._model_guard, "call", side_effect=Overloaded("busy")) as call:
+                verdict = clf.model_verdict("Your KYC expired, share OTP", "sms")
+        assert clf.inflight is function_app._inflight
+        assert clf.cache is function_app._verdict_cache
+        call.assert_called_once()
+        assert verdict["tier"] == "rules"
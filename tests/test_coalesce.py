@@ -0,0 +1,123 @@
+"""Tests for single-flight request coalescing."""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics
+from fraudshield.coalesce import CoalesceTimeout, SingleFlight, fingerprint, normalize_message
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    metrics.reset()
+
+
+def _run_concurrently(n, fn):
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        futures = [pool.submit(fn) for _ in range(n)]
+        return [f.exception() or f.result() for f in futures]
+
+
+class TestFingerprint:
+    def test_normalizes_case_and_whitespace(self):
+        assert fingerprint("Your KYC  expired.\n Update NOW") == fingerprint("your kyc expired. update now")
+
+    def test_normalizes_fullwidth_characters(self):
+        assert normalize_message("ＫＹＣ") == "kyc"
+
+    def test_different_messages_differ(self):
+        assert fingerprint("Rs.1500 cashback") != fingerprint("Rs.1600 cashback")
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight("t")
+        calls = []
+        release = threading.Event()
+
+        def slow():
+            calls.append(1)
+            release.wait(2)
+            return {"category": "kyc_freeze"}
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            futures = [pool.submit(flight.do, "k", slow) for _ in range(10)]
+            time.sleep(0.1)
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert len(calls) == 1
+        assert all(r == {"category": "kyc_freeze"} for r in results)
+        assert metrics.counter("t.leaders") == 1
+        assert metrics.counter("t.coalesced") == 9
+        assert metrics.gauge("t.ratio") == pytest.approx(0.9)
+
+    def test_error_propagates_to_all_waiters(self):
+        flight = SingleFlight("t")
+
+        def failing():
+            time.sleep(0.1)
+            raise RuntimeError("model down")
+
+        outcomes = _run_concurrently(5, lambda: flight.do("k", failing))
+        assert all(isinstance(o, RuntimeError) for o in outcomes)
+
+    def test_waiter_times_out(self):
+        flight = SingleFlight("t", timeout=0.05)
+        release = threading.Event()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(flight.do, "k", lambda: release.wait(2))
+            time.sleep(0.02)
+            follower = pool.submit(flight.do, "k", lambda: None)
+            with pytest.raises(CoalesceTimeout):
+                follower.result()
+            release.set()
+            assert leader.result() is True
+        assert metrics.counter("t.timeouts") == 1
+
+    def test_key_is_released_after_completion(self):
+        flight = SingleFlight("t")
+        assert flight.do("k", lambda: 1) == 1
+        assert flight.do("k", lambda: 2) == 2
+        assert flight.in_flight() == 0
+
+    def test_distinct_keys_run_independently(self):
+        flight = SingleFlight("t")
+        assert flight.do("a", lambda: "a") == "a"
+        assert flight.do("b", lambda: "b") == "b"
+        assert metrics.counter("t.coalesced") == 0
+
+
+class TestClassifyMessageCoalescing:
+    def test_identical_messages_issue_one_model_call(self):
+        verdict = {"is_scam": True, "category": "kyc_freeze", "confidence": 0.9,
+                   "risk_level": "high", "red_flags": ["otp"]}
+        router = MagicMock()
+
+        def create(**kwargs):
+            time.sleep(0.2)
+            resp = MagicMock()
+            resp.choices[0].message.content = json.dumps(verdict)
+            return resp
+
+        router.create.side_effect = create
+        with patch.object(function_app, "_get_router", return_value=router):
+            results = _run_concurrently(
+                8, lambda: function_app.classify_message("Your SBI KYC expired", "sms", "AX-SBI")
+            )
+
+        assert router.create.call_count == 1
+        assert all(r["category"] == "kyc_freeze" for r in results)
+        # Each caller gets its own copy of the shared verdict.
+        results[0]["red_flags"].append("mutated")
+        assert results[1]["red_flags"] == ["otp"]
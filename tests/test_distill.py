@@ -0,0 +1,185 @@
+"""Tests for the distilled local classifier, its verdict log and the classify cascade."""
+
+import json
+import os
+import random
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import distill, metrics
+from fraudshield.distill import DistilledModel, ShadowStats, VerdictLog, featurize, read_log, train
+
+TEMPLATES = {
+    "fake_cashback": ["Google Pay se aapko Rs.{n} cashback mila hai. Approve karein: cash{n}@ybl",
+                      "Refund of Rs.{n} pending. Approve the collect request to receive it"],
+    "digital_arrest": ["CBI officer here. Case {n} filed against you. Transfer Rs.{n} or face arrest",
+                       "Mumbai police: your Aadhaar is linked to case {n}. Stay on video call or be arrested"],
+    "kyc_freeze": ["Your SBI KYC expired. Update within 24 hours: bit.ly/kyc{n}",
+                   "Dear customer your account will be frozen, complete KYC now {n}"],
+    "job_scam": ["Earn Rs.{n} daily by liking videos! Pay Rs.999 deposit: task{n}@ybl",
+                 "Part time job offer, work from home, registration fee Rs.{n}"],
+    "lottery_scam": ["Congratulations! You won Rs.{n} lakh in KBC lottery. Pay processing fee",
+                     "Your number won a prize of Rs.{n} in lucky draw, claim by paying tax"],
+    "govt_impersonation": ["Your vehicle e-challan of Rs.{n} is pending. Pay at echallan-gov{n}.in",
+                           "Income tax notice: refund Rs.{n} blocked, verify PAN at itr-refund{n}.in"],
+    "phishing_link": ["Your parcel is on hold. Reschedule delivery: track-{n}.xyz/in",
+                      "Netflix payment failed, update card at netflx-{n}.com"],
+    "legitimate": ["Hey, dinner at 8pm tonight? I owe you Rs.{n}",
+                   "Mom, reached office. Will call at lunch {n}"],
+}
+
+
+def corpus(per_category=60, seed=1):
+    rng = random.Random(seed)
+    texts, labels = [], []
+    for category, templates in TEMPLATES.items():
+        for _ in range(per_category):
+            texts.append(rng.choice(templates).format(n=rng.randint(100, 99999)))
+            labels.append(category)
+    return texts, labels
+
+
+@pytest.fixture(scope="module")
+def model():
+    texts, labels = corpus()
+    return train(texts, labels, dim=1 << 12, epochs=15)
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    metrics.reset()
+
+
+class TestModel:
+    def test_features_are_stable_and_normalized(self):
+        indices, values = featurize("Your KYC expired", 1 << 10)
+        again, _ = featurize("your   KYC expired", 1 << 10)
+        assert sorted(indices) == sorted(again)
+        assert indices.max() < 1 << 10
+        assert float((values ** 2).sum()) == pytest.approx(1.0, rel=1e-5)
+
+    def test_learns_categories_and_picks_a_threshold(self, model):
+        holdout = model.meta["holdout"]
+        assert holdout["agreement"] >= 0.95
+        assert 0 < model.threshold <= 1.0
+        assert holdout["local_share"] > 0.5
+        category, confidence = model.predict("CBI officer here. Case 4242 filed against you. Transfer Rs.5000 or face arrest")
+        assert category == "digital_arrest"
+        assert confidence >= model.threshold
+
+    def test_training_densifies_one_batch_at_a_time(self):
+        texts, labels = corpus(per_category=20)
+        real = distill._dense
+        with patch.object(distill, "_dense", side_effect=real) as dense:
+            train(texts, labels, dim=1 << 10, epochs=2, batch=32)
+        assert max(len(c.args[0]) for c in dense.call_args_list) <= 32
+
+    def test_round_trip_is_small_and_fast(self, model, tmp_path):
+        path = str(tmp_path / "distilled.npz")
+        model.save(path)
+        t0 = time.perf_counter()
+        loaded = DistilledModel.load(path)
+        assert (time.perf_counter() - t0) < 0.5
+        assert os.path.getsize(path) < 200 * 1024
+        assert loaded.version == model.version
+        message = "Earn Rs.5000 daily by liking videos! Pay Rs.999 deposit: task1@ybl"
+        assert loaded.predict(message)[0] == model.predict(message)[0] == "job_scam"
+
+    def test_missing_or_corrupt_artifact_loads_as_none(self, tmp_path):
+        assert DistilledModel.load(str(tmp_path / "none.npz")) is None
+        bad = tmp_path / "bad.npz"
+        bad.write_bytes(b"not a model")
+        assert DistilledModel.load(str(bad)) is None
+
+    def test_local_verdict_shape(self, model):
+        verdict = model.verdict("Hey, dinner at 8pm tonight? I owe you Rs.300")
+        assert verdict["is_scam"] is False
+        assert verdict["tier"] == "distilled"
+        assert verdict["model_version"] == model.version
+
+
+class TestVerdictLog:
+    def test_logs_model_verdicts_only_and_latest_wins(self, tmp_path):
+        log = VerdictLog(str(tmp_path / "v.ndjson"))
+        log.append("Your  KYC expired", {"category": "kyc_freeze", "confidence": 0.7})
+        log.append("your kyc EXPIRED", {"category": "phishing_link", "confidence": 0.9})
+        log.append("Dinner?", {"category": "legitimate", "confidence": 0.6, "tier": "rules"})
+        log.append("Garbage", {"category": "not_a_category", "confidence": 0.9})
+        texts, labels, weights = read_log([log.path])
+        assert texts == ["your kyc expired"]
+        assert labels == ["phishing_link"] and weights == [0.9]
+
+    def test_rolls_over(self, tmp_path):
+        log = VerdictLog(str(tmp_path / "v.ndjson"), max_bytes=100)
+        for i in range(5):
+            log.append(f"message {i}", {"category": "legitimate", "confidence": 0.9})
+        assert os.path.exists(log.path + ".1")
+        assert os.path.getsize(log.path) <= 200
+
+    def test_logging_is_opt_in(self, tmp_path):
+        with patch.dict(os.environ, {"FRAUDSHIELD_DISTILL_LOG": ""}):
+            assert VerdictLog.from_env() is None
+        with patch.dict(os.environ, {"FRAUDSHIELD_DISTILL_LOG": str(tmp_path / "v.ndjson")}):
+            assert VerdictLog.from_env().path == str(tmp_path / "v.ndjson")
+        detector = MagicMock()
+        detector.model_verdict.return_value = {"is_scam": False, "category": "legitimate", "confidence": 0.9}
+        with patch.object(function_app, "_verdict_log", None), patch.object(function_app, "_detector", detector):
+            assert function_app._classify_with_model("Dinner at 8?", "sms", "unknown")["category"] == "legitimate"
+        assert metrics.counter("distill.logged") == 0
+
+
+class TestShadowStats:
+    def test_agreement_and_calls_saved(self):
+        shadow = ShadowStats()
+        shadow.record("kyc_freeze", 0.95, 0.9, "kyc_freeze")
+        shadow.record("job_scam", 0.95, 0.9, "lottery_scam")
+        shadow.record("legitimate", 0.5, 0.9, "legitimate")
+        shadow.record("legitimate", 0.99, 0.9, "legitimate")
+        assert shadow.summary() == {"calls": 4, "agreement": 0.75, "calls_saved": 0.75, "saved_agreement": 0.6667}
+        assert metrics.gauge("distill.shadow.calls_saved") == 0.75
+
+
+class TestCascade:
+    def _model_verdict(self, category="kyc_freeze"):
+        return {"is_scam": True, "category": category, "confidence": 0.9, "risk_level": "high",
+                "explanation_en": "", "explanation_hi": "", "red_flags": []}
+
+    def test_confident_local_answer_skips_the_model(self, model):
+        detector = MagicMock()
+        with patch.object(function_app, "_distilled", model), patch.object(function_app, "_DISTILL_MODE", "cascade"), \
+                patch.object(function_app, "_detector", detector):
+            result = function_app.classify_message("Your SBI KYC expired. Update within 24 hours: bit.ly/kyc77", "sms")
+        detector.model_verdict.assert_not_called()
+        assert result["tier"] == "distilled" and result["category"] == "kyc_freeze"
+        assert metrics.counter("distill.cascade.local") == 1
+
+    def test_unsure_local_answer_escalates(self, model, tmp_path):
+        detector = MagicMock()
+        detector.model_verdict.return_value = self._model_verdict("phishing_link")
+        unsure = DistilledModel(model.weights, model.bias, dict(model.meta, threshold=1.01))
+        with patch.object(function_app, "_distilled", unsure), patch.object(function_app, "_DISTILL_MODE", "cascade"), \
+                patch.object(function_app, "_detector", detector), \
+                patch.object(function_app, "_verdict_log", VerdictLog(str(tmp_path / "v.ndjson"))):
+            result = function_app.classify_message("Reset your bank password at secure-login.xyz", "sms")
+        assert result["category"] == "phishing_link" and "tier" not in result
+        assert metrics.counter("distill.cascade.escalated") == 1
+
+    def test_shadow_mode_calls_the_model_and_logs(self, model, tmp_path):
+        detector = MagicMock()
+        detector.model_verdict.return_value = self._model_verdict()
+        log = VerdictLog(str(tmp_path / "v.ndjson"))
+        with patch.object(function_app, "_distilled", model), patch.object(function_app, "_DISTILL_MODE", "shadow"), \
+                patch.object(function_app, "_detector", detector), patch.object(function_app, "_verdict_log", log), \
+                patch.object(function_app, "_shadow", ShadowStats()) as shadow:
+            result = function_app.classify_message("Your SBI KYC expired. Update within 24 hours: bit.ly/kyc78", "sms")
+        detector.model_verdict.assert_called_once()
+        assert "tier" not in result
+        assert shadow.summary()["agreement"] == 1.0
+        with open(log.path, encoding="utf-8") as f:
+            assert json.loads(f.readline())["category"] == "kyc_freeze"
@@ -0,0 +1,96 @@
+"""Tests for response content negotiation (fraudshield.encoding) on /api/classify."""
+
+import gzip
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import azure.functions as func
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import encoding, metrics
+
+VERDICT = {"is_scam": True, "category": "kyc_freeze", "confidence": 0.93, "risk_level": "high",
+           "explanation_en": "Banks never ask for your PIN by SMS. " * 20,
+           "explanation_hi": "बैंक SMS पर PIN नहीं माँगते। " * 20, "red_flags": ["asks for UPI PIN"],
+           "message": "Your SBI KYC expired", "source": "sms", "sender": "VM-SBIKYC", "verdict_id": "abc"}
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    metrics.reset()
+
+
+class TestNegotiation:
+    @pytest.mark.parametrize("header, expected", [
+        (None, "identity"),
+        ("gzip, deflate", "gzip"),
+        ("identity", "identity"),
+        ("gzip;q=0", "identity"),
+        ("*", "gzip"),
+        ("*, gzip;q=0", "identity"),
+        ("deflate, gzip;q=0.5", "gzip"),
+    ])
+    def test_content_encoding(self, header, expected):
+        with patch.object(encoding, "brotli", None):
+            assert encoding.content_encoding(header) == expected
+
+    def test_brotli_preferred_when_installed(self):
+        with patch.object(encoding, "brotli", MagicMock()):
+            assert encoding.content_encoding("gzip;q=0.8, br") == "br"
+
+    def test_msgpack_falls_back_to_json_when_missing(self):
+        with patch.object(encoding, "msgpack", None):
+            assert encoding.media_type("application/msgpack") == encoding.JSON
+        with patch.object(encoding, "msgpack", MagicMock()):
+            assert encoding.media_type("application/x-msgpack, application/json;q=0.5") == encoding.MSGPACK
+            assert encoding.media_type("application/json, application/msgpack;q=0.5") == encoding.JSON
+
+    def test_msgpack_round_trip(self):
+        msgpack = pytest.importorskip("msgpack")
+        body, headers = encoding.encode(VERDICT, accept="application/msgpack")
+        assert headers["Content-Type"] == encoding.MSGPACK
+        assert msgpack.unpackb(body) == VERDICT
+
+
+class TestEncode:
+    def test_small_bodies_are_not_compressed(self):
+        body, headers = encoding.encode({"ok": True}, accept_encoding="gzip")
+        assert "Content-Encoding" not in headers
+        assert json.loads(body) == {"ok": True}
+
+    def test_gzip_keeps_utf8(self):
+        body, headers = encoding.encode(VERDICT, accept_encoding="gzip")
+        assert headers["Content-Encoding"] == "gzip" and "Accept-Encoding" in headers["Vary"]
+        plain = gzip.decompress(body)
+        assert "माँगते".encode() in plain
+        assert json.loads(plain) == VERDICT
+        assert metrics.counter("response.bytes") == len(body) < metrics.counter("response.raw_bytes")
+
+    def test_dumps_without_orjson_matches(self):
+        with patch.object(encoding, "orjson", None):
+            assert json.loads(encoding.dumps(VERDICT)) == VERDICT
+
+    def test_select(self):
+        assert encoding.select(VERDICT, "is_scam, category") == {"is_scam": True, "category": "kyc_freeze",
+                                                                 "verdict_id": "abc"}
+        assert not set(encoding.ECHO_FIELDS) & set(encoding.select(VERDICT, echo=False))
+        assert encoding.select(VERDICT) == VERDICT
+
+
+def test_classify_route_negotiates():
+    request = func.HttpRequest(
+        method="POST", url="/api/classify", headers={"Accept-Encoding": "gzip"},
+        body=json.dumps({"message": "Your SBI KYC expired", "echo": False,
+                         "fields": ["is_scam", "category", "explanation_hi", "message"]}).encode())
+    with patch.object(function_app, "classify_message", return_value=dict(VERDICT)), \
+            patch.object(function_app, "_remember", return_value="abc"):
+        resp = function_app.classify(request)
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "gzip"
+    body = json.loads(gzip.decompress(resp.get_body()))
+    assert set(body) == {"is_scam", "category", "explanation_hi", "verdict_id"}
@@ -0,0 +1,133 @@
+"""Tests for response profiles on /api/classify and lazy explanations from /api/explain."""
+
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics, prompting
+from fraudshield.cache import VerdictCache
+from fraudshield.campaigns import CampaignIndex
+from fraudshield.classifier import DetectionClassifier
+from fraudshield.limiter import Overloaded
+from fraudshield.parsing import parse_verdict
+
+CORE = {"is_scam": True, "category": "kyc_freeze", "confidence": 0.93, "risk_level": "high"}
+# Below FRAUDSHIELD_TEMPLATE_MIN_CONFIDENCE, so the explanation is left to the model.
+UNSURE = {**CORE, "confidence": 0.62, "risk_level": "medium"}
+EXPLANATION = {"explanation_en": "Banks never ask for your PIN by SMS.", "explanation_hi": "बैंक SMS पर PIN नहीं माँगते।",
+               "red_flags": ["asks for UPI PIN", "short link"]}
+MESSAGE = "Your SBI KYC expired. Share UPI PIN to avoid block: bit.ly/kyc-sbi"
+
+
+def _request(body):
+    req = MagicMock()
+    req.method = "POST"
+    req.get_json.return_value = body
+    return req
+
+
+def _response(content: dict):
+    response = MagicMock()
+    response.choices[0].message.content = json.dumps(content, ensure_ascii=False)
+    response.usage.prompt_tokens = 120
+    response.usage.completion_tokens = 30
+    return response
+
+
+@pytest.fixture(autouse=True)
+def _isolated():
+    metrics.reset()
+    create = MagicMock()
+    with patch.object(function_app, "_detector", DetectionClassifier(create)), \
+            patch.object(function_app, "_verdict_store", VerdictCache(name="verdict_store")), \
+            patch.object(function_app, "_distilled", None), \
+            patch.object(function_app, "_campaigns", CampaignIndex()), \
+            patch.object(function_app, "_template_verdicts", VerdictCache(name="template_cache")), \
+            patch.object(function_app, "_reputation", MagicMock(assess=MagicMock(return_value=[]))):
+        yield create
+
+
+class TestProfiles:
+    def test_verdict_profile_asks_for_core_fields_only(self, _isolated):
+        _isolated.return_value = _response(UNSURE)
+        resp = function_app.classify(_request({"message": MESSAGE, "profile": "verdict"}))
+        body = json.loads(resp.get_body())
+        assert resp.status_code == 200
+        kwargs = _isolated.call_args.kwargs
+        assert kwargs["messages"][0]["content"] == prompting.SYSTEM_PROMPT_VERDICT
+        assert set(kwargs["response_format"]["json_schema"]["schema"]["required"]) == set(CORE)
+        assert "explanation_en" not in body and "red_flags" not in body
+        assert body["verdict_id"]
+
+    def test_confident_verdict_profile_is_templated(self, _isolated):
+        _isolated.return_value = _response(CORE)
+        body = json.loads(function_app.classify(_request({"message": MESSAGE, "profile": "verdict"})).get_body())
+        assert body["explanation_source"] == "template"
+        assert "SBI" in body["explanation_en"] and body["explanation_hi"] and body["explanation_hinglish"]
+        assert "link to bit.ly" in body["red_flags"]
+        resp = function_app.explain(_request({"verdict_id": body["verdict_id"]}))
+        assert json.loads(resp.get_body())["explanation_en"] == body["explanation_en"]
+        assert _isolated.call_count == 1
+
+    def test_explain_hi_profile(self):
+        verdict, errors = parse_verdict(json.dumps({**CORE, "explanation_hi": "धोखा", "red_flags": []}), "explain_hi")
+        assert errors == []
+        assert "explanation_en" not in verdict
+
+    def test_profile_prompts_shrink(self):
+        sizes = [prompting.build_messages("hi", variant=p)[1]["prompt_tokens"] for p in prompting.PROFILES]
+        assert sizes == sorted(sizes)
+
+    def test_unknown_profile_is_rejected(self):
+        resp = function_app.classify(_request({"message": MESSAGE, "profile": "tiny"}))
+        assert resp.status_code == 400
+
+
+class TestExplain:
+    def test_generates_once_then_serves_stored(self, _isolated):
+        _isolated.side_effect = [_response(UNSURE), _response(EXPLANATION)]
+        classified = json.loads(function_app.classify(_request({"message": MESSAGE, "profile": "verdict"})).get_body())
+
+        first = function_app.explain(_request({"verdict_id": classified["verdict_id"]}))
+        second = function_app.explain(_request({"verdict_id": classified["verdict_id"]}))
+        body = json.loads(first.get_body())
+        assert first.status_code == second.status_code == 200
+        assert body["explanation_hi"] == EXPLANATION["explanation_hi"]
+        assert body["category"] == "kyc_freeze" and body["helpline"] == "1930"
+        assert json.loads(second.get_body()) == body
+        assert _isolated.call_count == 2
+        explain_call = _isolated.call_args_list[1].kwargs["messages"]
+        assert explain_call[0]["content"] == prompting.EXPLAIN_PROMPT
+        assert "category kyc_freeze" in explain_call[1]["content"]
+        assert metrics.counter("explain.generated") == 1 and metrics.counter("explain.stored") == 1
+
+    def test_full_profile_verdict_needs_no_model_call(self, _isolated):
+        _isolated.return_value = _response({**CORE, **EXPLANATION})
+        classified = json.loads(function_app.classify(_request({"message": MESSAGE})).get_body())
+        resp = function_app.explain(_request({"verdict_id": classified["verdict_id"]}))
+        assert json.loads(resp.get_body())["explanation_en"] == EXPLANATION["explanation_en"]
+        assert _isolated.call_count == 1
+
+    def test_unknown_id_needs_the_message(self, _isolated):
+        assert function_app.explain(_request({"verdict_id": "gone"})).status_code == 404
+        _isolated.side_effect = [_response(UNSURE), _response(EXPLANATION)]
+        resp = function_app.explain(_request({"verdict_id": "gone", "message": MESSAGE}))
+        assert resp.status_code == 200
+        assert metrics.counter("explain.reclassified") == 1
+
+    def test_missing_fields(self):
+        assert function_app.explain(_request({})).status_code == 400
+
+    def test_canned_explanation_when_model_sheds(self):
+        def shed(**kwargs):
+            raise Overloaded("queue full")
+
+        explanation = DetectionClassifier(shed).explain(MESSAGE, CORE)
+        assert explanation["tier"] == "rules"
+        assert "KYC" in explanation["explanation_en"]
@@ -0,0 +1,152 @@
+"""Tests for the SSE delta feed behind /api/reports/stream."""
+
+import json
+import os
+import threading
+from unittest.mock import patch
+
+import azure.functions as func
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics
+from fraudshield.feed import HEARTBEAT, DeltaLog
+from fraudshield.reports import ReportAggregator
+
+
+def _events(body: bytes) -> list:
+    """Parse an SSE body into (event, id, data) tuples."""
+    out = []
+    for block in body.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in fields:
+            out.append((fields["event"], fields.get("id"), json.loads(fields["data"])))
+    return out
+
+
+def _wired(size=2048):
+    agg = ReportAggregator()
+    log = DeltaLog(size=size, retry_ms=3000, epoch=agg.epoch)
+    agg.listeners.append(log.append)
+    return agg, log
+
+
+def _scam(city="Mumbai", category="kyc_freeze"):
+    return {"is_scam": True, "category": category, "city": city}
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    metrics.reset()
+
+
+class TestDeltas:
+    def test_delta_carries_increment_and_new_city_total(self):
+        agg, log = _wired()
+        agg.ingest(_scam())
+        agg.ingest(_scam(category="job_scam"))
+        agg.ingest(_scam(category="job_scam"))
+        (_, event_id, last), = _events(log.stream(0))
+        assert event_id == f"{agg.epoch}-3"
+        assert last == {"seq": 3, "city": "Mumbai", "state": "Maharashtra", "category": "job_scam",
+                        "inc": 1, "total": 3, "reports": 3, "topScam": "job_scam",
+                        "lat": 19.076, "lng": 72.8777}
+
+    def test_reconnect_gets_newest_frame_per_city(self):
+        agg, log = _wired()
+        for city in ("Mumbai", "Pune", "Mumbai", "Delhi", "Pune"):
+            agg.ingest(_scam(city))
+        deltas = [d for _, _, d in _events(log.stream(0))]
+        assert [(d["seq"], d["city"], d["reports"]) for d in deltas] == [(3, "Mumbai", 2), (4, "Delhi", 1),
+                                                                        (5, "Pune", 2)]
+
+    def test_state_only_deltas_are_kept_per_state(self):
+        agg, log = _wired()
+        for state in ("Kerala", "Assam", "Kerala"):
+            agg.ingest({"is_scam": True, "category": "kyc_freeze", "state": state})
+        deltas = [d for _, _, d in _events(log.stream(0))]
+        assert [(d["seq"], d["state"], d["city"]) for d in deltas] == [(2, "Assam", None), (3, "Kerala", None)]
+
+    def test_stream_returns_only_newer_frames(self):
+        agg, log = _wired()
+        for city in ("Mumbai", "Pune", "Delhi"):
+            agg.ingest(_scam(city))
+        body = log.stream(f"{agg.epoch}-2")
+        assert body.startswith(b"retry: 3000\n\n")
+        assert [d["city"] for _, _, d in _events(body)] == ["Delhi"]
+        assert _events(log.stream(f"{agg.epoch}-3")) == []
+
+    def test_frames_are_encoded_once(self):
+        agg, log = _wired()
+        agg.ingest(_scam())
+        assert log.stream(0) == log.stream(0)
+        with patch("fraudshield.feed.encode_frame", side_effect=AssertionError("re-encoded")):
+            for _ in range(100):
+                log.stream(0)
+
+    @pytest.mark.parametrize("last_event_id", [None, "garbage", "4", "{epoch}-1", "{epoch}-99", "0a1b2c3d-4"])
+    def test_resync_when_client_cannot_catch_up(self, last_event_id):
+        agg, log = _wired(size=2)
+        for _ in range(4):
+            agg.ingest(_scam())
+        last_event_id = last_event_id and last_event_id.format(epoch=agg.epoch)
+        (event, event_id, data), = _events(log.stream(last_event_id))
+        assert event == "resync"
+        assert data == {"version": 4, "epoch": agg.epoch}
+        assert event_id == f"{agg.epoch}-4"
+        assert metrics.counter("feed.resyncs") == 1
+
+    def test_reconnect_after_a_resync_carries_on(self):
+        # A client from another instance resyncs once, then reconnects with the resync event's ID.
+        agg, log = _wired()
+        agg.ingest(_scam("Pune"))
+        (_, event_id, _), = _events(log.stream("ffffffff-1"))
+        agg.ingest(_scam("Delhi"))
+        assert [(e, d["city"]) for e, _, d in _events(log.stream(event_id))] == [("delta", "Delhi")]
+        assert metrics.counter("feed.resyncs") == 1
+
+    def test_empty_log_with_fresh_client(self):
+        assert _events(DeltaLog().stream("0")) == []
+
+
+class TestFollow:
+    def test_holds_open_and_sends_new_frames_as_they_arrive(self):
+        agg, log = _wired()
+        agg.ingest(_scam("Pune"))
+        chunks = log.follow("0", heartbeat=5)
+        assert [d["city"] for _, _, d in _events(next(chunks))] == ["Pune"]
+        threading.Timer(0.05, agg.ingest, args=(_scam("Delhi"),)).start()
+        assert [(e, d["city"]) for e, _, d in _events(next(chunks))] == [("delta", "Delhi")]
+        assert metrics.counter("feed.polls") == 0
+
+    def test_heartbeat_while_idle_and_close_ends_it(self):
+        log = DeltaLog()
+        chunks = log.follow("0", heartbeat=0.01)
+        next(chunks)
+        assert next(chunks) == HEARTBEAT
+        log.close()
+        assert list(chunks) == []
+
+    def test_resync_ends_the_stream(self):
+        chunks = DeltaLog().follow("garbage")
+        assert [e for e, _, _ in _events(next(chunks))] == ["resync"]
+        assert list(chunks) == []
+
+
+class TestStreamEndpoint:
+    def test_uses_last_event_id_header(self):
+        agg, log = _wired()
+        with patch.object(function_app, "_reports", agg), patch.object(function_app, "_feed", log):
+            agg.ingest(_scam("Pune"))
+            agg.ingest(_scam("Delhi"))
+            req = func.HttpRequest(method="GET", url="/api/reports/stream", headers={"Last-Event-ID": f"{agg.epoch}-1"},
+                                   params={"since": "0"}, body=b"")
+            resp = function_app.reports_stream(req)
+        assert resp.headers["Content-Type"] == "text/event-stream"
+        assert [d["city"] for _, _, d in _events(resp.get_body())] == ["Delhi"]
+
+    def test_module_aggregator_feeds_the_log(self):
+        assert function_app._feed.append in function_app._reports.listeners
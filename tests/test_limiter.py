@@ -0,0 +1,190 @@
+"""Tests for the adaptive concurrency limiter, circuit breaker and rule fallback."""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics
+from fraudshield.limiter import (
+    CLOSED, HALF_OPEN, OPEN, AdaptiveLimiter, CircuitBreaker, CircuitOpen, ModelGuard, Overloaded,
+)
+from fraudshield.rules import rule_verdict
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    metrics.reset()
+
+
+class TestAdaptiveLimiter:
+    def test_additive_increase_on_fast_success(self):
+        limiter = AdaptiveLimiter("l", initial=4)
+        limiter.acquire()
+        limiter.release(100)
+        assert limiter.limit == pytest.approx(4.25)
+
+    def test_multiplicative_decrease_on_429(self):
+        limiter = AdaptiveLimiter("l", initial=10, backoff=0.5)
+        limiter.acquire()
+        limiter.release(100, throttled=True)
+        assert limiter.limit == 5
+
+    def test_decrease_on_slow_call_and_floor(self):
+        limiter = AdaptiveLimiter("l", initial=1.5, min_limit=1, target_latency_ms=50, backoff=0.5)
+        limiter.acquire()
+        limiter.release(500)
+        assert limiter.limit == 1
+
+    def test_sheds_when_queue_full(self):
+        limiter = AdaptiveLimiter("l", initial=1, max_queue=0)
+        limiter.acquire()
+        with pytest.raises(Overloaded):
+            limiter.acquire()
+        assert metrics.counter("l.shed.queue_full") == 1
+
+    def test_sheds_after_deadline(self):
+        limiter = AdaptiveLimiter("l", initial=1, max_queue=5, queue_timeout=0.05)
+        limiter.acquire()
+        t0 = time.monotonic()
+        with pytest.raises(Overloaded):
+            limiter.acquire()
+        assert time.monotonic() - t0 < 1
+        assert metrics.counter("l.shed.deadline") == 1
+        assert metrics.gauge("l.queue_depth") == 0
+
+    def test_waiter_proceeds_when_slot_frees(self):
+        limiter = AdaptiveLimiter("l", initial=1, queue_timeout=2)
+        limiter.acquire()
+        threading.Timer(0.05, lambda: limiter.release(10)).start()
+        limiter.acquire()
+        assert limiter.in_flight == 1
+
+    def test_never_exceeds_limit(self):
+        limiter = AdaptiveLimiter("l", initial=3, max_limit=3, queue_timeout=5)
+        peak = []
+        lock = threading.Lock()
+        active = [0]
+
+        def work():
+            limiter.acquire()
+            with lock:
+                active[0] += 1
+                peak.append(active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            limiter.release(20)
+
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            list(pool.map(lambda _: work(), range(24)))
+        assert max(peak) <= 3
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker("b", failure_threshold=3)
+        for _ in range(3):
+            breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.allow() is False
+
+    def test_half_open_allows_single_probe(self):
+        breaker = CircuitBreaker("b", failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow() is True
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow() is False
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker("b", failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+
+
+class TestModelGuard:
+    def _guard(self, **kw):
+        return ModelGuard(AdaptiveLimiter("l", initial=4), CircuitBreaker("b", failure_threshold=2, **kw))
+
+    def test_passes_through_result(self):
+        assert self._guard().call(lambda x: x * 2, 21) == 42
+
+    def test_server_errors_open_circuit(self):
+        guard = self._guard()
+        for _ in range(2):
+            with pytest.raises(_StatusError):
+                guard.call(self._raise, 503)
+        with pytest.raises(CircuitOpen):
+            guard.call(lambda: "never")
+        assert metrics.counter("b.rejected") == 1
+
+    def test_client_errors_do_not_open_circuit(self):
+        guard = self._guard()
+        for _ in range(3):
+            with pytest.raises(_StatusError):
+                guard.call(self._raise, 400)
+        assert guard.breaker.state == CLOSED
+
+    def test_throttling_shrinks_limit(self):
+        guard = self._guard()
+        with pytest.raises(_StatusError):
+            guard.call(self._raise, 429)
+        assert guard.limiter.limit < 4
+
+    @staticmethod
+    def _raise(status):
+        raise _StatusError(status)
+
+
+class TestRuleVerdict:
+    @pytest.mark.parametrize("message, category", [
+        ("Google Pay se aapko Rs.1500 cashback mila hai. Approve karein: cashback@ybl", "fake_cashback"),
+        ("CBI officer here. Transfer Rs.50,000 or face arrest.", "digital_arrest"),
+        ("Your SBI KYC expired. Update: bit.ly/sbi-kyc", "kyc_freeze"),
+        ("Earn Rs.15,000 daily! Pay Rs.999 deposit: taskpay.earn@ybl", "job_scam"),
+        ("Badhai ho! Aapne KBC me Rs.25 lakh jeete hain. Fee Rs.5,000 bhejein.", "lottery_scam"),
+        ("Overspeeding Notice: Pay dues immediately. https://echallane.vip/in", "govt_impersonation"),
+    ])
+    def test_flags_known_patterns(self, message, category):
+        verdict = rule_verdict(message)
+        assert verdict["is_scam"] is True
+        assert verdict["category"] == category
+        assert verdict["tier"] == "rules"
+
+    def test_benign_message_is_legitimate(self):
+        verdict = rule_verdict("Hey, dinner at 8pm tonight? Send me Rs.300.")
+        assert verdict["is_scam"] is False
+        assert verdict["category"] == "legitimate"
+        assert verdict["red_flags"] == []
+
+
+class TestClassifyFallback:
+    def test_open_circuit_returns_rule_verdict_without_model_call(self):
+        guard = ModelGuard(AdaptiveLimiter("l"), CircuitBreaker("b", failure_threshold=1))
+        guard.breaker.record_failure()
+        with patch.object(function_app, "_model_guard", guard), \
+             patch.object(function_app, "_get_router") as router:
+            result = function_app.classify_message("CBI officer here. Transfer Rs.50,000 or face arrest.")
+        router.return_value.create.assert_not_called()
+        assert result["tier"] == "rules"
+        assert result["category"] == "digital_arrest"
+        assert metrics.counter("classify.rule_fallback") == 1
@@ -0,0 +1,127 @@
+"""Tests for look-alike domain and VPA detection."""
+
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics
+from fraudshield.entities import extract_entities
+from fraudshield.lookalike import STRONG, WEAK, DeletionIndex, LookalikeIndex, fold, levenshtein
+
+INDEX = LookalikeIndex()
+
+
+def _match(kind, value):
+    return [(m.brand, m.strength) for m in INDEX.match(kind, value)]
+
+
+@pytest.mark.parametrize("domain, brand", [
+    ("echallane.vip", "e-Challan (Parivahan)"),          # name + extra letter under a scam TLD
+    ("hdfcb4nk.in", "HDFC Bank"),                         # digit substitution
+    ("paytrn-cashback.com", "Paytm"),                     # rn for m
+    ("ph0npe-reward.in", "PhonePe"),                      # one edit and a digit
+    ("phonpe-reward.vip", "PhonePe"),                     # one edit under a scam TLD
+    ("xn--pytm-5qa.com", "Paytm"),                        # punycode
+    ("ѕbi-verify.com", "SBI"),                            # Cyrillic s
+    ("5bi.co", "SBI"),
+])
+def test_disguised_domains_are_strong(domain, brand):
+    assert _match("domain", domain)[0] == (brand, STRONG)
+
+
+@pytest.mark.parametrize("domain", ["sbi.co.in", "onlinesbi.sbi", "echallan.parivahan.gov.in", "sbicard.com",
+                                    "flipkart.com", "bit.ly", "hello.com", "mybank.com", "nic.in"])
+def test_official_and_unrelated_domains_do_not_match(domain):
+    assert _match("domain", domain) == []
+
+
+@pytest.mark.parametrize("domain, brand", [
+    ("kodak.com", "Kotak Mahindra Bank"), ("paytv.com", "Paytm"), ("filing.com", "Income Tax Department"),
+    ("phoneme.com", "PhonePe"), ("airtex.in", "Airtel"), ("my-custom.com", "Customs (CBIC)"),
+])
+def test_near_misses_alone_are_weak(domain, brand):
+    assert _match("domain", domain) == [(brand, WEAK)]
+
+
+def test_near_miss_is_strong_when_the_message_names_the_brand():
+    assert INDEX.match("domain", "phonpe-reward.in")[0].strength == WEAK
+    assert INDEX.match("domain", "phonpe-reward.in", "PhonePe cashback: claim at phonpe-reward.in")[0].strength == STRONG
+
+
+def test_plain_brand_in_domain_is_weak():
+    assert _match("domain", "sbi-kyc-update.in") == [("SBI", WEAK)]
+
+
+def test_vpas():
+    assert _match("vpa", "sbikyc.update@ybl") == [("SBI", WEAK)]
+    assert _match("vpa", "rahul.sharma@okhdfcbank") == []     # the PSP handle is not checked
+
+
+def test_fold():
+    assert fold("ｐａｙｔｍ") == "paytm"
+    assert fold("аmazоn") == "amazon"
+
+
+def test_deletion_index_matches_brute_force():
+    words = ["paytm", "phonepe", "echallan", "flipkart", "amazon", "airtel", "icici", "hdfcbank"]
+    index = DeletionIndex(words)
+    for query in ["paytn", "phonpe", "echallane", "flipcart", "amzaon", "zzzzzz", "pyatm"]:
+        for radius in (1, 2):
+            expected = sorted((levenshtein(query, w), w) for w in words if levenshtein(query, w) <= radius)
+            assert index.search(query, radius) == expected
+
+
+def test_scan_is_fast():
+    entities = extract_entities("Pay now https://echallane.vip/pay or sbikyc.update@ybl, see hdfcb4nk.in")
+    INDEX.scan(entities)
+    t0 = time.perf_counter()
+    for _ in range(200):
+        INDEX.scan(entities)
+    assert (time.perf_counter() - t0) / 200 < 0.001
+
+
+class TestClassify:
+    @pytest.fixture(autouse=True)
+    def _isolated(self):
+        metrics.reset()
+        with patch.object(function_app, "_reputation", MagicMock(assess=MagicMock(return_value=[]))), \
+                patch.object(function_app, "_distilled", None):
+            yield
+
+    def test_strong_lookalike_skips_the_model(self):
+        with patch.object(function_app, "_classify_with_model") as model:
+            result = function_app.classify_message("Pending e-challan. Pay at https://echallane.vip/pay")
+        model.assert_not_called()
+        assert result["tier"] == "lookalike" and result["category"] == "govt_impersonation"
+        assert "website echallane.vip imitates e-Challan (Parivahan)" in result["red_flags"]
+        assert result["explanation_hinglish"]
+        assert metrics.counter("classify.lookalike_fast_path") == 1
+
+    def test_weak_lookalike_is_a_red_flag_on_the_model_verdict(self):
+        verdict = {"is_scam": True, "category": "kyc_freeze", "confidence": 0.7, "risk_level": "medium",
+                   "explanation_en": "x", "explanation_hi": "y", "red_flags": ["asks for PIN"]}
+        with patch.object(function_app, "_classify_with_model", return_value=verdict):
+            result = function_app.classify_message("Send PIN to sbikyc.update@ybl")
+        assert result["red_flags"] == ["asks for PIN", "UPI ID sbikyc.update@ybl imitates SBI"]
+        assert verdict["red_flags"] == ["asks for PIN"]
+
+    def test_brand_with_a_near_miss_name_asks_the_model(self):
+        verdict = {"is_scam": False, "category": "legitimate", "confidence": 0.9, "risk_level": "low",
+                   "explanation_en": "x", "explanation_hi": "y", "red_flags": []}
+        with patch.object(function_app, "_classify_with_model", return_value=verdict) as model:
+            result = function_app.classify_message("Your Kodak photo prints are ready. "
+                                                   "Track at https://kodak.com/orders/123")
+        model.assert_called_once()
+        assert result["category"] == "legitimate" and "tier" not in result
+
+    def test_fast_path_can_be_disabled(self):
+        with patch.object(function_app, "_LOOKALIKE_FAST_PATH", False), \
+                patch.object(function_app, "_classify_with_model", return_value={"is_scam": True}) as model:
+            function_app.classify_message("Pay at https://echallane.vip/pay")
+        model.assert_called_once()
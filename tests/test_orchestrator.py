@@ -0,0 +1,107 @@
+"""Tests for the staged batch pipeline in pipeline/orchestrator.py."""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from pipeline import orchestrator
+from pipeline.orchestrator import Pipeline
+
+
+def _detect(item):
+    item["result"] = {"is_scam": "scam" in item["message"], "category": "job_scam", "confidence": 0.9,
+                      "risk_level": "high", "red_flags": ["deposit"]}
+    return item
+
+
+def _stages(detect=_detect, investigate=lambda item: item, workers=2):
+    return [("detection", detect, workers), ("investigation", investigate, workers),
+            ("response", orchestrator.respond, 1)]
+
+
+class TestPipeline:
+    def test_every_message_comes_out_once(self):
+        messages = [f"scam {i}" if i % 2 else f"hello {i}" for i in range(50)]
+        out = list(Pipeline(_stages(), queue_size=4).run(iter(messages)))
+        assert sorted(item["index"] for item in out) == list(range(50))
+        assert all(item["response"]["action_required"] == item["result"]["is_scam"] for item in out)
+
+    def test_stages_run_concurrently(self):
+        sleepy = lambda item: (time.sleep(0.05), _detect(item))[1]
+        pipeline = Pipeline(_stages(detect=sleepy, workers=4), queue_size=4)
+        t0 = time.perf_counter()
+        list(pipeline.run(f"scam {i}" for i in range(20)))
+        assert time.perf_counter() - t0 < 20 * 0.05 / 2
+
+    def test_slow_stage_applies_backpressure(self):
+        pulled = []
+        gate = threading.Event()
+
+        def source():
+            for i in range(100):
+                pulled.append(i)
+                yield f"scam {i}"
+
+        def blocked(item):
+            gate.wait(5)
+            return item
+
+        pipeline = Pipeline(_stages(investigate=blocked, workers=1), queue_size=2)
+        results = pipeline.run(source())
+        consumer = threading.Thread(target=lambda: list(results))
+        consumer.start()
+        time.sleep(0.2)
+        # blocked worker + 2 queued for investigation + 1 detecting + 2 queued for detection (+1 in hand)
+        assert len(pulled) <= 8
+        gate.set()
+        consumer.join(5)
+        assert len(pulled) == 100
+
+    def test_stage_errors_skip_later_stages(self):
+        def flaky(item):
+            if item["index"] == 3:
+                raise ValueError("model timeout")
+            return _detect(item)
+
+        pipeline = Pipeline(_stages(detect=flaky), queue_size=4)
+        out = {item["index"]: item for item in pipeline.run([f"scam {i}" for i in range(6)])}
+        assert out[3]["error"] == "detection: model timeout"
+        assert "response" not in out[3]
+        assert pipeline.stats()["stages"]["detection"]["errors"] == 1
+
+    def test_stats_report_throughput_and_queue_depth(self):
+        pipeline = Pipeline(_stages(), queue_size=8)
+        list(pipeline.run([f"scam {i}" for i in range(30)]))
+        stats = pipeline.stats()
+        assert stats["completed"] == 30
+        for stage in stats["stages"].values():
+            assert stage["processed"] == 30
+            assert stage["queue_capacity"] == 8
+            assert 0 <= stage["queue_depth_max"] <= 8
+            assert stage["throughput_per_s"] > 0
+
+
+class TestDefaultStages:
+    def test_investigation_only_for_actionable_scams(self):
+        calls = []
+        with patch.object(orchestrator, "_investigator", lambda message: calls.append(message) or {"upis": []}):
+            safe = orchestrator.investigate({"message": "hi", "result": {"is_scam": False}})
+            scam = orchestrator.investigate({"message": "pay x@ybl", "result": {"is_scam": True, "confidence": 0.9}})
+        assert calls == ["pay x@ybl"]
+        assert "investigation" not in safe
+        assert scam["investigation"] == {"upis": []}
+
+    def test_investigation_failure_is_recorded_not_raised(self):
+        def down(message):
+            raise RuntimeError("COSMOS_DB_ENDPOINT and COSMOS_DB_KEY must be set.")
+
+        with patch.object(orchestrator, "_investigator", down):
+            item = orchestrator.investigate({"message": "m", "result": {"is_scam": True, "confidence": 0.95}})
+        assert "COSMOS_DB_ENDPOINT" in item["investigation"]["error"]
+
+    @pytest.mark.parametrize("confidence,action", [(0.95, True), (0.5, False)])
+    def test_response(self, confidence, action):
+        item = orchestrator.respond({"result": {"is_scam": True, "confidence": confidence, "red_flags": ["otp"]}})
+        assert item["response"]["action_required"] is action
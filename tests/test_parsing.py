@@ -0,0 +1,135 @@
+"""Tests for structured-output verdict parsing, validation and repair."""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from fraudshield import metrics, parsing
+from fraudshield.parsing import VerdictParseError, compile_schema, extract_json_object, parse_verdict
+
+VALID = {
+    "is_scam": True,
+    "category": "kyc_freeze",
+    "confidence": 0.93,
+    "risk_level": "high",
+    "explanation_en": "Fake KYC update.",
+    "explanation_hi": "नकली KYC अपडेट।",
+    "red_flags": ["asks for OTP"],
+    "complaint_form": {"portal": "cybercrime.gov.in", "helpline": "1930", "evidence_to_collect": []},
+}
+
+
+def _response(content: str) -> MagicMock:
+    resp = MagicMock()
+    resp.choices[0].message.content = content
+    return resp
+
+
+@pytest.fixture(autouse=True)
+def _reset(monkeypatch):
+    metrics.reset()
+    monkeypatch.setattr(parsing, "_structured_output", True)
+
+
+class TestExtractJsonObject:
+    def test_plain_object(self):
+        assert extract_json_object(json.dumps(VALID)) == VALID
+
+    def test_markdown_fences_and_chatter(self):
+        text = "Sure! Here is the analysis:\n```json\n" + json.dumps(VALID) + "\n```\nStay safe."
+        assert extract_json_object(text) == VALID
+
+    def test_braces_inside_strings(self):
+        text = '{"explanation_en": "Use {OTP} never } share", "is_scam": true}'
+        assert extract_json_object(text)["is_scam"] is True
+
+    def test_skips_broken_leading_object(self):
+        text = '{not json} then {"is_scam": false}'
+        assert extract_json_object(text) == {"is_scam": False}
+
+    def test_truncated_output_raises(self):
+        with pytest.raises(VerdictParseError):
+            extract_json_object('{"is_scam": true, "category": "kyc_fr')
+
+
+class TestCompiledSchema:
+    def test_reports_enum_range_and_required_errors(self):
+        validate = compile_schema(parsing.VERDICT_SCHEMA)
+        errors = validate({"is_scam": True, "category": "pizza", "confidence": 1.7})
+        assert any("$.category" in e for e in errors)
+        assert any("$.confidence" in e and "<=" in e for e in errors)
+        assert any("$.risk_level: required" in e for e in errors)
+
+    def test_bool_is_not_a_number(self):
+        validate = compile_schema({"type": "number"})
+        assert validate(True) == ["$: expected number"]
+
+    def test_nested_items(self):
+        validate = compile_schema(parsing.VERDICT_SCHEMA)
+        bad = dict(VALID, red_flags=["ok", 3])
+        assert validate(bad) == ["$.red_flags[1]: expected string"]
+
+
+class TestParseVerdict:
+    def test_coerces_common_slips(self):
+        raw = json.dumps(dict(VALID, is_scam="true", confidence="87%", category="KYC Freeze", risk_level="HIGH"))
+        verdict, errors = parse_verdict(raw)
+        assert errors == []
+        assert verdict["is_scam"] is True
+        assert verdict["confidence"] == pytest.approx(0.87)
+        assert verdict["category"] == "kyc_freeze"
+
+    def test_fills_optional_text_defaults(self):
+        raw = json.dumps({"is_scam": False, "category": "legitimate", "confidence": 0.8, "risk_level": "low"})
+        verdict, errors = parse_verdict(raw, "compact")
+        assert errors == []
+        assert verdict["red_flags"] == []
+
+    def test_missing_complaint_form_is_not_an_error(self):
+        raw = json.dumps({k: v for k, v in VALID.items() if k != "complaint_form"})
+        assert parse_verdict(raw, "full")[1] == []
+
+
+class TestCompleteVerdict:
+    def test_requests_structured_output(self):
+        create = MagicMock(return_value=_response(json.dumps(VALID)))
+        _, verdict = parsing.complete_verdict(create, [{"role": "user", "content": "x"}])
+        assert verdict["category"] == "kyc_freeze"
+        fmt = create.call_args.kwargs["response_format"]
+        assert fmt["type"] == "json_schema"
+        assert fmt["json_schema"]["schema"] is parsing.FULL_VERDICT_SCHEMA
+
+    def test_falls_back_when_structured_output_unsupported(self):
+        rejected = Exception("Invalid parameter: 'response_format' of type 'json_schema' is not supported")
+        rejected.status_code = 400
+        create = MagicMock(side_effect=[rejected, _response("```json\n" + json.dumps(VALID) + "\n```")])
+        _, verdict = parsing.complete_verdict(create, [])
+        assert verdict["risk_level"] == "high"
+        assert "response_format" not in create.call_args.kwargs
+        assert parsing.structured_output_enabled() is False
+
+    def test_other_errors_propagate(self):
+        create = MagicMock(side_effect=RuntimeError("boom"))
+        with pytest.raises(RuntimeError):
+            parsing.complete_verdict(create, [])
+
+    def test_single_repair_call_on_invalid_output(self):
+        create = MagicMock(side_effect=[
+            _response('{"is_scam": true, "category": "kyc_freeze", "confidence": 0.9'),
+            _response(json.dumps(VALID)),
+        ])
+        response, verdict = parsing.complete_verdict(create, [{"role": "user", "content": "full prompt"}])
+        assert verdict == VALID
+        repair_call = create.call_args_list[1].kwargs
+        assert repair_call["max_completion_tokens"] == parsing.REPAIR_MAX_TOKENS
+        assert "full prompt" not in json.dumps(repair_call["messages"])
+        assert metrics.counter("parse.failures") == 1
+        assert metrics.gauge("parse.failure_rate") == 1.0
+
+    def test_raises_after_failed_repair(self):
+        create = MagicMock(return_value=_response("I cannot help with that."))
+        with pytest.raises(VerdictParseError):
+            parsing.complete_verdict(create, [])
+        assert create.call_count == 2
+        assert metrics.counter("parse.repair_failures") == 1
@@ -0,0 +1,146 @@
+"""Tests for entity extraction, prompt building and input truncation."""
+
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics, prompting
+from fraudshield.entities import extract_entities, normalize_phone, url_domain
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    metrics.reset()
+
+
+def _long_forward(signal_sentence: str, filler_count: int = 120) -> str:
+    filler = "Forwarded many times. Please read this carefully and share with family members."
+    return " ".join([
+        "Dear customer, important notice from your bank.",
+        *([filler] * (filler_count // 2)),
+        signal_sentence,
+        *([filler] * (filler_count // 2)),
+    ])
+
+
+class TestExtractEntities:
+    def test_extracts_vpa_and_amount(self):
+        e = extract_entities("Google Pay se aapko Rs.1500 cashback mila hai. Approve karein: cashback@ybl")
+        assert e["vpas"] == ["cashback@ybl"]
+        assert e["amounts"] == ["Rs.1500"]
+        assert e["urls"] == []
+
+    def test_extracts_bare_and_schemed_urls(self):
+        e = extract_entities("Update: bit.ly/sbi-kyc or https://echallane.vip/in now")
+        assert e["urls"] == ["bit.ly/sbi-kyc", "https://echallane.vip/in"]
+        assert e["domains"] == ["bit.ly", "echallane.vip"]
+
+    def test_normalizes_phone_numbers(self):
+        e = extract_entities("Call +91-98765-00001 or 9330284713")
+        assert e["phones"] == ["+91-9876500001", "+91-9330284713"]
+        assert normalize_phone("+919876500001") == "+91-9876500001"
+
+    def test_email_is_not_a_vpa_or_url(self):
+        e = extract_entities("Mail support@sbi.co.in for help")
+        assert e["vpas"] == []
+        assert e["urls"] == []
+
+    def test_url_domain_strips_www(self):
+        assert url_domain("https://www.sbi.co.in/kyc") == "sbi.co.in"
+
+    def test_malformed_url_is_skipped(self):
+        assert url_domain("http://[sbi-kyc") == ""
+        e = extract_entities("KYC update at http://[sbi-kyc now, or bit.ly/kyc")
+        assert e["urls"] == ["bit.ly/kyc"]
+        assert e["domains"] == ["bit.ly"]
+
+
+class TestCompactMessage:
+    def test_short_message_is_unchanged(self):
+        text, truncated = prompting.compact_message("Your KYC expired.", max_tokens=50)
+        assert text == "Your KYC expired."
+        assert truncated is False
+
+    def test_keeps_signal_rich_segments(self):
+        message = _long_forward("Pay Rs.999 now to taskpay.earn@ybl or visit bit.ly/x1.")
+        assert prompting.count_tokens(message) > 200
+        text, truncated = prompting.compact_message(message, max_tokens=60)
+        assert truncated is True
+        assert "taskpay.earn@ybl" in text
+        assert "bit.ly/x1" in text
+        assert text.startswith("Dear customer")
+        assert prompting.count_tokens(text) <= 60
+
+    def test_single_long_segment_is_clipped(self):
+        text, truncated = prompting.compact_message("a" * 4000, max_tokens=100)
+        assert truncated is True
+        assert prompting.count_tokens(text) <= 100
+
+    def test_dropped_runs_marked_with_ellipsis(self):
+        message = _long_forward("Transfer Rs.50,000 immediately.")
+        text, _ = prompting.compact_message(message, max_tokens=40)
+        assert "…" in text
+
+
+class TestBuildMessages:
+    def test_full_variant_uses_full_system_prompt(self):
+        messages, info = prompting.build_messages("hello", "sms", "AX-SBI", variant="full")
+        assert messages[0] == {"role": "system", "content": prompting.SYSTEM_PROMPT}
+        assert "Sender: AX-SBI" in messages[1]["content"]
+        assert info["variant"] == "full"
+        assert info["truncated"] is False
+
+    def test_compact_variant_is_smaller(self):
+        _, full = prompting.build_messages("hello", variant="full")
+        _, compact = prompting.build_messages("hello", variant="compact")
+        assert compact["prompt_tokens"] < full["prompt_tokens"]
+
+    def test_unknown_variant_raises(self):
+        with pytest.raises(ValueError):
+            prompting.build_messages("hello", variant="tiny")
+
+    def test_truncation_counted(self):
+        prompting.build_messages(_long_forward("Pay Rs.10 now."), max_message_tokens=50)
+        assert metrics.counter("prompt.truncated") == 1
+
+    def test_record_usage_counts_tokens(self):
+        response = MagicMock()
+        response.usage.prompt_tokens = 210
+        response.usage.completion_tokens = 95
+        prompting.record_usage(response, {"variant": "compact"})
+        assert metrics.counter("tokens.compact.prompt") == 210
+        assert metrics.counter("tokens.compact.completion") == 95
+
+
+class TestClassifyPromptVariant:
+    def test_variant_passed_to_model_call(self):
+        router = MagicMock()
+        router.create.return_value.choices[0].message.content = json.dumps(
+            {"is_scam": False, "category": "legitimate", "confidence": 0.9, "risk_level": "low"})
+        with patch.object(function_app, "_get_router", return_value=router):
+            function_app.classify_message("dinner at 8?", prompt_variant="compact")
+        messages = router.create.call_args.kwargs["messages"]
+        assert messages[0]["content"] == prompting.SYSTEM_PROMPT_COMPACT
+
+    def test_route_rejects_unknown_variant(self):
+        req = MagicMock()
+        req.method = "POST"
+        req.get_json.return_value = {"message": "hi", "prompt_variant": "tiny"}
+        resp = function_app.classify(req)
+        assert resp.status_code == 400
+
+    def test_route_accepts_malformed_url(self):
+        req = MagicMock()
+        req.method = "POST"
+        req.get_json.return_value = {"message": "KYC update at http://[sbi-kyc now"}
+        verdict = {"is_scam": True, "category": "kyc_freeze", "confidence": 0.9, "risk_level": "high",
+                   "explanation_en": "x", "explanation_hi": "y", "red_flags": []}
+        with patch.object(function_app, "_classify_with_model", return_value=verdict):
+            resp = function_app.classify(req)
+        assert resp.status_code == 200
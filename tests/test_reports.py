@@ -0,0 +1,115 @@
+"""Tests for the incrementally maintained /api/reports aggregates."""
+
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import azure.functions as func
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics
+from fraudshield.reports import ReportAggregator, etag_matches, resolve_city
+from fraudshield.trends import TrendStore
+
+
+def _event(category="kyc_freeze", city="Mumbai", **extra):
+    return dict({"is_scam": True, "category": category, "city": city}, **extra)
+
+
+def _get(headers=None):
+    return func.HttpRequest(method="GET", url="/api/reports", headers=headers or {}, body=b"")
+
+
+@pytest.fixture(autouse=True)
+def _reset(tmp_path):
+    metrics.reset()
+    with patch.object(function_app, "_reports", ReportAggregator()), \
+         patch.object(function_app, "_trends", TrendStore()), \
+         patch.object(function_app, "_TRENDS_PATH", str(tmp_path / "trends.json")):
+        yield
+
+
+class TestReportAggregator:
+    def test_counts_city_state_and_top_category(self):
+        agg = ReportAggregator()
+        for event in [_event(), _event(), _event("job_scam"), _event("job_scam", city="Pune"),
+                      _event("lottery_scam", city="bengaluru")]:
+            agg.ingest(event)
+        doc = agg.payload()
+        assert doc["total"] == 5
+        assert doc["live"] is True
+        mumbai = doc["cities"][0]
+        assert (mumbai["city"], mumbai["reports"], mumbai["topScam"]) == ("Mumbai", 3, "kyc_freeze")
+        assert mumbai["lat"] == 19.076
+        maharashtra = next(s for s in doc["states"] if s["state"] == "Maharashtra")
+        assert (maharashtra["reports"], maharashtra["topScam"]) == (4, "job_scam")
+        assert {c["city"] for c in doc["cities"]} == {"Mumbai", "Pune", "Bangalore"}
+
+    def test_ignores_legitimate_and_replayed_events(self):
+        agg = ReportAggregator()
+        assert agg.ingest(_event(is_scam=False)) is False
+        assert agg.ingest(_event(event_id="e1")) is True
+        assert agg.ingest(_event(event_id="e1")) is False
+        assert agg.total == 1
+
+    def test_unmapped_city_counts_towards_total_and_state(self):
+        agg = ReportAggregator()
+        agg.ingest(_event(city="Nagpur", state="maharashtra"))
+        agg.ingest(_event(city=None))
+        doc = agg.payload()
+        assert doc["total"] == 2
+        assert doc["cities"] == []
+        assert doc["states"] == [{"state": "Maharashtra", "reports": 1, "topScam": "kyc_freeze"}]
+
+    def test_render_is_cached_until_next_event(self):
+        agg = ReportAggregator()
+        agg.ingest(_event())
+        body, etag = agg.render()
+        with patch.object(agg, "payload", side_effect=AssertionError("re-rendered")):
+            assert agg.render() == (body, etag)
+        agg.ingest(_event())
+        assert agg.render()[1] != etag
+
+    def test_resolve_city_aliases(self):
+        assert resolve_city("  New   Delhi ") == "Delhi"
+        assert resolve_city("Atlantis") is None
+
+    def test_etag_matches(self):
+        assert etag_matches('W/"abc", "def"', '"abc"')
+        assert etag_matches("*", '"abc"')
+        assert not etag_matches(None, '"abc"')
+
+
+class TestReportsEndpoint:
+    def test_serves_payload_with_cache_headers(self):
+        function_app._reports.ingest(_event())
+        resp = function_app.reports(_get())
+        assert resp.status_code == 200
+        assert json.loads(resp.get_body())["cities"][0]["city"] == "Mumbai"
+        assert resp.headers["ETag"]
+        assert "max-age" in resp.headers["Cache-Control"]
+
+    def test_repeat_poll_is_304(self):
+        function_app._reports.ingest(_event())
+        etag = function_app.reports(_get()).headers["ETag"]
+        resp = function_app.reports(_get({"If-None-Match": etag}))
+        assert resp.status_code == 304
+        assert resp.get_body() == b""
+        assert metrics.counter("reports.not_modified") == 1
+
+    def test_new_event_invalidates_etag(self):
+        etag = function_app.reports(_get()).headers["ETag"]
+        function_app._reports.ingest(_event())
+        assert function_app.reports(_get({"If-None-Match": etag})).status_code == 200
+
+    def test_event_hub_batch_ingestion(self):
+        events = [MagicMock(), MagicMock(), MagicMock()]
+        events[0].get_body.return_value = json.dumps(_event()).encode()
+        events[1].get_body.return_value = b"not json"
+        events[2].get_body.return_value = json.dumps(_event(is_scam=False)).encode()
+        assert function_app.ingest_fraud_events(events) == 1
+        assert function_app._reports.total == 1
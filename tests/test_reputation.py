@@ -0,0 +1,200 @@
+"""Tests for the sender/VPA/phone reputation table and the classification fast path."""
+
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics
+from fraudshield.bloom import BloomFilter, identifier_key
+from fraudshield.reputation import ReputationTable, is_strong, reputation_verdict
+from fraudshield.scam_graph import LINKS, SCAM_PHONES, SCAM_UPIS
+
+DAY = 86400
+T0 = 1_700_000_000.0
+
+
+class Clock:
+    def __init__(self, now=T0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def table(clock):
+    return ReputationTable(capacity=100, half_life=10 * DAY, clock=clock)
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    metrics.reset()
+
+
+class TestReputationTable:
+    def test_counts_decay_by_half_life(self, table, clock):
+        table.record("vpa", "Fraud.Pay@YBL", "kyc_freeze", weight=8)
+        clock.now += 10 * DAY
+        hit = table.lookup("vpa", "fraud.pay@ybl")
+        assert hit["score"] == pytest.approx(4.0)
+        assert hit["category"] == "kyc_freeze"
+        assert hit["last_seen"] == T0
+
+    def test_late_reports_arrive_already_decayed(self, table, clock):
+        table.record("phone", "9876543210", "digital_arrest", ts=T0 - 10 * DAY)
+        assert table.lookup("phone", "+91 98765 43210")["score"] == pytest.approx(0.5)
+
+    def test_top_category_wins(self, table):
+        table.record("domain", "https://www.bad-kyc.in/x", "kyc_freeze", weight=3)
+        table.record("domain", "bad-kyc.in", "phishing_link", weight=1)
+        hit = table.lookup("domain", "bad-kyc.in")
+        assert (hit["category"], hit["category_score"], hit["score"]) == ("kyc_freeze", 3.0, 4.0)
+
+    def test_lru_eviction_keeps_capacity(self, clock):
+        table = ReputationTable(capacity=2, clock=clock)
+        table.record("vpa", "a@ybl", "job_scam")
+        table.record("vpa", "b@ybl", "job_scam")
+        table.lookup("vpa", "a@ybl")          # a is now most recently used
+        table.record("vpa", "c@ybl", "job_scam")
+        assert len(table) == 2
+        assert table.lookup("vpa", "b@ybl") is None
+        assert table.lookup("vpa", "a@ybl") is not None
+        assert metrics.counter("reputation.evictions") == 1
+
+    def test_generic_senders_are_ignored(self, table):
+        table.record("sender", "unknown", "job_scam")
+        table.record("sender", "telegram_user", "job_scam")
+        assert len(table) == 0
+
+    def test_seed_links_phones_to_upi_categories(self, table):
+        table.seed(SCAM_UPIS, SCAM_PHONES, LINKS)
+        phone_id, number = SCAM_PHONES[0][:2]
+        counts = {u[0]: u[3] for u in SCAM_UPIS}
+        expected = sum(counts[upi_id] for pid, upi_id, _ in LINKS if pid == phone_id)
+        assert table.lookup("phone", number)["score"] == pytest.approx(expected)
+        assert table.lookup("vpa", SCAM_UPIS[0][1])["score"] == pytest.approx(SCAM_UPIS[0][3])
+
+    def test_record_event_updates_every_identifier(self, table):
+        event = {"is_scam": True, "category": "digital_arrest", "sender": "+919812345678",
+                 "message": "Pay fine to cbi.case@okaxis or visit http://cbi-verify.in now"}
+        assert table.record_event(event) == 3
+        hits = table.assess(event["message"], event["sender"])
+        assert {h["kind"] for h in hits} == {"sender", "vpa", "domain"}
+        assert table.record_event({"is_scam": False, "message": "hi mom@ybl"}) == 0
+
+    def test_brand_and_shortener_domains_are_not_scored(self, table):
+        event = {"is_scam": True, "category": "kyc_freeze",
+                 "message": "SBI (sbi.co.in) KYC: update at bit.ly/x or sbi-kyc-update.in, helpdesk cybercrime.gov.in"}
+        assert table.record_event(event) == 4
+        assert len(table) == 1
+        assert table.lookup("domain", "sbi-kyc-update.in") is not None
+        assert table.lookup("domain", "sbi.co.in") is None and table.lookup("domain", "bit.ly") is None
+
+    def test_domain_prior_alone_is_not_strong(self, table):
+        table.record("domain", "sbi-kyc-update.in", "kyc_freeze", weight=20)
+        table.record("vpa", "pay.kyc@ybl", "kyc_freeze", weight=6)
+        hits = table.assess("Update at sbi-kyc-update.in")
+        assert not is_strong(hits, 5)
+        hits = table.assess("Update at sbi-kyc-update.in, fee to pay.kyc@ybl")
+        assert hits[0]["kind"] == "domain" and is_strong(hits, 5)
+        assert reputation_verdict(hits)["red_flags"][0] == "reported website sbi-kyc-update.in"
+        assert "pay.kyc@ybl" in reputation_verdict(hits)["explanation_en"]
+
+    def test_verdict_from_strong_prior(self, table):
+        table.record("vpa", "taskpay@ybl", "job_scam", weight=20)
+        hits = table.assess("send deposit to taskpay@ybl")
+        assert is_strong(hits, 5) and not is_strong(hits, 50)
+        verdict = reputation_verdict(hits)
+        assert verdict["tier"] == "reputation"
+        assert verdict["is_scam"] and verdict["category"] == "job_scam"
+        assert 0.7 < verdict["confidence"] <= 0.98
+        assert "taskpay@ybl" in verdict["explanation_en"]
+
+
+class TestClassifyWithReputation:
+    def _router(self):
+        router = MagicMock()
+        router.create.return_value = MagicMock(
+            choices=[MagicMock(message=MagicMock(content=json.dumps({
+                "is_scam": False, "category": "legitimate", "confidence": 0.6, "risk_level": "low",
+                "explanation_en": "", "explanation_hi": "", "red_flags": [],
+            })))],
+            usage=None,
+        )
+        return router
+
+    def _filter(self, *vpas):
+        bloom = BloomFilter(1000)
+        for vpa in vpas:
+            bloom.add(identifier_key("vpa", vpa))
+        return bloom
+
+    def test_strong_prior_skips_the_model(self, clock):
+        table = ReputationTable(clock=clock)
+        table.record("vpa", "taskpay@ybl", "job_scam", weight=20)
+        router = self._router()
+        with patch.object(function_app, "_reputation", table), \
+             patch.object(function_app, "_scam_filter", self._filter("taskpay@ybl")), \
+             patch.object(function_app, "_get_router", return_value=router):
+            result = function_app.classify_message("Deposit 500 to taskpay@ybl to unlock tasks", "sms")
+        router.create.assert_not_called()
+        assert result["tier"] == "reputation"
+        assert result["reputation"][0]["value"] == "taskpay@ybl"
+        assert metrics.counter("classify.reputation_fast_path") == 1
+
+    def test_weak_prior_is_attached_to_model_verdict(self, clock):
+        table = ReputationTable(clock=clock)
+        table.record("vpa", "maybe@ybl", "job_scam", weight=1)
+        router = self._router()
+        with patch.object(function_app, "_reputation", table), \
+             patch.object(function_app, "_scam_filter", self._filter("maybe@ybl")), \
+             patch.object(function_app, "_get_router", return_value=router):
+            result = function_app.classify_message("Pay maybe@ybl for the order", "sms")
+        router.create.assert_called_once()
+        assert result["category"] == "legitimate"
+        assert result["reputation"][0]["score"] == 1.0
+
+    def test_event_stream_builds_reputation(self, clock, tmp_path):
+        table, bloom = ReputationTable(clock=clock), self._filter()
+        event = MagicMock()
+        event.get_body.return_value = json.dumps({"is_scam": True, "category": "kyc_freeze",
+                                                  "message": "Update KYC via kyc-fix@paytm"}).encode()
+        with patch.object(function_app, "_reputation", table), \
+             patch.object(function_app, "_scam_filter", bloom), \
+             patch.object(function_app, "_reports", function_app.ReportAggregator()), \
+             patch.object(function_app, "_TRENDS_PATH", str(tmp_path / "t.json")):
+            function_app.ingest_fraud_events([event])
+        assert table.lookup("vpa", "kyc-fix@paytm")["category"] == "kyc_freeze"
+        assert identifier_key("vpa", "kyc-fix@paytm") in bloom
+
+    def test_scams_quoting_a_bank_domain_do_not_flag_the_bank(self, clock, tmp_path):
+        table, bloom = ReputationTable(clock=clock), self._filter()
+        events = []
+        for i in range(6):
+            event = MagicMock()
+            event.get_body.return_value = json.dumps({
+                "is_scam": True, "category": "kyc_freeze",
+                "message": f"SBI alert: visit sbi.co.in or update KYC at http://sbi-kyc{i}.xyz now"}).encode()
+            events.append(event)
+        router = self._router()
+        with patch.object(function_app, "_reputation", table), \
+             patch.object(function_app, "_scam_filter", bloom), \
+             patch.object(function_app, "_reports", function_app.ReportAggregator()), \
+             patch.object(function_app, "_TRENDS_PATH", str(tmp_path / "t.json")), \
+             patch.object(function_app, "_get_router", return_value=router):
+            function_app.ingest_fraud_events(events)
+            result = function_app.classify_message("Your SBI account statement for March is ready on sbi.co.in", "sms")
+        router.create.assert_called_once()
+        assert result.get("tier") != "reputation" and result["category"] == "legitimate"
+        assert table.lookup("domain", "sbi.co.in") is None
@@ -0,0 +1,198 @@
+"""Tests for the multi-deployment model router, run against local stub endpoints."""
+
+import time
+
+import openai
+import pytest
+
+from fraudshield import metrics
+from fraudshield.router import Deployment, HedgePolicy, ModelRouter, NoDeploymentAvailable
+from tests.stub_openai import StubEndpoint
+
+MESSAGES = [{"role": "user", "content": "Your SBI KYC expired. Update: bit.ly/sbi-kyc"}]
+
+
+def _deployment(name: str, stub: StubEndpoint, tpm=None) -> Deployment:
+    return Deployment(name=name, endpoint=stub.url, api_key="test-key", deployment="o4-mini", tpm=tpm)
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    metrics.reset()
+
+
+class TestRouting:
+    def test_prefers_fastest_deployment_after_probing(self):
+        with StubEndpoint(delay=0.15) as slow, StubEndpoint() as fast:
+            router = ModelRouter([_deployment("slow", slow), _deployment("fast", fast)])
+            for _ in range(6):
+                router.create(MESSAGES)
+        # Each deployment is probed once, then traffic sticks to the fast one.
+        assert slow.hits == 1
+        assert fast.hits == 5
+
+    def test_response_names_serving_deployment(self):
+        with StubEndpoint(content="hello") as stub:
+            router = ModelRouter([_deployment("korea-central", stub)])
+            response = router.create(MESSAGES)
+        assert response.choices[0].message.content == "hello"
+        assert response.deployment_name == "korea-central"
+
+    def test_forwards_deployment_name_as_model(self):
+        with StubEndpoint() as stub:
+            router = ModelRouter([_deployment("a", stub)])
+            router.create(MESSAGES, max_completion_tokens=123)
+        assert stub.requests[0]["max_completion_tokens"] == 123
+        assert stub.requests[0]["messages"] == MESSAGES
+
+
+class TestFailover:
+    def test_fails_over_on_429_and_cools_down(self):
+        with StubEndpoint(status=429, retry_after=30) as throttled, StubEndpoint() as backup:
+            router = ModelRouter([_deployment("throttled", throttled), _deployment("backup", backup)])
+            router.create(MESSAGES)
+            router.create(MESSAGES)
+        assert throttled.hits == 1
+        assert backup.hits == 2
+        assert metrics.counter("router.failovers") == 1
+        assert not router.deployments[0].healthy(time.monotonic())
+
+    def test_fails_over_on_5xx(self):
+        with StubEndpoint(status=503) as broken, StubEndpoint(content="ok") as backup:
+            router = ModelRouter([_deployment("broken", broken), _deployment("backup", backup)])
+            response = router.create(MESSAGES)
+        assert response.choices[0].message.content == "ok"
+        assert router.deployments[0].error_rate > 0
+
+    def test_client_errors_are_not_retried(self):
+        with StubEndpoint(status=400) as bad, StubEndpoint() as other:
+            router = ModelRouter([_deployment("bad", bad), _deployment("other", other)])
+            with pytest.raises(openai.BadRequestError):
+                router.create(MESSAGES)
+        assert other.hits == 0
+
+    def test_raises_last_error_when_all_fail(self):
+        with StubEndpoint(status=500) as a, StubEndpoint(status=502) as b:
+            router = ModelRouter([_deployment("a", a), _deployment("b", b)])
+            with pytest.raises(openai.InternalServerError):
+                router.create(MESSAGES)
+        assert a.hits == 1 and b.hits == 1
+
+    def test_cooling_deployment_is_used_as_last_resort(self):
+        with StubEndpoint() as stub:
+            router = ModelRouter([_deployment("only", stub)])
+            router.deployments[0].record_failure(60)
+            router.create(MESSAGES)
+        assert stub.hits == 1
+
+
+class TestTokenBudget:
+    def test_skips_deployment_over_tpm_budget(self):
+        with StubEndpoint() as small, StubEndpoint() as large:
+            router = ModelRouter([_deployment("small", small, tpm=100), _deployment("large", large)])
+            router.create(MESSAGES, max_completion_tokens=500)
+        assert small.hits == 0
+        assert large.hits == 1
+        assert metrics.counter("router.budget_skips") == 1
+
+    def test_budget_settles_to_billed_usage(self):
+        with StubEndpoint() as stub:
+            dep = _deployment("a", stub, tpm=10_000)
+            ModelRouter([dep]).create(MESSAGES, max_completion_tokens=500)
+        # The stub bills 70 tokens, not the 500+ reserved up front.
+        assert dep.tokens_used(time.monotonic()) == 70
+
+    def test_no_deployment_available(self):
+        with StubEndpoint() as stub:
+            router = ModelRouter([_deployment("tiny", stub, tpm=10)])
+            with pytest.raises(NoDeploymentAvailable):
+                router.create(MESSAGES)
+
+
+def _warm(policy: HedgePolicy, latency_ms: float = 30.0, samples: int = 200) -> HedgePolicy:
+    for _ in range(samples):
+        policy.record(latency_ms)
+    return policy
+
+
+class TestHedging:
+    def test_no_hedge_until_latency_is_known(self):
+        with StubEndpoint() as stub:
+            router = ModelRouter([_deployment("a", stub)], hedge=HedgePolicy(min_samples=5))
+            for _ in range(5):
+                router.create(MESSAGES)
+        assert metrics.counter("router.hedge.eligible") == 0
+        assert router.hedge.delay_ms() is not None
+
+    def test_straggler_is_hedged_to_another_deployment(self):
+        with StubEndpoint(delay=0.6) as slow, StubEndpoint(content="fast") as fast:
+            a, b = _deployment("slow", slow), _deployment("fast", fast)
+            a.latency_ms, b.latency_ms = 10.0, 50.0      # the router tries "slow" first
+            router = ModelRouter([a, b], hedge=_warm(HedgePolicy(min_delay_ms=20)))
+            t0 = time.perf_counter()
+            response = router.create(MESSAGES)
+            elapsed = time.perf_counter() - t0
+            time.sleep(0.7)     # let the abandoned call finish and report its latency
+        assert response.deployment_name == "fast"
+        assert elapsed < 0.5
+        assert metrics.counter("router.hedge.fired") == metrics.counter("router.hedge.won") == 1
+        assert metrics.percentile("router.hedge.saved_ms", 50) > 300
+        assert metrics.percentile("router.latency_ms", 99) < metrics.percentile("router.unhedged_latency_ms", 99)
+
+    def test_fast_primary_is_not_hedged(self):
+        with StubEndpoint() as a, StubEndpoint() as b:
+            router = ModelRouter([_deployment("a", a), _deployment("b", b)],
+                                 hedge=_warm(HedgePolicy(min_delay_ms=500)))
+            router.create(MESSAGES)
+        assert a.hits + b.hits == 1
+        assert metrics.counter("router.hedge.eligible") == 1
+        assert metrics.counter("router.hedge.fired") == 0
+
+    def test_budget_caps_extra_calls(self):
+        with StubEndpoint(delay=0.1) as slow, StubEndpoint() as other:
+            a, b = _deployment("slow", slow), _deployment("other", other)
+            a.latency_ms, b.latency_ms = 1.0, 5000.0
+            router = ModelRouter([a, b], hedge=_warm(HedgePolicy(budget=0.25, burst=1.0, min_delay_ms=20)))
+            router.hedge._tokens = 0.0
+            for _ in range(8):
+                a.latency_ms, b.latency_ms = 1.0, 5000.0
+                router.create(MESSAGES)
+        assert metrics.counter("router.hedge.eligible") == 8
+        assert metrics.counter("router.hedge.fired") == 2
+        assert metrics.counter("router.hedge.denied") == 6
+        assert metrics.gauge("router.hedge.rate") == 0.25
+
+    def test_failed_hedge_falls_back_to_primary(self):
+        with StubEndpoint(delay=0.2, content="slow but fine") as slow, StubEndpoint(status=400) as broken:
+            a, b = _deployment("slow", slow), _deployment("broken", broken)
+            a.latency_ms, b.latency_ms = 1.0, 50.0
+            router = ModelRouter([a, b], hedge=_warm(HedgePolicy(min_delay_ms=20)))
+            response = router.create(MESSAGES)
+        assert response.choices[0].message.content == "slow but fine"
+        assert metrics.counter("router.hedge.fired") == 1
+        assert metrics.counter("router.hedge.won") == 0
+
+    def test_from_env(self):
+        env = {"AZURE_OPENAI_ENDPOINT": "https://x/", "AZURE_OPENAI_KEY": "k"}
+        assert ModelRouter.from_env(env).hedge.budget == 0.05
+        assert ModelRouter.from_env(dict(env, FRAUDSHIELD_HEDGE_PERCENTILE="0")).hedge is None
+
+
+class TestFromEnv:
+    def test_single_deployment_fallback(self):
+        router = ModelRouter.from_env({
+            "AZURE_OPENAI_ENDPOINT": "https://x.openai.azure.com/",
+            "AZURE_OPENAI_KEY": "k",
+            "AZURE_OPENAI_DEPLOYMENT": "o4-mini",
+        })
+        assert [d.deployment for d in router.deployments] == ["o4-mini"]
+
+    def test_json_deployment_list(self):
+        router = ModelRouter.from_env({
+            "AZURE_OPENAI_DEPLOYMENTS": '[{"name": "ci", "endpoint": "https://ci/", "key_env": "CI_KEY", "tpm": 1000},'
+                                        ' {"name": "kc", "endpoint": "https://kc/", "key": "k2"}]',
+            "CI_KEY": "k1",
+        })
+        assert [d.name for d in router.deployments] == ["ci", "kc"]
+        assert router.deployments[0].api_key == "k1"
+        assert router.deployments[0].tpm == 1000
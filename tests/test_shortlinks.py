@@ -0,0 +1,194 @@
+"""Tests for short-link expansion, against a local redirect server."""
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics, shortlinks
+from fraudshield.shortlinks import LinkCache, ShortLinkResolver
+
+
+class _Redirects(BaseHTTPRequestHandler):
+    """/hop/<n> redirects n more times; /loop redirects to itself; /slow stalls; /nohead refuses HEAD."""
+
+    def _reply(self):
+        path = self.path
+        if path.startswith("/hop/"):
+            n = int(path.rsplit("/", 1)[1])
+            target = f"/hop/{n - 1}" if n > 0 else None
+        elif path == "/loop":
+            target = "/loop"
+        elif path == "/slow":
+            time.sleep(1.0)
+            target = None
+        elif path == "/away":
+            target = "http://echallane.vip/pay"
+        else:
+            target = None
+        if target:
+            self.send_response(302)
+            self.send_header("Location", target)
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        if self.path == "/nohead":
+            self.send_response(405)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._reply()
+
+    def do_GET(self):
+        if self.path == "/nohead":
+            self.path = "/hop/1"
+        self._reply()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Redirects)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+@pytest.fixture
+def resolver(tmp_path):
+    metrics.reset()
+    return ShortLinkResolver(LinkCache(str(tmp_path / "links.sqlite3")), timeout=0.5, max_hops=3,
+                             allow_private=True)
+
+
+class TestResolve:
+    def test_follows_redirects(self, server, resolver):
+        result = resolver.resolve(f"{server}/hop/2")
+        assert (result["final"], result["hops"], result["status"]) == (f"{server}/hop/0", 2, shortlinks.OK)
+
+    def test_hop_limit(self, server, resolver):
+        result = resolver.resolve(f"{server}/loop")
+        assert (result["hops"], result["status"]) == (3, shortlinks.TOO_MANY_HOPS)
+
+    def test_timeout(self, server, resolver):
+        t0 = time.monotonic()
+        assert resolver.resolve(f"{server}/slow")["status"] == shortlinks.FAILED
+        assert time.monotonic() - t0 < 0.9
+
+    def test_falls_back_to_get(self, server, resolver):
+        assert resolver.resolve(f"{server}/nohead")["final"] == f"{server}/hop/0"
+
+    def test_private_addresses_are_blocked_by_default(self, server, tmp_path):
+        strict = ShortLinkResolver(LinkCache(str(tmp_path / "strict.sqlite3")))
+        assert strict.resolve(f"{server}/hop/1")["status"] == shortlinks.BLOCKED
+        assert strict.resolve("file:///etc/passwd")["status"] == shortlinks.BLOCKED
+
+
+    def test_connection_to_a_private_address_is_blocked_after_the_check(self, server, tmp_path):
+        # The name checked out as public, then resolved to loopback when connecting (DNS rebinding).
+        strict = ShortLinkResolver(LinkCache(str(tmp_path / "strict.sqlite3")))
+        with patch.object(shortlinks, "_public_host", return_value=True):
+            result = strict.resolve(f"{server}/hop/1")
+        assert result["status"] == shortlinks.BLOCKED and result["hops"] == 0
+
+
+class TestCache:
+    def test_persists_with_ttl(self, tmp_path):
+        now = [1000.0]
+        path = str(tmp_path / "links.sqlite3")
+        cache = LinkCache(path, ttl=60, fail_ttl=5, clock=lambda: now[0])
+        cache.put({"short": "http://bit.ly/a", "final": "http://x.vip/", "hops": 1, "status": "ok"})
+        cache.put({"short": "http://bit.ly/b", "final": "http://bit.ly/b", "hops": 0, "status": "error"})
+        cache.set_verdict("http://bit.ly/a", {"category": "phishing_link", "tier": "lookalike"})
+
+        reopened = LinkCache(path, ttl=60, fail_ttl=5, clock=lambda: now[0])
+        assert reopened.get("http://bit.ly/a")["verdict"]["category"] == "phishing_link"
+        now[0] += 10
+        assert reopened.get("http://bit.ly/b") is None
+        assert reopened.get("http://bit.ly/a")["domain"] == "x.vip"
+        now[0] += 60
+        assert reopened.get("http://bit.ly/a") is None
+        assert reopened.purge() == 2
+
+    def test_database_and_session_are_created_on_first_use(self, tmp_path):
+        path = str(tmp_path / "lazy" / "links.sqlite3")
+        links = ShortLinkResolver(LinkCache(path))
+        assert not os.path.exists(path) and links._session is None
+        links.warm()
+        assert os.path.exists(path) and links.session.headers["User-Agent"] == shortlinks.USER_AGENT
+
+
+class TestSubmit:
+    def test_only_short_links_and_cache(self, resolver):
+        resolver.resolve = MagicMock(return_value={"short": "http://bit.ly/x", "final": "http://a.in/",
+                                                   "domain": "a.in", "hops": 1, "status": "ok", "verdict": None})
+        pending = resolver.submit(["https://example.com/a", "bit.ly/x", "http://bit.ly/x"])
+        assert [e["domain"] for e in pending.wait(1)] == ["a.in"]
+        assert resolver.resolve.call_count == 1
+        assert resolver.submit(["bit.ly/x"]).done()[0]["final"] == "http://a.in/"
+        assert resolver.resolve.call_count == 1
+
+
+class TestClassify:
+    @pytest.fixture(autouse=True)
+    def _isolated(self, tmp_path):
+        metrics.reset()
+        links = ShortLinkResolver(LinkCache(str(tmp_path / "links.sqlite3")), timeout=1.0)
+        with patch.object(function_app, "_shortlinks", links), \
+                patch.object(function_app, "_reputation", MagicMock(assess=MagicMock(return_value=[]))), \
+                patch.object(function_app, "_distilled", None):
+            yield links
+
+    def _slow_resolve(self, final, delay=0.2):
+        def resolve(url):
+            time.sleep(delay)
+            return {"short": url, "final": final, "domain": final.split("/")[2], "hops": 1, "status": "ok",
+                    "verdict": None}
+        return resolve
+
+    def test_runs_in_parallel_with_the_model_and_upgrades(self, _isolated):
+        _isolated.resolve = self._slow_resolve("http://echallane.vip/pay")
+        legit = {"is_scam": False, "category": "legitimate", "confidence": 0.6, "risk_level": "low",
+                 "explanation_en": "ok", "explanation_hi": "ok", "red_flags": []}
+
+        def model(*args, **kwargs):
+            time.sleep(0.2)
+            return legit
+
+        t0 = time.monotonic()
+        with patch.object(function_app, "_classify_with_model", side_effect=model):
+            result = function_app.classify_message("Check your challan: bit.ly/chln")
+        assert time.monotonic() - t0 < 0.35
+        assert result["tier"] == "lookalike" and result["is_scam"]
+        assert "short link leads to echallane.vip" in result["red_flags"]
+        assert result["links"][0]["final"] == "http://echallane.vip/pay"
+        assert metrics.counter("classify.shortlink_upgrades") == 1
+
+        # The destination's verdict is cached: the next message is answered without the model.
+        with patch.object(function_app, "_classify_with_model") as again:
+            cached = function_app.classify_message("Final notice bit.ly/chln")
+        again.assert_not_called()
+        assert cached["tier"] in ("lookalike", "shortlink")
+
+    def test_scam_verdict_does_not_wait(self, _isolated):
+        _isolated.resolve = self._slow_resolve("http://example.org/", delay=0.5)
+        scam = {"is_scam": True, "category": "kyc_freeze", "confidence": 0.9, "risk_level": "high",
+                "explanation_en": "x", "explanation_hi": "y", "red_flags": []}
+        t0 = time.monotonic()
+        with patch.object(function_app, "_classify_with_model", return_value=scam):
+            result = function_app.classify_message("KYC expired, update at bit.ly/kyc-x")
+        assert time.monotonic() - t0 < 0.3
+        assert result["category"] == "kyc_freeze" and result["links"] == []
@@ -0,0 +1,176 @@
+"""Tests for the Drain-style SMS template miner, template-keyed verdict caching and /api/templates."""
+
+import json
+import os
+import random
+import string
+from unittest.mock import MagicMock, patch
+
+import azure.functions as func
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics
+from fraudshield.cache import VerdictCache
+from fraudshield.template_miner import TemplateMiner, is_specific, mask_token
+
+KBC = [
+    "Badhai ho! Aapne KBC me Rs.25,000 jeete hain. Registration fee Rs.5000 bhejein.",
+    "Badhai ho! Aapne KBC me Rs.50,000 jeete hain. Registration fee Rs.10,000 bhejein.",
+    "Badhai ho! Aapne KBC me Rs.1,00,000 jeete hain. Processing fee Rs.9,999 bhejein.",
+]
+VERDICT = {"is_scam": True, "category": "lottery_scam", "confidence": 0.95, "risk_level": "high",
+           "explanation_en": "x", "explanation_hi": "y", "red_flags": []}
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    metrics.reset()
+
+
+class TestMiner:
+    @pytest.mark.parametrize("token,mask", [
+        ("rs.5,000", "<AMT>"), ("₹500/-", "<AMT>"), ("9876543210.", "<PHONE>"), ("pay.kbc@ybl", "<VPA>"),
+        ("https://x.in/a", "<URL>"), ("sbi-kyc.xyz", "<URL>"), ("otp:482913", "<NUM>"), ("bhejein.", "bhejein."),
+    ])
+    def test_mask_token(self, token, mask):
+        assert mask_token(token) == mask
+
+    def test_variants_collapse_to_one_template(self):
+        miner = TemplateMiner()
+        mined = [miner.mine(m) for m in KBC]
+        assert len({m.template_id for m in mined}) == 1 and len(miner) == 1
+        assert mined[-1].template == "badhai ho! aapne kbc me <AMT> jeete hain. <*> fee <AMT> bhejein."
+        assert mined[0].slots == ["Rs.25,000", "Rs.5000"]
+        assert mined[-1].slots == ["Rs.1,00,000", "Processing", "Rs.9,999"]
+        assert mined[-1].specific
+
+    def test_different_messages_get_different_templates(self):
+        miner = TemplateMiner()
+        a = miner.mine("Your OTP for login is 482913. Do not share it with anyone.")
+        b = miner.mine("Meeting moved to 4pm, see you at the cafe near the office.")
+        assert a.template_id != b.template_id
+        assert miner.mine("   ") is None
+
+    def test_loose_templates_are_not_specific(self):
+        assert not is_specific(["<*>", "<*>", "<NUM>"])
+        assert not is_specific(["pay", "<AMT>", "<*>", "<*>", "<*>"])
+        assert is_specific(["your", "otp", "is", "<NUM>"])
+
+    def test_statistics(self):
+        clock = Clock()
+        miner = TemplateMiner(clock=clock)
+        template_id = miner.mine(KBC[0]).template_id
+        clock.now += 60
+        miner.mine(KBC[1])
+        miner.mine("Your OTP for login is 482913. Do not share it with anyone.")
+        stats = miner.get(template_id)
+        assert (stats["count"], stats["first_seen"], stats["last_seen"]) == (2, clock.now - 60, clock.now)
+        assert [t["template_id"] for t in miner.top(1)] == [template_id]
+        assert len(miner.top(10, since=clock.now)) == 2
+        assert miner.get("missing") is None
+
+    def test_memory_is_bounded(self):
+        rng = random.Random(0)
+        miner = TemplateMiner(capacity=50, max_leaf=4)
+        for _ in range(2000):
+            miner.mine(" ".join("".join(rng.choices(string.ascii_lowercase, k=4)) for _ in range(rng.randint(3, 12))))
+        assert len(miner) <= 50
+        leaves = []
+
+        def walk(node):
+            if not node.children:
+                leaves.append(node)
+            for child in node.children.values():
+                walk(child)
+
+        walk(miner._root)
+        assert sum(len(leaf.templates) for leaf in leaves) == len(miner)
+        assert all(leaf.templates for leaf in leaves)
+        assert metrics.counter("template_miner.evictions") > 0
+
+
+class TestClassify:
+    @pytest.fixture(autouse=True)
+    def _isolated(self):
+        with patch.object(function_app, "_template_miner", TemplateMiner()), \
+                patch.object(function_app, "_template_verdicts", VerdictCache(name="template_cache")), \
+                patch.object(function_app, "_campaigns", None), \
+                patch.object(function_app, "_shortlinks", None), \
+                patch.object(function_app, "_distilled", None), \
+                patch.object(function_app, "_reputation", MagicMock(assess=MagicMock(return_value=[]))):
+            yield
+
+    def test_template_keys_the_verdict_cache(self):
+        with patch.object(function_app, "_classify_with_model", return_value=dict(VERDICT)) as model:
+            results = [function_app.classify_message(m) for m in KBC[:2]]
+        assert model.call_count == 1
+        assert len({r["template_id"] for r in results}) == 1
+        assert all(r["category"] == "lottery_scam" for r in results)
+        assert "tier" not in results[0] and results[1]["tier"] == "template"
+        assert metrics.counter("classify.template_cache_hits") == 1
+
+    def test_a_word_turned_wildcard_is_not_served_the_cached_verdict(self):
+        credited = "Your SBI account XX1234 has been credited with Rs.500 by NEFT today"
+        blocked = "Your SBI account XX1234 has been blocked, share OTP to reactivate today"
+        verdicts = [dict(VERDICT, is_scam=False, category="legitimate"), dict(VERDICT, category="kyc_freeze")]
+        with patch.object(function_app, "_classify_with_model", side_effect=verdicts) as model:
+            first, second = function_app.classify_message(credited), function_app.classify_message(blocked)
+        assert first["template_id"] == second["template_id"]
+        assert model.call_count == 2
+        assert second["category"] == "kyc_freeze"
+
+    def test_links_hidden_by_masks_are_part_of_the_key(self):
+        alert = "Rs.2,000 debited from A/c XX1234 on 05-Jun. Not you? Visit {} to report. -SBI"
+        verdicts = [dict(VERDICT, is_scam=False, category="legitimate"), dict(VERDICT, category="phishing_link")]
+        with patch.object(function_app, "_classify_with_model", side_effect=verdicts) as model:
+            function_app.classify_message(alert.format("https://onlinesbi.sbi"))
+            result = function_app.classify_message(alert.format("https://secure-refunds.in/kyc"))
+        assert model.call_count == 2
+        assert result["category"] == "phishing_link"
+        with patch.object(function_app, "_classify_with_model") as model:
+            assert function_app.classify_message(alert.format("https://onlinesbi.sbi"))["tier"] == "template"
+        model.assert_not_called()
+
+    def test_profiles_are_cached_separately(self):
+        with patch.object(function_app, "_classify_with_model", return_value=dict(VERDICT)) as model:
+            function_app.classify_message(KBC[0])
+            function_app.classify_message(KBC[1], prompt_variant="explain_hi")
+        assert model.call_count == 2
+
+    def test_loose_templates_fall_back_to_the_fingerprint(self):
+        with patch.object(function_app, "_classify_with_model", return_value=dict(VERDICT)) as model:
+            function_app.classify_message("Call 9876543210")
+            function_app.classify_message("Call 9123456780")
+            function_app.classify_message("Call 9123456780")
+        assert model.call_count == 2
+
+    def test_templates_endpoint(self):
+        with patch.object(function_app, "_classify_with_model", return_value=dict(VERDICT)):
+            template_id = function_app.classify_message(KBC[0])["template_id"]
+            function_app.classify_message(KBC[1])
+
+        def get(**params):
+            return function_app.message_templates(func.HttpRequest(method="GET", url="/api/templates",
+                                                                   params=params, body=b""))
+
+        resp = get(limit="5", window="1h")
+        body = json.loads(resp.get_body())
+        assert resp.status_code == 200 and body["total"] == 1
+        assert body["templates"][0]["template_id"] == template_id and body["templates"][0]["count"] == 2
+        assert json.loads(get(id=template_id).get_body())["count"] == 2
+        assert get(id="missing").status_code == 404
+        assert get(limit="many").status_code == 400
+        with patch.object(function_app, "_template_miner", None):
+            assert get().status_code == 503
@@ -0,0 +1,68 @@
+"""Tests for the per-category explanation and red-flag templates."""
+
+import pytest
+
+from fraudshield import templates
+from fraudshield.entities import extract_entities
+from fraudshield.prompting import CATEGORIES
+
+KYC = "URGENT: Your SBI KYC expired. Update now at http://sbi-kyc.xyz/u or call 9876543210"
+CASHBACK = "Google Pay cashback of Rs.1500 credited! Approve request from cashback@ybl to receive."
+
+
+@pytest.mark.parametrize("category", CATEGORIES)
+@pytest.mark.parametrize("language", templates.LANGUAGES)
+def test_every_category_renders_without_entities(category, language):
+    text = templates.explanation(category, "hello", language=language)
+    assert text and "{" not in text
+
+
+def test_slots_filled_from_entities():
+    text = templates.explanation("kyc_freeze", KYC)
+    assert "SBI never asks" in text
+    assert "sbi-kyc.xyz" in text and "9876543210" in text
+
+
+def test_falls_back_to_generic_sentence():
+    text = templates.explanation("kyc_freeze", "Your KYC expired, update today")
+    assert "Banks never ask" in text
+    assert "official bank website" not in text
+
+
+def test_hindi_and_hinglish_use_localised_names():
+    assert "एक्सिस बैंक" in templates.explanation("kyc_freeze", "Axis KYC pending", language="hi")
+    assert "Rs.1500" in templates.explanation("fake_cashback", CASHBACK, language="hinglish")
+
+
+def test_red_flags():
+    flags = templates.red_flags("kyc_freeze", KYC)
+    assert "uses the name of SBI" in flags
+    assert "link to sbi-kyc.xyz" in flags
+    assert "creates urgency" in flags
+    assert templates.red_flags("legitimate", KYC) == []
+
+
+def test_apply_keeps_reputation_explanation():
+    verdict = {"category": "fake_cashback", "is_scam": True, "tier": "reputation",
+               "explanation_en": "This UPI handle has 40 reports.", "explanation_hi": "40 रिपोर्ट।",
+               "red_flags": ["reported UPI handle cashback@ybl"]}
+    templates.apply(verdict, CASHBACK, extract_entities(CASHBACK))
+    assert verdict["explanation_en"] == "This UPI handle has 40 reports."
+    assert verdict["explanation_hinglish"]
+    assert verdict["red_flags"][-1] == "reported UPI handle cashback@ybl"
+    assert verdict["explanation_source"] == "template"
+
+
+def test_apply_replaces_generic_pattern_flags():
+    verdict = {"category": "kyc_freeze", "is_scam": True, "tier": "rules",
+               "red_flags": ["matches kyc freeze pattern", "link to sbi-kyc.xyz"]}
+    templates.apply(verdict, KYC)
+    assert "matches kyc freeze pattern" not in verdict["red_flags"]
+    assert verdict["red_flags"].count("link to sbi-kyc.xyz") == 1
+
+
+def test_eligible():
+    assert templates.eligible({"category": "kyc_freeze", "tier": "distilled"})
+    assert not templates.eligible({"category": "kyc_freeze", "confidence": 0.95})
+    assert templates.eligible({"category": "kyc_freeze", "confidence": 0.95}, "verdict")
+    assert not templates.eligible({"category": "kyc_freeze", "confidence": 0.5}, "verdict")
@@ -0,0 +1,141 @@
+"""Tests for the rolling minute/hour/day trend counters and /api/trends."""
+
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import azure.functions as func
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics
+from fraudshield.trends import LEVELS, Series, TrendStore
+
+T0 = 1_700_000_000 - 1_700_000_000 % 86400   # midnight UTC
+
+
+class Clock:
+    def __init__(self, now=T0):
+        self.now = float(now)
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def store(clock):
+    return TrendStore(clock=clock)
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    metrics.reset()
+
+
+class TestTrendStore:
+    def test_last_hour_by_category_and_state(self, store, clock):
+        store.add("digital_arrest", "Karnataka", "sms")
+        clock.now += 600
+        store.add("digital_arrest", "Karnataka", "whatsapp")
+        store.add("digital_arrest", "Maharashtra", "sms")
+        store.add("job_scam", "Karnataka", "sms")
+        result = store.query(3600, category="digital_arrest", state="karnataka")
+        assert result["total"] == 2
+        assert len(result["buckets"]) == 60
+        assert [b["count"] for b in result["buckets"] if b["count"]] == [1, 1]
+
+    def test_rollup_keeps_totals_across_resolutions(self, store, clock):
+        for minute in range(0, 180, 7):        # three hours of events, crossing hour boundaries
+            clock.now = T0 + minute * 60
+            store.add("kyc_freeze", "Delhi", "sms")
+        expected = len(range(0, 180, 7))
+        assert store.query(3 * 3600, "hour")["total"] == expected
+        assert store.query(86400, "day")["total"] == expected
+        hours = [b["count"] for b in store.query(3 * 3600, "hour")["buckets"]]
+        assert hours == [9, 9, 8]
+
+    def test_minutes_expire_but_hours_and_days_remain(self, store, clock):
+        store.add("lottery_scam", "Bihar", "sms", n=5)
+        clock.now += 5 * 3600
+        assert store.query(3 * 3600, "minute")["total"] == 0
+        assert store.query(6 * 3600, "hour")["total"] == 5
+        clock.now += 3 * 86400
+        assert store.query(7 * 86400, "day")["total"] == 5
+
+    def test_late_event_reaches_closed_buckets(self, store, clock):
+        store.add("job_scam", "Kerala", "sms")
+        clock.now += 2 * 3600
+        store.add("job_scam", "Kerala", "sms", ts=T0 + 30)
+        assert store.query(3 * 3600, "hour")["total"] == 2
+        assert store.query(86400, "day")["total"] == 2
+
+    def test_group_by(self, store):
+        for state in ("Karnataka", "Karnataka", "Delhi"):
+            store.add("digital_arrest", state, "sms")
+        result = store.query(3600, group_by="state")
+        assert result["groups"] == {"Karnataka": 2, "Delhi": 1}
+
+    def test_memory_is_fixed_per_key_and_keys_are_capped(self, clock):
+        store = TrendStore(max_keys=2, clock=clock)
+        for state in ("A", "B", "C", "D"):
+            store.add("job_scam", state, "sms")
+        assert len(store) == 3   # two keys plus the shared overflow key
+        assert store.query(3600, category="job_scam")["total"] == 4
+        assert metrics.counter("trends.key_overflow") == 2
+        series = Series()
+        assert [len(c) for c in series.counts] == [slots for _, _, slots in LEVELS]
+
+    def test_rejects_bad_arguments(self, store):
+        with pytest.raises(ValueError):
+            store.query(3600, "week")
+        with pytest.raises(ValueError):
+            store.query(3600, group_by="city")
+        with pytest.raises(ValueError):
+            store.query(3600, city="Delhi")
+
+    def test_snapshot_and_restore(self, store, clock, tmp_path):
+        store.add("phishing_link", "Assam", "email", n=3)
+        clock.now += 7200
+        path = str(tmp_path / "trends.json")
+        store.snapshot(path)
+        restored = TrendStore(clock=clock)
+        assert restored.restore(path) is True
+        assert restored.query(3 * 3600, "hour", state="assam") == store.query(3 * 3600, "hour", state="assam")
+
+    def test_restore_ignores_missing_or_corrupt_file(self, store, tmp_path):
+        assert store.restore(str(tmp_path / "missing.json")) is False
+        bad = tmp_path / "bad.json"
+        bad.write_text("{not json")
+        assert store.restore(str(bad)) is False
+
+
+class TestTrendsEndpoint:
+    def _get(self, **params):
+        return func.HttpRequest(method="GET", url="/api/trends", params=params, body=b"")
+
+    def test_query_and_event_hub_feed(self, tmp_path, clock):
+        event = MagicMock()
+        event.get_body.return_value = json.dumps({"is_scam": True, "category": "digital_arrest",
+                                                  "city": "Bengaluru", "source": "SMS"}).encode()
+        with patch.object(function_app, "_trends", TrendStore(clock=clock)), \
+             patch.object(function_app, "_reports", function_app.ReportAggregator()), \
+             patch.object(function_app, "_TRENDS_PATH", str(tmp_path / "t.json")):
+            function_app.ingest_fraud_events([event])
+            resp = function_app.trends(self._get(window="1h", category="digital_arrest", state="Karnataka",
+                                                 source="sms"))
+        body = json.loads(resp.get_body())
+        assert resp.status_code == 200
+        assert body["total"] == 1
+        assert body["filters"] == {"category": "digital_arrest", "state": "karnataka", "source": "sms"}
+
+    @pytest.mark.parametrize("params", [{"window": "abc"}, {"window": "-1h"}, {"resolution": "week"}])
+    def test_bad_parameters_are_400(self, params):
+        assert function_app.trends(self._get(**params)).status_code == 400
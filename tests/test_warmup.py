@@ -0,0 +1,102 @@
+"""Tests for cold-start warm-up and first-request latency tracking."""
+
+import json
+import os
+import threading
+from unittest.mock import MagicMock, patch
+
+import azure.functions as func
+import pytest
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com/")
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+
+import function_app
+from fraudshield import metrics
+from fraudshield.warmup import Warmup
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    metrics.reset()
+
+
+def _router():
+    router = MagicMock()
+    router.deployments = [MagicMock(name="d1"), MagicMock(name="d2")]
+    return router
+
+
+class TestWarmup:
+    def test_runs_steps_once(self):
+        router = _router()
+        warm = Warmup(lambda: router)
+        first = warm.run()
+        assert set(first) == {"imports", "clients", "tokenizer", "tls", "total"}
+        assert warm.run() is first
+        for deployment in router.deployments:
+            deployment.client.with_options.assert_called_once_with(timeout=5.0, max_retries=0)
+            deployment.client.with_options.return_value.models.list.assert_called_once_with()
+        assert metrics.gauge("warmup.done") is True
+
+    def test_concurrent_callers_share_one_run(self):
+        calls = []
+        router = _router()
+
+        def get_router():
+            calls.append(1)
+            return router
+
+        warm = Warmup(get_router, tls=False)
+        threads = [threading.Thread(target=warm.run) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+
+    def test_failing_step_does_not_abort(self):
+        def broken():
+            raise RuntimeError("no config")
+
+        warm = Warmup(broken, tls=False)
+        timings = warm.run()
+        assert "tokenizer" in timings
+        assert warm.done.is_set()
+
+    def test_extra_steps_run_after_the_built_in_ones(self):
+        extra = MagicMock()
+        timings = Warmup(_router, tls=False, extra=[("shortlinks", extra)]).run()
+        extra.assert_called_once_with()
+        assert list(timings) == ["imports", "clients", "tokenizer", "shortlinks", "total"]
+
+    def test_tls_errors_are_swallowed(self):
+        router = _router()
+        router.deployments[0].client.with_options.return_value.models.list.side_effect = OSError("unreachable")
+        Warmup(lambda: router).run()
+        router.deployments[1].client.with_options.return_value.models.list.assert_called_once_with()
+
+    def test_not_started_outside_functions_host(self):
+        assert "FUNCTIONS_WORKER_RUNTIME" not in os.environ
+        assert not any(t.name == "fraudshield-warmup" for t in threading.enumerate())
+
+
+class TestFirstRequestLatency:
+    def _classify(self):
+        req = func.HttpRequest(method="POST", url="/api/classify", body=json.dumps({"message": "hi"}).encode())
+        verdict = {"is_scam": False, "category": "legitimate", "confidence": 0.9, "risk_level": "low"}
+        with patch.object(function_app, "classify_message", return_value=dict(verdict)):
+            return function_app.classify(req)
+
+    def test_first_request_is_reported_separately(self):
+        with patch.object(function_app, "_first_request_pending", True):
+            self._classify()
+            self._classify()
+            self._classify()
+        assert metrics.gauge("cold_start.first_request_ms") is not None
+        assert metrics.gauge("cold_start.warm_before_first_request") is False
+        assert metrics.snapshot()["timings"]["classify.latency_ms"]["count"] == 2
+
+    def test_warmup_trigger_is_registered(self):
+        names = {f.get_function_name(): f for f in function_app.app.get_functions()}
+        assert [b.type for b in names["warmup"].get_bindings()] == ["warmupTrigger"]